@@ -0,0 +1,208 @@
+"""Turn alert keyspace events into "the visible alerts changed" signals.
+
+Every write to an alert key publishes a keyspace event, and a burst of them
+(a monitoring flap, the weather service rewriting its alerts) used to restart
+the widget rotation once per event. :class:`AlertTracker` keeps a fingerprint
+of every stored alert, i.e. what it displays, without its timestamp. It
+collects the keys that events touched and re-reads only those keys, in one
+MGET, once the events have been quiet for a debounce window. It reports a
+change only when a fingerprint appeared, disappeared or differs.
+
+Events caused by the clock's own writes, such as the delete of a
+``delete_after_display`` alert, are recorded in the tracker's
+:class:`OwnWrites`, which the code making them is given, and ignored, so a
+clock does not interrupt itself.
+
+The tracker also keeps an
+:class:`~led_kurokku.alert_scheduler.AlertScheduler` up to date with the
+stored alerts, which it re-reads anyway.
+"""
+
+import json
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Optional
+
+import redis.asyncio as redis
+
+if TYPE_CHECKING:
+    from .alert_scheduler import AlertScheduler
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ALERT_DEBOUNCE = 0.25  # Seconds without alert events before re-reading
+MAX_DEBOUNCE_FACTOR = 8  # A steady stream of events is still read this often
+OWN_WRITE_GRACE = 10.0  # Seconds an expected own event is waited for
+
+# Events that remove a key, so there is nothing to read
+REMOVAL_EVENTS = {"del", "expired", "evicted", "rename_from"}
+# Events that do not change a key's value
+IGNORED_EVENTS = {"expire", "persist"}
+
+
+class OwnWrites:
+    """Keyspace events a process expects from its own writes."""
+
+    def __init__(self):
+        self._expected: dict[tuple[str, str], float] = {}
+
+    def expect(self, key: str | bytes, event: str = "del") -> None:
+        """Record that this process is about to cause ``event`` on ``key``."""
+        self._expected[(_text(key), event)] = time.monotonic() + OWN_WRITE_GRACE
+
+    def consume(self, key: str, event: str) -> bool:
+        """Whether an event was expected; each expectation matches one event."""
+        deadline = self._expected.pop((key, event), None)
+        if len(self._expected) > 1024:
+            now = time.monotonic()
+            self._expected = {k: d for k, d in self._expected.items() if d > now}
+        return deadline is not None and deadline >= time.monotonic()
+
+
+def fingerprint(value: bytes | str | None) -> Any:
+    """What an alert displays: its stored JSON without the timestamp."""
+    if value is None:
+        return None
+    try:
+        alert = json.loads(value)
+    except ValueError:
+        return value
+    if isinstance(alert, dict):
+        alert.pop("timestamp", None)
+        return json.dumps(alert, sort_keys=True)
+    return value
+
+
+class AlertTracker:
+    """
+    Debounces alert keyspace events into changes of the visible alert set.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        key_prefix: str,
+        debounce: float = DEFAULT_ALERT_DEBOUNCE,
+        scheduler: Optional["AlertScheduler"] = None,
+        own_writes: Optional[OwnWrites] = None,
+    ):
+        """
+        Initialize the tracker.
+
+        :param redis_client: Client to read alerts with.
+        :param key_prefix: Prefix of alert keys, e.g. ``kurokku:alert``.
+        :param debounce: Seconds without events before they are processed.
+        :param scheduler: Optional scheduler given the alerts read.
+        :param own_writes: The clock's own writes, shared with the code that
+            deletes alerts; a new one by default.
+        """
+        self.redis_client = redis_client
+        self.key_prefix = key_prefix
+        self.debounce = debounce
+        self.scheduler = scheduler
+        self.own_writes = OwnWrites() if own_writes is None else own_writes
+        self.visible: dict[str, Any] = {}
+        self.events = 0  # Alert events received
+        self.reads = 0  # Alert keys read
+        self.changes = 0  # Changes of the visible set reported
+        self._dirty: dict[str, str] = {}
+        self._first_event: float | None = None
+        self._last_event = 0.0
+
+    async def load(self) -> None:
+        """Read every stored alert."""
+        keys = [key async for key in self.redis_client.scan_iter(f"{self.key_prefix}*")]
+        self.visible = {}
+        if keys:
+            values = await self.redis_client.mget(keys)
+            self.reads += len(keys)
+            for key, value in zip(keys, values):
+                if value is not None:
+                    self.visible[_text(key)] = fingerprint(value)
+                    if self.scheduler is not None:
+                        self.scheduler.update(_text(key), value, announce=False)
+        if self.scheduler is not None:
+            self.scheduler.loaded = True
+
+    def remember(self, key: str, value: bytes | str) -> None:
+        """Record an alert the process stored itself as visible."""
+        self.visible[key] = fingerprint(value)
+
+    def note(self, key: str, event: str) -> None:
+        """
+        Record a keyspace event on an alert key.
+
+        :param key: The key.
+        :param event: The event name, e.g. ``set`` or ``del``.
+        """
+        self.events += 1
+        if event in IGNORED_EVENTS:
+            return
+        if self.own_writes.consume(key, event):
+            # Track the change without reporting it
+            logger.debug(f"Ignoring own {event} of {key}")
+            if event in REMOVAL_EVENTS:
+                self.visible.pop(key, None)
+                self._dirty.pop(key, None)
+                if self.scheduler is not None:
+                    self.scheduler.remove(key)
+            return
+        self._dirty[key] = event
+        now = time.monotonic()
+        if self._first_event is None:
+            self._first_event = now
+        self._last_event = now
+
+    def timeout(self) -> float | None:
+        """Seconds until pending events are due, or None if there are none."""
+        if self._first_event is None:
+            return None
+        due = min(
+            self._last_event + self.debounce,
+            self._first_event + self.debounce * MAX_DEBOUNCE_FACTOR,
+        )
+        return max(0.0, due - time.monotonic())
+
+    async def flush(self) -> bool:
+        """
+        Process the pending events if they are due.
+
+        :return: Whether the visible alert set changed.
+        """
+        timeout = self.timeout()
+        if timeout is None or timeout > 0:
+            return False
+        dirty, self._dirty = self._dirty, {}
+        self._first_event = None
+
+        changed = False
+        to_read = [key for key, event in dirty.items() if event not in REMOVAL_EVENTS]
+        values = await self.redis_client.mget(to_read) if to_read else []
+        self.reads += len(to_read)
+        values = dict(zip(to_read, values))
+        scheduler = self.scheduler
+        for key in dirty:
+            value = values.get(key)
+            new = fingerprint(value)
+            if new is None:
+                changed |= self.visible.pop(key, None) is not None
+                if scheduler is not None:
+                    scheduler.remove(key)
+            elif self.visible.get(key) != new:
+                self.visible[key] = new
+                changed = True
+                if scheduler is not None:
+                    scheduler.update(key, value)
+            elif scheduler is not None:
+                scheduler.update(key, value, announce=False)  # e.g. a new timestamp
+        if changed:
+            self.changes += 1
+        logger.debug(
+            f"{len(dirty)} alert keys touched, {len(to_read)} read, "
+            f"visible alerts {'changed' if changed else 'unchanged'}"
+        )
+        return changed
+
+
+def _text(value: bytes | str) -> str:
+    return value.decode("utf-8", errors="ignore") if isinstance(value, bytes) else value
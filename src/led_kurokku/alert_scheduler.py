@@ -0,0 +1,269 @@
+"""Schedule alerts for the display, letting urgent ones preempt widgets.
+
+The :class:`~led_kurokku.alert_events.AlertTracker` feeds every stored alert
+into an :class:`AlertScheduler`, which keeps them in display order for the
+:class:`~led_kurokku.widgets.alert.AlertWidget`, so the widget neither scans
+Redis nor sorts on every pass. A new or changed alert at or above the preempt
+priority (a lower number is more important) goes on a heap and interrupts the
+current widget, which resumes where it left off once the alert was shown.
+Alerts below it wait for the alert widget's turn in the rotation.
+
+Priorities can be limited to times given as cron expressions, e.g. priority
+10 (heat advisories) to every tenth minute. Each expression is evaluated once
+per minute of the day, when the day starts, into :class:`TimeWindows`.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Optional
+
+import pycron
+import redis.asyncio as redis
+
+from .utils import clock
+
+if TYPE_CHECKING:
+    from .alert_events import OwnWrites
+    from .widgets.alert import AlertWidgetConfig, IndividualAlert
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREEMPT_PRIORITY = 1  # Alerts at this priority or lower interrupt widgets
+# Cron expressions of the times a priority is shown at
+DEFAULT_PRIORITY_RULES = {10: "*/10 * * * *"}
+
+MINUTES_PER_DAY = 24 * 60
+
+
+class TimeWindows:
+    """The minutes of a day a cron expression matches."""
+
+    def __init__(self, cron: str):
+        """
+        Initialize the windows.
+
+        :param cron: The cron expression.
+        """
+        self.cron = cron
+        self._day: Optional[date] = None
+        self._minutes = bytearray(MINUTES_PER_DAY)
+
+    def is_open(self, now: datetime) -> bool:
+        """Whether the expression matches the minute of ``now``."""
+        if now.date() != self._day:
+            self._compute(now)
+        return bool(self._minutes[now.hour * 60 + now.minute])
+
+    def _compute(self, now: datetime) -> None:
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        try:
+            self._minutes = bytearray(
+                pycron.is_now(self.cron, midnight + timedelta(minutes=minute))
+                for minute in range(MINUTES_PER_DAY)
+            )
+        except ValueError as e:
+            logger.error(f"Invalid cron expression '{self.cron}': {e}")
+            self._minutes = bytearray(MINUTES_PER_DAY)
+        self._day = now.date()
+
+
+class PriorityWindows:
+    """When alerts of each priority may be shown."""
+
+    def __init__(self, rules: Optional[dict[int, str]] = None):
+        """
+        Initialize the windows.
+
+        :param rules: Cron expression per priority; priorities without one
+            are always shown.
+        """
+        rules = DEFAULT_PRIORITY_RULES if rules is None else rules
+        self.windows = {priority: TimeWindows(cron) for priority, cron in rules.items()}
+
+    def is_open(self, priority: int, now: datetime) -> bool:
+        """Whether alerts of a priority may be shown at ``now``."""
+        windows = self.windows.get(priority)
+        return windows is None or windows.is_open(now)
+
+
+PRIORITY_WINDOWS = PriorityWindows()
+
+
+@dataclass(order=True)
+class ScheduledAlert:
+    """An alert waiting to preempt the display."""
+
+    priority: int
+    timestamp: str
+    sequence: int
+    alert: "IndividualAlert" = field(compare=False)
+    received: float = field(compare=False)  # time.monotonic() when scheduled
+    sent_at: Optional[float] = field(compare=False, default=None)  # Sender's epoch seconds
+
+    def latency(self) -> tuple[float, Optional[float]]:
+        """Seconds since scheduling and, if the sender gave ``sent_at``, since sending."""
+        since_sent = None if self.sent_at is None else time.time() - self.sent_at
+        return time.monotonic() - self.received, since_sent
+
+
+class AlertScheduler:
+    """
+    The stored alerts in display order, and a heap of those waiting to
+    preempt the current widget.
+    """
+
+    def __init__(
+        self,
+        preempt_priority: int = DEFAULT_PREEMPT_PRIORITY,
+        windows: Optional[PriorityWindows] = None,
+    ):
+        """
+        Initialize the scheduler.
+
+        :param preempt_priority: Alerts at this priority or lower (more
+            important) interrupt the current widget.
+        :param windows: When each priority may be shown, by default
+            :data:`DEFAULT_PRIORITY_RULES`.
+        """
+        self.preempt_priority = preempt_priority
+        self.windows = windows or PRIORITY_WINDOWS
+        self.preempt = asyncio.Event()  # Set while alerts wait to preempt
+        self.loaded = False  # Whether the stored alerts were loaded
+        self.alert_config: Optional["AlertWidgetConfig"] = None  # How preempting alerts scroll
+        self._alerts: dict[str, "IndividualAlert"] = {}
+        self._ordered: Optional[list["IndividualAlert"]] = None
+        self._urgent: list[ScheduledAlert] = []
+        self._sequence = itertools.count()
+
+    def update(self, key: str, value: bytes | str, announce: bool = True) -> None:
+        """
+        Add or replace a stored alert.
+
+        :param key: The alert's key.
+        :param value: Its stored JSON.
+        :param announce: Whether it is new or changed, so it may preempt.
+        """
+        from .widgets.alert import IndividualAlert
+
+        try:
+            alert = IndividualAlert(id=key, **json.loads(value))
+        except Exception as e:
+            logger.error(f"Error parsing alert {key}: {e}")
+            self.remove(key)
+            return
+        self._alerts[key] = alert
+        self._ordered = None
+        if announce and alert.priority <= self.preempt_priority:
+            self._schedule(alert)
+
+    def add(self, alert: "IndividualAlert", sent_at: Optional[float] = None) -> None:
+        """
+        Add an alert received directly, which preempts whatever its priority.
+
+        :param alert: The alert; its ID is its key.
+        :param sent_at: The sender's time in epoch seconds, to report latency.
+        """
+        self._alerts[alert.id] = alert
+        self._ordered = None
+        self._schedule(alert, sent_at)
+
+    def remove(self, key: str) -> None:
+        """Forget an alert that was deleted or expired."""
+        if self._alerts.pop(key, None) is not None:
+            self._ordered = None
+
+    def _schedule(self, alert: "IndividualAlert", sent_at: Optional[float] = None) -> None:
+        if not self.windows.is_open(alert.priority, clock.now()):
+            return
+        heapq.heappush(
+            self._urgent,
+            ScheduledAlert(
+                alert.priority,
+                alert.timestamp,
+                next(self._sequence),
+                alert,
+                time.monotonic(),
+                sent_at,
+            ),
+        )
+        self.preempt.set()
+
+    def alerts(self, now: Optional[datetime] = None) -> list["IndividualAlert"]:
+        """The alerts to show now, most important and then oldest first."""
+        if self._ordered is None:
+            self._ordered = sorted(
+                self._alerts.values(), key=lambda alert: (alert.priority, alert.timestamp)
+            )
+        now = now or clock.now()
+        is_open = self.windows.is_open
+        return [alert for alert in self._ordered if is_open(alert.priority, now)]
+
+    def pop_urgent(self) -> Optional[ScheduledAlert]:
+        """Take the next alert to preempt with, or None if there is none."""
+        entry = None
+        while self._urgent and entry is None:
+            entry = heapq.heappop(self._urgent)
+            # Skip alerts removed or replaced since they were scheduled
+            if self._alerts.get(entry.alert.id) is not entry.alert:
+                entry = None
+        if not self._urgent:
+            self.preempt.clear()
+        return entry
+
+    async def show_urgent(
+        self,
+        tm,
+        redis_client: redis.Redis,
+        config_event: asyncio.Event,
+        own_writes: Optional["OwnWrites"] = None,
+        write_client: Optional[redis.Redis] = None,
+    ) -> None:
+        """
+        Show the alerts waiting to preempt, most important first.
+
+        :param tm: The display.
+        :param redis_client: The display's Redis client.
+        :param config_event: Event that interrupts the alerts.
+        :param own_writes: Where deletes of ``delete_after_display`` alerts
+            are recorded.
+        :param write_client: Client those deletes go to, if not ``redis_client``.
+        """
+        from .widgets.alert import AlertWidget, AlertWidgetConfig
+
+        widget = AlertWidget(
+            tm,
+            redis_client,
+            config_event,
+            self.alert_config or AlertWidgetConfig(),
+            own_writes=own_writes,
+            scheduler=self,
+            write_client=write_client,
+        )
+        widget.preemptible = False  # Newer urgent alerts wait for this one
+        while not config_event.is_set() and (entry := self.pop_urgent()) is not None:
+            since_scheduled, since_sent = entry.latency()
+            logger.info(
+                f"Alert {entry.alert.id} preempted the display "
+                f"{since_scheduled * 1000:.1f} ms after scheduling"
+                + (f", {since_sent * 1000:.1f} ms after sending" if since_sent is not None else "")
+            )
+            await widget.show_alert(entry.alert)
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+
+async def wait_for_either(first: asyncio.Event, second: asyncio.Event, timeout: float) -> None:
+    """Wait until either event is set, or at most ``timeout`` seconds."""
+    waiters = [asyncio.ensure_future(first.wait()), asyncio.ensure_future(second.wait())]
+    try:
+        await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
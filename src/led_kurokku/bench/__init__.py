@@ -0,0 +1,34 @@
+"""Benchmark suite for LED-Kurokku.
+
+Measures display encoding, scroll rendering, driver output, websocket
+broadcast, Redis alert access and configuration validation. Run it with the
+``kurokku-bench`` entry point.
+"""
+
+from .runner import (
+    BENCHMARKS,
+    Benchmark,
+    BenchmarkResult,
+    BenchmarkSkipped,
+    Comparison,
+    benchmark,
+    compare_results,
+    load_results,
+    run_benchmark,
+    run_benchmarks,
+    save_results,
+)
+
+__all__ = [
+    "BENCHMARKS",
+    "Benchmark",
+    "BenchmarkResult",
+    "BenchmarkSkipped",
+    "Comparison",
+    "benchmark",
+    "compare_results",
+    "load_results",
+    "run_benchmark",
+    "run_benchmarks",
+    "save_results",
+]
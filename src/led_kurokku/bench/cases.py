@@ -0,0 +1,591 @@
+"""Benchmark definitions for rendering, drivers and Redis access paths.
+
+Each benchmark is a setup function registered with :func:`benchmark`. The setup
+returns the operation to time, optionally paired with a cleanup callable.
+"""
+
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+from ..display_factory import DisplayType
+from ..drivers.recording import RecordingDriver
+from ..ht16k33 import HT16K33
+from ..ht16k33.console import HT16K33ConsoleDriver
+from ..ht16k33.virtual import HT16K33VirtualDriver
+from ..ht16k33.websocket import HT16K33WebSocketDriver
+from ..models import ConfigSettings
+from ..tm1637 import TM1637
+from ..tm1637.base_driver import BaseDriver
+from ..tm1637.console import ConsoleDriver
+from ..tm1637.virtual import VirtualDriver
+from ..tm1637.websocket import WebSocketDriver
+from ..widgets.alert import AlertWidget, AlertWidgetConfig
+from ..widgets.message import MessageWidget, MessageWidgetConfig
+from .fakes import fake_hardware
+from .runner import BenchmarkSkipped, benchmark
+
+DISPLAYS = {DisplayType.TM1637: TM1637, DisplayType.HT16K33: HT16K33}
+
+SCROLL_MESSAGE = "THE QUICK BROWN FOX JUMPS OVER THE LAZY DOG 0123456789"
+
+WEBSOCKET_CLIENTS = 1000
+
+
+class NullDriver(BaseDriver):
+    """Driver that discards every frame, isolating encoding cost."""
+
+    def __init__(self):
+        super().__init__()
+        self._driver_name = "null"
+        self.frames = 0
+
+    def display(self, data: list[int], colon: bool = False) -> None:
+        self.frames += 1
+
+    def clear(self) -> None:
+        pass
+
+
+class _StopAfterDriver(NullDriver):
+    """Driver that sets an event once a given number of frames was shown."""
+
+    def __init__(self, event: asyncio.Event, limit: int):
+        super().__init__()
+        self.event = event
+        self.limit = limit
+
+    def display(self, data: list[int], colon: bool = False) -> None:
+        self.frames += 1
+        if self.frames >= self.limit:
+            self.event.set()
+
+
+def _frames_for(display_type: DisplayType) -> list[list[int]]:
+    segments = DISPLAYS[display_type].SEGMENTS
+    return [
+        [segments["1"], segments["2"], segments["3"], segments["4"]],
+        [segments["5"], segments["6"], segments["7"], segments["8"]],
+    ]
+
+
+def _alternating(driver: BaseDriver, frames: list[list[int]]):
+    state = {"i": 0}
+
+    def operation():
+        state["i"] ^= 1
+        driver.display(frames[state["i"]], colon=bool(state["i"]))
+
+    return operation
+
+
+def _register_render_benchmarks(display_type: DisplayType) -> None:
+    display_cls = DISPLAYS[display_type]
+
+    @benchmark(f"render.show_text.{display_type}", group="render")
+    def show_text():
+        """Encode a four character string with show_text."""
+        display = display_cls(driver=NullDriver())
+        return lambda: display.show_text("Ab9-")
+
+    @benchmark(f"render.show_time.{display_type}", group="render")
+    def show_time():
+        """Encode a time with show_time."""
+        display = display_cls(driver=NullDriver())
+        return lambda: display.show_time(12, 34, colon=True)
+
+    @benchmark(f"render.scroll.{display_type}", group="render")
+    def scroll():
+        """Scroll a long message once through interruptable_scrolled_display."""
+        event = asyncio.Event()
+        windows = len(SCROLL_MESSAGE) + display_cls.display_length + 1
+        driver = _StopAfterDriver(event, windows)
+        display = display_cls(driver=driver)
+        widget = MessageWidget(
+            display, None, event, MessageWidgetConfig(duration=0)
+        )
+
+        async def operation():
+            driver.frames = 0
+            event.clear()
+            await widget.interruptable_scrolled_display(
+                display.show_text,
+                SCROLL_MESSAGE,
+                scroll_speed=0,
+                repeat=False,
+                sleep_before_repeat=0,
+                duration=3600,
+            )
+
+        return operation
+
+
+def _register_driver_benchmarks(display_type: DisplayType) -> None:
+    frames = _frames_for(display_type)
+    if display_type == DisplayType.TM1637:
+        console_cls, virtual_cls, websocket_cls = (
+            ConsoleDriver,
+            VirtualDriver,
+            WebSocketDriver,
+        )
+    else:
+        console_cls, virtual_cls, websocket_cls = (
+            HT16K33ConsoleDriver,
+            HT16K33VirtualDriver,
+            HT16K33WebSocketDriver,
+        )
+
+    @benchmark(f"driver.led.{display_type}", group="driver")
+    def led():
+        """Hardware driver display() against a fake GPIO or smbus backend."""
+        with fake_hardware() as (tm1637_led, ht16k33_led):
+            if display_type == DisplayType.TM1637:
+                driver = tm1637_led.LedDriver()
+            else:
+                driver = ht16k33_led.HT16K33LedDriver()
+        return _alternating(driver, frames)
+
+    @benchmark(f"driver.console.{display_type}", group="driver")
+    def console():
+        """Console driver display()."""
+        return _alternating(console_cls(), frames)
+
+    @benchmark(f"driver.virtual.{display_type}", group="driver")
+    def virtual():
+        """Terminal driver display() with output sent to /dev/null."""
+        saved_stdout = sys.stdout
+        devnull = open(os.devnull, "w")
+        sys.stdout = devnull
+
+        def cleanup():
+            sys.stdout = saved_stdout
+            devnull.close()
+
+        return _alternating(virtual_cls(), frames), cleanup
+
+    @benchmark(f"driver.websocket.{display_type}", group="driver")
+    def websocket():
+        """WebSocket driver display() with no connected clients."""
+        return _alternating(websocket_cls(), frames)
+
+    @benchmark(f"driver.recording.{display_type}", group="driver")
+    def recording():
+        """Recording driver teeing into the null driver (ring file wraps)."""
+        tmp = tempfile.NamedTemporaryFile(suffix=".rec", delete=False)
+        tmp.close()
+        driver = RecordingDriver(tmp.name, NullDriver(), size=64 * 1024)
+
+        def cleanup():
+            driver.close()
+            os.unlink(tmp.name)
+
+        return _alternating(driver, frames), cleanup
+
+
+for _display_type in DisplayType:
+    _register_render_benchmarks(_display_type)
+    _register_driver_benchmarks(_display_type)
+
+
+def _register_broadcast_benchmark(binary: bool) -> None:
+    suffix = ".binary" if binary else ""
+
+    @benchmark(f"websocket.broadcast.{WEBSOCKET_CLIENTS}{suffix}", group="websocket")
+    def websocket_broadcast():
+        """Broadcast one frame to 1,000 client queues."""
+        driver = WebSocketDriver()
+        queues = [asyncio.Queue() for _ in range(WEBSOCKET_CLIENTS)]
+        for queue in queues:
+            driver.add_client(queue, binary=binary)
+        display = _alternating(driver, _frames_for(DisplayType.TM1637))
+
+        def operation():
+            display()
+            # Drain periodically so the queues stay small (amortized over 64 frames)
+            if queues[0].qsize() >= 64:
+                for queue in queues:
+                    queue._queue.clear()
+
+        return operation
+
+
+_register_broadcast_benchmark(binary=False)
+_register_broadcast_benchmark(binary=True)
+
+
+def _register_alert_benchmark(count: int) -> None:
+    @benchmark(f"redis.get_alerts.{count}", group="redis")
+    async def get_alerts():
+        """AlertWidget._get_alerts against fakeredis."""
+        if importlib.util.find_spec("fakeredis") is None:
+            raise BenchmarkSkipped("fakeredis is not installed")
+        from fakeredis import FakeAsyncRedis, FakeServer
+
+        client = FakeAsyncRedis(server=FakeServer())
+        payload = json.dumps(
+            {
+                "timestamp": datetime(2025, 1, 1).isoformat(),
+                "message": "SEVERE THUNDERSTORM WARNING",
+                "priority": 1,
+                "display_duration": 5.0,
+            }
+        )
+        async with client.pipeline(transaction=False) as pipe:
+            for i in range(count):
+                pipe.set(f"kurokku:alert:{i}", payload)
+            await pipe.execute()
+
+        widget = AlertWidget(
+            TM1637(driver=NullDriver()), client, asyncio.Event(), AlertWidgetConfig()
+        )
+
+        async def cleanup():
+            await client.flushall()
+            await client.aclose()
+
+        return widget._get_alerts, cleanup
+
+
+for _count in (10, 10_000):
+    _register_alert_benchmark(_count)
+
+
+@benchmark("alert.scheduler.10000", group="alert")
+def scheduler_alerts():
+    """AlertScheduler.alerts: the alert widget's pass over 10,000 ordered alerts."""
+    from ..alert_scheduler import AlertScheduler
+
+    scheduler = AlertScheduler()
+    for i in range(10_000):
+        payload = {
+            "timestamp": datetime(2025, 1, 1, 0, i % 60).isoformat(),
+            "message": "SEVERE THUNDERSTORM WARNING",
+            "priority": i % 11,
+        }
+        scheduler.update(f"kurokku:alert:{i}", json.dumps(payload), announce=False)
+    now = datetime(2025, 1, 1, 12, 5)
+
+    def operation():
+        scheduler.alerts(now)
+
+    return operation
+
+
+CLI_ALERTS = 10_000
+
+
+async def _seeded_alert_client(count: int):
+    if importlib.util.find_spec("fakeredis") is None:
+        raise BenchmarkSkipped("fakeredis is not installed")
+    from fakeredis import FakeAsyncRedis, FakeServer
+
+    client = FakeAsyncRedis(server=FakeServer())
+    payload = json.dumps(
+        {
+            "timestamp": datetime(2025, 1, 1).isoformat(),
+            "message": "SEVERE THUNDERSTORM WARNING",
+            "priority": 1,
+            "display_duration": 5.0,
+            "delete_after_display": False,
+        }
+    )
+
+    async def seed():
+        async with client.pipeline(transaction=False) as pipe:
+            for i in range(count):
+                pipe.set(f"kurokku:alert:{i}", payload)
+            await pipe.execute()
+
+    async def cleanup():
+        await client.flushall()
+        await client.aclose()
+
+    await seed()
+    return client, seed, cleanup
+
+
+@benchmark(f"redis.read_alerts.{CLI_ALERTS}", group="redis")
+async def read_alerts_bench():
+    """CLI read_alerts (pipelined SCAN and MGET batches) against fakeredis."""
+    from ..cli.utils.redis_helpers import read_alerts
+
+    client, _, cleanup = await _seeded_alert_client(CLI_ALERTS)
+
+    async def operation():
+        await read_alerts(client)
+
+    return operation, cleanup
+
+
+@benchmark(f"redis.delete_alerts.{CLI_ALERTS}", group="redis")
+async def delete_alerts_bench():
+    """CLI delete_alerts (pipelined SCAN and UNLINK batches), including reseeding."""
+    from ..cli.utils.redis_helpers import delete_alerts
+
+    client, seed, cleanup = await _seeded_alert_client(CLI_ALERTS)
+
+    async def operation():
+        await delete_alerts(client)
+        await seed()
+
+    return operation, cleanup
+
+
+class _FrameWatchDriver(NullDriver):
+    """Driver that sets an event when an expected frame is shown."""
+
+    def __init__(self):
+        super().__init__()
+        self.shown = asyncio.Event()
+        self.target: list[int] | None = None
+        self.last: list[int] | None = None
+
+    def expect(self, frame: list[int]) -> None:
+        self.target = frame
+        self.shown.clear()
+
+    def display(self, data: list[int], colon: bool = False) -> None:
+        self.frames += 1
+        self.last = list(data)
+        if self.last == self.target:
+            self.shown.set()
+
+
+def _text_frame(message: str) -> list[int]:
+    driver = _FrameWatchDriver()
+    TM1637(driver=driver).show_text(message)
+    return driver.last
+
+
+LATENCY_MESSAGES = ("A1", "B2")
+
+
+def _register_alert_latency_benchmark(direct: bool) -> None:
+    path = "direct" if direct else "keyspace"
+
+    @benchmark(f"alert.latency.{path}", group="alert")
+    async def alert_latency():
+        """Time from publishing (or storing) an alert to its first frame on a running clock."""
+        if importlib.util.find_spec("fakeredis") is None:
+            raise BenchmarkSkipped("fakeredis is not installed")
+        from fakeredis import FakeAsyncRedis, FakeServer
+
+        from ..alert_scheduler import AlertScheduler
+        from ..core import (
+            REDIS_CHANNEL_ALERT,
+            REDIS_KEY_CONFIG,
+            display_widgets,
+            event_listener,
+        )
+
+        client = FakeAsyncRedis(server=FakeServer())
+        config = {
+            "widgets": [
+                {"widget_type": "alert"},
+                {"widget_type": "message", "message": "IDLE", "duration": 3600},
+            ]
+        }
+        await client.set(REDIS_KEY_CONFIG, json.dumps(config))
+        frames = [_text_frame(message) for message in LATENCY_MESSAGES]
+        driver = _FrameWatchDriver()
+        queue: asyncio.Queue = asyncio.Queue()
+        config_event, stop_event = asyncio.Event(), asyncio.Event()
+        scheduler = AlertScheduler()
+        tasks = [
+            asyncio.create_task(
+                event_listener(client, queue, config_event, stop_event, scheduler=scheduler)
+            ),
+            asyncio.create_task(
+                display_widgets(
+                    client,
+                    queue,
+                    config_event,
+                    stop_event,
+                    driver_instance=driver,
+                    scheduler=scheduler,
+                )
+            ),
+        ]
+        while not driver.frames:
+            await asyncio.sleep(0.01)
+        state = {"i": 0}
+
+        async def operation():
+            # Alternate the message so every iteration is a visible change
+            state["i"] ^= 1
+            driver.expect(frames[state["i"]])
+            alert = {
+                "message": LATENCY_MESSAGES[state["i"]],
+                "display_duration": 0.001,
+            }
+            if direct:
+                alert["id"] = "bench"
+                await client.publish(REDIS_CHANNEL_ALERT, json.dumps(alert))
+            else:
+                alert["timestamp"] = datetime(2025, 1, 1).isoformat()
+                await client.set("kurokku:alert:bench", json.dumps(alert), ex=300)
+            await asyncio.wait_for(driver.shown.wait(), 5)
+
+        async def cleanup():
+            stop_event.set()
+            config_event.set()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await client.flushall()
+            await client.aclose()
+
+        return operation, cleanup
+
+
+_register_alert_latency_benchmark(direct=True)
+_register_alert_latency_benchmark(direct=False)
+
+
+def large_config(widget_count: int = 400) -> dict:
+    """Build a configuration dictionary with many widgets of every type."""
+    widgets = []
+    for i in range(widget_count):
+        kind = i % 4
+        if kind == 0:
+            widgets.append({"widget_type": "clock", "duration": 10})
+        elif kind == 1:
+            widgets.append({"widget_type": "alert", "scroll_speed": 0.2})
+        elif kind == 2:
+            widgets.append(
+                {
+                    "widget_type": "message",
+                    "message": f"MESSAGE {i}",
+                    "cron": "*/5 * * * *",
+                }
+            )
+        else:
+            widgets.append(
+                {
+                    "widget_type": "animation",
+                    "frames": [
+                        {"segments": [1 << (j % 7)] * 4, "duration": 0.1}
+                        for j in range(16)
+                    ],
+                }
+            )
+    return {
+        "widgets": widgets,
+        "brightness": {"begin": "07:00", "end": "21:00", "high": 7, "low": 1},
+    }
+
+
+@benchmark("config.validate.large", group="config")
+def config_validate():
+    """ConfigSettings validation of a 400 widget configuration."""
+    data = large_config()
+    return lambda: ConfigSettings.model_validate(data)
+
+
+async def _layered_config_client():
+    if importlib.util.find_spec("fakeredis") is None:
+        raise BenchmarkSkipped("fakeredis is not installed")
+    from fakeredis import FakeAsyncRedis, FakeServer
+
+    client = FakeAsyncRedis(server=FakeServer())
+    await client.set("kurokku:config:base", json.dumps(large_config()))
+    await client.set("kurokku:config:groups", json.dumps(["office"]))
+    await client.set("kurokku:config:group:office", json.dumps({"brightness": {"low": 0}}))
+    await client.set("kurokku:config", json.dumps({"brightness": {"high": 5}}))
+
+    async def cleanup():
+        await client.flushall()
+        await client.aclose()
+
+    return client, cleanup
+
+
+@benchmark("config.reload.full", group="config")
+async def config_reload_full():
+    """Re-read and decode a whole 400 widget configuration, as for an unlayered clock."""
+    client, cleanup = await _layered_config_client()
+    await client.set("kurokku:config", json.dumps(large_config()))
+
+    async def operation():
+        json.loads(await client.get("kurokku:config"))
+
+    return operation, cleanup
+
+
+@benchmark("config.layers.own_change", group="config")
+async def config_layers_own_change():
+    """Refresh a clock's own small layer over a cached 400 widget base layer."""
+    from ..config_layers import ConfigLayers
+
+    client, cleanup = await _layered_config_client()
+    layers = ConfigLayers(client, "kurokku:config")
+    await layers.load()
+
+    async def operation():
+        await layers.refresh("kurokku:config")
+
+    return operation, cleanup
+
+
+SHARED_REDIS_CLOCKS = 500
+
+
+def _register_shared_redis_benchmark(namespaced: bool) -> None:
+    layout = "namespaced" if namespaced else "unnamespaced"
+
+    @benchmark(f"redis.shared.{layout}.{SHARED_REDIS_CLOCKS}", group="redis")
+    async def shared_redis():
+        """An alert for each of 500 clocks sharing a Redis, and the keyspace events delivered.
+
+        Namespaced, each clock receives the event of its own alert; without
+        namespaces, every clock receives all 500.
+        """
+        if importlib.util.find_spec("fakeredis") is None:
+            raise BenchmarkSkipped("fakeredis is not installed")
+        from fakeredis import FakeAsyncRedis, FakeServer
+
+        from ..core import event_patterns
+        from ..namespace import DEFAULT_NAMESPACE, KeyNamespace
+
+        server = FakeServer()
+        client = FakeAsyncRedis(server=server)
+        await client.config_set("notify-keyspace-events", "KEA")
+        clocks = [
+            KeyNamespace(f"clock-{i}") if namespaced else DEFAULT_NAMESPACE
+            for i in range(SHARED_REDIS_CLOCKS)
+        ]
+        pubsubs = []
+        for keys in clocks:
+            pubsub = FakeAsyncRedis(server=server).pubsub()
+            channel_pattern, keyspace_patterns = event_patterns(keys)
+            await pubsub.psubscribe(channel_pattern, *keyspace_patterns)
+            # Their confirmations, so only events are left to read
+            for _ in range(1 + len(keyspace_patterns)):
+                await pubsub.get_message(timeout=1)
+            pubsubs.append(pubsub)
+        value = json.dumps({"timestamp": "2025-01-01T00:00:00", "message": "STORM"})
+
+        async def operation():
+            pipe = client.pipeline(transaction=False)
+            for i, keys in enumerate(clocks):
+                pipe.set(keys.alert_key(str(i)), value)
+            await pipe.execute()
+            for pubsub in pubsubs:
+                while await pubsub.get_message(timeout=0) is not None:
+                    pass
+
+        async def cleanup():
+            for pubsub in pubsubs:
+                await pubsub.aclose()
+            await client.flushall()
+            await client.aclose()
+
+        return operation, cleanup
+
+
+for _namespaced in (True, False):
+    _register_shared_redis_benchmark(_namespaced)
@@ -0,0 +1,111 @@
+"""Per-clock memory cost of hosting many virtual clocks in one process.
+
+Starts N virtual clocks against an in-memory Redis (``fakeredis``), lets
+their widget rotations run, and reports the Python heap traced by
+``tracemalloc`` per clock. Socket buffers of real Redis connections are not
+included; each clock holds one pub/sub connection of its own.
+"""
+
+import asyncio
+import gc
+import importlib.util
+import json
+import tracemalloc
+
+import click
+
+from ..web_clocks import ClockHost, VirtualClock
+
+CLOCK_CONFIG = {
+    "widgets": [
+        {"widget_type": "clock", "duration": 10, "format_24h": True},
+        {"widget_type": "message", "duration": 2, "message": "HELLO"},
+    ]
+}
+
+
+async def _measure(count: int, display_type: str, settle: float) -> dict:
+    from fakeredis import FakeAsyncRedis, FakeServer
+
+    server = FakeServer()
+    # One pub/sub connection per clock plus a few for commands
+    redis_client = FakeAsyncRedis(server=server, max_connections=count + 16)
+    await redis_client.set("kurokku:config", json.dumps(CLOCK_CONFIG))
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+
+    host = ClockHost()
+    for i in range(count):
+        # Clocks on one endpoint share a client and its connection pool
+        host.add_clock(VirtualClock(f"clock-{i}", redis_client, display_type))
+    task = asyncio.create_task(host.run_clocks())
+    await asyncio.sleep(settle)
+
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "lineno")
+    allocated = sum(stat.size_diff for stat in stats)
+    top = [
+        (
+            f"{stat.traceback[0].filename.rsplit('/', 1)[-1]}:{stat.traceback[0].lineno}",
+            stat.size_diff,
+        )
+        for stat in stats[:8]
+    ]
+    frames = sum(clock.hub.version for clock in host.clocks.values())
+    running = sum(clock.running for clock in host.clocks.values())
+
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await redis_client.aclose()
+    return {
+        "clocks": count,
+        "running": running,
+        "frames": frames,
+        "bytes_total": allocated,
+        "bytes_per_clock": allocated / count,
+        "top": top,
+    }
+
+
+def measure_clock_memory(
+    count: int = 100, display_type: str = "tm1637", settle: float = 2.0
+) -> dict:
+    """
+    Measure the heap each hosted clock costs once its rotation is running.
+
+    :param count: Number of clocks to host.
+    :param display_type: Hardware display type ("tm1637" or "ht16k33").
+    :param settle: Seconds to let the clocks run before measuring.
+    :return: Totals, the per-clock average and the largest allocating files.
+    """
+    if importlib.util.find_spec("fakeredis") is None:
+        raise click.ClickException("fakeredis is not installed (pip install led-kurokku[bench])")
+    return asyncio.run(_measure(count, display_type, settle))
+
+
+@click.command()
+@click.option("--clocks", "count", type=int, default=100, help="Number of clocks to host")
+@click.option(
+    "--display-type",
+    type=click.Choice(["tm1637", "ht16k33"], case_sensitive=False),
+    default="tm1637",
+)
+@click.option("--settle", type=float, default=2.0, help="Seconds to run before measuring")
+def main(count, display_type, settle):
+    """Measure the memory cost of each clock hosted by web-kurokku --clocks."""
+    result = measure_clock_memory(count, display_type, settle)
+    click.echo(f"Clocks running:   {result['running']}/{result['clocks']}")
+    click.echo(f"Frames rendered:  {result['frames']}")
+    click.echo(f"Heap total:       {result['bytes_total'] / 1024:.0f} KiB")
+    click.echo(f"Heap per clock:   {result['bytes_per_clock'] / 1024:.1f} KiB")
+    click.echo("Largest allocations by line:")
+    for filename, size in result["top"]:
+        click.echo(f"  {filename:<40} {size / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Fake hardware backends for benchmarking the hardware drivers.
+
+``LedDriver`` imports ``RPi.GPIO`` and ``HT16K33LedDriver`` imports ``smbus2``
+at module import time, so the fakes are installed into ``sys.modules`` before
+those driver modules are imported and removed again afterwards.
+"""
+
+import contextlib
+import importlib
+import sys
+import types
+
+
+class FakeGPIO(types.ModuleType):
+    """
+    Minimal stand-in for the ``RPi.GPIO`` module.
+
+    Records the number of pin writes so benchmarks can sanity check that the
+    driver actually did some work.
+    """
+
+    BCM = 11
+    OUT = 0
+    IN = 1
+    HIGH = 1
+    LOW = 0
+    PUD_UP = 22
+
+    def __init__(self):
+        super().__init__("RPi.GPIO")
+        self.writes = 0
+
+    def setwarnings(self, flag):
+        pass
+
+    def setmode(self, mode):
+        pass
+
+    def setup(self, pin, mode, pull_up_down=None):
+        pass
+
+    def cleanup(self, pins=None):
+        pass
+
+    def output(self, pin, value):
+        self.writes += 1
+
+    def input(self, pin):
+        # Always acknowledge immediately
+        return self.LOW
+
+
+class FakeSMBus:
+    """
+    Minimal stand-in for ``smbus2.SMBus``.
+
+    Keeps a copy of the display RAM so the writes are observable.
+    """
+
+    def __init__(self, bus=None):
+        self.bus = bus
+        self.ram = [0] * 16
+        self.writes = 0
+
+    def write_byte(self, address, value):
+        self.writes += 1
+
+    def write_i2c_block_data(self, address, register, data):
+        self.ram[register : register + len(data)] = data
+        self.writes += 1
+
+    def close(self):
+        pass
+
+
+_DRIVER_MODULES = ("led_kurokku.tm1637.led", "led_kurokku.ht16k33.led")
+
+
+@contextlib.contextmanager
+def fake_hardware():
+    """
+    Install fake ``RPi.GPIO`` and ``smbus2`` modules for the duration of the block.
+
+    Yields a tuple of the imported ``(tm1637.led, ht16k33.led)`` driver modules
+    bound to the fakes.
+    """
+    saved = {
+        name: sys.modules.get(name)
+        for name in ("RPi", "RPi.GPIO", "smbus2", *_DRIVER_MODULES)
+    }
+    gpio = FakeGPIO()
+    rpi = types.ModuleType("RPi")
+    rpi.GPIO = gpio
+    smbus2 = types.ModuleType("smbus2")
+    smbus2.SMBus = FakeSMBus
+
+    sys.modules["RPi"] = rpi
+    sys.modules["RPi.GPIO"] = gpio
+    sys.modules["smbus2"] = smbus2
+    for name in _DRIVER_MODULES:
+        sys.modules.pop(name, None)
+    try:
+        tm1637_led = importlib.import_module("led_kurokku.tm1637.led")
+        ht16k33_led = importlib.import_module("led_kurokku.ht16k33.led")
+        yield tm1637_led, ht16k33_led
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
@@ -0,0 +1,333 @@
+"""Websocket load test for the web display.
+
+Starts a web server in a separate process, connects thousands of local
+websocket viewers from one or more client processes and publishes frames at
+a fixed rate. Reports what the display path costs per frame, how far the
+server's event loop lagged, and whether every viewer ended on the final
+frame.
+
+``--mode hub`` uses the web server's latest-state-wins broadcast hub;
+``--mode queue`` replays the previous design (a bounded queue and a sender
+task per viewer fed from the display path) for comparison. ``--mode workers``
+publishes to a frame buffer followed by ``--workers`` processes sharing the
+port, as ``web-kurokku --workers`` does; compare it against ``hub`` on a
+machine with several cores.
+"""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import resource
+import statistics
+import time
+
+import aiohttp
+import click
+from aiohttp import web
+
+from ..tm1637.websocket import WebSocketDriver
+from ..websocket_protocol import decode_frame
+
+logger = logging.getLogger(__name__)
+
+FINAL_FRAME = [0x7F, 0x7F, 0x7F, 0x7F]
+
+
+def _raise_fd_limit() -> None:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def _frame(i: int) -> list[int]:
+    return [i & 0x7F, (i >> 7) & 0x7F, 0x3F, 0x06]
+
+
+class _DropCounter(logging.Handler):
+    """Counts "queue full" warnings instead of printing thousands of them."""
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+
+def _queue_app(driver: WebSocketDriver) -> web.Application:
+    """The previous design: one bounded queue and sender task per viewer."""
+
+    async def handle(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        queue = asyncio.Queue(maxsize=10)
+        driver.add_client(queue, binary=request.query.get("proto") == "bin")
+
+        async def sender():
+            while True:
+                message = await queue.get()
+                if isinstance(message, bytes):
+                    await ws.send_bytes(message)
+                else:
+                    await ws.send_str(message)
+
+        task = asyncio.create_task(sender())
+        try:
+            async for _ in ws:
+                pass
+        finally:
+            task.cancel()
+            driver.remove_client(queue)
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/ws", handle)
+    return app
+
+
+async def _serve(
+    mode, port, clients, fps, duration, workers, connected_count, ready, done, results
+) -> None:
+    from ..web_server import WebServer
+
+    _raise_fd_limit()
+    drops = _DropCounter()
+    driver_logger = logging.getLogger("led_kurokku.tm1637.websocket")
+    driver_logger.addHandler(drops)
+    driver_logger.propagate = False
+
+    pool = runner = None
+    if mode == "workers":
+        from ..drivers.framebuffer import FrameBufferDriver
+        from ..web_workers import WorkerPool, worker_path
+
+        driver = FrameBufferDriver(worker_path())
+        pool = WorkerPool("127.0.0.1", port, driver.path, workers, log_level=logging.WARNING)
+        pool.start()
+        connected = lambda: connected_count.value  # noqa: E731
+    elif mode == "hub":
+        server = WebServer()
+        driver = server.tm1637_driver
+        runner = web.AppRunner(server.app)
+        connected = lambda: driver.hub.viewers  # noqa: E731
+    else:
+        driver = WebSocketDriver()
+        runner = web.AppRunner(_queue_app(driver))
+        connected = lambda: driver.client_count  # noqa: E731
+    if runner is not None:
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port, backlog=4096).start()
+    ready.set()
+
+    deadline = time.monotonic() + 120
+    while connected() < clients and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+    connected_clients = connected()
+
+    loop = asyncio.get_running_loop()
+    interval = 1 / fps
+    frames = int(duration * fps)
+    display_ns = []
+    lag = []
+    next_at = loop.time()
+    final_at = 0.0
+    for i in range(frames):
+        data = FINAL_FRAME if i == frames - 1 else _frame(i)
+        if i == frames - 1:
+            final_at = time.time()
+        start = time.perf_counter_ns()
+        driver.display(data, colon=bool(i & 1))
+        display_ns.append(time.perf_counter_ns() - start)
+        next_at += interval
+        await asyncio.sleep(max(0.0, next_at - loop.time()))
+        lag.append(max(0.0, loop.time() - next_at))
+
+    # Let the viewers drain, then report
+    await asyncio.sleep(3)
+    done.set()
+    results.put(
+        {
+            "role": "server",
+            "connected": connected_clients,
+            "frames": frames,
+            "display_us_mean": statistics.mean(display_ns) / 1000,
+            "display_us_max": max(display_ns) / 1000,
+            "lag_ms_max": max(lag) * 1000,
+            "dropped": drops.count,
+            "skipped": driver.hub.skipped if pool is None else None,
+            "final_at": final_at,
+        }
+    )
+    if pool is not None:
+        pool.stop()
+        driver.close(unlink=True)
+    else:
+        await runner.cleanup()
+
+
+async def _viewers(port, count, binary, connected_count, done, results) -> None:
+    _raise_fd_limit()
+    url = f"http://127.0.0.1:{port}/ws" + ("?proto=bin" if binary else "")
+    received = 0
+    received_bytes = 0
+    final = 0
+    final_seen = 0.0  # When the last viewer received the final frame
+    connector = aiohttp.TCPConnector(limit=0)
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+
+        async def viewer():
+            nonlocal received, received_bytes, final, final_seen
+            state = None
+            try:
+                async with session.ws_connect(url, max_msg_size=0) as ws:
+                    with connected_count.get_lock():
+                        connected_count.value += 1
+                    async for msg in ws:
+                        received += 1
+                        if msg.type == aiohttp.WSMsgType.BINARY:
+                            received_bytes += len(msg.data)
+                            state = decode_frame(msg.data, state)
+                        elif msg.type == aiohttp.WSMsgType.TEXT:
+                            received_bytes += len(msg.data)
+                            state = {"digits": json.loads(msg.data)["digits"]}
+                        if state and state["digits"] == FINAL_FRAME:
+                            final_seen = max(final_seen, time.time())
+            except (aiohttp.ClientError, asyncio.CancelledError):
+                pass
+            finally:
+                if state and state["digits"] == FINAL_FRAME:
+                    final += 1
+
+        tasks = []
+        for _ in range(count):
+            tasks.append(asyncio.create_task(viewer()))
+            await asyncio.sleep(0)
+        while not done.is_set():
+            await asyncio.sleep(0.2)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    results.put(
+        {
+            "role": "viewers",
+            "viewers": count,
+            "received": received,
+            "bytes": received_bytes,
+            "final": final,
+            "final_seen": final_seen,
+        }
+    )
+
+
+def _run_server(*args) -> None:
+    asyncio.run(_serve(*args))
+
+
+def _run_viewers(*args) -> None:
+    asyncio.run(_viewers(*args))
+
+
+def run_loadtest(
+    mode: str = "hub",
+    clients: int = 5000,
+    fps: float = 20.0,
+    duration: float = 10.0,
+    port: int = 18080,
+    binary: bool = True,
+    processes: int = 2,
+    workers: int = 2,
+) -> dict:
+    """
+    Run a load test and return the combined results.
+
+    :param mode: "hub", "queue" or "workers".
+    :param clients: Total number of websocket viewers.
+    :param fps: Frames published per second.
+    :param duration: Seconds of publishing.
+    :param port: Local port for the server.
+    :param binary: Use the binary protocol.
+    :param processes: Number of viewer processes.
+    :param workers: Number of server worker processes in "workers" mode.
+    :return: Server and aggregated viewer results.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    connected_count = ctx.Value("i", 0)
+    ready = ctx.Event()
+    done = ctx.Event()
+    server = ctx.Process(
+        target=_run_server,
+        args=(mode, port, clients, fps, duration, workers, connected_count, ready, done, results),
+    )
+    server.start()
+    ready.wait(30)
+
+    # Viewers stay connected until the server has published and drained
+    per_process = [clients // processes + (i < clients % processes) for i in range(processes)]
+    viewers = [
+        ctx.Process(
+            target=_run_viewers, args=(port, n, binary, connected_count, done, results)
+        )
+        for n in per_process
+    ]
+    for process in viewers:
+        process.start()
+
+    combined = {"mode": mode, "binary": binary, "received": 0, "bytes": 0, "final": 0}
+    final_seen = 0.0
+    for _ in range(len(viewers) + 1):
+        result = results.get()
+        if result.pop("role") == "server":
+            combined.update(result)
+        else:
+            for key in ("received", "bytes", "final"):
+                combined[key] += result[key]
+            final_seen = max(final_seen, result["final_seen"])
+    for process in [server, *viewers]:
+        process.join()
+    # How long until every viewer showed the final frame
+    combined["final_ms"] = max(0.0, final_seen - combined.pop("final_at")) * 1000
+    return combined
+
+
+@click.command()
+@click.option(
+    "--mode", type=click.Choice(["hub", "queue", "workers", "both", "all"]), default="both"
+)
+@click.option("--clients", type=int, default=5000, help="Number of websocket viewers")
+@click.option("--fps", type=float, default=20.0, help="Frames published per second")
+@click.option("--duration", type=float, default=10.0, help="Seconds of publishing")
+@click.option("--port", type=int, default=18080, help="Local port for the server")
+@click.option("--json", "use_json", is_flag=True, default=False, help="Use JSON messages")
+@click.option("--processes", type=int, default=2, help="Viewer processes")
+@click.option("--workers", type=int, default=2, help="Server processes in workers mode")
+def main(mode, clients, fps, duration, port, use_json, processes, workers):
+    """Load test the websocket fan-out with thousands of local viewers."""
+    modes = {"both": ["queue", "hub"], "all": ["queue", "hub", "workers"]}.get(mode, [mode])
+    for current in modes:
+        click.echo(f"Running {current} mode with {clients} viewers at {fps:g} fps...")
+        result = run_loadtest(
+            current, clients, fps, duration, port, not use_json, processes, workers
+        )
+        click.echo(f"  connected viewers:     {result['connected']}")
+        click.echo(
+            f"  display path:          {result['display_us_mean']:.1f} us mean, "
+            f"{result['display_us_max']:.1f} us max"
+        )
+        click.echo(f"  server loop lag:       {result['lag_ms_max']:.1f} ms max")
+        click.echo(f"  frames dropped (full): {result['dropped']}")
+        if result["skipped"] is not None:
+            click.echo(f"  frames coalesced:      {result['skipped']}")
+        click.echo(
+            f"  messages received:     {result['received']} "
+            f"({result['bytes'] / 1024:.0f} KiB)"
+        )
+        click.echo(f"  viewers on final frame: {result['final']}/{clients}")
+        click.echo(f"  final frame everywhere: {result['final_ms']:.0f} ms after publishing")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import logging
+import sys
+
+import click
+
+from ..utils.logging import setup_logging
+from .runner import (
+    BENCHMARKS,
+    BenchmarkResult,
+    compare_results,
+    load_results,
+    run_benchmarks,
+    save_results,
+)
+
+
+def _format_ns(value: float) -> str:
+    """Format a duration in nanoseconds with a sensible unit."""
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+        if value >= scale:
+            return f"{value / scale:.2f} {unit}"
+    return f"{value:.0f} ns"
+
+
+def _print_result(result: BenchmarkResult) -> None:
+    click.echo(
+        f"  {result.name:<36} {_format_ns(result.median_ns):>12}"
+        f"  (min {_format_ns(result.min_ns)}, {result.iterations} iter x {result.rounds})"
+    )
+
+
+@click.command()
+@click.version_option()
+@click.option(
+    "--filter",
+    "-k",
+    "names",
+    multiple=True,
+    help="Only run benchmarks whose name contains this string (repeatable)",
+)
+@click.option("--output", "-o", type=click.Path(), help="Write results to a JSON file")
+@click.option(
+    "--baseline",
+    "-b",
+    type=click.Path(exists=True),
+    help="Compare against a stored baseline results file",
+)
+@click.option(
+    "--compare",
+    "compare_file",
+    type=click.Path(exists=True),
+    help="Compare an existing results file instead of running benchmarks",
+)
+@click.option(
+    "--threshold",
+    type=float,
+    default=0.2,
+    help="Slowdown fraction flagged as a regression (default: 0.2)",
+)
+@click.option("--rounds", type=int, default=5, help="Timed rounds per benchmark")
+@click.option(
+    "--min-time",
+    type=float,
+    default=0.1,
+    help="Minimum seconds per round (default: 0.1)",
+)
+@click.option("--list", "list_only", is_flag=True, help="List benchmarks and exit")
+@click.option("--debug", is_flag=True, default=False)
+def main(names, output, baseline, compare_file, threshold, rounds, min_time, list_only, debug):
+    """Run the LED-Kurokku benchmark suite."""
+    setup_logging(level=logging.DEBUG if debug else logging.WARNING)
+
+    if list_only:
+        from . import cases  # noqa: F401
+
+        for bench in BENCHMARKS.values():
+            click.echo(f"  {bench.name:<36} {bench.description}")
+        return
+
+    if compare_file:
+        results = load_results(compare_file)
+    else:
+        click.echo("Running benchmarks:")
+        results = run_benchmarks(
+            names=list(names),
+            rounds=rounds,
+            min_time=min_time,
+            on_result=_print_result,
+        )
+        for name, reason in results["skipped"].items():
+            click.echo(f"  {name:<36} skipped: {reason}")
+
+    if output:
+        save_results(results, output)
+        click.echo(f"Results written to '{output}'.")
+
+    if baseline:
+        comparisons = compare_results(load_results(baseline), results, threshold)
+        regressions = [c for c in comparisons if c.regression]
+        click.echo(f"Comparison against '{baseline}' (threshold {threshold:.0%}):")
+        for c in comparisons:
+            marker = "REGRESSION" if c.regression else ""
+            click.echo(
+                f"  {c.name:<36} {_format_ns(c.baseline_ns):>12} -> "
+                f"{_format_ns(c.current_ns):>12}  x{c.ratio:.2f} {marker}"
+            )
+        if regressions:
+            click.echo(f"{len(regressions)} benchmark(s) regressed.", err=True)
+            sys.exit(1)
+        click.echo("No regressions found.")
+
+
+if __name__ == "__main__":
+    main()
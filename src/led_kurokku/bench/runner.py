@@ -0,0 +1,248 @@
+"""Timing, result storage and baseline comparison for the benchmark suite."""
+
+import asyncio
+import inspect
+import json
+import logging
+import platform
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+RESULTS_VERSION = 1
+
+
+class BenchmarkSkipped(Exception):
+    """Raised by a benchmark setup function when it cannot run here."""
+
+
+@dataclass
+class Benchmark:
+    """
+    A registered benchmark.
+
+    ``setup`` is called once and returns the operation to time. The operation
+    may be a plain callable or a coroutine function. If ``setup`` returns a
+    tuple, the second item is a cleanup callable.
+    """
+
+    name: str
+    group: str
+    setup: Callable[[], Any]
+    description: str = ""
+
+
+@dataclass
+class BenchmarkResult:
+    """Timing statistics for a single benchmark, in nanoseconds per operation."""
+
+    name: str
+    group: str
+    iterations: int
+    rounds: int
+    min_ns: float
+    median_ns: float
+    mean_ns: float
+    stdev_ns: float
+
+
+@dataclass
+class Comparison:
+    """A benchmark compared against its baseline."""
+
+    name: str
+    baseline_ns: float
+    current_ns: float
+    ratio: float
+    regression: bool
+
+
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, group: str):
+    """Decorator registering a benchmark setup function."""
+
+    def decorator(func):
+        BENCHMARKS[name] = Benchmark(
+            name=name,
+            group=group,
+            setup=func,
+            description=(func.__doc__ or "").strip().splitlines()[0]
+            if func.__doc__
+            else "",
+        )
+        return func
+
+    return decorator
+
+
+def _time_sync(operation, iterations: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        operation()
+    return time.perf_counter_ns() - start
+
+
+async def _time_async(operation, iterations: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        await operation()
+    return time.perf_counter_ns() - start
+
+
+def _run_rounds(
+    operation, is_async: bool, rounds: int, min_time: float, loop
+) -> tuple[int, list[float]]:
+    def timed(iterations):
+        if is_async:
+            return loop.run_until_complete(_time_async(operation, iterations))
+        return _time_sync(operation, iterations)
+
+    # Calibrate so each round takes at least ``min_time`` seconds
+    iterations = 1
+    while True:
+        elapsed = timed(iterations)
+        if elapsed >= min_time * 1e9 or iterations >= 1_000_000:
+            break
+        iterations *= 10 if elapsed < min_time * 1e8 else 2
+
+    samples = [elapsed / iterations]
+    for _ in range(rounds - 1):
+        samples.append(timed(iterations) / iterations)
+    return iterations, samples
+
+
+def run_benchmark(bench: Benchmark, rounds: int = 5, min_time: float = 0.1) -> BenchmarkResult:
+    """
+    Run a single benchmark and return its statistics.
+
+    :param bench: The benchmark to run.
+    :param rounds: Number of timed rounds.
+    :param min_time: Minimum duration of each round in seconds.
+    :return: The benchmark result.
+    :raises BenchmarkSkipped: If the benchmark cannot run in this environment.
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    cleanup = None
+    try:
+        if inspect.iscoroutinefunction(bench.setup):
+            prepared = loop.run_until_complete(bench.setup())
+        else:
+            prepared = bench.setup()
+        if isinstance(prepared, tuple):
+            operation, cleanup = prepared
+        else:
+            operation = prepared
+        is_async = inspect.iscoroutinefunction(operation)
+        iterations, samples = _run_rounds(operation, is_async, rounds, min_time, loop)
+    finally:
+        if cleanup is not None:
+            result = cleanup()
+            if inspect.isawaitable(result):
+                loop.run_until_complete(result)
+        loop.close()
+        asyncio.set_event_loop(None)
+
+    return BenchmarkResult(
+        name=bench.name,
+        group=bench.group,
+        iterations=iterations,
+        rounds=rounds,
+        min_ns=min(samples),
+        median_ns=statistics.median(samples),
+        mean_ns=statistics.fmean(samples),
+        stdev_ns=statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    )
+
+
+def run_benchmarks(
+    names: list[str] | None = None,
+    rounds: int = 5,
+    min_time: float = 0.1,
+    on_result: Callable[[BenchmarkResult], None] | None = None,
+) -> dict[str, Any]:
+    """
+    Run the selected benchmarks and return a JSON-serializable results document.
+
+    :param names: Substrings selecting benchmarks by name (all if empty).
+    :param rounds: Number of timed rounds per benchmark.
+    :param min_time: Minimum duration of each round in seconds.
+    :param on_result: Optional callback invoked as each benchmark finishes.
+    :return: Results document with environment metadata.
+    """
+    # Importing the cases module registers the benchmarks
+    from . import cases  # noqa: F401
+
+    results = {}
+    skipped = {}
+    for bench in BENCHMARKS.values():
+        if names and not any(n in bench.name for n in names):
+            continue
+        try:
+            result = run_benchmark(bench, rounds=rounds, min_time=min_time)
+        except BenchmarkSkipped as e:
+            logger.warning(f"Skipping {bench.name}: {e}")
+            skipped[bench.name] = str(e)
+            continue
+        results[bench.name] = asdict(result)
+        if on_result:
+            on_result(result)
+
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def save_results(results: dict[str, Any], path: str) -> None:
+    """Write a results document to a JSON file."""
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def load_results(path: str) -> dict[str, Any]:
+    """Load a results document from a JSON file."""
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def compare_results(
+    baseline: dict[str, Any], current: dict[str, Any], threshold: float = 0.2
+) -> list[Comparison]:
+    """
+    Compare two results documents benchmark by benchmark.
+
+    A benchmark regresses when its median time exceeds the baseline median by
+    more than ``threshold`` (a fraction, so 0.2 means 20% slower).
+
+    :param baseline: The stored baseline results document.
+    :param current: The results document to check.
+    :param threshold: Allowed slowdown before flagging a regression.
+    :return: One comparison per benchmark present in both documents.
+    """
+    comparisons = []
+    for name, result in current.get("results", {}).items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        ratio = result["median_ns"] / base["median_ns"] if base["median_ns"] else 1.0
+        comparisons.append(
+            Comparison(
+                name=name,
+                baseline_ns=base["median_ns"],
+                current_ns=result["median_ns"],
+                ratio=ratio,
+                regression=ratio > 1.0 + threshold,
+            )
+        )
+    return comparisons
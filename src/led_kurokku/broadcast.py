@@ -0,0 +1,361 @@
+"""Latest-state-wins broadcast hub for websocket viewers.
+
+The display path only stores the newest frame and bumps a version counter,
+which is O(1) however many viewers are connected. Each viewer remembers the
+version it last sent; when it is ready to send again it picks up whatever is
+newest, skipping intermediate frames instead of queueing them. Messages are
+encoded lazily, at most once per version and protocol, and shared by every
+viewer.
+
+Binary viewers receive a delta when they are exactly one version behind and a
+keyframe otherwise (see :mod:`led_kurokku.websocket_protocol`). Server-Sent
+Events viewers receive the JSON message as an event whose ID is the version.
+
+A hub can keep a bounded history of recent frames. A binary viewer that
+reconnects with the version it last received is then replayed the frames it
+missed as deltas instead of starting over from a keyframe.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import deque
+from itertools import islice
+from typing import NamedTuple
+
+from .drivers.recording import FrameRecord
+from .websocket_protocol import SEQUENCE_MASK, encode_frame
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryEntry(NamedTuple):
+    version: int
+    time: float  # Seconds since the epoch
+    digits: list[int]
+    colon: bool
+    brightness: int
+
+
+class FrameHistory:
+    """
+    Bounded ring of the most recent frames, by count and by age.
+    """
+
+    def __init__(self, size: int = 1024, max_age: float = 300.0):
+        """
+        Initialize the history.
+
+        :param size: Maximum number of frames kept.
+        :param max_age: Seconds a frame is kept.
+        """
+        self.max_age = max_age
+        self._entries: deque[HistoryEntry] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def append(self, version: int, digits: list[int], colon: bool, brightness: int) -> None:
+        """Record a published frame."""
+        now = time.time()
+        entries = self._entries
+        entries.append(HistoryEntry(version, now, digits, colon, brightness))
+        while now - entries[0].time > self.max_age:
+            entries.popleft()
+
+    def _index(self, version: int) -> int | None:
+        if not self._entries:
+            return None
+        # Versions in the ring are consecutive
+        index = (version - self._entries[0].version) & SEQUENCE_MASK
+        return index if index < len(self._entries) else None
+
+    def replay(self, since: int, ht16k33: bool = False) -> list[bytes] | None:
+        """
+        Encode the frames after a version as a chain of binary deltas.
+
+        :param since: Version the viewer has.
+        :param ht16k33: Flag the frames as HT16K33 words.
+        :return: The deltas, oldest first, or None if ``since`` is no longer
+            (or was never) in the history.
+        """
+        index = self._index(since)
+        if index is None:
+            return None
+        previous = self._entries[index]
+        messages = []
+        for entry in islice(self._entries, index + 1, None):
+            messages.append(
+                encode_frame(
+                    entry.version,
+                    entry.digits,
+                    entry.colon,
+                    entry.brightness,
+                    previous=previous.digits,
+                    previous_brightness=previous.brightness,
+                    ht16k33=ht16k33,
+                )
+            )
+            previous = entry
+        return messages
+
+    def records(self, seconds: float | None = None) -> list[FrameRecord]:
+        """
+        The frames of the last ``seconds`` as recording records.
+
+        :param seconds: How far back to go; defaults to the whole history.
+        :return: Records, oldest first.
+        """
+        since = time.time() - seconds if seconds is not None else float("-inf")
+        records = []
+        brightness = None
+        for entry in self._entries:
+            if entry.time < since:
+                continue
+            # Frame records do not carry the brightness, changes are separate records
+            if entry.brightness != brightness:
+                brightness = entry.brightness
+                records.append(
+                    FrameRecord(entry.time, "brightness", entry.digits, entry.colon, brightness)
+                )
+            records.append(
+                FrameRecord(entry.time, "frame", entry.digits, entry.colon, entry.brightness)
+            )
+        return records
+
+    def versions(self) -> tuple[int, int] | None:
+        """First and last version in the history, or None when empty."""
+        if not self._entries:
+            return None
+        return self._entries[0].version, self._entries[-1].version
+
+
+class BroadcastHub:
+    """
+    Holds the latest frame and wakes waiting viewers when it changes.
+
+    Must be published to from the event loop thread.
+    """
+
+    def __init__(self, display_type: str | None = None, brightness: int = 2):
+        """
+        Initialize the hub.
+
+        :param display_type: Added to JSON messages and flagged in binary frames.
+        :param brightness: Initial brightness level (0-7).
+        """
+        self.display_type = display_type
+        self.version = 0
+        self.digits = [0, 0, 0, 0]
+        self.colon = False
+        self.brightness = brightness
+        self.viewers = 0
+        self.skipped = 0  # Frames coalesced away by slow viewers
+        self._previous_digits = self.digits
+        self._previous_brightness = brightness
+        self._json: str | None = None
+        self._json_body: bytes | None = None
+        self._event: bytes | None = None
+        self._keyframe: bytes | None = None
+        self._delta: bytes | None = None
+        self._waiter: asyncio.Future | None = None
+        self._wake_scheduled = False
+        self.history: FrameHistory | None = None
+
+    def keep_history(self, size: int = 1024, max_age: float = 300.0) -> FrameHistory:
+        """
+        Start keeping a history of recent frames for resuming viewers.
+
+        Before the first frame, the version counter also starts at a random
+        value, so a viewer resuming against a restarted server does not match
+        one of its versions by accident.
+
+        :param size: Maximum number of frames kept.
+        :param max_age: Seconds a frame is kept.
+        :return: The history.
+        """
+        if self.version == 0:
+            self.version = random.getrandbits(32) & SEQUENCE_MASK
+        self.history = FrameHistory(size, max_age)
+        self.history.append(self.version, self.digits, self.colon, self.brightness)
+        return self.history
+
+    def publish(self, digits: list[int], colon: bool, brightness: int) -> None:
+        """
+        Store a new frame and schedule a wake-up for waiting viewers.
+
+        :param digits: Segment words for each digit.
+        :param colon: Colon state.
+        :param brightness: Brightness level (0-7).
+        """
+        self._previous_digits = self.digits
+        self._previous_brightness = self.brightness
+        self.digits = digits
+        self.colon = colon
+        self.brightness = brightness
+        self.version = (self.version + 1) & SEQUENCE_MASK
+        self._json = self._json_body = self._event = None
+        self._keyframe = self._delta = None
+        if self.history is not None:
+            self.history.append(self.version, digits, colon, brightness)
+        self._notify()
+
+    def _notify(self) -> None:
+        # A single callback per loop iteration, however many frames or viewers
+        if self._waiter is not None and not self._wake_scheduled:
+            self._wake_scheduled = True
+            self._waiter.get_loop().call_soon(self._wake)
+
+    def _wake(self) -> None:
+        self._wake_scheduled = False
+        waiter, self._waiter = self._waiter, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def _wait(self) -> None:
+        if self._waiter is None:
+            self._waiter = asyncio.get_running_loop().create_future()
+        # Shielded so a cancelled viewer does not cancel everyone's waiter
+        await asyncio.shield(self._waiter)
+
+    def json_message(self) -> str:
+        """The current frame as a JSON message."""
+        if self._json is None:
+            update = {
+                "brightness": self.brightness,
+                "digits": self.digits,
+                "colon": self.colon,
+            }
+            if self.display_type:
+                update = {"display_type": self.display_type, **update}
+            self._json = json.dumps(update)
+        return self._json
+
+    def json_body(self) -> bytes:
+        """The current frame as an encoded JSON message, for HTTP responses."""
+        if self._json_body is None:
+            self._json_body = self.json_message().encode()
+        return self._json_body
+
+    def event_message(self) -> bytes:
+        """The current frame as a Server-Sent Event, with the version as its ID."""
+        if self._event is None:
+            self._event = f"id: {self.version}\ndata: {self.json_message()}\n\n".encode()
+        return self._event
+
+    def keyframe(self) -> bytes:
+        """The current frame as a binary keyframe."""
+        if self._keyframe is None:
+            self._keyframe = encode_frame(
+                self.version,
+                self.digits,
+                self.colon,
+                self.brightness,
+                ht16k33=self.display_type == "ht16k33",
+            )
+        return self._keyframe
+
+    def delta(self) -> bytes:
+        """The current frame as a binary delta from the previous version."""
+        if self._delta is None:
+            self._delta = encode_frame(
+                self.version,
+                self.digits,
+                self.colon,
+                self.brightness,
+                previous=self._previous_digits,
+                previous_brightness=self._previous_brightness,
+                ht16k33=self.display_type == "ht16k33",
+            )
+        return self._delta
+
+    def message(self, since: int | None, binary: bool, events: bool = False) -> str | bytes:
+        """
+        The message bringing a viewer from version ``since`` to the current one.
+
+        :param since: Version the viewer last received, or None for a new viewer.
+        :param binary: Whether the viewer uses the binary protocol.
+        :param events: Whether the viewer uses Server-Sent Events.
+        :return: The encoded message.
+        """
+        if events:
+            return self.event_message()
+        if not binary:
+            return self.json_message()
+        if since is not None and (since + 1) & SEQUENCE_MASK == self.version:
+            return self.delta()
+        return self.keyframe()
+
+    def subscribe(
+        self, binary: bool = False, since: int | None = None, events: bool = False
+    ) -> "Subscriber":
+        """
+        Register a viewer.
+
+        :param binary: Whether the viewer uses the binary protocol.
+        :param since: Version a reconnecting viewer last received. Binary
+            viewers are replayed the frames after it when they are still in the
+            history; other viewers skip the current frame if they have it.
+        :param events: Whether the viewer uses Server-Sent Events.
+        :return: The viewer's subscription; close it when the viewer leaves.
+        """
+        self.viewers += 1
+        subscriber = Subscriber(self, binary, events)
+        if not binary:
+            # Every JSON message holds the whole state
+            if since == self.version:
+                subscriber.version = since
+        elif since is not None and self.history is not None:
+            replay = self.history.replay(since, ht16k33=self.display_type == "ht16k33")
+            if replay is not None:
+                subscriber.version = self.version
+                subscriber._replay = deque(replay)
+        return subscriber
+
+
+class Subscriber:
+    """A viewer's single slot: the version it last received."""
+
+    def __init__(self, hub: BroadcastHub, binary: bool, events: bool = False):
+        self.hub = hub
+        self.binary = binary
+        self.events = events
+        self.version: int | None = None
+        self._replay: deque[bytes] | None = None
+        self._resync = False
+        self._closed = False
+
+    def resync(self) -> None:
+        """Send a full keyframe next, e.g. when the viewer detected a gap."""
+        self._resync = True
+        self.hub._notify()
+
+    async def next_message(self) -> str | bytes:
+        """
+        Wait until there is a newer frame than the last one returned.
+
+        :return: The message to send to the viewer.
+        """
+        if self._replay and not self._resync:
+            message = self._replay.popleft()
+            if not self._replay:
+                self._replay = None
+            return message
+        self._replay = None
+        hub = self.hub
+        while self.version == hub.version and not self._resync:
+            await hub._wait()
+        since = None if self._resync else self.version
+        self._resync = False
+        if since is not None:
+            hub.skipped += ((hub.version - since) & SEQUENCE_MASK) - 1
+        self.version = hub.version
+        return hub.message(since, self.binary, self.events)
+
+    def close(self) -> None:
+        """Unregister the viewer."""
+        if not self._closed:
+            self._closed = True
+            self.hub.viewers -= 1
@@ -5,5 +5,17 @@ from .config import config
 from .template import template
 from .alert import alert
 from .weather import weather
+from .simulate import simulate
+from .recording import recording
+from .command import command
 
-__all__ = ["instances", "config", "template", "alert", "weather"]
+__all__ = [
+    "instances",
+    "config",
+    "template",
+    "alert",
+    "weather",
+    "simulate",
+    "recording",
+    "command",
+]
@@ -2,11 +2,44 @@
 CLI commands for managing LED-Kurokku alerts.
 """
 
+import asyncio
+import sys
+import time
+
 import click
-from typing import Optional
+from typing import IO, Optional
 
 from ..models.instance import load_registry
-from ..utils.redis_helpers import run_async, send_alert, list_alerts, clear_alerts
+from ..utils.alert_import import DEFAULT_FLUSH_INTERVAL, import_alerts
+from ..utils.fleet import (
+    echo_header,
+    echo_row,
+    echo_summary,
+    fleet_options,
+    is_fleet,
+    run_fleet_command,
+    select_instances,
+    table_width,
+)
+from ..utils.redis_helpers import (
+    run_async,
+    send_alert,
+    list_alerts,
+    clear_alerts,
+    make_alert,
+    deliver_alert,
+    read_alerts,
+    delete_alerts,
+    DEFAULT_BATCH_SIZE,
+)
+
+batch_size_option = click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=DEFAULT_BATCH_SIZE,
+    show_default=True,
+    help="Alert keys per Redis round trip",
+)
 
 
 @click.group()
@@ -16,7 +49,9 @@ def alert():
 
 
 @alert.command("send")
-@click.option("--clock", "-c", required=True, help="Instance name")
+@click.option(
+    "--clock", "-c", "clocks", multiple=True, help="Instance name or glob pattern (repeatable)"
+)
 @click.argument("message")
 @click.option(
     "--ttl", "-t", type=int, default=300, help="Time to live in seconds (default: 300)"
@@ -36,12 +71,46 @@ def alert():
     default=False,
     help="Delete alert after displaying once (default: False, alert repeats until TTL expires)",
 )
+@click.option(
+    "--direct",
+    is_flag=True,
+    default=False,
+    help="Publish the alert for the clock to show at once and store itself "
+    "(stored as usual when no clock is listening)",
+)
+@fleet_options
 def send_alert_command(
-    clock: str, message: str, ttl: int, duration: Optional[float], priority: int, delete_after_display: bool
+    clocks: tuple[str, ...],
+    message: str,
+    ttl: int,
+    duration: Optional[float],
+    priority: int,
+    delete_after_display: bool,
+    direct: bool,
+    all_instances: bool,
+    groups: tuple[str, ...],
+    parallel: int,
+    timeout: float,
 ):
-    """Send an alert to an instance."""
+    """Send an alert to one or more instances."""
     registry = load_registry()
 
+    if is_fleet(clocks, groups, all_instances):
+        instances = select_instances(registry, clocks, groups, all_instances)
+        # One alert, with the same ID on every instance
+        alert_item = make_alert(message, duration, priority, delete_after_display)
+
+        async def send(client, instance):
+            return await deliver_alert(
+                client, alert_item, ttl, direct, instance.key_namespace()
+            )
+
+        run_fleet_command(
+            instances, send, lambda how: f"{how} {alert_item.id}", parallel, timeout
+        )
+        return
+
+    clock = clocks[0]
     instance = registry.get_instance(clock)
     if not instance:
         click.echo(f"No instance found with name '{clock}'.")
@@ -51,26 +120,199 @@ def send_alert_command(
     display_duration = duration if duration is not None else None
 
     # Send the alert
-    success = run_async(send_alert(instance, message, ttl, display_duration, priority, delete_after_display))
+    success = run_async(
+        send_alert(instance, message, ttl, display_duration, priority, delete_after_display, direct)
+    )
     if success:
         click.echo(f"Alert sent to '{clock}'.")
     else:
         click.echo(f"Failed to send alert to '{clock}'.")
 
 
+@alert.command("import")
+@click.argument("instance_names", nargs=-1)
+@click.option(
+    "--input",
+    "-i",
+    "input_file",
+    type=click.File("rb"),
+    default="-",
+    help="NDJSON file to read, one alert per line (default: stdin)",
+)
+@click.option(
+    "--ttl", "-t", type=click.IntRange(min=1), default=300, help="TTL of alerts without a ttl field"
+)
+@batch_size_option
+@click.option(
+    "--flush-interval",
+    type=click.FloatRange(min=0, min_open=True),
+    default=DEFAULT_FLUSH_INTERVAL,
+    show_default=True,
+    help="Seconds to wait for more input before writing a partial batch",
+)
+@fleet_options
+def import_instance_alerts(
+    instance_names: tuple[str, ...],
+    input_file: IO,
+    ttl: int,
+    batch_size: int,
+    flush_interval: float,
+    all_instances: bool,
+    groups: tuple[str, ...],
+    parallel: int,
+    timeout: float,
+):
+    """
+    Import alerts from NDJSON into one or more instances.
+
+    Each line is a JSON object with a message and optionally an id,
+    timestamp, priority, display_duration, delete_after_display and ttl.
+    """
+    registry = load_registry()
+    instances = select_instances(registry, instance_names, groups, all_instances)
+
+    def reject(line: int, error: str) -> None:
+        click.echo(f"Line {line}: {error}", err=True)
+
+    started = time.perf_counter()
+    stats = asyncio.run(
+        import_alerts(
+            instances,
+            input_file,
+            default_ttl=ttl,
+            batch_size=batch_size,
+            parallel=parallel,
+            timeout=timeout,
+            flush_interval=flush_interval,
+            on_reject=reject,
+        )
+    )
+    elapsed = time.perf_counter() - started
+
+    width = table_width(instances)
+    echo_header(width)
+    for result in stats.results:
+        echo_row(result, width, f"{result.value} alerts" if result.ok else result.error)
+    echo_summary(stats.results, elapsed)
+    click.echo(
+        f"{stats.alerts} alerts imported from {stats.lines} lines, {stats.rejected} rejected"
+    )
+    if stats.rejected or any(not result.ok for result in stats.results):
+        sys.exit(1)
+
+
+@alert.command("gateway")
+@click.argument("instance_names", nargs=-1)
+@click.option("--host", default="127.0.0.1", show_default=True, help="HTTP host address")
+@click.option("--port", type=int, default=8090, show_default=True, help="HTTP port")
+@click.option("--no-http", is_flag=True, default=False, help="Only accept alerts on --socket")
+@click.option("--socket", "socket_path", type=click.Path(), help="Also accept NDJSON on this Unix socket")
+@click.option(
+    "--window",
+    type=click.FloatRange(min=0, min_open=True),
+    default=1.0,
+    show_default=True,
+    help="Seconds alerts are collected before being written",
+)
+@click.option(
+    "--rate",
+    type=click.FloatRange(min=0, min_open=True),
+    default=30.0,
+    show_default=True,
+    help="Alerts per minute written to each instance",
+)
+@click.option(
+    "--burst",
+    type=click.IntRange(min=1),
+    default=10,
+    show_default=True,
+    help="Alerts an idle instance can be sent at once",
+)
+@click.option(
+    "--ttl", "-t", type=click.IntRange(min=1), default=300, help="TTL of alerts without a ttl field"
+)
+@fleet_options
+def alert_gateway(
+    instance_names: tuple[str, ...],
+    host: str,
+    port: int,
+    no_http: bool,
+    socket_path: Optional[str],
+    window: float,
+    rate: float,
+    burst: int,
+    ttl: int,
+    all_instances: bool,
+    groups: tuple[str, ...],
+    parallel: int,
+    timeout: float,
+):
+    """
+    Run a gateway that batches alerts for one or more instances.
+
+    Alerts are accepted as JSON at POST /alerts and as NDJSON on --socket.
+    Duplicates are coalesced, each instance is rate limited, and every
+    window's alerts are written to an instance in one batch. Counters are
+    at GET /metrics.
+    """
+    from ..services.alert_gateway import AlertGateway, serve_gateway
+
+    if no_http and not socket_path:
+        raise click.UsageError("--no-http needs --socket")
+    registry = load_registry()
+    instances = select_instances(registry, instance_names, groups, all_instances)
+    click.echo(f"Gateway for {len(instances)} instances, writing every {window:g}s")
+
+    async def run() -> None:
+        gateway = AlertGateway(instances, window, rate, burst, ttl, parallel, timeout)
+        await serve_gateway(gateway, host, None if no_http else port, socket_path)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        click.echo("\nAlert gateway stopped.")
+
+
 @alert.command("list")
-@click.argument("instance_name")
-def list_instance_alerts(instance_name: str):
-    """List current alerts on an instance."""
+@click.argument("instance_names", nargs=-1)
+@batch_size_option
+@fleet_options
+def list_instance_alerts(
+    instance_names: tuple[str, ...],
+    batch_size: int,
+    all_instances: bool,
+    groups: tuple[str, ...],
+    parallel: int,
+    timeout: float,
+):
+    """List current alerts on one or more instances."""
     registry = load_registry()
 
+    if is_fleet(instance_names, groups, all_instances):
+        instances = select_instances(registry, instance_names, groups, all_instances)
+        run_fleet_command(
+            instances,
+            lambda client, instance: read_alerts(
+                client, batch_size, instance.key_namespace()
+            ),
+            lambda alerts: f"{len(alerts)} alerts",
+            parallel,
+            timeout,
+            details=lambda alerts: [
+                f"{a['id']}  priority {a.get('priority', 0)}  {a.get('message', '')}"
+                for a in alerts
+            ],
+        )
+        return
+
+    instance_name = instance_names[0]
     instance = registry.get_instance(instance_name)
     if not instance:
         click.echo(f"No instance found with name '{instance_name}'.")
         return
 
     # List the alerts
-    alerts = run_async(list_alerts(instance))
+    alerts = run_async(list_alerts(instance, batch_size))
     if not alerts:
         click.echo(f"No alerts found for instance '{instance_name}'.")
         return
@@ -86,16 +328,39 @@ def list_instance_alerts(instance_name: str):
 
 
 @alert.command("clear")
-@click.argument("instance_name")
-def clear_instance_alerts(instance_name: str):
-    """Clear alerts from an instance."""
+@click.argument("instance_names", nargs=-1)
+@batch_size_option
+@fleet_options
+def clear_instance_alerts(
+    instance_names: tuple[str, ...],
+    batch_size: int,
+    all_instances: bool,
+    groups: tuple[str, ...],
+    parallel: int,
+    timeout: float,
+):
+    """Clear alerts from one or more instances."""
     registry = load_registry()
 
+    if is_fleet(instance_names, groups, all_instances):
+        instances = select_instances(registry, instance_names, groups, all_instances)
+        run_fleet_command(
+            instances,
+            lambda client, instance: delete_alerts(
+                client, batch_size, instance.key_namespace()
+            ),
+            lambda count: f"cleared {count} alerts",
+            parallel,
+            timeout,
+        )
+        return
+
+    instance_name = instance_names[0]
     instance = registry.get_instance(instance_name)
     if not instance:
         click.echo(f"No instance found with name '{instance_name}'.")
         return
 
     # Clear the alerts
-    count = run_async(clear_alerts(instance))
+    count = run_async(clear_alerts(instance, batch_size))
     click.echo(f"Cleared {count} alerts from instance '{instance_name}'.")
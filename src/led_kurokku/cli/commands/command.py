@@ -0,0 +1,143 @@
+"""
+CLI commands for sending acknowledged commands to LED-Kurokku instances.
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+import click
+
+from ...command_stream import ACK_OK, COMMAND_TTL, CommandAck, send_command, wait_for_ack
+from ...core import ALERT_WORD, STOP_WORD, parse_direct_alert
+from ..models.instance import load_registry
+from ..utils.fleet import (
+    FleetResult,
+    echo_header,
+    echo_row,
+    echo_summary,
+    fleet_options,
+    run_fleet,
+    select_instances,
+    table_width,
+)
+
+
+@click.group()
+def command():
+    """Send commands that clocks acknowledge."""
+    pass
+
+
+def _check_command(ctx, param, value):
+    if value.upper() in (STOP_WORD, ALERT_WORD):
+        return value.upper()
+    try:
+        parse_direct_alert(value)
+    except ValueError as e:
+        raise click.BadParameter(f"not STOP, ALERT or alert JSON ({e})")
+    return value
+
+
+def describe_ack(ack: CommandAck) -> str:
+    """Summarize an acknowledgement for its result row."""
+    return (
+        f"{ack.result} by {ack.consumer} in {ack.delivery_ms:.0f} ms"
+        f" (processing {ack.processing_ms:.2f} ms)"
+    )
+
+
+def latency_report(acks: list[CommandAck], instances: int) -> str:
+    """Summarize the delivery and processing latency of acknowledged commands."""
+    if not acks:
+        return f"Acknowledged by 0 of {instances} instances"
+    delivery = [ack.delivery_ms for ack in acks]
+    processing = [ack.processing_ms for ack in acks]
+    return (
+        f"Acknowledged by {len(acks)} of {instances} instances:"
+        f" delivery median {statistics.median(delivery):.0f} ms, max {max(delivery):.0f} ms;"
+        f" processing median {statistics.median(processing):.2f} ms,"
+        f" max {max(processing):.2f} ms"
+    )
+
+
+@command.command("send")
+@click.argument("command_text", metavar="COMMAND", callback=_check_command)
+@click.argument("instance_names", nargs=-1)
+@click.option(
+    "--ttl",
+    "-t",
+    type=click.IntRange(min=1),
+    default=COMMAND_TTL,
+    show_default=True,
+    help="Seconds a clock that is away may still act on the command",
+)
+@click.option(
+    "--wait",
+    type=click.FloatRange(min=0),
+    default=5.0,
+    show_default=True,
+    help="Seconds to wait for each clock to acknowledge; 0 to not wait",
+)
+@fleet_options
+def send_command_to_instances(
+    command_text: str,
+    instance_names: tuple[str, ...],
+    ttl: int,
+    wait: float,
+    all_instances: bool,
+    groups: tuple[str, ...],
+    parallel: int,
+    timeout: float,
+):
+    """
+    Send a command to one or more instances and wait for them to act on it.
+
+    COMMAND is STOP, ALERT or alert JSON, as published on the channels.
+    Clocks started with --command-stream read it from their command stream,
+    also when they come back after missing it, and acknowledge it. Every
+    instance is waited for at once, and the delivery latency of each
+    acknowledgement is reported.
+    """
+    registry = load_registry()
+    instances = select_instances(registry, instance_names, groups, all_instances)
+
+    async def send(client, instance):
+        keys = instance.key_namespace()
+        command_id = await send_command(client, command_text, ttl, keys)
+        if not wait:
+            return command_id
+        try:
+            ack = await wait_for_ack(client, command_id, wait, keys, block=timeout / 2)
+        except TimeoutError as e:
+            raise RuntimeError(f"sent {command_id}, {e}")
+        if ack.result != ACK_OK:
+            error = f": {ack.error}" if ack.error else ""
+            raise RuntimeError(f"{ack.result} by {ack.consumer}{error}")
+        return ack
+
+    width = table_width(instances)
+    echo_header(width)
+
+    async def collect() -> list[FleetResult]:
+        results = []
+        # Waiting for the acknowledgement is not bounded by --timeout
+        async for result in run_fleet(instances, send, parallel, timeout + wait):
+            if not result.ok:
+                detail = result.error
+            elif wait:
+                detail = describe_ack(result.value)
+            else:
+                detail = f"sent {result.value}"
+            echo_row(result, width, detail)
+            results.append(result)
+        return results
+
+    started = time.perf_counter()
+    results = asyncio.run(collect())
+    echo_summary(results, time.perf_counter() - started)
+    if wait:
+        click.echo(latency_report([r.value for r in results if r.ok], len(instances)))
+    if any(not result.ok for result in results):
+        sys.exit(1)
@@ -2,6 +2,8 @@
 CLI commands for managing LED-Kurokku configurations.
 """
 
+import hashlib
+import os
 import sys
 
 import click
@@ -10,8 +12,24 @@ import json
 import difflib
 from typing import Optional
 
+import redis.asyncio as redis
+from pydantic import ValidationError
+
+from ... import models
+from ...config_layers import deep_merge, layer_key
+from ...core import REDIS_KEY_CONFIG
 from ..models.instance import load_registry
-from ..utils.redis_helpers import run_async, set_config, get_config
+from ..utils.fleet import fleet_options, is_fleet, run_fleet_command, select_instances
+from ..utils.redis_helpers import (
+    run_async,
+    set_config,
+    get_config,
+    read_config,
+    write_config,
+    write_config_layer,
+    delete_config_layer,
+    write_config_groups,
+)
 from ..utils.config_helpers import (
     load_yaml_config,
     validate_config,
@@ -26,19 +44,76 @@ def config():
     pass
 
 
+def _split_config_args(args: tuple[str, ...]) -> tuple[tuple[str, ...], str]:
+    """Split ``[INSTANCE]... CONFIG_FILE`` arguments."""
+    *names, config_file = args
+    if not os.path.exists(config_file):
+        raise click.BadParameter(
+            f"Path '{config_file}' does not exist.", param_hint="'CONFIG_FILE'"
+        )
+    return tuple(names), config_file
+
+
+def _config_lines(config_settings) -> list[str]:
+    """A configuration as YAML lines, for diffing."""
+    return yaml.dump(
+        json.loads(config_settings.model_dump_json()), sort_keys=False, indent=2
+    ).splitlines()
+
+
+def _config_digest(config_settings) -> str:
+    """Short digest of a configuration, to spot instances that differ."""
+    return hashlib.sha256(config_settings.model_dump_json().encode()).hexdigest()[:12]
+
+
 @config.command("set")
-@click.argument("instance_name")
-@click.argument("config_file", type=click.Path(exists=True))
+@click.argument("args", nargs=-1, required=True, metavar="[INSTANCE]... CONFIG_FILE")
 @click.option("--template", "-t", help="Template to apply")
-def set_instance_config(instance_name: str, config_file: str, template: Optional[str]):
-    """Set configuration from a YAML file."""
+@fleet_options
+def set_instance_config(
+    args: tuple[str, ...],
+    template: Optional[str],
+    all_instances: bool,
+    groups: tuple[str, ...],
+    parallel: int,
+    timeout: float,
+):
+    """Set configuration from a YAML file on one or more instances."""
+    instance_names, config_file = _split_config_args(args)
     registry = load_registry()
 
+    if is_fleet(instance_names, groups, all_instances):
+        instances = select_instances(registry, instance_names, groups, all_instances)
+        config_settings = _load_config_file(config_file, template)
+        run_fleet_command(
+            instances,
+            lambda client, instance: write_config(
+                client, config_settings, instance.key_namespace()
+            ),
+            lambda _: f"configured ({_config_digest(config_settings)})",
+            parallel,
+            timeout,
+        )
+        return
+
+    instance_name = instance_names[0]
     instance = registry.get_instance(instance_name)
     if not instance:
         click.echo(f"No instance found with name '{instance_name}'.")
         return
 
+    config_settings = _load_config_file(config_file, template)
+
+    # Set the config
+    success = run_async(set_config(instance, config_settings))
+    if success:
+        click.echo(f"Configuration set for instance '{instance_name}'.")
+    else:
+        click.echo(f"Failed to set configuration for instance '{instance_name}'.")
+
+
+def _load_config_file(config_file: str, template: Optional[str]):
+    """Load, merge with a template and validate a config file, exiting on errors."""
     # Load the config file
     try:
         config_data = load_yaml_config(config_file)
@@ -58,18 +133,17 @@ def set_instance_config(instance_name: str, config_file: str, template: Optional
     if not config_settings:
         click.echo("Invalid configuration file.", err=True)
         sys.exit(1)
-
-    # Set the config
-    success = run_async(set_config(instance, config_settings))
-    if success:
-        click.echo(f"Configuration set for instance '{instance_name}'.")
-    else:
-        click.echo(f"Failed to set configuration for instance '{instance_name}'.")
+    return config_settings
 
 
 @config.command("get")
-@click.argument("instance_name")
-@click.option("--output", "-o", type=click.Path(), help="Output file")
+@click.argument("instance_names", nargs=-1)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(),
+    help="Output file, or directory for one file per instance when targeting several",
+)
 @click.option(
     "--format",
     "-f",
@@ -77,10 +151,46 @@ def set_instance_config(instance_name: str, config_file: str, template: Optional
     default="yaml",
     help="Output format",
 )
-def get_instance_config(instance_name: str, output: Optional[str], format: str):
-    """Get current configuration from an instance."""
+@fleet_options
+def get_instance_config(
+    instance_names: tuple[str, ...],
+    output: Optional[str],
+    format: str,
+    all_instances: bool,
+    groups: tuple[str, ...],
+    parallel: int,
+    timeout: float,
+):
+    """Get current configuration from one or more instances."""
     registry = load_registry()
 
+    if is_fleet(instance_names, groups, all_instances):
+        instances = select_instances(registry, instance_names, groups, all_instances)
+        if output:
+            os.makedirs(output, exist_ok=True)
+
+        async def fetch(client, instance):
+            config_settings = await read_config(client, instance.key_namespace())
+            if config_settings is None:
+                raise LookupError("no configuration")
+            if output:
+                path = os.path.join(output, f"{instance.name}.{format}")
+                with open(path, "w") as f:
+                    f.write(_format_config(config_settings, format))
+            return config_settings
+
+        run_fleet_command(
+            instances,
+            fetch,
+            lambda config_settings: (
+                f"{len(config_settings.widgets)} widgets ({_config_digest(config_settings)})"
+            ),
+            parallel,
+            timeout,
+        )
+        return
+
+    instance_name = instance_names[0]
     instance = registry.get_instance(instance_name)
     if not instance:
         click.echo(f"No instance found with name '{instance_name}'.")
@@ -93,13 +203,7 @@ def get_instance_config(instance_name: str, output: Optional[str], format: str):
         return
 
     # Output the config
-    if format == "yaml":
-        config_str = yaml.dump(
-            json.loads(config_settings.json()), sort_keys=False, indent=2
-        )
-    else:
-        config_str = config_settings.json(indent=2)
-
+    config_str = _format_config(config_settings, format)
     if output:
         with open(output, "w") as f:
             f.write(config_str)
@@ -108,6 +212,14 @@ def get_instance_config(instance_name: str, output: Optional[str], format: str):
         click.echo(config_str)
 
 
+def _format_config(config_settings, format: str) -> str:
+    if format == "yaml":
+        return yaml.dump(
+            json.loads(config_settings.model_dump_json()), sort_keys=False, indent=2
+        )
+    return config_settings.model_dump_json(indent=2)
+
+
 @config.command("validate")
 @click.argument("config_file", type=click.Path(exists=True))
 def validate_config_file(config_file: str):
@@ -124,12 +236,61 @@ def validate_config_file(config_file: str):
 
 
 @config.command("diff")
-@click.argument("instance_name")
-@click.argument("config_file", type=click.Path(exists=True))
-def diff_configs(instance_name: str, config_file: str):
-    """Compare local config with instance config."""
+@click.argument("args", nargs=-1, required=True, metavar="[INSTANCE]... CONFIG_FILE")
+@click.option("--show", is_flag=True, default=False, help="Print the diff of every instance")
+@fleet_options
+def diff_configs(
+    args: tuple[str, ...],
+    show: bool,
+    all_instances: bool,
+    groups: tuple[str, ...],
+    parallel: int,
+    timeout: float,
+):
+    """Compare local config with the config of one or more instances."""
+    instance_names, config_file = _split_config_args(args)
     registry = load_registry()
 
+    if is_fleet(instance_names, groups, all_instances):
+        instances = select_instances(registry, instance_names, groups, all_instances)
+        local_config = validate_config(load_yaml_config(config_file))
+        if not local_config:
+            click.echo("Invalid local configuration.", err=True)
+            sys.exit(1)
+        local_yaml = _config_lines(local_config)
+
+        async def diff_one(client, instance):
+            instance_config = await read_config(client, instance.key_namespace())
+            if instance_config is None:
+                raise LookupError("no configuration")
+            return list(
+                difflib.unified_diff(
+                    _config_lines(instance_config),
+                    local_yaml,
+                    fromfile=f"{instance.name} (remote)",
+                    tofile=config_file,
+                    lineterm="",
+                )
+            )
+
+        def describe(diff: list[str]) -> str:
+            if not diff:
+                return "identical"
+            added = sum(line.startswith("+") for line in diff[2:])
+            removed = sum(line.startswith("-") for line in diff[2:])
+            return f"+{added} -{removed} lines"
+
+        run_fleet_command(
+            instances,
+            diff_one,
+            describe,
+            parallel,
+            timeout,
+            details=(lambda diff: diff) if show else None,
+        )
+        return
+
+    instance_name = instance_names[0]
     instance = registry.get_instance(instance_name)
     if not instance:
         click.echo(f"No instance found with name '{instance_name}'.")
@@ -149,12 +310,8 @@ def diff_configs(instance_name: str, config_file: str):
         return
 
     # Convert to YAML for diffing
-    instance_yaml = yaml.dump(
-        json.loads(instance_config.json()), sort_keys=False, indent=2
-    ).splitlines()
-    local_yaml = yaml.dump(
-        json.loads(local_config.json()), sort_keys=False, indent=2
-    ).splitlines()
+    instance_yaml = _config_lines(instance_config)
+    local_yaml = _config_lines(local_config)
 
     # Generate the diff
     diff = difflib.unified_diff(
@@ -171,3 +328,145 @@ def diff_configs(instance_name: str, config_file: str):
         click.echo(diff_output)
     else:
         click.echo("No differences found.")
+
+
+@config.group("layer")
+def layer():
+    """Manage configuration layers shared by a fleet.
+
+    An instance's configuration is merged from the ``base`` layer, the
+    ``group:<name>`` layers of its groups and its own configuration. Layers
+    are written once to a fleet Redis given with --redis, which clocks
+    started with --fleet-redis watch, or to each selected instance.
+    """
+    pass
+
+
+def _check_layer(layer_name: str) -> None:
+    """Validate a layer name."""
+    try:
+        layer_key(REDIS_KEY_CONFIG, layer_name)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="'LAYER'")
+
+
+def _load_layer_file(layer_file: str) -> dict:
+    """Load and validate a partial configuration, exiting on errors."""
+    try:
+        data = load_yaml_config(layer_file)
+    except yaml.YAMLError as e:
+        click.echo(f"Error loading layer file: {e}", err=True)
+        sys.exit(1)
+    if not isinstance(data, dict):
+        click.echo("A layer must be a mapping of configuration settings.", err=True)
+        sys.exit(1)
+    try:
+        # Only the settings present are checked
+        models.ConfigSettings.model_validate(deep_merge({"widgets": []}, data))
+    except ValidationError as e:
+        click.echo(f"Invalid layer: {e}", err=True)
+        sys.exit(1)
+    return data
+
+
+async def _on_fleet_redis(redis_url: str, operation):
+    async with redis.Redis.from_url(redis_url) as client:
+        return await operation(client)
+
+
+@layer.command("set")
+@click.argument("layer_name", metavar="LAYER")
+@click.argument("args", nargs=-1, required=True, metavar="[INSTANCE]... LAYER_FILE")
+@click.option("--redis", "redis_url", help="Fleet Redis URL to write the layer to, once")
+@fleet_options
+def set_layer(
+    layer_name: str,
+    args: tuple[str, ...],
+    redis_url: Optional[str],
+    all_instances: bool,
+    groups: tuple[str, ...],
+    parallel: int,
+    timeout: float,
+):
+    """Set LAYER (base or group:<name>) from a YAML file."""
+    _check_layer(layer_name)
+    instance_names, layer_file = _split_config_args(args)
+    data = _load_layer_file(layer_file)
+    digest = hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()[:12]
+
+    if redis_url:
+        if instance_names or groups or all_instances:
+            raise click.UsageError("Use either --redis or instances, not both")
+        run_async(_on_fleet_redis(redis_url, lambda client: write_config_layer(client, layer_name, data)))
+        click.echo(f"Layer '{layer_name}' set ({digest}).")
+        return
+
+    instances = select_instances(load_registry(), instance_names, groups, all_instances)
+    run_fleet_command(
+        instances,
+        lambda client, instance: write_config_layer(client, layer_name, data),
+        lambda _: f"{layer_name} set ({digest})",
+        parallel,
+        timeout,
+    )
+
+
+@layer.command("delete")
+@click.argument("layer_name", metavar="LAYER")
+@click.argument("instance_names", nargs=-1)
+@click.option("--redis", "redis_url", help="Fleet Redis URL to delete the layer from")
+@fleet_options
+def delete_layer(
+    layer_name: str,
+    instance_names: tuple[str, ...],
+    redis_url: Optional[str],
+    all_instances: bool,
+    groups: tuple[str, ...],
+    parallel: int,
+    timeout: float,
+):
+    """Delete LAYER (base or group:<name>)."""
+    _check_layer(layer_name)
+    if redis_url:
+        if instance_names or groups or all_instances:
+            raise click.UsageError("Use either --redis or instances, not both")
+        existed = run_async(
+            _on_fleet_redis(redis_url, lambda client: delete_config_layer(client, layer_name))
+        )
+        click.echo(f"Layer '{layer_name}' {'deleted' if existed else 'did not exist'}.")
+        return
+
+    instances = select_instances(load_registry(), instance_names, groups, all_instances)
+    run_fleet_command(
+        instances,
+        lambda client, instance: delete_config_layer(client, layer_name),
+        lambda existed: f"{layer_name} {'deleted' if existed else 'did not exist'}",
+        parallel,
+        timeout,
+    )
+
+
+@layer.command("groups")
+@click.argument("instance_names", nargs=-1)
+@fleet_options
+def push_groups(
+    instance_names: tuple[str, ...],
+    all_instances: bool,
+    groups: tuple[str, ...],
+    parallel: int,
+    timeout: float,
+):
+    """Tell instances which group layers to apply, from their registry groups."""
+    instances = select_instances(load_registry(), instance_names, groups, all_instances)
+
+    async def push(client, instance):
+        await write_config_groups(client, instance.groups, instance.key_namespace())
+        return instance.groups
+
+    run_fleet_command(
+        instances,
+        push,
+        lambda names: f"groups: {', '.join(names) or '(none)'}",
+        parallel,
+        timeout,
+    )
@@ -4,10 +4,21 @@ CLI commands for managing LED-Kurokku instances.
 
 import click
 
+from ...namespace import validate_instance_name
 from ..models.instance import KurokkuInstance, load_registry, save_registry
 from ..utils.redis_helpers import run_async, test_connection
 
 
+def _check_namespace(ctx, param, value):
+    """Validate a key namespace."""
+    if value is None:
+        return None
+    try:
+        return validate_instance_name(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
 @click.group()
 def instances():
     """Manage LED-Kurokku instances."""
@@ -25,8 +36,11 @@ def list_instances():
 
     click.echo("Configured instances:")
     for instance in registry.instances:
+        groups = f" [{', '.join(instance.groups)}]" if instance.groups else ""
+        namespace = f" ({instance.namespace})" if instance.namespace else ""
         click.echo(
-            f"  - {instance.name}: {instance.host}:{instance.port} - {instance.description}"
+            f"  - {instance.name}: {instance.host}:{instance.port}{namespace}"
+            f" - {instance.description}{groups}"
         )
 
 
@@ -35,7 +49,22 @@ def list_instances():
 @click.argument("host")
 @click.option("--port", "-p", type=int, default=6379, help="Redis port (default: 6379)")
 @click.option("--description", "-d", help="Description of the instance")
-def add_instance(name: str, host: str, port: int, description: str | None):
+@click.option(
+    "--group", "-g", "groups", multiple=True, help="Group for fleet commands (repeatable)"
+)
+@click.option(
+    "--namespace",
+    callback=_check_namespace,
+    help="Key namespace of the clock, if it shares its Redis (kurokku --namespace)",
+)
+def add_instance(
+    name: str,
+    host: str,
+    port: int,
+    description: str | None,
+    groups: tuple[str, ...],
+    namespace: str | None,
+):
     """Add a new instance."""
     registry = load_registry()
 
@@ -50,6 +79,8 @@ def add_instance(name: str, host: str, port: int, description: str | None):
         host=host,
         port=port,
         description=description or "",
+        groups=list(groups),
+        namespace=namespace,
     )
 
     # Test the connection
@@ -85,12 +116,20 @@ def remove_instance(name: str):
 @click.option("--host", "-h", help="New Redis host")
 @click.option("--port", "-p", type=int, help="New Redis port")
 @click.option("--description", "-d", help="New description for the instance")
+@click.option(
+    "--group", "-g", "groups", multiple=True, help="Replace the instance's groups (repeatable)"
+)
+@click.option(
+    "--namespace", callback=_check_namespace, help="New key namespace of the clock"
+)
 def update_instance(
     name: str,
     new_name: str | None,
     host: str | None,
     port: int | None,
     description: str | None,
+    groups: tuple[str, ...],
+    namespace: str | None,
 ):
     """Update an existing instance."""
     registry = load_registry()
@@ -106,6 +145,8 @@ def update_instance(
         host=host or instance.host,
         port=port or instance.port,
         description=description if description is not None else instance.description,
+        groups=list(groups) if groups else instance.groups,
+        namespace=namespace if namespace is not None else instance.namespace,
     )
 
     # Test the connection if host or port changed
@@ -141,6 +182,8 @@ def show_instance(name: str):
     click.echo(f"Host: {instance.host}")
     click.echo(f"Port: {instance.port}")
     click.echo(f"Description: {instance.description}")
+    if instance.groups:
+        click.echo(f"Groups: {', '.join(instance.groups)}")
 
     # Test the connection
     if run_async(test_connection(instance)):
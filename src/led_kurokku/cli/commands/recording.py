@@ -0,0 +1,158 @@
+"""
+CLI commands for inspecting and replaying frame recordings.
+"""
+
+import asyncio
+import pathlib
+import sys
+import time
+from datetime import datetime
+
+import click
+
+from ...display_factory import create_driver
+from ...drivers.recording import RecordingPlayer, read_recording
+from ...render import RENDER_AVAILABLE, RENDER_MISSING
+from ...simulation import decode_text
+from ...tm1637.factory import DriverType
+
+
+def _load(path: str):
+    try:
+        return read_recording(path)
+    except (OSError, ValueError) as e:
+        click.echo(f"Cannot read recording '{path}': {e}", err=True)
+        sys.exit(1)
+
+
+@click.group()
+def recording():
+    """Inspect and replay frame recordings."""
+    pass
+
+
+@recording.command("info")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+def info(path: str):
+    """Show a summary of a recording."""
+    records = _load(path)
+    player = RecordingPlayer(records)
+    click.echo(f"Records:  {len(records)}")
+    if records:
+        first = datetime.fromtimestamp(records[0].time)
+        last = datetime.fromtimestamp(records[-1].time)
+        click.echo(f"From:     {first.isoformat(timespec='seconds')}")
+        click.echo(f"To:       {last.isoformat(timespec='seconds')}")
+        click.echo(f"Duration: {player.duration:.1f}s")
+
+
+@recording.command("dump")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--display-type",
+    type=click.Choice(["tm1637", "ht16k33"], case_sensitive=False),
+    default="tm1637",
+    help="Display type used to decode digits",
+)
+def dump(path: str, display_type: str):
+    """Print every record of a recording."""
+    for record in _load(path):
+        when = datetime.fromtimestamp(record.time).isoformat(timespec="milliseconds")
+        if record.kind == "brightness":
+            click.echo(f"{when}  brightness {record.brightness}")
+        else:
+            text = decode_text(record.digits, display_type)
+            colon = ":" if record.colon else " "
+            click.echo(f"{when}  {record.kind:<10} [{text}] {colon}")
+
+
+@recording.command("replay")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--speed", type=float, default=1.0, help="Playback speed (0 = no delays)")
+@click.option(
+    "--display-type",
+    type=click.Choice(["tm1637", "ht16k33"], case_sensitive=False),
+    default="tm1637",
+    help="Display hardware type (tm1637 or ht16k33)",
+)
+@click.option(
+    "--driver",
+    "driver_type",
+    type=click.Choice(["virtual", "console", "websocket"]),
+    default="virtual",
+    help="Driver to play into (websocket starts the web server)",
+)
+@click.option("--port", default=8080, type=int, help="Web server port (websocket driver)")
+@click.option("--repeat", is_flag=True, default=False, help="Loop the recording")
+def replay(
+    path: str,
+    speed: float,
+    display_type: str,
+    driver_type: str,
+    port: int,
+    repeat: bool,
+):
+    """Play a recording back into a driver."""
+    player = RecordingPlayer(_load(path))
+    driver = create_driver(display_type, driver_type=DriverType(driver_type))
+
+    async def run():
+        if driver_type == DriverType.WEBSOCKET:
+            from ...web_server import WebServer
+
+            server = WebServer(driver_instance=driver, display_type=display_type)
+            server_task = asyncio.create_task(server.start(port=port))
+            await player.play(driver, speed=speed, repeat=repeat)
+            # Keep serving the last frame once the recording has ended
+            await server_task
+        else:
+            await player.play(driver, speed=speed, repeat=repeat)
+
+    if driver_type == DriverType.WEBSOCKET:
+        click.echo(f"Serving replay of '{path}' on http://localhost:{port}/")
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+@recording.command("export")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.argument("output", type=click.Path(dir_okay=False, writable=True))
+@click.option(
+    "--format",
+    "image_format",
+    type=click.Choice(["gif", "apng"]),
+    help="Animation format (default: from the output file's extension)",
+)
+@click.option(
+    "--display-type",
+    type=click.Choice(["tm1637", "ht16k33"], case_sensitive=False),
+    default="tm1637",
+    help="Display type used to decode digits",
+)
+@click.option("--scale", type=click.IntRange(1, 8), default=2, help="Image size (1-8)")
+@click.option("--speed", type=float, default=1.0, help="Playback speed")
+def export(
+    path: str, output: str, image_format: str | None, display_type: str, scale: int, speed: float
+):
+    """Render a recording as an animated GIF or APNG."""
+    if not RENDER_AVAILABLE:
+        raise click.ClickException(RENDER_MISSING)
+    from ...render.animation import export_animation
+
+    if speed <= 0:
+        raise click.BadParameter("must be positive", param_hint="--speed")
+    if image_format is None:
+        image_format = "gif" if pathlib.Path(output).suffix.lower() == ".gif" else "apng"
+    records = _load(path)
+    if not records:
+        raise click.ClickException(f"Recording '{path}' is empty")
+
+    started = time.perf_counter()
+    data = export_animation(records, image_format, display_type, scale=scale, speed=speed)
+    pathlib.Path(output).write_bytes(data)
+    click.echo(
+        f"Wrote {image_format.upper()} of {len(records)} records to '{output}'"
+        f" ({len(data) / 1024:.0f} KiB in {time.perf_counter() - started:.1f}s)"
+    )
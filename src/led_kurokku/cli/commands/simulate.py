@@ -0,0 +1,132 @@
+"""
+CLI command for simulating a configuration on virtual time.
+"""
+
+import importlib.util
+import json
+import sys
+from datetime import datetime, timedelta
+from typing import Optional
+
+import click
+
+from ...simulation import simulate as run_simulation
+from ..utils.config_helpers import load_yaml_config, validate_config
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, secs = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{secs:02d}"
+
+
+@click.command()
+@click.argument("config_file", type=click.Path(exists=True))
+@click.option(
+    "--start",
+    "-s",
+    help="Simulated start time as ISO datetime (default: today at midnight)",
+)
+@click.option(
+    "--hours", type=float, default=24.0, help="Simulated hours to run (default: 24)"
+)
+@click.option(
+    "--display-type",
+    type=click.Choice(["tm1637", "ht16k33"], case_sensitive=False),
+    default="tm1637",
+    help="Display hardware type (tm1637 or ht16k33)",
+)
+@click.option(
+    "--alerts",
+    "-a",
+    "alerts_file",
+    type=click.Path(exists=True),
+    help="YAML/JSON list of alerts to inject (supports 'at' and 'ttl' fields)",
+)
+@click.option(
+    "--data",
+    "-d",
+    multiple=True,
+    help="Preload a Redis key as KEY=VALUE (repeatable)",
+)
+@click.option(
+    "--format",
+    "-f",
+    type=click.Choice(["text", "json"]),
+    default="text",
+    help="Output format",
+)
+@click.option(
+    "--min-duration",
+    type=float,
+    default=0.0,
+    help="Hide timeline spans shorter than this many seconds",
+)
+@click.option("--output", "-o", type=click.Path(), help="Output file")
+def simulate(
+    config_file: str,
+    start: Optional[str],
+    hours: float,
+    display_type: str,
+    alerts_file: Optional[str],
+    data: tuple[str, ...],
+    format: str,
+    min_duration: float,
+    output: Optional[str],
+):
+    """Fast-forward a configuration and print what is shown when."""
+    if importlib.util.find_spec("fakeredis") is None:
+        click.echo(
+            "Simulation requires fakeredis (pip install 'led-kurokku[simulate]').",
+            err=True,
+        )
+        sys.exit(1)
+
+    config_settings = validate_config(load_yaml_config(config_file))
+    if not config_settings:
+        click.echo("Invalid configuration file.", err=True)
+        sys.exit(1)
+
+    alerts = load_yaml_config(alerts_file) if alerts_file else []
+    preload = {}
+    for item in data:
+        key, _, value = item.partition("=")
+        preload[key] = value
+
+    result = run_simulation(
+        config_settings,
+        start=datetime.fromisoformat(start) if start else None,
+        duration=timedelta(hours=hours),
+        display_type=display_type,
+        alerts=alerts,
+        data=preload,
+    )
+
+    if format == "json":
+        text = json.dumps(result.to_dict(), indent=2)
+    else:
+        lines = [
+            f"Simulated {result.start.isoformat()} to {result.end.isoformat()} "
+            f"({result.frames} frames in {result.elapsed:.2f}s)",
+            "",
+        ]
+        for entry in result.timeline:
+            if entry.duration < min_duration:
+                continue
+            lines.append(
+                f"{entry.start.strftime('%Y-%m-%d %H:%M:%S')}  "
+                f"{_format_duration(entry.duration):>8}  "
+                f"{(entry.widget or '-'):<10} [{entry.text}]"
+            )
+        lines.append("")
+        lines.append("Time per widget:")
+        for widget, seconds in sorted(result.widget_time.items()):
+            lines.append(f"  {widget:<10} {_format_duration(seconds):>8}")
+        text = "\n".join(lines)
+
+    if output:
+        with open(output, "w") as f:
+            f.write(text)
+        click.echo(f"Timeline written to '{output}'.")
+    else:
+        click.echo(text)
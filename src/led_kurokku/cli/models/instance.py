@@ -1,9 +1,12 @@
 from typing import Annotated
+import fnmatch
 import os
 import json
 from pathlib import Path
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+from ...namespace import KeyNamespace, validate_instance_name
 
 
 class KurokkuInstance(BaseModel):
@@ -17,11 +20,24 @@ class KurokkuInstance(BaseModel):
     ]
     port: int = 6379
     description: str = ""
+    groups: list[str] = Field(default_factory=list, description="Groups for fleet commands")
+    namespace: str | None = Field(
+        default=None, description="Key namespace of the clock on a shared Redis"
+    )
+
+    @field_validator("namespace")
+    @classmethod
+    def _check_namespace(cls, value: str | None) -> str | None:
+        return None if value is None else validate_instance_name(value)
 
     def redis_url(self) -> str:
         """Return the Redis URL for this instance."""
         return f"redis://{self.host}:{self.port}"
 
+    def key_namespace(self) -> KeyNamespace:
+        """Return the Redis keys of this instance."""
+        return KeyNamespace(self.namespace)
+
 
 class KurokkuRegistry(BaseModel):
     """Registry of all LED-Kurokku instances."""
@@ -53,6 +69,29 @@ class KurokkuRegistry(BaseModel):
                 return instance
         return None
 
+    def select(
+        self,
+        patterns: tuple[str, ...] | list[str] = (),
+        groups: tuple[str, ...] | list[str] = (),
+        all_instances: bool = False,
+    ) -> list[KurokkuInstance]:
+        """
+        Select instances for a fleet command, in registry order.
+
+        :param patterns: Instance names or glob patterns.
+        :param groups: Group names; instances in any of them are selected.
+        :param all_instances: Select every instance.
+        :return: The selected instances.
+        """
+        if all_instances:
+            return list(self.instances)
+        return [
+            instance
+            for instance in self.instances
+            if any(fnmatch.fnmatchcase(instance.name, pattern) for pattern in patterns)
+            or any(group in instance.groups for group in groups)
+        ]
+
     def update_instance(self, name: str, new_instance: KurokkuInstance) -> bool:
         """Update an existing instance."""
         for i, instance in enumerate(self.instances):
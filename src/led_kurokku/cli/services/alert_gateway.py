@@ -0,0 +1,390 @@
+"""
+Alert gateway for LED-Kurokku instances.
+
+Alerts are accepted over HTTP and a local socket and written to the
+instances once per window, in one MULTI/EXEC batch per instance, instead of
+one write (and one keyspace event on the clock) per alert. Within a window,
+alerts with the same content are coalesced. An alert whose content is already
+on an instance is not written again until half its TTL has passed, and is then
+refreshed under its original ID. Each instance also has a token bucket
+limiting how many alerts it is sent; the most important alerts are written
+first and the rest are dropped. Every suppressed write is counted in the
+metrics.
+"""
+
+import asyncio
+import fnmatch
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Optional
+
+from aiohttp import web
+from loguru import logger
+
+from ...utils.redis_pools import RedisPools
+from ...widgets.alert import IndividualAlert
+from ..models.instance import KurokkuInstance
+from ..utils.alert_import import alert_from_dict
+from ..utils.redis_helpers import alert_entry, write_alert_entries
+
+DEFAULT_WINDOW = 1.0
+DEFAULT_RATE = 30.0  # Alerts per minute per instance
+DEFAULT_BURST = 10
+DEFAULT_TTL = 300
+REFRESH_FRACTION = 0.5  # Rewrite a known alert once this much of its TTL is left
+
+
+def content_key(alert: IndividualAlert) -> str:
+    """Digest of what an alert displays, ignoring its ID and timestamp."""
+    content = [alert.message, alert.priority, alert.display_duration, alert.delete_after_display]
+    return hashlib.sha256(json.dumps(content).encode()).hexdigest()
+
+
+@dataclass
+class GatewayMetrics:
+    """
+    Counters of alerts received, written and suppressed.
+
+    In the gateway's totals, ``received`` and ``rejected`` count alerts and
+    the other counters are summed over instances.
+    """
+
+    received: int = 0
+    rejected: int = 0  # Invalid alerts
+    coalesced: int = 0  # Duplicates within a window
+    unchanged: int = 0  # Duplicates of an alert already on the instance
+    rate_limited: int = 0
+    written: int = 0
+    batches: int = 0
+    write_errors: int = 0
+
+    @property
+    def suppressed(self) -> int:
+        """Alert writes saved by coalescing, deduplication and rate limiting."""
+        return self.coalesced + self.unchanged + self.rate_limited
+
+    def as_dict(self) -> dict[str, int]:
+        return {**asdict(self), "suppressed": self.suppressed}
+
+
+class TokenBucket:
+    """Allows ``rate`` events per minute, with bursts of up to ``burst``."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate / 60
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        """Use a token if one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+@dataclass
+class _Pending:
+    alert: IndividualAlert
+    ttl: int
+
+
+@dataclass
+class _InstanceState:
+    instance: KurokkuInstance
+    bucket: TokenBucket
+    metrics: GatewayMetrics = field(default_factory=GatewayMetrics)
+    pending: dict[str, _Pending] = field(default_factory=dict)
+    # Content key to the ID and expiry time of alerts written to the instance
+    written: dict[str, tuple[str, float]] = field(default_factory=dict)
+
+
+class AlertGateway:
+    """
+    Coalesces, deduplicates and rate limits alerts for a set of instances.
+    """
+
+    def __init__(
+        self,
+        instances: list[KurokkuInstance],
+        window: float = DEFAULT_WINDOW,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        default_ttl: int = DEFAULT_TTL,
+        parallel: int = 32,
+        timeout: float = 5.0,
+    ):
+        """
+        Initialize the gateway.
+
+        :param instances: Instances alerts are written to.
+        :param window: Seconds alerts are collected before being written.
+        :param rate: Alerts per minute written to each instance.
+        :param burst: Alerts an idle instance can be sent at once.
+        :param default_ttl: TTL of alerts without a ``ttl`` field.
+        :param parallel: Maximum number of instances written to at once.
+        :param timeout: Seconds allowed per instance and batch.
+        """
+        self.window = window
+        self.default_ttl = default_ttl
+        self.timeout = timeout
+        self.metrics = GatewayMetrics()
+        self.states = {
+            instance.name: _InstanceState(instance, TokenBucket(rate, burst))
+            for instance in instances
+        }
+        self._pools = RedisPools(socket_connect_timeout=timeout, socket_timeout=timeout)
+        self._semaphore = asyncio.Semaphore(parallel)
+        self._ready = asyncio.Event()
+
+    def _targets(self, names: Any, groups: Any) -> list[_InstanceState]:
+        if names is None and groups is None:
+            return list(self.states.values())
+        if not all(isinstance(value, list) for value in (names or [], groups or [])):
+            raise ValueError("instances and groups must be lists")
+        targets = [
+            state
+            for state in self.states.values()
+            if any(fnmatch.fnmatchcase(state.instance.name, name) for name in names or [])
+            or any(group in state.instance.groups for group in groups or [])
+        ]
+        if not targets:
+            raise ValueError("no instances matched")
+        return targets
+
+    def submit(self, data: Any) -> IndividualAlert:
+        """
+        Queue an alert for the next window.
+
+        Besides the alert fields and ``ttl``, the data can list ``instances``
+        (names or glob patterns) and ``groups`` to send it to; by default it
+        goes to every instance.
+
+        :param data: The decoded JSON alert.
+        :return: The validated alert.
+        :raises ValueError: If the alert is invalid or matches no instance.
+        """
+        try:
+            if not isinstance(data, dict):
+                raise ValueError("not a JSON object")
+            data = dict(data)
+            targets = self._targets(data.pop("instances", None), data.pop("groups", None))
+            alert, ttl = alert_from_dict(data, self.default_ttl)
+        except ValueError:
+            self.metrics.rejected += 1
+            raise
+        self.metrics.received += 1
+        key = content_key(alert)
+        for state in targets:
+            state.metrics.received += 1
+            pending = state.pending.get(key)
+            if pending is not None:
+                pending.ttl = max(pending.ttl, ttl)
+                state.metrics.coalesced += 1
+                self.metrics.coalesced += 1
+            else:
+                state.pending[key] = _Pending(alert, ttl)
+        self._ready.set()
+        return alert
+
+    @property
+    def pending(self) -> int:
+        """Alerts waiting for the next window."""
+        return sum(len(state.pending) for state in self.states.values())
+
+    def _batch(self, state: _InstanceState) -> list[tuple[str, str, tuple[str, str, int]]]:
+        pending, state.pending = state.pending, {}
+        now = time.time()
+        state.written = {key: known for key, known in state.written.items() if known[1] > now}
+        batch = []
+        # Most important first, in case the rate limit cuts the batch short
+        for key, item in sorted(
+            pending.items(), key=lambda kv: (kv[1].alert.priority, kv[1].alert.timestamp)
+        ):
+            alert = item.alert
+            # Alerts deleted once displayed may be gone, so they are always written
+            known = None if alert.delete_after_display else state.written.get(key)
+            if known is not None:
+                if known[1] - now >= item.ttl * REFRESH_FRACTION:
+                    state.metrics.unchanged += 1
+                    self.metrics.unchanged += 1
+                    continue
+                alert = alert.model_copy(update={"id": known[0]})
+            if not state.bucket.take():
+                state.metrics.rate_limited += 1
+                self.metrics.rate_limited += 1
+                continue
+            entry = alert_entry(alert, state.instance.key_namespace())
+            batch.append((key, alert.id, (*entry, item.ttl)))
+        return batch
+
+    async def _write(self, state: _InstanceState, batch: list) -> None:
+        async with self._semaphore:
+            client = self._pools.client(state.instance.host, state.instance.port)
+            try:
+                await asyncio.wait_for(
+                    write_alert_entries(client, [entry for *_, entry in batch], transaction=True),
+                    self.timeout,
+                )
+            except Exception as e:
+                state.metrics.write_errors += 1
+                self.metrics.write_errors += 1
+                logger.error(f"Error writing alerts to {state.instance.name}: {e!r}")
+                return
+        now = time.time()
+        for key, alert_id, (_, _, ttl) in batch:
+            state.written[key] = (alert_id, now + ttl)
+        for metrics in (state.metrics, self.metrics):
+            metrics.written += len(batch)
+            metrics.batches += 1
+
+    async def flush(self) -> None:
+        """Write the alerts collected so far."""
+        self._ready.clear()
+        batches = [(state, self._batch(state)) for state in self.states.values()]
+        await asyncio.gather(*(self._write(state, batch) for state, batch in batches if batch))
+
+    async def run(self) -> None:
+        """Write each window's alerts when it closes, until cancelled."""
+        try:
+            while True:
+                await self._ready.wait()
+                await asyncio.sleep(self.window)
+                await self.flush()
+        finally:
+            if self.pending:
+                await asyncio.shield(self.flush())
+            await self._pools.aclose()
+
+    def metrics_dict(self) -> dict[str, Any]:
+        """Metrics in total and per instance."""
+        return {
+            "total": self.metrics.as_dict(),
+            "pending": self.pending,
+            "instances": {name: state.metrics.as_dict() for name, state in self.states.items()},
+        }
+
+    def submit_many(self, items: list[Any]) -> tuple[int, list[dict[str, Any]]]:
+        """
+        Submit several decoded alerts.
+
+        :param items: The alerts.
+        :return: The number accepted and an error per rejected alert.
+        """
+        accepted, rejected = 0, []
+        for index, item in enumerate(items):
+            try:
+                self.submit(item)
+                accepted += 1
+            except ValueError as e:
+                rejected.append({"index": index, "error": str(e)})
+        return accepted, rejected
+
+
+def _decode_body(body: bytes, ndjson: bool) -> list[Any]:
+    if ndjson:
+        return [json.loads(line) for line in body.splitlines() if line.strip()]
+    data = json.loads(body)
+    return data if isinstance(data, list) else [data]
+
+
+def create_app(gateway: AlertGateway) -> web.Application:
+    """
+    HTTP interface of a gateway.
+
+    ``POST /alerts`` takes an alert object, a JSON array of them, or NDJSON
+    (``application/x-ndjson``). ``GET /metrics`` returns the counters.
+    """
+
+    async def handle_alerts(request: web.Request) -> web.Response:
+        try:
+            items = _decode_body(
+                await request.read(), request.content_type == "application/x-ndjson"
+            )
+        except ValueError as e:
+            gateway.metrics.rejected += 1
+            raise web.HTTPBadRequest(text=f"Invalid JSON: {e}")
+        accepted, rejected = gateway.submit_many(items)
+        status = 202 if accepted or not rejected else 400
+        return web.json_response({"accepted": accepted, "rejected": rejected}, status=status)
+
+    async def handle_metrics(request: web.Request) -> web.Response:
+        return web.json_response(gateway.metrics_dict())
+
+    app = web.Application()
+    app.router.add_post("/alerts", handle_alerts)
+    app.router.add_get("/metrics", handle_metrics)
+    return app
+
+
+async def handle_socket(
+    gateway: AlertGateway, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> None:
+    """
+    Read NDJSON alerts from a local socket client, answering every line with
+    ``OK`` or ``ERROR <reason>``.
+    """
+    try:
+        while line := await reader.readline():
+            if not line.strip():
+                continue
+            try:
+                try:
+                    data = json.loads(line)
+                except ValueError as e:
+                    gateway.metrics.rejected += 1
+                    raise ValueError(f"invalid JSON: {e}") from None
+                gateway.submit(data)
+                writer.write(b"OK\n")
+            except ValueError as e:
+                writer.write(f"ERROR {e}\n".encode())
+            await writer.drain()
+    except ConnectionResetError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_gateway(
+    gateway: AlertGateway,
+    host: str = "127.0.0.1",
+    port: Optional[int] = 8090,
+    socket_path: Optional[str] = None,
+) -> None:
+    """
+    Serve a gateway over HTTP and/or a Unix socket until cancelled.
+
+    :param gateway: The gateway.
+    :param host: HTTP host address to bind to.
+    :param port: HTTP port, or None for no HTTP server.
+    :param socket_path: Unix socket path, or None for no socket.
+    """
+    runner = None
+    server = None
+    try:
+        if port is not None:
+            runner = web.AppRunner(create_app(gateway))
+            await runner.setup()
+            await web.TCPSite(runner, host, port).start()
+            logger.info(f"Accepting alerts at http://{host}:{port}/alerts")
+        if socket_path is not None:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            server = await asyncio.start_unix_server(
+                lambda reader, writer: handle_socket(gateway, reader, writer), socket_path
+            )
+            logger.info(f"Accepting alerts on {socket_path}")
+        await gateway.run()
+    finally:
+        if server is not None:
+            server.close()
+            os.unlink(socket_path)
+        if runner is not None:
+            await runner.cleanup()
@@ -10,13 +10,14 @@ from datetime import datetime
 from loguru import logger
 import redis.asyncio as redis
 
+from ...namespace import DEFAULT_NAMESPACE, KeyNamespace
 from ..models.instance import KurokkuInstance, load_registry
 from ..models.weather import WeatherConfig, WeatherLocation
 from ..utils.weather_api import (
     REDIS_WEATHER_TEMP_KEY_PREFIX,
-    REDIS_WEATHER_ALERT_KEY_PREFIX,
     get_temperature_data,
     process_noaa_alerts,
+    weather_alert_key_prefix,
 )
 
 
@@ -81,17 +82,23 @@ class WeatherService:
         logger.info(f"Got temperature for {location.display_name}: {formatted_temp}")
 
         # Distribute to all instances
+        written = set()  # Redis servers holding the temperature already
         for instance in self.registry.instances:
             try:
                 client = await self.connect_to_instance(instance)
                 redis_key = f"{REDIS_WEATHER_TEMP_KEY_PREFIX}{location.name}"
 
-                # Set the temperature with a TTL of 1 hour
-                await client.set(redis_key, formatted_temp, ex=3600)
+                # Set the temperature with a TTL of 1 hour, once per Redis:
+                # clocks sharing a Redis share the key
+                if (instance.host, instance.port) not in written:
+                    await client.set(redis_key, formatted_temp, ex=3600)
+                    written.add((instance.host, instance.port))
 
                 # Update brightness settings only if this is the default location and sunrise/sunset data is available
                 if location.is_default and sun_data:
-                    await self.update_brightness_settings(client, sun_data)
+                    await self.update_brightness_settings(
+                        client, sun_data, instance.key_namespace()
+                    )
                     logger.info(
                         f"Used {location.name} (default) for brightness settings"
                     )
@@ -107,7 +114,10 @@ class WeatherService:
         return formatted_temp
 
     async def update_brightness_settings(
-        self, client: redis.Redis, sun_data: dict
+        self,
+        client: redis.Redis,
+        sun_data: dict,
+        keys: KeyNamespace = DEFAULT_NAMESPACE,
     ) -> bool:
         """
         Update brightness settings based on sunrise/sunset times.
@@ -115,13 +125,14 @@ class WeatherService:
         Args:
             client: Redis client
             sun_data: Dictionary containing sunrise and sunset times
+            keys: Redis keys of the instance
 
         Returns:
             True if the update was successful, False otherwise
         """
         try:
             # Get the current configuration
-            config_json = await client.get("kurokku:config")
+            config_json = await client.get(keys.config)
             if not config_json:
                 logger.warning(
                     "No configuration found in Redis, cannot update brightness settings"
@@ -182,7 +193,7 @@ class WeatherService:
                 config_data["brightness"]["end"] = new_end
 
                 # Save the updated configuration
-                await client.set("kurokku:config", json.dumps(config_data))
+                await client.set(keys.config, json.dumps(config_data))
 
                 logger.info(
                     f"Updated brightness settings: begin={new_begin}, end={new_end}"
@@ -220,9 +231,10 @@ class WeatherService:
         for instance in self.registry.instances:
             try:
                 client = await self.connect_to_instance(instance)
+                key_prefix = weather_alert_key_prefix(instance.key_namespace())
 
                 # Clear existing alerts for this location
-                pattern = f"{REDIS_WEATHER_ALERT_KEY_PREFIX}{location.name}:*"
+                pattern = f"{key_prefix}{location.name}:*"
                 # Get all keys matching the pattern first, then delete them
                 keys_to_delete = []
                 async for key in client.scan_iter(pattern):
@@ -233,7 +245,7 @@ class WeatherService:
 
                 # Set new alerts
                 for i, alert in enumerate(alerts):
-                    redis_key = f"{REDIS_WEATHER_ALERT_KEY_PREFIX}{location.name}:{i}"
+                    redis_key = f"{key_prefix}{location.name}:{i}"
                     
                     # Determine priority based on event type
                     alert_priority = self.config.get_alert_priority(alert["message"])
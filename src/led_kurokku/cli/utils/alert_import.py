@@ -0,0 +1,230 @@
+"""Stream alerts from NDJSON into one or more instances.
+
+Every line is a JSON object with the fields of
+:class:`~led_kurokku.widgets.alert.IndividualAlert`, of which only
+``message`` is required, plus an optional ``ttl`` in seconds. Lines are read
+and validated by a thread into a buffer of at most two batches, so memory
+stays constant however long the input is. Alerts are written in pipelined
+batches, one pipeline per instance and batch, while the next batch is read.
+A partial batch is written when no full one arrives within
+``flush_interval``, so a slow producer's alerts are not held back.
+"""
+
+import asyncio
+import json
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import IO, Any, Callable, Optional
+
+from pydantic import ValidationError
+
+from ...utils.redis_pools import RedisPools
+from ...widgets.alert import IndividualAlert
+from ..models.instance import KurokkuInstance
+from .fleet import FleetResult
+from .redis_helpers import alert_entry, write_alert_entries
+
+DEFAULT_FLUSH_INTERVAL = 0.5
+
+@dataclass
+class ImportStats:
+    """Totals of an import."""
+
+    lines: int = 0
+    alerts: int = 0
+    rejected: int = 0
+    results: list[FleetResult] = field(default_factory=list)
+
+
+def parse_alert(line: bytes | str, default_ttl: int) -> tuple[IndividualAlert, int]:
+    """
+    Parse and validate one NDJSON alert.
+
+    :param line: The JSON object.
+    :param default_ttl: TTL of alerts without a ``ttl`` field.
+    :return: The alert and its TTL.
+    :raises ValueError: If the line is not a valid alert.
+    """
+    return alert_from_dict(json.loads(line), default_ttl)
+
+
+def alert_from_dict(data: Any, default_ttl: int) -> tuple[IndividualAlert, int]:
+    """
+    Validate a decoded alert.
+
+    A missing ``id`` or ``timestamp`` is generated, and a missing
+    ``display_duration`` follows the message length, like ``alert send``.
+
+    :param data: The decoded JSON object; it is not modified.
+    :param default_ttl: TTL of alerts without a ``ttl`` field.
+    :return: The alert and its TTL.
+    :raises ValueError: If the data is not a valid alert.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("not a JSON object")
+    data = dict(data)
+    ttl = data.pop("ttl", default_ttl)
+    if not isinstance(ttl, int) or isinstance(ttl, bool) or ttl <= 0:
+        raise ValueError("ttl must be a positive integer")
+    data.setdefault("id", str(uuid.uuid4()))
+    data.setdefault("timestamp", datetime.now().isoformat())
+    if "display_duration" not in data and isinstance(data.get("message"), str):
+        data["display_duration"] = len(data["message"]) * 0.4
+    try:
+        return IndividualAlert.model_validate(data), ttl
+    except ValidationError as e:
+        error = e.errors()[0]
+        location = ".".join(str(part) for part in error["loc"])
+        raise ValueError(f"{location}: {error['msg']}" if location else error["msg"]) from None
+
+
+class _BatchReader:
+    """
+    Reads and parses lines on a thread into a buffer of at most
+    ``max_pending`` alerts, waking the event loop when a batch is ready.
+    """
+
+    def __init__(
+        self,
+        stream: IO,
+        stats: ImportStats,
+        default_ttl: int,
+        batch_size: int,
+        on_reject: Optional[Callable[[int, str], None]],
+    ):
+        self.stream = stream
+        self.stats = stats
+        self.default_ttl = default_ttl
+        self.batch_size = batch_size
+        self.on_reject = on_reject
+        self.finished = False
+        self.ready = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._buffer: list[tuple[str, str, int]] = []
+        self._condition = threading.Condition()
+
+    def start(self) -> None:
+        threading.Thread(target=self._read, name="alert-import-reader", daemon=True).start()
+
+    def _read(self) -> None:
+        stats = self.stats
+        max_pending = self.batch_size * 2
+        try:
+            for line in self.stream:
+                stats.lines += 1
+                if not line.strip():
+                    continue
+                try:
+                    alert, ttl = parse_alert(line, self.default_ttl)
+                except ValueError as e:
+                    stats.rejected += 1
+                    if self.on_reject is not None:
+                        self.on_reject(stats.lines, str(e))
+                    continue
+                # Keyed by ID; each instance's namespace gives the key
+                entry = (alert.id, alert_entry(alert)[1], ttl)
+                with self._condition:
+                    while len(self._buffer) >= max_pending:
+                        self._condition.wait()
+                    self._buffer.append(entry)
+                    stats.alerts += 1
+                    if len(self._buffer) == self.batch_size:
+                        self._loop.call_soon_threadsafe(self.ready.set)
+        finally:
+            with self._condition:
+                self.finished = True
+            self._loop.call_soon_threadsafe(self.ready.set)
+
+    def take(self) -> list[tuple[str, str, int]]:
+        """Take up to a batch of the buffered alerts."""
+        with self._condition:
+            batch = self._buffer[: self.batch_size]
+            del self._buffer[: self.batch_size]
+            if len(self._buffer) < self.batch_size and not self.finished:
+                self.ready.clear()
+            self._condition.notify()
+        return batch
+
+
+async def import_alerts(
+    instances: list[KurokkuInstance],
+    stream: IO,
+    default_ttl: int = 300,
+    batch_size: int = 500,
+    parallel: int = 32,
+    timeout: float = 5.0,
+    flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    on_reject: Optional[Callable[[int, str], None]] = None,
+) -> ImportStats:
+    """
+    Import NDJSON alerts into every instance.
+
+    An instance that fails a batch is dropped from the rest of the import.
+
+    :param instances: Instances to write to.
+    :param stream: NDJSON input, e.g. ``sys.stdin.buffer``.
+    :param default_ttl: TTL of alerts without a ``ttl`` field.
+    :param batch_size: Alerts per pipeline.
+    :param parallel: Maximum number of instances written to at once.
+    :param timeout: Seconds allowed per instance and batch.
+    :param flush_interval: Seconds to wait for a full batch before writing a
+        partial one.
+    :param on_reject: Called with the line number and error of invalid lines,
+        from the reading thread.
+    :return: The totals, with a result per instance whose value is the number
+        of alerts written.
+    """
+    stats = ImportStats()
+    reader = _BatchReader(stream, stats, default_ttl, batch_size, on_reject)
+    results = [FleetResult(instance, True, 0) for instance in instances]
+    pools = RedisPools(socket_connect_timeout=timeout, socket_timeout=timeout)
+    semaphore = asyncio.Semaphore(parallel)
+
+    async def write_to(result: FleetResult, batch: list[tuple[str, str, int]]) -> None:
+        keys = result.instance.key_namespace()
+        entries = [(keys.alert_key(alert_id), value, ttl) for alert_id, value, ttl in batch]
+        async with semaphore:
+            started = time.perf_counter()
+            client = pools.client(result.instance.host, result.instance.port)
+            try:
+                await asyncio.wait_for(write_alert_entries(client, entries), timeout)
+                result.value += len(entries)
+            except asyncio.TimeoutError:
+                result.ok, result.error = False, f"timed out after {timeout:g}s"
+            except Exception as e:
+                result.ok, result.error = False, str(e) or type(e).__name__
+            result.elapsed += time.perf_counter() - started
+
+    async def write(entries: list[tuple[str, str, int]]) -> None:
+        await asyncio.gather(*(write_to(result, entries) for result in results if result.ok))
+
+    reader.start()
+    pending_write: asyncio.Task | None = None
+    try:
+        while True:
+            try:
+                await asyncio.wait_for(reader.ready.wait(), flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            finished = reader.finished
+            batch = reader.take()
+            if batch:
+                # One batch is written while the next one is read
+                if pending_write is not None:
+                    await pending_write
+                if not any(result.ok for result in results):
+                    break
+                pending_write = asyncio.create_task(write(batch))
+            elif finished:
+                break
+        if pending_write is not None:
+            await pending_write
+    finally:
+        if pending_write is not None and not pending_write.done():
+            pending_write.cancel()
+        await pools.aclose()
+    stats.results = results
+    return stats
@@ -0,0 +1,213 @@
+"""Run CLI operations on many instances at once.
+
+Instances are selected by name or glob pattern, by group, or all at once.
+The operation runs on every selected instance concurrently, at most
+``--parallel`` at a time and each bounded by ``--timeout``, over one
+connection pool per Redis endpoint. Results are printed as a table, a row
+per instance as soon as it finishes, so the total time is that of the
+slowest host rather than the sum of all hosts.
+"""
+
+import asyncio
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+import click
+import redis.asyncio as redis
+
+from ...utils.redis_pools import RedisPools
+from ..models.instance import KurokkuInstance, KurokkuRegistry
+
+DEFAULT_PARALLEL = 32
+DEFAULT_TIMEOUT = 5.0
+
+Operation = Callable[[redis.Redis, KurokkuInstance], Awaitable[Any]]
+
+
+@dataclass
+class FleetResult:
+    """Outcome of an operation on one instance."""
+
+    instance: KurokkuInstance
+    ok: bool
+    value: Any = None
+    error: str = ""
+    elapsed: float = 0.0
+
+
+def fleet_options(func):
+    """Add the instance selection and concurrency options to a command."""
+    options = [
+        click.option(
+            "--all", "all_instances", is_flag=True, default=False, help="Target every instance"
+        ),
+        click.option(
+            "--group", "-g", "groups", multiple=True, help="Target a group of instances (repeatable)"
+        ),
+        click.option(
+            "--parallel",
+            type=click.IntRange(min=1),
+            default=DEFAULT_PARALLEL,
+            show_default=True,
+            help="Instances to work on at once",
+        ),
+        click.option(
+            "--timeout",
+            type=click.FloatRange(min=0, min_open=True),
+            default=DEFAULT_TIMEOUT,
+            show_default=True,
+            help="Seconds allowed per instance",
+        ),
+    ]
+    for option in reversed(options):
+        func = option(func)
+    return func
+
+
+def is_fleet(names: tuple[str, ...], groups: tuple[str, ...], all_instances: bool) -> bool:
+    """Whether a selection can target more than one instance."""
+    return (
+        all_instances
+        or bool(groups)
+        or len(names) != 1
+        or any(c in names[0] for c in "*?[")
+    )
+
+
+def select_instances(
+    registry: KurokkuRegistry,
+    names: tuple[str, ...],
+    groups: tuple[str, ...],
+    all_instances: bool,
+) -> list[KurokkuInstance]:
+    """
+    Resolve a fleet selection, exiting when it matches nothing.
+
+    :param registry: The instance registry.
+    :param names: Instance names or glob patterns.
+    :param groups: Group names.
+    :param all_instances: Select every instance.
+    :return: The selected instances.
+    """
+    if not (names or groups or all_instances):
+        raise click.UsageError("Name an instance, or use --group or --all")
+    instances = registry.select(names, groups, all_instances)
+    if not instances:
+        click.echo("No instances matched.", err=True)
+        sys.exit(1)
+    return instances
+
+
+async def run_fleet(
+    instances: list[KurokkuInstance],
+    operation: Operation,
+    parallel: int = DEFAULT_PARALLEL,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> AsyncIterator[FleetResult]:
+    """
+    Run an operation on every instance concurrently.
+
+    :param instances: Instances to run on.
+    :param operation: Coroutine function taking a client and the instance.
+    :param parallel: Maximum number of instances worked on at once.
+    :param timeout: Seconds allowed per instance, including connecting.
+    :return: An async iterator of results in completion order.
+    """
+    pools = RedisPools(socket_connect_timeout=timeout, socket_timeout=timeout)
+    semaphore = asyncio.Semaphore(parallel)
+
+    async def run_one(instance: KurokkuInstance) -> FleetResult:
+        async with semaphore:
+            started = time.perf_counter()
+            client = pools.client(instance.host, instance.port)
+            try:
+                value = await asyncio.wait_for(operation(client, instance), timeout)
+                result = FleetResult(instance, True, value)
+            except asyncio.TimeoutError:
+                result = FleetResult(instance, False, error=f"timed out after {timeout:g}s")
+            except Exception as e:
+                result = FleetResult(instance, False, error=str(e) or type(e).__name__)
+            result.elapsed = time.perf_counter() - started
+            return result
+
+    tasks = [asyncio.create_task(run_one(instance)) for instance in instances]
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            yield await next_result
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await pools.aclose()
+
+
+def run_fleet_command(
+    instances: list[KurokkuInstance],
+    operation: Operation,
+    describe: Callable[[Any], str],
+    parallel: int = DEFAULT_PARALLEL,
+    timeout: float = DEFAULT_TIMEOUT,
+    details: Optional[Callable[[Any], list[str]]] = None,
+) -> list[FleetResult]:
+    """
+    Run an operation on every instance and print a row per instance as it finishes.
+
+    Exits with status 1 if the operation failed on any instance.
+
+    :param instances: Instances to run on.
+    :param operation: Coroutine function taking a client and the instance.
+    :param describe: Summarizes a successful result for its row.
+    :param parallel: Maximum number of instances worked on at once.
+    :param timeout: Seconds allowed per instance.
+    :param details: Optional extra lines printed under a successful row.
+    :return: The results, in completion order.
+    """
+    width = table_width(instances)
+    echo_header(width)
+
+    async def collect() -> list[FleetResult]:
+        results = []
+        async for result in run_fleet(instances, operation, parallel, timeout):
+            echo_row(result, width, describe(result.value) if result.ok else result.error)
+            if result.ok and details is not None:
+                for line in details(result.value):
+                    click.echo(f"    {line}")
+            results.append(result)
+        return results
+
+    started = time.perf_counter()
+    results = asyncio.run(collect())
+    echo_summary(results, time.perf_counter() - started)
+    if any(not result.ok for result in results):
+        sys.exit(1)
+    return results
+
+
+def table_width(instances: list[KurokkuInstance]) -> int:
+    """Width of the instance column of a result table."""
+    return max(len("INSTANCE"), *(len(instance.name) for instance in instances))
+
+
+def echo_header(width: int) -> None:
+    """Print the header of a result table."""
+    click.echo(f"{'INSTANCE':<{width}}  {'STATUS':<6}  {'TIME':>8}  DETAIL")
+
+
+def echo_row(result: FleetResult, width: int, detail: str) -> None:
+    """Print a result table row."""
+    status = "ok" if result.ok else "FAILED"
+    click.echo(
+        f"{result.instance.name:<{width}}  {status:<6}  "
+        f"{result.elapsed * 1000:>5.0f} ms  {detail}"
+    )
+
+
+def echo_summary(results: list[FleetResult], elapsed: float) -> None:
+    """Print the line summarizing a result table."""
+    failed = sum(not result.ok for result in results)
+    click.echo(
+        f"{len(results)} instances: {len(results) - failed} ok, {failed} failed"
+        f" in {elapsed:.1f}s"
+    )
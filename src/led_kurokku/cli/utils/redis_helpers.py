@@ -1,15 +1,17 @@
 import json
 import asyncio
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
 
 import redis.asyncio as redis
 
 from ..models.instance import KurokkuInstance
 from ... import models  # Updated import path
+from ...config_layers import layer_key
+from ...namespace import DEFAULT_NAMESPACE, KeyNamespace
 from ...widgets.alert import IndividualAlert
 from ...core import (
     REDIS_KEY_CONFIG,
-    REDIS_KEY_ALERT,
     REDIS_KEY_SEPARATOR,
 )
 
@@ -34,12 +36,253 @@ async def test_connection(instance: KurokkuInstance) -> bool:
         return False
 
 
+ALERT_KEY_PATTERN = DEFAULT_NAMESPACE.alert_pattern
+DEFAULT_BATCH_SIZE = 500  # Alert keys per MGET or UNLINK
+
+
+def make_alert(
+    message: str,
+    display_duration: Optional[float] = None,
+    priority: int = 0,
+    delete_after_display: bool = False,
+) -> IndividualAlert:
+    """Create an alert with a new ID, timestamped now."""
+    import uuid
+    from datetime import datetime
+
+    # Calculate display duration if not provided
+    if display_duration is None:
+        display_duration = len(message) * 0.4
+
+    return IndividualAlert(
+        id=str(uuid.uuid4()),
+        timestamp=datetime.now().isoformat(),
+        message=message,
+        priority=priority,
+        display_duration=display_duration,
+        delete_after_display=delete_after_display,
+    )
+
+
+# Client-level operations; they raise on errors, for callers that report
+# errors themselves (e.g. fleet commands). ``keys`` are those of the clock
+# worked on, see KurokkuInstance.key_namespace().
+
+
+async def write_config(
+    client: redis.Redis, config: models.ConfigSettings, keys: KeyNamespace = DEFAULT_NAMESPACE
+) -> None:
+    """Store a configuration."""
+    await client.set(keys.config, config.model_dump_json())
+
+
+async def write_config_layer(client: redis.Redis, layer: str, data: Dict[str, Any]) -> None:
+    """Store a shared configuration layer, ``base`` or ``group:<name>``."""
+    await client.set(layer_key(REDIS_KEY_CONFIG, layer), json.dumps(data))
+
+
+async def delete_config_layer(client: redis.Redis, layer: str) -> bool:
+    """Delete a shared configuration layer; returns whether it existed."""
+    return bool(await client.delete(layer_key(REDIS_KEY_CONFIG, layer)))
+
+
+async def write_config_groups(
+    client: redis.Redis, groups: List[str], keys: KeyNamespace = DEFAULT_NAMESPACE
+) -> None:
+    """Store the groups whose configuration layers an instance applies, in order."""
+    await client.set(f"{keys.config}:groups", json.dumps(groups))
+
+
+async def read_config(
+    client: redis.Redis, keys: KeyNamespace = DEFAULT_NAMESPACE
+) -> Optional[models.ConfigSettings]:
+    """Read the stored configuration, or None if there is none."""
+    config_json = await client.get(keys.config)
+    if not config_json:
+        return None
+    return models.ConfigSettings.model_validate_json(config_json)
+
+
+def alert_entry(
+    alert: IndividualAlert, keys: KeyNamespace = DEFAULT_NAMESPACE
+) -> tuple[str, str]:
+    """The key and value an alert is stored as."""
+    alert_key = keys.alert_key(alert.id)
+    alert_json = alert.model_dump_json(exclude={"id"})  # Exclude ID as it's in the key
+    return alert_key, alert_json
+
+
+async def write_alert(
+    client: redis.Redis,
+    alert: IndividualAlert,
+    ttl: int = 300,
+    keys: KeyNamespace = DEFAULT_NAMESPACE,
+) -> None:
+    """Store an alert that expires after ``ttl`` seconds."""
+    alert_key, alert_json = alert_entry(alert, keys)
+    await client.set(alert_key, alert_json, ex=ttl)
+
+
+async def publish_alert(
+    client: redis.Redis,
+    alert: IndividualAlert,
+    ttl: int = 300,
+    keys: KeyNamespace = DEFAULT_NAMESPACE,
+) -> int:
+    """
+    Publish an alert for a listening clock to show at once and store itself.
+
+    :return: The number of subscribers that received it; 0 means no clock is
+        listening and nothing was stored.
+    """
+    payload = alert.model_dump()
+    payload["ttl"] = ttl
+    payload["sent_at"] = time.time()  # Lets the clock log the end-to-end latency
+    return await client.publish(keys.channel_alert, json.dumps(payload))
+
+
+async def deliver_alert(
+    client: redis.Redis,
+    alert: IndividualAlert,
+    ttl: int = 300,
+    direct: bool = False,
+    keys: KeyNamespace = DEFAULT_NAMESPACE,
+) -> str:
+    """
+    Store an alert, or publish it directly if ``direct`` and a clock is listening.
+
+    :return: ``"published"`` or ``"stored"``.
+    """
+    if direct and await publish_alert(client, alert, ttl, keys):
+        return "published"
+    await write_alert(client, alert, ttl, keys)
+    return "stored"
+
+
+async def write_alert_entries(
+    client: redis.Redis, entries: list[tuple[str, str, int]], transaction: bool = False
+) -> None:
+    """
+    Store many alerts in one pipeline.
+
+    :param client: Redis client.
+    :param entries: Key, value (see :func:`alert_entry`) and TTL of every alert.
+    :param transaction: Write them atomically, in a MULTI/EXEC block.
+    """
+    pipe = client.pipeline(transaction=transaction)
+    for alert_key, alert_json, ttl in entries:
+        pipe.set(alert_key, alert_json, ex=ttl)
+    await pipe.execute()
+
+
+async def _alert_key_batches(
+    client: redis.Redis,
+    batch_size: int,
+    command: Callable[[Any, list], Any],
+    pattern: str = ALERT_KEY_PATTERN,
+) -> AsyncIterator[tuple[list, Any]]:
+    """
+    Run a command on batches of alert keys as they are scanned.
+
+    Each round trip is one pipeline holding the next SCAN and the command for
+    the keys the previous SCAN returned, so scanning and the command overlap.
+
+    :param client: Redis client.
+    :param batch_size: Maximum keys per command; also the SCAN count hint.
+    :param command: Adds the command for a batch of keys to a pipeline.
+    :param pattern: The pattern of the alert keys.
+    :return: An async iterator of each batch of keys and the command's reply.
+    """
+    cursor = 0
+    scanning = True
+    pending: list = []
+    while scanning or pending:
+        batch, pending = pending[:batch_size], pending[batch_size:]
+        pipe = client.pipeline(transaction=False)
+        if scanning:
+            pipe.scan(cursor, match=pattern, count=batch_size)
+        if batch:
+            command(pipe, batch)
+        replies = await pipe.execute()
+        if scanning:
+            cursor, keys = replies[0]
+            pending.extend(keys)
+            scanning = cursor != 0
+        if batch:
+            yield batch, replies[-1]
+
+
+def _alert_id(key: bytes | str) -> str:
+    if isinstance(key, bytes):
+        key = key.decode("utf-8")
+    return key.rsplit(REDIS_KEY_SEPARATOR, 1)[-1]
+
+
+async def iter_alerts(
+    client: redis.Redis,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    keys: KeyNamespace = DEFAULT_NAMESPACE,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Read the stored alerts in batches, as they arrive.
+
+    :param client: Redis client.
+    :param batch_size: Maximum alerts fetched per MGET.
+    :return: An async iterator of lists of alerts, each with its ID.
+    """
+    async for batch_keys, values in _alert_key_batches(
+        client, batch_size, lambda pipe, batch: pipe.mget(batch), keys.alert_pattern
+    ):
+        # Alerts expire between SCAN and MGET
+        found = [(key, value) for key, value in zip(batch_keys, values) if value]
+        if not found:
+            continue
+        # One JSON document for the whole batch instead of one per alert
+        if isinstance(found[0][1], bytes):
+            document = b"[" + b",".join(value for _, value in found) + b"]"
+        else:
+            document = "[" + ",".join(value for _, value in found) + "]"
+        alerts = json.loads(document)
+        for (key, _), alert_dict in zip(found, alerts):
+            alert_dict["id"] = _alert_id(key)
+        yield alerts
+
+
+async def read_alerts(
+    client: redis.Redis,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    keys: KeyNamespace = DEFAULT_NAMESPACE,
+) -> List[Dict[str, Any]]:
+    """Read every stored alert, with its ID."""
+    alerts = []
+    async for batch in iter_alerts(client, batch_size, keys):
+        alerts.extend(batch)
+    return alerts
+
+
+async def delete_alerts(
+    client: redis.Redis,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    keys: KeyNamespace = DEFAULT_NAMESPACE,
+) -> int:
+    """Delete every stored alert and return how many there were."""
+    count = 0
+    async for _, deleted in _alert_key_batches(
+        client, batch_size, lambda pipe, batch: pipe.unlink(*batch), keys.alert_pattern
+    ):
+        count += deleted
+    return count
+
+
+# Instance-level operations; they open a connection per call, print errors
+# and return a falsy result instead of raising
+
+
 async def set_config(instance: KurokkuInstance, config: models.ConfigSettings) -> bool:
     """Set the configuration for an instance."""
     try:
         client = await connect_to_instance(instance)
-        config_json = config.json()
-        await client.set(REDIS_KEY_CONFIG, config_json)
+        await write_config(client, config, instance.key_namespace())
         await client.close()
         return True
     except Exception as e:
@@ -51,14 +294,9 @@ async def get_config(instance: KurokkuInstance) -> Optional[models.ConfigSetting
     """Get the configuration from an instance."""
     try:
         client = await connect_to_instance(instance)
-        config_json = await client.get(REDIS_KEY_CONFIG)
+        config = await read_config(client, instance.key_namespace())
         await client.close()
-
-        if not config_json:
-            return None
-
-        config_dict = json.loads(config_json)
-        return models.ConfigSettings.parse_obj(config_dict)
+        return config
     except Exception as e:
         print(f"Error getting config: {e}")
         return None
@@ -71,62 +309,27 @@ async def send_alert(
     display_duration: Optional[float] = None,
     priority: int = 0,
     delete_after_display: bool = False,
+    direct: bool = False,
 ) -> bool:
-    """Send an alert to an instance."""
+    """Send an alert to an instance, over pub/sub if ``direct`` (see :func:`deliver_alert`)."""
     try:
-        import uuid
-        from datetime import datetime
-
-        # Calculate display duration if not provided
-        if display_duration is None:
-            display_duration = len(message) * 0.4
-
-        # Create an alert object
-        alert_id = str(uuid.uuid4())
-        alert = IndividualAlert(
-            id=alert_id,
-            timestamp=datetime.now().isoformat(),
-            message=message,
-            priority=priority,
-            display_duration=display_duration,
-            delete_after_display=delete_after_display,
-        )
-
-        # Connect to Redis
+        alert = make_alert(message, display_duration, priority, delete_after_display)
         client = await connect_to_instance(instance)
-
-        # Set the alert
-        alert_key = f"{REDIS_KEY_ALERT}{REDIS_KEY_SEPARATOR}{alert_id}"
-        alert_json = alert.json(exclude={"id"})  # Exclude ID as it's in the key
-
-        await client.set(alert_key, alert_json, ex=ttl)
+        await deliver_alert(client, alert, ttl, direct, instance.key_namespace())
         await client.close()
-
         return True
     except Exception as e:
         print(f"Error sending alert: {e}")
         return False
 
 
-async def list_alerts(instance: KurokkuInstance) -> List[Dict[str, Any]]:
+async def list_alerts(
+    instance: KurokkuInstance, batch_size: int = DEFAULT_BATCH_SIZE
+) -> List[Dict[str, Any]]:
     """List all alerts for an instance."""
     try:
         client = await connect_to_instance(instance)
-
-        # Get all alert keys
-        alert_keys = []
-        async for key in client.scan_iter(f"{REDIS_KEY_ALERT}{REDIS_KEY_SEPARATOR}*"):
-            alert_keys.append(key)
-
-        # Get the alerts
-        alerts = []
-        for key in alert_keys:
-            alert_json = await client.get(key)
-            if alert_json:
-                alert_dict = json.loads(alert_json)
-                alert_dict["id"] = key.decode("utf-8").split(REDIS_KEY_SEPARATOR)[-1]
-                alerts.append(alert_dict)
-
+        alerts = await read_alerts(client, batch_size, instance.key_namespace())
         await client.close()
         return alerts
     except Exception as e:
@@ -134,22 +337,11 @@ async def list_alerts(instance: KurokkuInstance) -> List[Dict[str, Any]]:
         return []
 
 
-async def clear_alerts(instance: KurokkuInstance) -> int:
+async def clear_alerts(instance: KurokkuInstance, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
     """Clear all alerts for an instance."""
     try:
         client = await connect_to_instance(instance)
-
-        # Get all alert keys
-        alert_keys = []
-        async for key in client.scan_iter(f"{REDIS_KEY_ALERT}{REDIS_KEY_SEPARATOR}*"):
-            alert_keys.append(key)
-
-        # Delete the alerts
-        count = 0
-        for key in alert_keys:
-            await client.delete(key)
-            count += 1
-
+        count = await delete_alerts(client, batch_size, instance.key_namespace())
         await client.close()
         return count
     except Exception as e:
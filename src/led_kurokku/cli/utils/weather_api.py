@@ -8,12 +8,20 @@ from typing import Dict, List, Optional, Tuple, Any
 import aiohttp
 from loguru import logger
 
+from ...namespace import DEFAULT_NAMESPACE, REDIS_KEY_SEPARATOR, KeyNamespace
 from ..models.weather import WeatherLocation
 
 
-# Redis key constants
+# Redis key constants; temperatures are shared by every clock on a Redis
 REDIS_WEATHER_TEMP_KEY_PREFIX = "kurokku:weather:temp:"
-REDIS_WEATHER_ALERT_KEY_PREFIX = "kurokku:alert:weather:"
+
+
+def weather_alert_key_prefix(keys: KeyNamespace) -> str:
+    """Return the prefix of a clock's weather alert keys."""
+    return keys.alert_key("weather") + REDIS_KEY_SEPARATOR
+
+
+REDIS_WEATHER_ALERT_KEY_PREFIX = weather_alert_key_prefix(DEFAULT_NAMESPACE)
 
 
 async def fetch_openweather_data(
@@ -1,7 +1,16 @@
 #!/usr/bin/env python3
 import click
 
-from .cli.commands import instances, config, template, alert, weather
+from .cli.commands import (
+    instances,
+    config,
+    template,
+    alert,
+    weather,
+    simulate,
+    recording,
+    command,
+)
 
 
 # Main CLI entry point
@@ -17,6 +26,9 @@ cli.add_command(config)
 cli.add_command(template)
 cli.add_command(alert)
 cli.add_command(weather)
+cli.add_command(simulate)
+cli.add_command(recording)
+cli.add_command(command)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,281 @@
+"""Commands delivered over a Redis stream and acknowledged by the clock.
+
+Commands published on the ``kurokku:channel:*`` channels are fire and
+forget: a clock that is reconnecting misses them, and the sender cannot
+tell. A clock started with ``--command-stream`` also reads commands from the
+stream ``kurokku:commands`` (``kurokku:<namespace>:commands``) through the
+consumer group :data:`COMMAND_GROUP`. Commands added while the clock is away
+are read when it is back. Commands it read but did not acknowledge before
+a restart are read again.
+
+The commands are those of the channels: ``STOP``, ``ALERT`` and alert JSON.
+After acting on a command the clock acknowledges it (XACK) and adds a
+:class:`CommandAck` to ``kurokku:commands:acks``, with its result and how
+long it took, which senders wait for. A command older than its ``ttl`` is
+acknowledged as expired instead, so a clock that was away for a day does not
+act on stale commands.
+
+XREADGROUP changes the consumer group, so the streams are read and written
+on the primary, through the clock's write client.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import redis.asyncio as redis
+
+from .namespace import DEFAULT_NAMESPACE, KeyNamespace
+
+COMMAND_GROUP = "kurokku"
+COMMAND_TTL = 300  # Seconds a command may wait for a clock that is away
+COMMAND_STREAM_MAXLEN = 1000  # Commands kept, approximately
+ACK_STREAM_MAXLEN = 10000  # Acknowledgements kept, approximately
+READ_BLOCK = 1.0  # Seconds each read waits for a command
+RETRY_DELAY = 1.0  # Seconds to wait before reading again after an error
+
+ACK_OK = "ok"
+ACK_EXPIRED = "expired"
+ACK_ERROR = "error"
+
+logger = logging.getLogger(__name__)
+
+
+def _text(value: bytes | str) -> str:
+    return value.decode("utf-8", errors="ignore") if isinstance(value, bytes) else value
+
+
+def entry_time(entry_id: bytes | str) -> float:
+    """The Redis server time, in epoch seconds, a stream entry was added at."""
+    return int(_text(entry_id).partition("-")[0]) / 1000
+
+
+@dataclass
+class CommandAck:
+    """A clock's acknowledgement of a command."""
+
+    id: str  # The acknowledgement's stream entry ID
+    command: str  # The command's stream entry ID
+    consumer: str
+    result: str  # ACK_OK, ACK_EXPIRED or ACK_ERROR
+    error: str = ""
+    processing_ms: float = 0.0  # From reading the command to acting on it
+
+    @property
+    def delivery_ms(self) -> float:
+        """
+        Milliseconds from adding the command to acknowledging it.
+
+        Both times are taken from the stream entry IDs, i.e. the Redis
+        server's clock, so the clocks of sender and clock do not matter.
+        """
+        return (entry_time(self.id) - entry_time(self.command)) * 1000
+
+    @classmethod
+    def from_entry(cls, entry_id: bytes | str, fields: dict) -> "CommandAck":
+        """Parse an entry of the acknowledgement stream."""
+        fields = {_text(k): _text(v) for k, v in fields.items()}
+        return cls(
+            id=_text(entry_id),
+            command=fields.get("command", ""),
+            consumer=fields.get("consumer", ""),
+            result=fields.get("result", ""),
+            error=fields.get("error", ""),
+            processing_ms=float(fields.get("processing_ms", 0)),
+        )
+
+
+async def ensure_command_group(client: redis.Redis, stream: str) -> None:
+    """
+    Create the stream's consumer group, at the end of the stream, if it is missing.
+
+    :param client: Client of the primary.
+    :param stream: The command stream.
+    """
+    try:
+        await client.xgroup_create(stream, COMMAND_GROUP, id="$", mkstream=True)
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+async def read_commands(
+    client: redis.Redis,
+    consumer: str,
+    run_command: Callable[[str], None],
+    keys: KeyNamespace = DEFAULT_NAMESPACE,
+) -> None:
+    """
+    Read, act on and acknowledge commands until cancelled.
+
+    Commands this consumer read before, but did not acknowledge, are read
+    first. Errors reading from Redis are logged and reading resumes, so the
+    clock catches up with the commands it missed once Redis is back.
+
+    :param client: The clock's write client, i.e. of the primary.
+    :param consumer: Name of the clock in the consumer group.
+    :param run_command: Acts on a command, raising ValueError if it is invalid.
+    :param keys: The clock's Redis keys.
+    """
+    while True:
+        try:
+            await ensure_command_group(client, keys.commands)
+            logger.info(f"Reading commands from {keys.commands} as {consumer}")
+            while True:
+                # Our pending commands first, i.e. those read before a restart
+                # or whose acknowledgement failed, then new ones
+                response = await client.xreadgroup(
+                    COMMAND_GROUP, consumer, {keys.commands: "0"}
+                )
+                if not (response and response[0][1]):
+                    response = await client.xreadgroup(
+                        COMMAND_GROUP,
+                        consumer,
+                        {keys.commands: ">"},
+                        block=int(READ_BLOCK * 1000),
+                    )
+                entries = response[0][1] if response else []
+                if not entries:
+                    continue
+                now = await _server_time(client)
+                for entry_id, fields in entries:
+                    await _process(client, keys, consumer, entry_id, fields, now, run_command)
+        except redis.RedisError as e:
+            logger.warning(f"Error reading commands, retrying: {e}")
+            await asyncio.sleep(RETRY_DELAY)
+
+
+async def _server_time(client: redis.Redis) -> float:
+    seconds, microseconds = await client.time()
+    return seconds + microseconds / 1e6
+
+
+async def _process(
+    client: redis.Redis,
+    keys: KeyNamespace,
+    consumer: str,
+    entry_id: bytes,
+    fields: Optional[dict],
+    now: float,
+    run_command: Callable[[str], None],
+) -> None:
+    started = time.perf_counter()
+    # A pending command trimmed from the stream has no fields
+    fields = {_text(k): _text(v) for k, v in (fields or {}).items()}
+    command = fields.get("command", "")
+    error = ""
+    try:
+        ttl = float(fields.get("ttl", COMMAND_TTL))
+    except ValueError:
+        ttl = COMMAND_TTL
+    if now - entry_time(entry_id) > ttl:
+        result = ACK_EXPIRED
+    else:
+        try:
+            run_command(command)
+            result = ACK_OK
+        except ValueError as e:
+            result, error = ACK_ERROR, str(e)
+        except Exception as e:
+            logger.exception(f"Error running command {_text(entry_id)}")
+            result, error = ACK_ERROR, f"{type(e).__name__}: {e}"
+    processing_ms = (time.perf_counter() - started) * 1000
+    logger.info(
+        f"Command {_text(entry_id)} {command[:20]!r}: {result}"
+        f" in {processing_ms:.2f} ms, {(now - entry_time(entry_id)) * 1000:.0f} ms after it was sent"
+    )
+
+    pipe = client.pipeline(transaction=True)
+    pipe.xack(keys.commands, COMMAND_GROUP, entry_id)
+    pipe.xadd(
+        keys.command_acks,
+        {
+            "command": _text(entry_id),
+            "consumer": consumer,
+            "result": result,
+            "error": error,
+            "processing_ms": f"{processing_ms:.3f}",
+        },
+        maxlen=ACK_STREAM_MAXLEN,
+        approximate=True,
+    )
+    acknowledging = asyncio.ensure_future(pipe.execute())
+    try:
+        await asyncio.shield(acknowledging)
+    except asyncio.CancelledError:
+        # Stopping, e.g. for this very command: acknowledge it first
+        await acknowledging
+        raise
+
+
+async def send_command(
+    client: redis.Redis,
+    command: str,
+    ttl: int = COMMAND_TTL,
+    keys: KeyNamespace = DEFAULT_NAMESPACE,
+) -> str:
+    """
+    Add a command to a clock's command stream.
+
+    The consumer group is created if missing, so a clock that has never read
+    the stream still gets the command when it starts.
+
+    :param client: Client of the clock's primary.
+    :param command: ``STOP``, ``ALERT`` or alert JSON.
+    :param ttl: Seconds the clock may still act on the command.
+    :param keys: The clock's Redis keys.
+    :return: The command's stream entry ID.
+    """
+    pipe = client.pipeline(transaction=False)
+    pipe.xgroup_create(keys.commands, COMMAND_GROUP, id="$", mkstream=True)
+    pipe.xadd(
+        keys.commands,
+        {"command": command, "ttl": ttl},
+        maxlen=COMMAND_STREAM_MAXLEN,
+        approximate=True,
+    )
+    created, command_id = await pipe.execute(raise_on_error=False)
+    if isinstance(created, Exception) and "BUSYGROUP" not in str(created):
+        raise created
+    if isinstance(command_id, Exception):
+        raise command_id
+    return _text(command_id)
+
+
+async def wait_for_ack(
+    client: redis.Redis,
+    command_id: str,
+    timeout: float,
+    keys: KeyNamespace = DEFAULT_NAMESPACE,
+    block: Optional[float] = None,
+) -> CommandAck:
+    """
+    Wait for a clock to acknowledge a command.
+
+    :param client: Client of the clock's primary.
+    :param command_id: The command's stream entry ID.
+    :param timeout: Seconds to wait.
+    :param keys: The clock's Redis keys.
+    :param block: Most seconds one read waits, below the client's socket
+        timeout; :data:`READ_BLOCK` by default.
+    :return: The acknowledgement.
+    :raises TimeoutError: If it was not acknowledged in time.
+    """
+    # Acknowledgements are added later, by the server's clock, but the
+    # sequence numbers of two streams are unrelated within a millisecond
+    last_id = f"{max(0, int(entry_time(command_id) * 1000) - 1)}-0"
+    block = READ_BLOCK if block is None else block
+    deadline = time.monotonic() + timeout
+    while (remaining := deadline - time.monotonic()) > 0:
+        response = await client.xread(
+            {keys.command_acks: last_id}, block=max(1, int(min(remaining, block) * 1000))
+        )
+        for _, entries in response or []:
+            for entry_id, fields in entries:
+                last_id = entry_id
+                ack = CommandAck.from_entry(entry_id, fields)
+                if ack.command == command_id:
+                    return ack
+    raise TimeoutError(f"not acknowledged within {timeout:g}s")
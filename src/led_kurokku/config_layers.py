@@ -0,0 +1,210 @@
+"""Resolve a clock's configuration from shared and per-clock layers.
+
+The effective configuration is merged, in order, from:
+
+* ``kurokku:config:base``, shared by the whole fleet;
+* ``kurokku:config:group:<name>`` for each group listed, in order, in the
+  clock's ``kurokku:config:groups`` (a JSON array);
+* ``kurokku:config``, the clock's own settings.
+
+Every layer is optional, so a clock with only ``kurokku:config`` behaves as
+before. Mappings are merged key by key, ``null`` removes a key and anything
+else, lists included, replaces the value below it.
+
+The shared layers live in the clock's own Redis, or in a fleet Redis that
+every clock watches, so a fleet-wide change is one write. They are not
+namespaced: a clock with its own key namespace (see
+:mod:`led_kurokku.namespace`) reads ``kurokku:<instance>:config`` and
+``kurokku:<instance>:config:groups`` over the same shared layers. Each layer is
+cached as parsed JSON, and the shared layers are cached merged, so a changed
+key costs one GET and a merge of what is above it.
+"""
+
+import json
+import logging
+from typing import Optional
+
+import redis.asyncio as redis
+
+logger = logging.getLogger(__name__)
+
+BASE_LAYER = "base"
+GROUP_LAYER_PREFIX = "group:"
+
+
+def deep_merge(base: dict, override: dict) -> dict:
+    """
+    Merge a layer over another.
+
+    :param base: The lower layer; it is not modified.
+    :param override: The upper layer; ``None`` values remove keys.
+    :return: The merged layer.
+    """
+    merged = dict(base)
+    for key, value in override.items():
+        if value is None:
+            merged.pop(key, None)
+        elif isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def layer_key(config_key: str, layer: str) -> str:
+    """
+    The Redis key of a shared layer.
+
+    :param config_key: The clock's own configuration key, e.g. ``kurokku:config``.
+    :param layer: ``base`` or ``group:<name>``.
+    :return: The layer's key.
+    :raises ValueError: If the layer name is not valid.
+    """
+    if layer == BASE_LAYER:
+        return f"{config_key}:{BASE_LAYER}"
+    if layer.startswith(GROUP_LAYER_PREFIX) and layer[len(GROUP_LAYER_PREFIX):]:
+        return f"{config_key}:{layer}"
+    raise ValueError(f"Unknown layer '{layer}', expected 'base' or 'group:<name>'")
+
+
+class ConfigLayers:
+    """
+    The cached layers of a clock's configuration.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        config_key: str,
+        fleet_client: Optional[redis.Redis] = None,
+        shared_key: Optional[str] = None,
+    ):
+        """
+        Initialize the layers.
+
+        :param redis_client: The clock's Redis, holding its own layer and groups.
+        :param config_key: The clock's own configuration key, e.g. ``kurokku:config``.
+        :param fleet_client: Optional Redis holding the shared layers; by
+            default they are read from the clock's Redis.
+        :param shared_key: The key the shared layer keys start with, by
+            default ``config_key``.
+        """
+        self.redis_client = redis_client
+        self.fleet_client = fleet_client
+        self.config_key = config_key
+        self.shared_key = shared_key or config_key
+        self.groups_key = f"{config_key}:groups"
+        self.groups: list[str] = []
+        self.fetches = 0  # Layer keys read
+        self._layers: dict[str, Optional[dict]] = {}
+        self._shared: dict = {}
+        self._effective: Optional[dict] = None
+
+    def shared_keys(self) -> list[str]:
+        """Keys of the shared layers, lowest first."""
+        return [layer_key(self.shared_key, BASE_LAYER)] + [
+            layer_key(self.shared_key, GROUP_LAYER_PREFIX + group) for group in self.groups
+        ]
+
+    @property
+    def effective(self) -> Optional[dict]:
+        """The merged configuration, or None if no layer exists."""
+        return self._effective
+
+    async def load(self) -> Optional[dict]:
+        """
+        Read every layer.
+
+        :return: The merged configuration.
+        """
+        self.groups = await self._read_groups()
+        self._layers = {}
+        await self._fetch(self.shared_keys(), shared=True)
+        await self._fetch([self.config_key], shared=False)
+        self._merge_shared()
+        self._merge()
+        return self._effective
+
+    async def refresh(self, key: str, fleet: bool = False) -> bool:
+        """
+        Re-read a key that changed.
+
+        :param key: The key from the keyspace event.
+        :param fleet: Whether the event came from the fleet Redis.
+        :return: Whether the merged configuration changed.
+        """
+        before = self._effective
+        shared_from_fleet = self.fleet_client is not None
+        if key == self.config_key and not fleet:
+            await self._fetch([key], shared=False)
+        elif key == self.groups_key and not fleet:
+            groups = await self._read_groups()
+            if groups == self.groups:
+                return False
+            self.groups = groups
+            shared = self.shared_keys()
+            # Layers of groups left are dropped, those of groups joined read
+            self._layers = {
+                k: v for k, v in self._layers.items() if k == self.config_key or k in shared
+            }
+            await self._fetch([k for k in shared if k not in self._layers], shared=True)
+            self._merge_shared()
+        elif key in self.shared_keys() and fleet == shared_from_fleet:
+            await self._fetch([key], shared=True)
+            self._merge_shared()
+        else:
+            return False
+        self._merge()
+        return self._effective != before
+
+    async def _read_groups(self) -> list[str]:
+        value = await self.redis_client.get(self.groups_key)
+        if value is None:
+            return []
+        try:
+            groups = json.loads(value)
+        except ValueError as e:
+            logger.error(f"Invalid {self.groups_key}: {e}")
+            return []
+        if not isinstance(groups, list) or not all(isinstance(g, str) for g in groups):
+            logger.error(f"Invalid {self.groups_key}: expected a JSON array of names")
+            return []
+        return groups
+
+    async def _fetch(self, keys: list[str], shared: bool) -> None:
+        if not keys:
+            return
+        client = self.fleet_client if shared and self.fleet_client is not None else self.redis_client
+        values = await client.mget(keys)
+        self.fetches += len(keys)
+        for key, value in zip(keys, values):
+            self._layers[key] = _parse_layer(key, value)
+
+    def _merge_shared(self) -> None:
+        shared: dict = {}
+        for key in self.shared_keys():
+            layer = self._layers.get(key)
+            if layer:
+                shared = deep_merge(shared, layer)
+        self._shared = shared
+
+    def _merge(self) -> None:
+        own = self._layers.get(self.config_key)
+        if own is None and not self._shared:
+            self._effective = None
+        else:
+            self._effective = deep_merge(self._shared, own or {})
+
+
+def _parse_layer(key: str, value: Optional[bytes | str]) -> Optional[dict]:
+    if value is None:
+        return None
+    try:
+        layer = json.loads(value)
+    except ValueError as e:
+        logger.error(f"Invalid configuration layer {key}: {e}")
+        return None
+    if not isinstance(layer, dict):
+        logger.error(f"Invalid configuration layer {key}: not a JSON object")
+        return None
+    return layer
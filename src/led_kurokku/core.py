@@ -1,15 +1,27 @@
 import asyncio
-from datetime import datetime
 import hashlib
 import json
 import logging
-from typing import Optional
+import uuid
+from typing import Callable, Optional
 
 import redis.asyncio as redis
+from .alert_events import DEFAULT_ALERT_DEBOUNCE, AlertTracker, OwnWrites
+from .alert_scheduler import DEFAULT_PREEMPT_PRIORITY, AlertScheduler, wait_for_either
+from .command_stream import read_commands
+from .config_layers import ConfigLayers
 from .models import ConfigSettings
+from .namespace import (  # The key constants are re-exported from here
+    DEFAULT_NAMESPACE,
+    REDIS_KEY_SEPARATOR,
+    KeyNamespace,
+)
 from .display_factory import create_display, DisplayType
 from .tm1637.factory import DriverType
 from .tm1637.base_driver import BaseDriver
+from .utils import clock
+from .widgets.alert import IndividualAlert
+from .widgets.base import WidgetConfig
 
 from .widgets import widget_factory
 
@@ -17,20 +29,124 @@ from .widgets import widget_factory
 STOP_WORD = "STOP"  # Define a stop word for the PubSub channel
 ALERT_WORD = "ALERT"  # Define an alert word for the PubSub channel
 
-REDIS_KEY_BASE = "kurokku"
-REDIS_KEY_SEPARATOR = ":"
-REDIS_KEY_CONFIG = f"{REDIS_KEY_BASE}{REDIS_KEY_SEPARATOR}config"
-REDIS_KEY_ALERT = f"{REDIS_KEY_BASE}{REDIS_KEY_SEPARATOR}alert"
-REDIS_CHANNEL_PATTERN = (
-    f"{REDIS_KEY_BASE}{REDIS_KEY_SEPARATOR}channel{REDIS_KEY_SEPARATOR}*"
-)
+# The un-namespaced keys; a clock with an instance name uses a KeyNamespace
+REDIS_KEY_CONFIG = DEFAULT_NAMESPACE.config
+REDIS_KEY_ALERT = DEFAULT_NAMESPACE.alert
+REDIS_CHANNEL_PATTERN = DEFAULT_NAMESPACE.channel_pattern
+# Channel alert JSON is published on to show it without a keyspace round trip
+REDIS_CHANNEL_ALERT = DEFAULT_NAMESPACE.channel_alert
+# Patterns for database 0; event_listener uses the client's own database
 REDIS_CONFIG_EVENT = "__keyspace@0__:" + REDIS_KEY_CONFIG + "*"
 REDIS_ALERT_EVENT = "__keyspace@0__:" + REDIS_KEY_ALERT + "*"
 
+IDLE_ROTATION_TIME = 0.05  # A rotation shorter than this displayed nothing
+IDLE_SLEEP = 1.0  # Seconds to wait before retrying an idle rotation
+DIRECT_ALERT_TTL = 300  # Seconds a direct alert without a ``ttl`` is stored for
+# Shown while no configuration layer exists, e.g. after the last one was deleted
+EMPTY_CONFIG = {"widgets": []}
+FLEET_RETRY_DELAY = 1.0  # Seconds before reconnecting to the fleet Redis, doubled per failure
+FLEET_RETRY_MAX_DELAY = 60.0  # Longest wait between reconnects
+
 
 logger = logging.getLogger(__name__)
 
 
+def keyspace_pattern(key: str, db: int = 0) -> str:
+    """
+    Keyspace notification channel pattern for keys starting with ``key``.
+
+    :param key: Key prefix to watch.
+    :param db: Redis database the keys live in.
+    :return: The channel pattern.
+    """
+    return f"__keyspace@{db}__:{key}*"
+
+
+def event_patterns(
+    keys: KeyNamespace = DEFAULT_NAMESPACE, db: int = 0, shared_layers: bool = True
+) -> tuple[str, list[str]]:
+    """
+    The channel patterns a clock's :func:`event_listener` subscribes to.
+
+    A namespaced clock matches the keyspace events of its own namespace with
+    a single pattern, plus the shared configuration layers when they are in
+    its Redis. Redis matches every event against every subscribed pattern,
+    so clocks sharing a Redis each add as few as possible.
+
+    :param keys: The clock's Redis keys.
+    :param db: Redis database the keys live in.
+    :param shared_layers: Whether the shared layers are in the clock's Redis,
+        rather than in a fleet Redis.
+    :return: The channel pattern and the keyspace patterns.
+    """
+    if keys == DEFAULT_NAMESPACE:
+        # Other keys, e.g. weather data, start with "kurokku:" too
+        return keys.channel_pattern, [
+            keyspace_pattern(keys.config, db),
+            keyspace_pattern(keys.alert, db),
+        ]
+    keyspace_patterns = [keyspace_pattern(keys.prefix + REDIS_KEY_SEPARATOR, db)]
+    if shared_layers:
+        keyspace_patterns.append(
+            keyspace_pattern(REDIS_KEY_CONFIG + REDIS_KEY_SEPARATOR, db)
+        )
+    return keys.channel_pattern, keyspace_patterns
+
+
+def parse_direct_alert(
+    payload: str,
+    keys: KeyNamespace = DEFAULT_NAMESPACE,
+) -> tuple[IndividualAlert, int, Optional[float]]:
+    """
+    Parse an alert published as JSON on a channel.
+
+    The payload has the fields of :class:`~led_kurokku.widgets.alert.IndividualAlert`,
+    of which only ``message`` is required, plus an optional ``ttl`` in seconds
+    and ``sent_at``, the sender's time in epoch seconds, used to report latency.
+    A missing ``id`` is generated; the alert's ID becomes its Redis key.
+
+    :param payload: The JSON object.
+    :param keys: The keys of the clock it was published to.
+    :return: The alert, its TTL and ``sent_at``.
+    :raises ValueError: If the payload is not a valid alert.
+    """
+    data = json.loads(payload)
+    if not isinstance(data, dict):
+        raise ValueError("not a JSON object")
+    ttl = data.pop("ttl", DIRECT_ALERT_TTL)
+    if not isinstance(ttl, int) or isinstance(ttl, bool) or ttl <= 0:
+        raise ValueError("ttl must be a positive integer")
+    sent_at = data.pop("sent_at", None)
+    if sent_at is not None and (
+        not isinstance(sent_at, (int, float)) or isinstance(sent_at, bool)
+    ):
+        raise ValueError("sent_at must be a number")
+    alert_key = keys.alert_key(str(data.pop("id", None) or uuid.uuid4()))
+    data.setdefault("timestamp", clock.now().isoformat())
+    if "display_duration" not in data and isinstance(data.get("message"), str):
+        data["display_duration"] = len(data["message"]) * 0.4
+    return IndividualAlert(id=alert_key, **data), ttl, sent_at
+
+
+async def _persist_direct_alert(
+    write_client: redis.Redis, own_writes: OwnWrites, key: str, value: str, ttl: int
+) -> None:
+    # Already scheduled, so its keyspace event must not schedule it again
+    own_writes.expect(key, "set")
+    try:
+        await write_client.set(key, value, ex=ttl)
+    except Exception as e:
+        logger.error(f"Error storing direct alert {key}: {e}")
+
+
+async def _latest_config(queue: asyncio.Queue) -> ConfigSettings:
+    # Configs queued while the display was busy are superseded by the newest
+    config = await queue.get()
+    while not queue.empty():
+        config = queue.get_nowait()
+    return ConfigSettings(**config)
+
+
 async def display_widgets(
     redis_client: redis.Redis,
     queue: asyncio.Queue,
@@ -40,12 +156,20 @@ async def display_widgets(
     driver_type: Optional[DriverType] = None,
     driver_instance: Optional[BaseDriver] = None,
     display_type: str = "tm1637",
+    widget_callback: Optional[Callable[[WidgetConfig], None]] = None,
+    keys: KeyNamespace = DEFAULT_NAMESPACE,
+    own_writes: Optional[OwnWrites] = None,
+    scheduler: Optional[AlertScheduler] = None,
+    write_client: Optional[redis.Redis] = None,
 ):
     """
     Main function to display the clock and other widgets.
     This function should be run in an asynchronous context.
 
-    :param redis_client: Redis client for communication.
+    Alerts the :func:`event_listener`'s ``scheduler`` marks as urgent
+    interrupt the current widget, which then resumes.
+
+    :param redis_client: Redis client the widgets read through.
     :param queue: Queue for receiving configuration updates.
     :param config_event: Event to signal configuration updates.
     :param stop_event: Event to signal stopping.
@@ -53,8 +177,17 @@ async def display_widgets(
     :param driver_type: Optional specific driver type to use.
     :param driver_instance: Optional existing driver instance to use.
     :param display_type: Hardware display type ("tm1637" or "ht16k33").
+    :param widget_callback: Optional callable invoked with each widget's config
+        before it is displayed.
+    :param keys: The clock's Redis keys.
+    :param own_writes: The :func:`event_listener`'s own writes, which the
+        deletes of ``delete_after_display`` alerts are recorded in.
+    :param scheduler: The :func:`event_listener`'s alert scheduler; without
+        one, alerts wait for the alert widget, which reads them from Redis.
+    :param write_client: Client of the primary the widgets write to, if
+        ``redis_client`` reads from a replica.
     """
-    config_data = ConfigSettings(**(await queue.get()))
+    config_data = await _latest_config(queue)
     config_event.clear()
 
     # Create display using unified factory
@@ -65,30 +198,78 @@ async def display_widgets(
         driver_instance=driver_instance,
     )
 
+    loop = asyncio.get_running_loop()
     current_widget_type = None
     while True:
+        rotation_start = loop.time()
+        if scheduler is not None:
+            # Urgent alerts scroll like the configured alert widget
+            scheduler.alert_config = next(
+                (w for w in config_data.widgets if w.widget_type == "alert"), None
+            )
         if (
             config_data.brightness.end
-            > datetime.now().time()
+            > clock.now().time()
             > config_data.brightness.begin
         ):
             tm.brightness = config_data.brightness.high
         else:
             tm.brightness = config_data.brightness.low
+        if (
+            scheduler is not None
+            and scheduler.preempt.is_set()
+            and not stop_event.is_set()
+        ):
+            # Urgent alerts that arrived between widgets
+            if current_widget_type != "alert":
+                tm.clear()
+                current_widget_type = "alert"
+            await scheduler.show_urgent(
+                tm, redis_client, config_event, own_writes, write_client
+            )
+        if not config_data.widgets and current_widget_type is not None:
+            # Nothing is configured any more, so nothing is left showing
+            tm.clear()
+            current_widget_type = None
         for widget_config in config_data.widgets:
             if config_event.is_set() or stop_event.is_set():
                 break
             if widget_config.enabled:
+                if widget_callback:
+                    widget_callback(widget_config)
                 # Clear display when switching between different widget types
                 # to prevent remnants from previous widget persisting
                 if current_widget_type != widget_config.widget_type:
                     tm.clear()
                     current_widget_type = widget_config.widget_type
-                widget = widget_factory(widget_config, tm, redis_client, config_event)
+                widget = widget_factory(
+                    widget_config,
+                    tm,
+                    redis_client,
+                    config_event,
+                    keys,
+                    own_writes,
+                    scheduler,
+                    write_client,
+                )
                 logger.debug(f"Displaying widget: {widget_config.widget_type}")
                 await widget.display()
+        if (
+            loop.time() - rotation_start < IDLE_ROTATION_TIME
+            and not config_event.is_set()
+        ):
+            # Nothing was displayed (disabled or cron-gated widgets, no alerts),
+            # so wait instead of spinning through the rotation.
+            if scheduler is not None:
+                await wait_for_either(config_event, scheduler.preempt, IDLE_SLEEP)
+            else:
+                try:
+                    async with asyncio.timeout(IDLE_SLEEP):
+                        await config_event.wait()
+                except TimeoutError:
+                    pass
         if config_event.is_set() and not stop_event.is_set():
-            config_data = ConfigSettings(**(await queue.get()))
+            config_data = await _latest_config(queue)
             config_event.clear()
         if stop_event.is_set():
             logger.debug("Stopping display widgets due to stop event.")
@@ -100,76 +281,229 @@ async def event_listener(
     queue: asyncio.Queue,
     config_event: asyncio.Event,
     stop_event: asyncio.Event,
+    alert_debounce: float = DEFAULT_ALERT_DEBOUNCE,
+    preempt_priority: int = DEFAULT_PREEMPT_PRIORITY,
+    fleet_client: Optional[redis.Redis] = None,
+    keys: KeyNamespace = DEFAULT_NAMESPACE,
+    command_consumer: Optional[str] = None,
+    own_writes: Optional[OwnWrites] = None,
+    scheduler: Optional[AlertScheduler] = None,
+    write_client: Optional[redis.Redis] = None,
 ):
+    """
+    Listen for configuration, alert and channel events and signal the display.
+
+    The configuration is merged from cached layers (see
+    :mod:`led_kurokku.config_layers`); a change to one layer re-reads only
+    that layer, and restarts the display only if the merged result changed.
+
+    Alert events are debounced by an :class:`~led_kurokku.alert_events.AlertTracker`,
+    which keeps the :class:`~led_kurokku.alert_scheduler.AlertScheduler` shared
+    with :func:`display_widgets` up to date. New or changed alerts at or above
+    ``preempt_priority`` interrupt the current widget; the others wait for the
+    alert widget. An alert published as JSON on a channel (see
+    :func:`parse_direct_alert`) interrupts it whatever its priority, and is
+    stored in the background.
+
+    With a ``command_consumer``, the commands of the channels are also read
+    from a stream and acknowledged (see :mod:`led_kurokku.command_stream`).
+
+    Everything is read, and subscribed to, through ``redis_client``, which
+    may be a replica; writes go to ``write_client``.
+
+    :param redis_client: Redis client for communication.
+    :param queue: Queue the configuration is put on when the display should restart.
+    :param config_event: Event to signal configuration updates.
+    :param stop_event: Event to signal stopping.
+    :param alert_debounce: Seconds without alert events before they are processed.
+    :param preempt_priority: Alerts at this priority or lower (more important)
+        interrupt the current widget.
+    :param fleet_client: Optional Redis shared by the fleet, holding the base
+        and group configuration layers.
+    :param keys: The clock's Redis keys; only their keyspace events are
+        subscribed to, so clocks can share a Redis.
+    :param command_consumer: Optional name to read the command stream as.
+    :param own_writes: Optional record of the clock's own writes, given to
+        :func:`display_widgets` too, so its deletes do not count as changes.
+    :param scheduler: Optional alert scheduler to keep up to date, given to
+        :func:`display_widgets` too; a new one by default.
+    :param write_client: Client of the primary, if ``redis_client`` reads
+        from a replica; direct alerts are stored and commands read with it.
+    """
+    if scheduler is None:
+        scheduler = AlertScheduler()
+    if write_client is None:
+        write_client = redis_client
+    scheduler.preempt_priority = preempt_priority
+    # Keyspace notifications are published per database
+    db = redis_client.connection_pool.connection_kwargs.get("db", 0)
+    channel_pattern, keyspace_patterns = event_patterns(
+        keys, db, shared_layers=fleet_client is None
+    )
     await redis_client.config_set("notify-keyspace-events", "KEA")
-    config_data = json.loads(await redis_client.get(REDIS_KEY_CONFIG))
+    layers = ConfigLayers(redis_client, keys.config, fleet_client, REDIS_KEY_CONFIG)
+    config_data = await layers.load()
     hash_value = (
         hashlib.md5(json.dumps(config_data).encode("utf-8")).hexdigest()
         if config_data
         else None
     )
-    # TODO: what to do if hash_value is None?
     logger.info("Loaded initial configuration from redis")
+    logger.debug(f"Initial configuration layers: {layers.shared_keys()}")
     logger.debug(f"Initial configuration hash: {hash_value}")
     logger.debug(f"Initial configuration value: {config_data}")
+
+    def displayed_config() -> dict:
+        # The display needs a configuration even while no layer exists
+        if layers.effective is None:
+            logger.warning(f"No configuration found at {keys.config}, clearing the display")
+            return EMPTY_CONFIG
+        return layers.effective
+
     config_event.set()
-    await queue.put(config_data)
+    await queue.put(displayed_config())
+
+    async def config_key_changed(key: Optional[str], fleet: bool = False) -> None:
+        # A key of None re-reads every layer, e.g. after missing their events
+        nonlocal hash_value
+        if key is None:
+            await layers.load()
+        elif not await layers.refresh(key, fleet):
+            return
+        new_config_data = layers.effective
+        new_hash_value = (
+            hashlib.md5(json.dumps(new_config_data).encode("utf-8")).hexdigest()
+            if new_config_data
+            else None
+        )
+        if new_hash_value != hash_value:
+            logger.debug(f"New configuration hash: {new_hash_value}")
+            logger.debug(f"New configuration value: {new_config_data}")
+            hash_value = new_hash_value
+            logger.info(f"Configuration update received from {key or 'the layers'}")
+            config_event.set()
+            await queue.put(displayed_config())
+
+    fleet_watch = None
+    if fleet_client is not None:
+        fleet_watch = asyncio.create_task(
+            _watch_fleet_layers(fleet_client, config_key_changed)
+        )
+    alerts = AlertTracker(redis_client, keys.alert, alert_debounce, scheduler, own_writes)
+    persisting: set[asyncio.Task] = set()
+    await alerts.load()
+
+    def run_command(data: str) -> None:
+        # A STOP, ALERT or direct alert command, from a channel or the stream
+        if data == STOP_WORD:
+            logger.debug("STOP word seen")
+            logger.debug("Stopping display widgets due to stop word.")
+            config_event.set()
+            stop_event.set()
+        elif data == ALERT_WORD:
+            logger.debug("ALERT received, stopping display widgets and restarting.")
+            # The display waits for a config to restart with
+            queue.put_nowait(displayed_config())
+            config_event.set()
+        elif data.startswith("{"):
+            alert, ttl, sent_at = parse_direct_alert(data, keys)
+            logger.info(f"Direct alert received: {alert.message}")
+            scheduler.add(alert, sent_at)
+            value = alert.model_dump_json(exclude={"id"})
+            alerts.remember(alert.id, value)
+            task = asyncio.create_task(
+                _persist_direct_alert(write_client, alerts.own_writes, alert.id, value, ttl)
+            )
+            persisting.add(task)
+            task.add_done_callback(persisting.discard)
+        else:
+            raise ValueError(f"unknown command {data[:20]!r}")
+
+    command_reader = None
+    if command_consumer is not None:
+        command_reader = asyncio.create_task(
+            read_commands(write_client, command_consumer, run_command, keys)
+        )
     logger.debug(
-        f"Listening for messages on Redis channel pattern: {REDIS_CHANNEL_PATTERN}"
+        f"Listening for messages on Redis channel pattern: {channel_pattern}"
     )
-    logger.debug(f"Listening for config updates on Redis key: {REDIS_CONFIG_EVENT}")
-    logger.debug(f"Listening for alert updates on Redis key: {REDIS_ALERT_EVENT}")
-    async with redis_client.pubsub() as pubsub:
-        await pubsub.psubscribe(
-            REDIS_CHANNEL_PATTERN, REDIS_ALERT_EVENT, REDIS_CONFIG_EVENT
-        )
-        logger.info("Entering listening loop for Redis event messages.")
-        while True:
-            message = await pubsub.get_message(
-                ignore_subscribe_messages=True, timeout=1.0
+    logger.debug(f"Listening for config and alert updates on Redis keys: {keyspace_patterns}")
+    try:
+        async with redis_client.pubsub() as pubsub:
+            await pubsub.psubscribe(
+                channel_pattern, *keyspace_patterns
             )
-            if message is not None:
-                logger.debug(f"(Reader) Message Received: {message}")
-                data = message.get("data").decode("utf-8", errors="ignore")
-                pattern = message.get("pattern").decode("utf-8", errors="ignore")
-                if pattern == REDIS_CONFIG_EVENT:
-                    logger.debug("Config update redis key event received")
-                    new_config_data = json.loads(
-                        await redis_client.get(REDIS_KEY_CONFIG)
-                    )
-                    new_hash_value = (
-                        hashlib.md5(
-                            json.dumps(new_config_data).encode("utf-8")
-                        ).hexdigest()
-                        if new_config_data
-                        else None
-                    )
-                    if new_hash_value != hash_value:
-                        logger.debug(f"New configuration hash: {new_hash_value}")
-                        logger.debug(f"New configuration value: {new_config_data}")
-                        hash_value = new_hash_value
-                        config_data = new_config_data
-                        logger.info("Configuration update received")
-                        config_event.set()
-                        await queue.put(new_config_data)
-                elif pattern == REDIS_ALERT_EVENT:
-                    logger.info("Alert key event received")
-                    config_event.set()
-                    await queue.put(config_data)
-                elif pattern == REDIS_CHANNEL_PATTERN:
-                    logger.info("Channel pattern received")
-                    if data == STOP_WORD:
-                        logger.debug("STOP word seen")
-                        logger.debug("Stopping display widgets due to stop word.")
-                        config_event.set()
-                        stop_event.set()
-                        break
-                    elif data == ALERT_WORD:
-                        logger.debug(
-                            "ALERT received, stopping display widgets and restarting."
-                        )
-                        config_event.set()
-                else:
-                    logger.warning(f"Unhandled redis event pattern: {pattern}")
-
-            await asyncio.sleep(0.1)
+            logger.info("Entering listening loop for Redis event messages.")
+            while not stop_event.is_set():
+                alert_timeout = alerts.timeout()
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=1.0 if alert_timeout is None else min(1.0, alert_timeout),
+                )
+                if message is not None:
+                    logger.debug(f"(Reader) Message Received: {message}")
+                    data = message.get("data").decode("utf-8", errors="ignore")
+                    pattern = message.get("pattern").decode("utf-8", errors="ignore")
+                    if pattern in keyspace_patterns:
+                        channel = message.get("channel").decode("utf-8", errors="ignore")
+                        key = channel.partition("__:")[2]
+                        if key.startswith(keys.alert):
+                            logger.debug(f"Alert key event received: {data} {key}")
+                            alerts.note(key, data)
+                        elif key.startswith((keys.config, REDIS_KEY_CONFIG)):
+                            logger.debug("Config update redis key event received")
+                            await config_key_changed(key)
+                    elif pattern == channel_pattern:
+                        logger.info("Channel pattern received")
+                        try:
+                            run_command(data)
+                        except ValueError as e:
+                            if data.startswith("{"):
+                                logger.warning(f"Ignoring invalid direct alert: {e}")
+                        if stop_event.is_set():
+                            break
+                    else:
+                        logger.warning(f"Unhandled redis event pattern: {pattern}")
+
+                if await alerts.flush():
+                    # The scheduler preempts for urgent alerts; the rest wait their turn
+                    logger.info("Visible alerts changed")
+    finally:
+        watchers = [task for task in (fleet_watch, command_reader) if task is not None]
+        for task in watchers:
+            task.cancel()
+        await asyncio.gather(*watchers, return_exceptions=True)
+
+
+async def _watch_fleet_layers(fleet_client: redis.Redis, changed) -> None:
+    # Keyspace events of the shared layers in the fleet Redis, resubscribed
+    # to when the connection drops; the layers are re-read after reconnecting
+    # as their events meanwhile were missed
+    db = fleet_client.connection_pool.connection_kwargs.get("db", 0)
+    delay = FLEET_RETRY_DELAY
+    reconnecting = False
+    while True:
+        try:
+            try:
+                await fleet_client.config_set("notify-keyspace-events", "KEA")
+            except Exception as e:
+                logger.warning(f"Could not enable keyspace events on the fleet Redis: {e}")
+            async with fleet_client.pubsub() as pubsub:
+                await pubsub.psubscribe(keyspace_pattern(REDIS_KEY_CONFIG, db))
+                logger.info("Watching the fleet Redis for configuration layer changes")
+                if reconnecting:
+                    await changed(None, fleet=True)
+                delay = FLEET_RETRY_DELAY
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    channel = message["channel"].decode("utf-8", errors="ignore")
+                    try:
+                        await changed(channel.partition("__:")[2], fleet=True)
+                    except Exception as e:
+                        logger.error(f"Error applying fleet configuration change: {e}")
+        except Exception as e:
+            logger.warning(f"Lost the fleet Redis, reconnecting in {delay:g}s: {e}")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, FLEET_RETRY_MAX_DELAY)
+        reconnecting = True
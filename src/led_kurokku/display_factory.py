@@ -23,6 +23,24 @@ class DisplayType(StrEnum):
     HT16K33 = "ht16k33"
 
 
+def create_driver(
+    display_type: DisplayType | str = DisplayType.TM1637,
+    driver_type: DriverType | None = None,
+    force_console: bool = False,
+) -> BaseDriver:
+    """
+    Create a driver for the given display type without wrapping it in a display.
+
+    :param display_type: Type of display hardware ("tm1637" or "ht16k33").
+    :param driver_type: Specific driver to use (led, virtual, console, websocket).
+    :param force_console: Force console driver (for debugging).
+    :return: A BaseDriver instance.
+    """
+    if DisplayType(display_type) == DisplayType.HT16K33:
+        return create_ht16k33_driver(force_console=force_console, driver_type=driver_type)
+    return create_tm1637_driver(force_console=force_console, driver_type=driver_type)
+
+
 def create_display(
     display_type: DisplayType | str = DisplayType.TM1637,
     driver_type: DriverType | None = None,
@@ -47,18 +65,10 @@ def create_display(
 
     logger.info(f"Creating display: {display_type}, driver: {driver_type}")
 
+    driver = driver_instance or create_driver(display_type, driver_type, force_console)
     if display_type == DisplayType.HT16K33:
         # Create HT16K33 14-segment display
-        if driver_instance:
-            driver = driver_instance
-        else:
-            driver = create_ht16k33_driver(force_console=force_console, driver_type=driver_type)
         return HT16K33(driver=driver)
 
-    else:
-        # Default to TM1637 7-segment display
-        if driver_instance:
-            driver = driver_instance
-        else:
-            driver = create_tm1637_driver(force_console=force_console, driver_type=driver_type)
-        return TM1637(driver=driver)
+    # Default to TM1637 7-segment display
+    return TM1637(driver=driver)
@@ -0,0 +1,37 @@
+"""Display drivers that wrap or combine the hardware drivers."""
+
+from .fanout import FanoutChild, FanoutDriver, is_blocking
+from .framebuffer import (
+    FrameBufferDriver,
+    FrameBufferReader,
+    FrameBufferState,
+    mirror,
+)
+from .recording import (
+    FrameRecord,
+    RecordingDriver,
+    RecordingPlayer,
+    encode_frames,
+    read_recording,
+    read_recording_bytes,
+)
+from .redis_frames import RedisFrameDriver, follow_frames, frame_channel
+
+__all__ = [
+    "FanoutChild",
+    "FanoutDriver",
+    "is_blocking",
+    "FrameBufferDriver",
+    "FrameBufferReader",
+    "FrameBufferState",
+    "mirror",
+    "FrameRecord",
+    "RecordingDriver",
+    "RecordingPlayer",
+    "encode_frames",
+    "read_recording",
+    "read_recording_bytes",
+    "RedisFrameDriver",
+    "follow_frames",
+    "frame_channel",
+]
@@ -0,0 +1,225 @@
+"""Fan-out driver sending each rendered frame to several child drivers.
+
+The display engine renders a frame once and the fan-out driver hands the same
+digits to every child, e.g. the hardware driver, the websocket driver and a
+recorder. Each child is its own failure domain:
+
+* exceptions raised by a child are logged and counted, never propagated;
+* a child can be rate limited, in which case only the latest frame is sent
+  once its interval has passed;
+* blocking children (GPIO bit-banging, I2C) can run on a worker thread so
+  they never hold up the event loop or the other children.
+
+Children track the desired display state rather than a queue of calls, so a
+slow child always catches up to the latest frame instead of replaying a
+backlog.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from ..tm1637.base_driver import BaseDriver
+
+logger = logging.getLogger(__name__)
+
+# Seconds between repeated error logs for the same child
+ERROR_LOG_INTERVAL = 60.0
+
+
+@dataclass
+class FanoutChild:
+    """
+    A child driver and how frames are delivered to it.
+
+    :param driver: The child driver.
+    :param min_interval: Minimum seconds between frames sent to this child.
+    :param threaded: Deliver frames from a dedicated worker thread.
+    """
+
+    driver: BaseDriver
+    min_interval: float = 0.0
+    threaded: bool = False
+
+
+class _ChildState:
+    """Delivery state for a single child."""
+
+    def __init__(self, child: FanoutChild):
+        self.driver = child.driver
+        self.min_interval = child.min_interval
+        self.threaded = child.threaded
+        self.frame: tuple[list[int] | None, bool] | None = None  # None digits = clear
+        self.brightness: int | None = None
+        self.last_sent = float("-inf")
+        self.errors = 0
+        self.sent = 0
+        self.dropped = 0
+        self._last_error_log = float("-inf")
+        self._timer: asyncio.TimerHandle | None = None
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread: threading.Thread | None = None
+        if self.threaded:
+            self._thread = threading.Thread(
+                target=self._worker, name=f"fanout-{self.driver.name}", daemon=True
+            )
+            self._thread.start()
+
+    def submit(self, frame=None, brightness: int | None = None) -> None:
+        """Record the latest desired state and deliver it when allowed."""
+        if self.threaded:
+            with self._condition:
+                self._set_pending(frame, brightness)
+                self._condition.notify()
+            return
+        self._set_pending(frame, brightness)
+        wait = self.last_sent + self.min_interval - time.monotonic()
+        if wait <= 0:
+            self.flush()
+        elif self._timer is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return  # Delivered with the next frame after the interval
+            self._timer = loop.call_later(wait, self.flush)
+
+    def _set_pending(self, frame, brightness: int | None) -> None:
+        if frame is not None:
+            if self.frame is not None:
+                self.dropped += 1
+            self.frame = frame
+        if brightness is not None:
+            self.brightness = brightness
+
+    def _take(self):
+        frame, brightness = self.frame, self.brightness
+        self.frame = self.brightness = None
+        return frame, brightness
+
+    def flush(self) -> None:
+        """Send the pending state to the child now."""
+        self._timer = None
+        self._deliver(*self._take())
+
+    def _deliver(self, frame, brightness: int | None) -> None:
+        if frame is None and brightness is None:
+            return
+        try:
+            if brightness is not None:
+                self.driver.brightness = brightness
+            if frame is not None:
+                digits, colon = frame
+                if digits is None:
+                    self.driver.clear()
+                else:
+                    self.driver.display(digits, colon)
+            self.sent += 1
+        except Exception as e:
+            self.errors += 1
+            now = time.monotonic()
+            if now - self._last_error_log >= ERROR_LOG_INTERVAL:
+                self._last_error_log = now
+                logger.error(f"Driver {self.driver.name} failed ({self.errors} errors): {e}")
+        self.last_sent = time.monotonic()
+
+    def _worker(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed and self.frame is None and self.brightness is None:
+                    self._condition.wait()
+                if self._closed:
+                    return
+            wait = self.last_sent + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            with self._condition:
+                pending = self._take()
+            self._deliver(*pending)
+
+    def close(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._thread is not None:
+            with self._condition:
+                self._closed = True
+                self._condition.notify()
+            self._thread.join(timeout=1.0)
+
+
+def is_blocking(driver: BaseDriver) -> bool:
+    """Whether a driver talks to real hardware and should run on a worker thread."""
+    return driver.name.endswith("LED")
+
+
+class FanoutDriver(BaseDriver):
+    """
+    Driver that forwards every frame to several child drivers.
+
+    Unknown attributes are looked up on the children in order, so a fan-out
+    containing a websocket driver still accepts websocket clients.
+    """
+
+    def __init__(self, children: list[BaseDriver | FanoutChild], brightness: int = 2) -> None:
+        """
+        Initialize the fan-out driver.
+
+        :param children: Child drivers, optionally wrapped in :class:`FanoutChild`
+            to configure rate limiting and threading.
+        :param brightness: Initial brightness level (0-7).
+        """
+        super().__init__(brightness=brightness)
+        self._children = [
+            _ChildState(c if isinstance(c, FanoutChild) else FanoutChild(c)) for c in children
+        ]
+        names = ", ".join(c.driver.name for c in self._children)
+        self._driver_name = f"fanout({names})"
+
+    def __getattr__(self, name):
+        for child in self.__dict__.get("_children", ()):
+            if hasattr(child.driver, name):
+                return getattr(child.driver, name)
+        raise AttributeError(name)
+
+    @property
+    def children(self) -> list[BaseDriver]:
+        """The child drivers."""
+        return [c.driver for c in self._children]
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Frames sent, coalesced and failed per child."""
+        return {
+            c.driver.name: {"sent": c.sent, "dropped": c.dropped, "errors": c.errors}
+            for c in self._children
+        }
+
+    def display(self, data: list[int], colon: bool = False) -> None:
+        frame = (list(data), colon)
+        for child in self._children:
+            child.submit(frame=frame)
+
+    def clear(self) -> None:
+        for child in self._children:
+            child.submit(frame=(None, False))
+
+    @BaseDriver.brightness.setter
+    def brightness(self, value: int) -> None:
+        if not 0 <= value <= 7:
+            raise ValueError("Brightness must be between 0 and 7")
+        self._brightness = value
+        for child in self._children:
+            child.submit(brightness=value)
+
+    def close(self) -> None:
+        """Stop worker threads and pending timers, then close closable children."""
+        for child in self._children:
+            child.close()
+            close = getattr(child.driver, "close", None)
+            if callable(close):
+                try:
+                    close()
+                except Exception as e:
+                    logger.error(f"Error closing driver {child.driver.name}: {e}")
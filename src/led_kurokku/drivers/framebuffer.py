@@ -0,0 +1,248 @@
+"""Shared-memory frame buffer for local mirroring processes.
+
+The driver publishes the current frame into a small memory-mapped file so
+other local processes (a web mirror, a status LED daemon, a screenshot tool)
+can follow the real display without running their own display engine.
+
+The segment is a single fixed-size record guarded by a sequence lock: the
+writer makes the sequence number odd, updates the frame, then makes it even
+again. Readers retry whenever the sequence was odd or changed while reading.
+"""
+
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+from ..tm1637.base_driver import BaseDriver
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"KRKFB\x00\x00\x01"
+# magic, sequence, timestamp, digits, colon, brightness, display type
+SEGMENT = struct.Struct("<8sQd4HBB8s")
+SEGMENT_SIZE = 64
+SEQUENCE = struct.Struct("<Q")
+SEQUENCE_OFFSET = 8
+FRAME = struct.Struct("<d4HBB8s")
+FRAME_OFFSET = 16
+
+
+def default_path() -> str:
+    """Default segment path, in /dev/shm when available."""
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "led-kurokku.fb")
+
+
+@dataclass
+class FrameBufferState:
+    """A consistent snapshot of the frame buffer."""
+
+    sequence: int  # Always even; advances by two per published frame
+    timestamp: float
+    digits: list[int]
+    colon: bool
+    brightness: int
+    display_type: str
+
+
+class FrameBufferDriver(BaseDriver):
+    """
+    Driver that publishes every frame into a shared-memory segment.
+
+    Wraps another driver (tee) when one is given. Unknown attributes are
+    looked up on the wrapped driver.
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        driver: BaseDriver | None = None,
+        display_type: str = "tm1637",
+    ) -> None:
+        """
+        Initialize the frame buffer driver.
+
+        :param path: Segment path (defaults to :func:`default_path`).
+        :param driver: Optional driver to forward every call to.
+        :param display_type: Display type readers should decode digits for.
+        """
+        super().__init__(brightness=driver.brightness if driver else 2)
+        self.driver = driver
+        self.path = path or default_path()
+        self._driver_name = f"framebuffer({driver.name})" if driver else "framebuffer"
+        self._display_type = display_type.encode()[:8]
+        self._digits = [0, 0, 0, 0]
+        self._colon = False
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, SEGMENT_SIZE)
+            self._mmap = mmap.mmap(fd, SEGMENT_SIZE)
+        finally:
+            os.close(fd)
+        self._sequence = 0
+        SEGMENT.pack_into(
+            self._mmap,
+            0,
+            MAGIC,
+            0,
+            time.time(),
+            *self._digits,
+            False,
+            self._brightness,
+            self._display_type,
+        )
+        logger.info(f"Publishing frames to {self.path}")
+
+    def __getattr__(self, name):
+        driver = self.__dict__.get("driver")
+        if driver is None:
+            raise AttributeError(name)
+        return getattr(driver, name)
+
+    @property
+    def sequence(self) -> int:
+        """Sequence number of the last published frame."""
+        return self._sequence
+
+    def _publish(self) -> None:
+        buf = self._mmap
+        SEQUENCE.pack_into(buf, SEQUENCE_OFFSET, self._sequence + 1)
+        FRAME.pack_into(
+            buf,
+            FRAME_OFFSET,
+            time.time(),
+            *self._digits,
+            self._colon,
+            self._brightness,
+            self._display_type,
+        )
+        self._sequence += 2
+        SEQUENCE.pack_into(buf, SEQUENCE_OFFSET, self._sequence)
+
+    def display(self, data: list[int], colon: bool = False) -> None:
+        if self.driver:
+            self.driver.display(data, colon)
+        self._digits = data
+        self._colon = colon
+        self._publish()
+
+    def clear(self) -> None:
+        if self.driver:
+            self.driver.clear()
+        self._digits = [0, 0, 0, 0]
+        self._colon = False
+        self._publish()
+
+    @BaseDriver.brightness.setter
+    def brightness(self, value: int) -> None:
+        if self.driver:
+            self.driver.brightness = value
+        elif not 0 <= value <= 7:
+            raise ValueError("Brightness must be between 0 and 7")
+        self._brightness = value
+        self._publish()
+
+    def close(self, unlink: bool = False) -> None:
+        """
+        Unmap the segment.
+
+        :param unlink: Also remove the segment file.
+        """
+        if not self._mmap.closed:
+            self._mmap.close()
+        if unlink and os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class FrameBufferReader:
+    """
+    Reads frames published by :class:`FrameBufferDriver`.
+
+    The segment is mapped read-only and decoded in place.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        self.path = path or default_path()
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), SEGMENT_SIZE, access=mmap.ACCESS_READ)
+        if self._mmap[:8] != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{self.path} is not a LED-Kurokku frame buffer")
+
+    @property
+    def sequence(self) -> int:
+        """Current sequence number (odd while a frame is being written)."""
+        return SEQUENCE.unpack_from(self._mmap, SEQUENCE_OFFSET)[0]
+
+    def read(self, retries: int = 100) -> FrameBufferState | None:
+        """
+        Read a consistent snapshot of the current frame.
+
+        :param retries: Attempts before giving up on a busy writer.
+        :return: The snapshot, or None if no consistent read succeeded.
+        """
+        buf = self._mmap
+        for _ in range(retries):
+            before = SEQUENCE.unpack_from(buf, SEQUENCE_OFFSET)[0]
+            if before & 1:
+                continue
+            timestamp, d0, d1, d2, d3, colon, brightness, display_type = FRAME.unpack_from(
+                buf, FRAME_OFFSET
+            )
+            if SEQUENCE.unpack_from(buf, SEQUENCE_OFFSET)[0] == before:
+                return FrameBufferState(
+                    sequence=before,
+                    timestamp=timestamp,
+                    digits=[d0, d1, d2, d3],
+                    colon=bool(colon),
+                    brightness=brightness,
+                    display_type=display_type.rstrip(b"\x00").decode(),
+                )
+        return None
+
+    async def follow(
+        self, interval: float = 0.02, since: int | None = None
+    ) -> AsyncIterator[FrameBufferState]:
+        """
+        Yield every new frame as it is published.
+
+        Frames published faster than ``interval`` are coalesced to the latest.
+
+        :param interval: Polling interval in seconds.
+        :param since: Only yield frames newer than this sequence number;
+            defaults to yielding the current frame first.
+        """
+        last = since
+        while True:
+            if self.sequence != last:
+                state = self.read()
+                if state is not None and state.sequence != last:
+                    last = state.sequence
+                    yield state
+            await asyncio.sleep(interval)
+
+    def close(self) -> None:
+        """Unmap the segment."""
+        if not self._mmap.closed:
+            self._mmap.close()
+
+
+async def mirror(reader: FrameBufferReader, driver: BaseDriver, interval: float = 0.02) -> None:
+    """
+    Drive ``driver`` with every frame published to a frame buffer.
+
+    :param reader: Frame buffer to follow.
+    :param driver: Driver to show the frames on, e.g. the websocket driver.
+    :param interval: Polling interval in seconds.
+    """
+    async for state in reader.follow(interval):
+        if state.brightness != driver.brightness:
+            driver.brightness = state.brightness
+        driver.display(state.digits, state.colon)
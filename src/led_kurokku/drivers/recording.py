@@ -0,0 +1,488 @@
+"""Frame recording driver and compact replay format.
+
+Frames are stored in a fixed-size ring inside a memory-mapped file. Each
+record holds only what changed since the previous record::
+
+    byte 0      kind (bits 0-1), colon (bit 2), changed digit mask (bits 4-7)
+    varint      milliseconds since the previous record
+    payload     one little-endian uint16 per changed digit (frames), or one
+                brightness byte (brightness changes), or nothing (clears)
+
+When the ring is full the oldest records are evicted and folded into a
+snapshot kept in the file header, so a recording can always be decoded from
+its oldest surviving record.
+"""
+
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import time
+from dataclasses import dataclass
+from typing import Iterator
+
+from ..tm1637.base_driver import BaseDriver
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"KRKREC\x00\x01"
+FORMAT_VERSION = 1
+DIGITS = 4
+DEFAULT_SIZE = 1024 * 1024  # On-disk budget in bytes (header included)
+
+# magic, version, digits, capacity, head, tail, records, total,
+# tail time (ms), tail digits, tail colon, tail brightness
+HEADER = struct.Struct("<8sHHIIIIQQ4HBB")
+HEADER_SIZE = 64
+# Parts of the header rewritten on every append and on every eviction
+POSITIONS = struct.Struct("<IIIQ")
+POSITIONS_OFFSET = 16
+SNAPSHOT = struct.Struct("<Q4HBB")
+SNAPSHOT_OFFSET = 36
+
+KIND_FRAME = 0
+KIND_CLEAR = 1
+KIND_BRIGHTNESS = 2
+KIND_WRAP = 3
+KIND_NAMES = {KIND_FRAME: "frame", KIND_CLEAR: "clear", KIND_BRIGHTNESS: "brightness"}
+
+COLON_BIT = 0x04
+MAX_RECORD_SIZE = 1 + 10 + DIGITS * 2
+
+
+@dataclass
+class FrameRecord:
+    """A decoded record with the full display state after applying it."""
+
+    time: float  # Seconds since the epoch
+    kind: str  # "frame", "clear" or "brightness"
+    digits: list[int]
+    colon: bool
+    brightness: int
+
+
+@dataclass
+class _State:
+    time_ms: int
+    digits: list[int]
+    colon: bool
+    brightness: int
+
+
+def _encode_varint(value: int) -> bytes:
+    if value < 0x80:
+        return bytes((value,))
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def encode_record(
+    kind: int,
+    delta_ms: int,
+    previous: list[int],
+    digits: list[int] | None = None,
+    colon: bool = False,
+    brightness: int = 0,
+) -> bytes:
+    """
+    Encode a single record relative to the previous display state.
+
+    :param kind: Record kind (``KIND_FRAME``, ``KIND_CLEAR`` or ``KIND_BRIGHTNESS``).
+    :param delta_ms: Milliseconds since the previous record.
+    :param previous: Digits shown before this record.
+    :param digits: New digits (frames only).
+    :param colon: Colon state (frames only).
+    :param brightness: New brightness (brightness records only).
+    :return: The encoded record.
+    """
+    if kind == KIND_FRAME:
+        mask = 0
+        payload = bytearray()
+        for i in range(DIGITS):
+            value = digits[i]
+            if value != previous[i]:
+                mask |= 1 << i
+                payload += (value & 0xFFFF).to_bytes(2, "little")
+        head = kind | (COLON_BIT if colon else 0) | (mask << 4)
+        return bytes((head,)) + _encode_varint(delta_ms) + payload
+    if kind == KIND_BRIGHTNESS:
+        return bytes((kind,)) + _encode_varint(delta_ms) + bytes((brightness & 0xFF,))
+    return bytes((kind,)) + _encode_varint(delta_ms)
+
+
+def _decode_at(buf, pos: int, state: _State) -> tuple[int, int]:
+    """Apply the record at ``pos`` to ``state``; return its kind and length."""
+    head = buf[pos]
+    kind = head & 0x03
+    p = pos + 1
+    shift = 0
+    delta = 0
+    while True:
+        byte = buf[p]
+        p += 1
+        delta |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            break
+        shift += 7
+    state.time_ms += delta
+    if kind == KIND_FRAME:
+        mask = head >> 4
+        digits = list(state.digits)
+        for i in range(DIGITS):
+            if mask & (1 << i):
+                digits[i] = buf[p] | (buf[p + 1] << 8)
+                p += 2
+        state.digits = digits
+        state.colon = bool(head & COLON_BIT)
+    elif kind == KIND_CLEAR:
+        state.digits = [0] * DIGITS
+        state.colon = False
+    elif kind == KIND_BRIGHTNESS:
+        state.brightness = buf[p]
+        p += 1
+    return kind, p - pos
+
+
+class FrameLog:
+    """
+    Ring of delta-encoded records inside a writable buffer.
+
+    The buffer starts with the header; the remainder is the ring. Works on a
+    ``bytearray`` as well as on an ``mmap``.
+    """
+
+    def __init__(self, buf, initialize: bool = True, start_time: float | None = None):
+        self.buf = buf
+        self.capacity = len(buf) - HEADER_SIZE
+        self._evicted = False
+        if self.capacity < MAX_RECORD_SIZE * 2:
+            raise ValueError("Recording buffer is too small")
+        if initialize:
+            start_ms = int((start_time if start_time is not None else time.time()) * 1000)
+            self._head = 0
+            self._tail = 0
+            self._records = 0
+            self._total = 0
+            self._tail_state = _State(start_ms, [0] * DIGITS, False, 0)
+            self._last = _State(start_ms, [0] * DIGITS, False, 0)
+            self._write_header()
+        else:
+            self._read_header()
+            self._last = self._copy_state(self._tail_state)
+            for _, state in self._iter_states():
+                self._last = state
+
+    def _read_header(self) -> None:
+        (
+            magic,
+            version,
+            digits,
+            capacity,
+            self._head,
+            self._tail,
+            self._records,
+            self._total,
+            tail_ms,
+            *rest,
+        ) = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC or version != FORMAT_VERSION or digits != DIGITS:
+            raise ValueError("Not a LED-Kurokku recording")
+        if capacity != self.capacity:
+            raise ValueError("Recording size does not match the file")
+        self._tail_state = _State(tail_ms, list(rest[:DIGITS]), bool(rest[DIGITS]), rest[DIGITS + 1])
+
+    def _write_header(self) -> None:
+        tail = self._tail_state
+        HEADER.pack_into(
+            self.buf,
+            0,
+            MAGIC,
+            FORMAT_VERSION,
+            DIGITS,
+            self.capacity,
+            self._head,
+            self._tail,
+            self._records,
+            self._total,
+            tail.time_ms,
+            *tail.digits,
+            tail.colon,
+            tail.brightness,
+        )
+
+    @property
+    def records(self) -> int:
+        """Number of records currently held in the ring."""
+        return self._records
+
+    @property
+    def total(self) -> int:
+        """Number of records ever appended."""
+        return self._total
+
+    def _position(self, pos: int) -> int:
+        """Resolve wrap markers and the end of the ring to the ring start."""
+        if pos >= self.capacity or self.buf[HEADER_SIZE + pos] & 0x03 == KIND_WRAP:
+            return 0
+        return pos
+
+    def _evict(self) -> None:
+        pos = self._position(self._tail)
+        _, length = _decode_at(self.buf, HEADER_SIZE + pos, self._tail_state)
+        self._records -= 1
+        # Resolve a wrap marker now, before the head can overwrite it
+        self._tail = self._position(pos + length) if self._records else pos + length
+        self._evicted = True
+
+    def _reserve(self, size: int) -> int:
+        """Free ``size`` contiguous bytes at the head, evicting old records."""
+        if self._records == 0:
+            self._head = self._tail = 0
+        if self._head + size > self.capacity:
+            # Records between the head and the end of the ring are the oldest
+            while self._records and self._tail >= self._head:
+                self._evict()
+            if self._head < self.capacity:
+                self.buf[HEADER_SIZE + self._head] = KIND_WRAP
+            self._head = 0
+        while self._records and self._head <= self._position(self._tail) < self._head + size:
+            self._evict()
+        return self._head
+
+    def _append(self, record: bytes, time_ms: int) -> None:
+        pos = self._reserve(len(record))
+        start = HEADER_SIZE + pos
+        self.buf[start : start + len(record)] = record
+        self._head = pos + len(record)
+        self._records += 1
+        self._total += 1
+        self._last.time_ms = time_ms
+        POSITIONS.pack_into(
+            self.buf, POSITIONS_OFFSET, self._head, self._tail, self._records, self._total
+        )
+        if self._evicted:
+            tail = self._tail_state
+            SNAPSHOT.pack_into(
+                self.buf, SNAPSHOT_OFFSET, tail.time_ms, *tail.digits, tail.colon, tail.brightness
+            )
+            self._evicted = False
+
+    def _delta(self, timestamp: float | None) -> tuple[int, int]:
+        time_ms = int((timestamp if timestamp is not None else time.time()) * 1000)
+        return time_ms, max(0, time_ms - self._last.time_ms)
+
+    def append_frame(self, digits: list[int], colon: bool, timestamp: float | None = None) -> None:
+        """Append a frame if it differs from the current state."""
+        last = self._last
+        if digits == last.digits and colon == last.colon:
+            return
+        time_ms, delta = self._delta(timestamp)
+        self._append(encode_record(KIND_FRAME, delta, last.digits, digits, colon), time_ms)
+        last.digits = list(digits)
+        last.colon = colon
+
+    def append_clear(self, timestamp: float | None = None) -> None:
+        """Append a clear record."""
+        time_ms, delta = self._delta(timestamp)
+        self._append(encode_record(KIND_CLEAR, delta, self._last.digits), time_ms)
+        self._last.digits = [0] * DIGITS
+        self._last.colon = False
+
+    def append_brightness(self, brightness: int, timestamp: float | None = None) -> None:
+        """Append a brightness change if it differs from the current state."""
+        if brightness == self._last.brightness:
+            return
+        time_ms, delta = self._delta(timestamp)
+        self._append(
+            encode_record(KIND_BRIGHTNESS, delta, self._last.digits, brightness=brightness),
+            time_ms,
+        )
+        self._last.brightness = brightness
+
+    @staticmethod
+    def _copy_state(state: _State) -> _State:
+        return _State(state.time_ms, list(state.digits), state.colon, state.brightness)
+
+    def _iter_states(self) -> Iterator[tuple[int, _State]]:
+        state = self._copy_state(self._tail_state)
+        pos = self._tail
+        for _ in range(self._records):
+            pos = self._position(pos)
+            kind, length = _decode_at(self.buf, HEADER_SIZE + pos, state)
+            pos += length
+            yield kind, state
+
+    def __iter__(self) -> Iterator[FrameRecord]:
+        for kind, state in self._iter_states():
+            yield FrameRecord(
+                time=state.time_ms / 1000,
+                kind=KIND_NAMES[kind],
+                digits=list(state.digits),
+                colon=state.colon,
+                brightness=state.brightness,
+            )
+
+
+def encode_frames(records: list[FrameRecord], size: int | None = None) -> bytes:
+    """
+    Encode decoded records into a standalone recording blob.
+
+    :param records: Records to encode, oldest first.
+    :param size: Total blob size; defaults to just large enough.
+    :return: Bytes readable with :func:`read_recording_bytes`.
+    """
+    if size is None:
+        size = HEADER_SIZE + max(len(records) * MAX_RECORD_SIZE + 1, MAX_RECORD_SIZE * 2)
+    start = records[0].time if records else time.time()
+    log = FrameLog(bytearray(size), start_time=start)
+    for record in records:
+        if record.kind == "clear":
+            log.append_clear(record.time)
+        elif record.kind == "brightness":
+            log.append_brightness(record.brightness, record.time)
+        else:
+            log.append_frame(record.digits, record.colon, record.time)
+    return bytes(log.buf)
+
+
+def read_recording_bytes(data: bytes) -> list[FrameRecord]:
+    """Decode every record in a recording blob."""
+    return list(FrameLog(bytearray(data), initialize=False))
+
+
+def read_recording(path: str) -> list[FrameRecord]:
+    """Decode every record in a recording file."""
+    with open(path, "rb") as f:
+        return read_recording_bytes(f.read())
+
+
+class RecordingDriver(BaseDriver):
+    """
+    Driver that records every frame to a memory-mapped ring file.
+
+    Wraps another driver (tee) when one is given, otherwise acts as a plain
+    sink. Unknown attributes are looked up on the wrapped driver, so e.g. a
+    wrapped websocket driver still accepts clients.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        driver: BaseDriver | None = None,
+        size: int = DEFAULT_SIZE,
+        append: bool = False,
+    ) -> None:
+        """
+        Initialize the recording driver.
+
+        :param path: Recording file path.
+        :param driver: Optional driver to forward every call to.
+        :param size: Fixed on-disk budget in bytes.
+        :param append: Continue an existing recording of the same size.
+        """
+        super().__init__(brightness=driver.brightness if driver else 2)
+        self.driver = driver
+        self.path = path
+        self._driver_name = f"recording({driver.name})" if driver else "recording"
+
+        exists = append and os.path.exists(path) and os.path.getsize(path) == size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT)
+        try:
+            if not exists:
+                os.ftruncate(fd, size)
+            self._mmap = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self.log = FrameLog(self._mmap, initialize=not exists)
+        if not exists:
+            self.log.append_brightness(self._brightness)
+        logger.info(f"Recording frames to {path} ({size} bytes)")
+
+    def __getattr__(self, name):
+        driver = self.__dict__.get("driver")
+        if driver is None:
+            raise AttributeError(name)
+        return getattr(driver, name)
+
+    def display(self, data: list[int], colon: bool = False) -> None:
+        if self.driver:
+            self.driver.display(data, colon)
+        self.log.append_frame(data, colon)
+
+    def clear(self) -> None:
+        if self.driver:
+            self.driver.clear()
+        self.log.append_clear()
+
+    @BaseDriver.brightness.setter
+    def brightness(self, value: int) -> None:
+        if self.driver:
+            self.driver.brightness = value
+        elif not 0 <= value <= 7:
+            raise ValueError("Brightness must be between 0 and 7")
+        self._brightness = value
+        self.log.append_brightness(value)
+
+    def flush(self) -> None:
+        """Flush the recording to disk."""
+        self._mmap.flush()
+
+    def close(self) -> None:
+        """Flush and unmap the recording file."""
+        if not self._mmap.closed:
+            self._mmap.flush()
+            self._mmap.close()
+
+
+class RecordingPlayer:
+    """
+    Plays a recording back into any driver, e.g. the virtual or websocket driver.
+    """
+
+    def __init__(self, records: list[FrameRecord]):
+        self.records = records
+
+    @classmethod
+    def from_file(cls, path: str) -> "RecordingPlayer":
+        return cls(read_recording(path))
+
+    @property
+    def duration(self) -> float:
+        """Length of the recording in seconds."""
+        if not self.records:
+            return 0.0
+        return self.records[-1].time - self.records[0].time
+
+    @staticmethod
+    def apply(record: FrameRecord, driver: BaseDriver) -> None:
+        """Apply a single record to a driver."""
+        if record.kind == "brightness":
+            driver.brightness = record.brightness
+        elif record.kind == "clear":
+            driver.clear()
+        else:
+            driver.display(list(record.digits), record.colon)
+
+    async def play(self, driver: BaseDriver, speed: float = 1.0, repeat: bool = False) -> None:
+        """
+        Play the recording into a driver.
+
+        :param driver: Driver to play into.
+        :param speed: Playback speed multiplier; 0 plays as fast as possible.
+        :param repeat: Loop the recording until cancelled.
+        """
+        while True:
+            previous = self.records[0].time if self.records else 0.0
+            for record in self.records:
+                delay = record.time - previous
+                previous = record.time
+                if speed > 0 and delay > 0:
+                    await asyncio.sleep(delay / speed)
+                self.apply(record, driver)
+            if not repeat or not self.records:
+                break
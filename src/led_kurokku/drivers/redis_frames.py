@@ -0,0 +1,170 @@
+"""Redis pub/sub frame channel for remote live mirrors.
+
+The driver publishes each frame to ``kurokku:frames:<instance>`` as a binary
+keyframe of the websocket protocol (14 bytes, see
+:mod:`led_kurokku.websocket_protocol`), so a mirror can relay it to browsers
+without re-encoding. The latest frame is also stored under the key of the same
+name, with a short expiry, so a mirror that starts later shows the current
+state straight away and clocks that stop publishing drop out.
+
+Unchanged frames are not published again, and while a publish is in flight
+newer frames only replace the pending one. Rate limiting is left to
+:class:`~led_kurokku.drivers.fanout.FanoutChild`.
+"""
+
+import asyncio
+import logging
+from typing import AsyncIterator
+
+import redis.asyncio as redis
+
+from ..tm1637.base_driver import BaseDriver
+from ..websocket_protocol import decode_frame, encode_frame
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "kurokku:frames:"
+# Seconds the stored latest frame outlives the last publish
+SNAPSHOT_TTL = 60
+
+
+def frame_channel(instance: str) -> str:
+    """Channel (and snapshot key) an instance publishes its frames to."""
+    return f"{CHANNEL_PREFIX}{instance}"
+
+
+class RedisFrameDriver(BaseDriver):
+    """
+    Driver that publishes every changed frame to a Redis channel.
+
+    Must be called from the event loop thread.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        instance: str,
+        display_type: str = "tm1637",
+        brightness: int = 2,
+    ) -> None:
+        """
+        Initialize the frame channel driver.
+
+        :param redis_client: Client to publish with.
+        :param instance: Name of this clock, used in the channel name.
+        :param display_type: Display type mirrors should decode digits for.
+        :param brightness: Initial brightness level (0-7).
+        """
+        super().__init__(brightness=brightness)
+        self._driver_name = "redis-frames"
+        self.redis_client = redis_client
+        self.instance = instance
+        self.channel = frame_channel(instance)
+        self._ht16k33 = display_type == "ht16k33"
+        self._digits = [0, 0, 0, 0]
+        self._colon = False
+        self._sequence = 0
+        self._last: tuple | None = None
+        self._inflight: asyncio.Task | None = None
+        self._pending = False
+        self.published = 0
+        self.deduplicated = 0
+        self.errors = 0
+
+    def _publish(self) -> None:
+        state = (tuple(self._digits), self._colon, self._brightness)
+        if state == self._last:
+            self.deduplicated += 1
+            return
+        if self._inflight is not None:
+            # Sent with the latest state once the current publish completes
+            self._pending = True
+            return
+        self._last = state
+        self._sequence += 1
+        payload = encode_frame(
+            self._sequence, self._digits, self._colon, self._brightness, ht16k33=self._ht16k33
+        )
+        self._inflight = asyncio.get_running_loop().create_task(self._send(payload))
+        self._inflight.add_done_callback(self._sent)
+
+    async def _send(self, payload: bytes) -> None:
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.publish(self.channel, payload)
+            pipe.set(self.channel, payload, ex=SNAPSHOT_TTL)
+            await pipe.execute()
+
+    def _sent(self, task: asyncio.Task) -> None:
+        self._inflight = None
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.errors += 1
+            # Publish the current state again with the next frame
+            self._last = None
+            logger.warning(f"Publishing frame to {self.channel} failed: {task.exception()}")
+        else:
+            self.published += 1
+        if self._pending:
+            self._pending = False
+            self._publish()
+
+    def display(self, data: list[int], colon: bool = False) -> None:
+        self._digits = list(data)
+        self._colon = colon
+        self._publish()
+
+    def clear(self) -> None:
+        self._digits = [0, 0, 0, 0]
+        self._colon = False
+        self._publish()
+
+    @BaseDriver.brightness.setter
+    def brightness(self, value: int) -> None:
+        if not 0 <= value <= 7:
+            raise ValueError("Brightness must be between 0 and 7")
+        self._brightness = value
+        self._publish()
+
+    def close(self) -> None:
+        """Cancel a publish still in flight."""
+        if self._inflight is not None:
+            self._inflight.cancel()
+
+
+async def follow_frames(
+    redis_client: redis.Redis, pattern: str = "*"
+) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Follow the frames published by every instance matching a glob pattern.
+
+    Yields the stored latest frame of each matching instance first, then
+    every published frame.
+
+    :param redis_client: Client to subscribe with.
+    :param pattern: Glob pattern of instance names.
+    :return: An async iterator of ``(instance, state)`` pairs, where state is
+        a decoded frame (see :func:`~led_kurokku.websocket_protocol.decode_frame`).
+    """
+    channel_pattern = frame_channel(pattern)
+    async with redis_client.pubsub() as pubsub:
+        # Subscribe before reading the snapshots so no frame falls in between
+        await pubsub.psubscribe(channel_pattern)
+        keys = [key async for key in redis_client.scan_iter(match=channel_pattern)]
+        if keys:
+            for key, payload in zip(keys, await redis_client.mget(keys)):
+                if payload:
+                    instance = key.decode()[len(CHANNEL_PREFIX) :]
+                    yield instance, decode_frame(payload)
+        logger.info(f"Following frames on {channel_pattern}")
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            if message is None or message["type"] != "pmessage":
+                continue
+            instance = message["channel"].decode()[len(CHANNEL_PREFIX) :]
+            try:
+                state = decode_frame(message["data"])
+            except Exception as e:
+                logger.warning(f"Invalid frame from {instance}: {e}")
+                continue
+            yield instance, state
@@ -29,6 +29,7 @@ class HT16K33:
         :param driver: Driver instance (hardware, virtual, console, or websocket).
         """
         self.driver = driver
+        self.last_frame = None
 
     def clear(self):
         """Clear the display."""
@@ -51,6 +52,7 @@ class HT16K33:
         :param segments: List of 4 integers representing 14-segment values.
         :param colon: Boolean flag for colon display.
         """
+        self.last_frame = (segments, colon)  # Restored after an urgent alert
         self.driver.display(segments, colon)
 
     def show_number(self, number: int | float):
@@ -1,36 +1,109 @@
 import asyncio
 import atexit
 import logging
-import os
 import signal
+import socket
 import sys
 
 import click
 import redis.asyncio as redis
 
+from .alert_events import DEFAULT_ALERT_DEBOUNCE, OwnWrites
+from .alert_scheduler import DEFAULT_PREEMPT_PRIORITY, AlertScheduler
 from .core import display_widgets, event_listener
+from .display_factory import create_driver
+from .drivers.fanout import FanoutChild, FanoutDriver, is_blocking
+from .drivers.framebuffer import FrameBufferDriver, default_path
+from .drivers.recording import DEFAULT_SIZE, RecordingDriver
+from .drivers.redis_frames import RedisFrameDriver
+from .namespace import KeyNamespace, validate_instance_name
+from .redis_topology import RedisEndpoints, open_clients
 from .utils.logging import setup_logging
 
 
-async def event_loop(force_console=False, display_type="tm1637"):
+async def event_loop(
+    force_console=False,
+    display_type="tm1637",
+    record=None,
+    record_size=DEFAULT_SIZE,
+    framebuffer=None,
+    publish_frames=None,
+    publish_fps=10.0,
+    alert_debounce=DEFAULT_ALERT_DEBOUNCE,
+    preempt_priority=DEFAULT_PREEMPT_PRIORITY,
+    fleet_redis=None,
+    namespace=None,
+    endpoints=None,
+    command_stream=None,
+):
     """
     Event loop function to run the clock application.
 
     :param force_console: Force console driver.
     :param display_type: Type of display hardware ("tm1637" or "ht16k33").
+    :param record: Optional path to record every frame to.
+    :param record_size: On-disk budget of the recording in bytes.
+    :param framebuffer: Optional shared-memory segment to publish frames to.
+    :param publish_frames: Optional instance name to publish frames over Redis as.
+    :param publish_fps: Maximum frames per second published over Redis.
+    :param alert_debounce: Seconds without alert events before they are processed.
+    :param preempt_priority: Alerts at this priority or lower interrupt the
+        current widget.
+    :param fleet_redis: Optional URL of a Redis shared by the fleet, holding
+        the base and group configuration layers.
+    :param namespace: Optional instance name to keep the clock's keys under,
+        so several clocks can share a Redis.
+    :param endpoints: Where to read from and write to; by default read from
+        the environment (see :mod:`led_kurokku.redis_topology`).
+    :param command_stream: Optional consumer name to read acknowledged
+        commands from the command stream as.
     """
 
     queue = asyncio.Queue()  # Create an asyncio.Queue for inter-task communication
     stop_event = asyncio.Event()  # Create an asyncio.Event to signal stopping
     config_event = asyncio.Event()  # Event to signal configuration updates
+    own_writes = OwnWrites()  # The display's deletes the listener ignores
+    scheduler = AlertScheduler()  # Alerts the listener schedules for the display
 
     # Get Redis configuration from environment variables
-    redis_host = os.environ.get("REDIS_HOST", "localhost")
-    redis_port = int(os.environ.get("REDIS_PORT", 6379))
+    endpoints = endpoints or RedisEndpoints.from_env()
+    keys = KeyNamespace(namespace)
 
-    async with redis.Redis(host=redis_host, port=redis_port, db=0) as redis_client:
+    # Extra outputs share the engine's frames through a fan-out driver
+    outputs = []
+    if framebuffer:
+        outputs.append(FrameBufferDriver(framebuffer, display_type=display_type))
+    if record:
+        outputs.append(RecordingDriver(record, size=record_size, append=True))
+
+    # Reads may come from a replica; the few writes go to the primary
+    async with open_clients(endpoints) as (redis_client, write_client):
+        if publish_frames:
+            publisher = RedisFrameDriver(write_client, publish_frames, display_type=display_type)
+            outputs.append(FanoutChild(publisher, min_interval=1.0 / publish_fps))
+        driver = None
+        if outputs:
+            hardware = create_driver(display_type, force_console=force_console)
+            driver = FanoutDriver(
+                [FanoutChild(hardware, threaded=is_blocking(hardware)), *outputs]
+            )
+
+        fleet_client = redis.Redis.from_url(fleet_redis) if fleet_redis else None
         tasks = [
-            event_listener(redis_client, queue, config_event, stop_event),
+            event_listener(
+                redis_client,
+                queue,
+                config_event,
+                stop_event,
+                alert_debounce,
+                preempt_priority,
+                fleet_client,
+                keys,
+                command_stream,
+                own_writes,
+                scheduler,
+                write_client,
+            ),
             display_widgets(
                 redis_client,
                 queue,
@@ -38,9 +111,20 @@ async def event_loop(force_console=False, display_type="tm1637"):
                 stop_event,
                 force_console=force_console,
                 display_type=display_type,
+                driver_instance=driver,
+                keys=keys,
+                own_writes=own_writes,
+                scheduler=scheduler,
+                write_client=write_client,
             ),
         ]
-        await asyncio.gather(*tasks)  # Run tasks concurrently
+        try:
+            await asyncio.gather(*tasks)  # Run tasks concurrently
+        finally:
+            if driver:
+                driver.close()
+            if fleet_client is not None:
+                await fleet_client.aclose()
 
 
 def cleanup_gpio():
@@ -74,6 +158,15 @@ def setup_signal_handlers():
     signal.signal(signal.SIGTERM, signal_handler)
 
 
+def _check_namespace(ctx, param, value):
+    if value is None:
+        return None
+    try:
+        return validate_instance_name(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
 @click.command()
 @click.version_option()
 @click.option("--debug", is_flag=True, default=False)
@@ -85,7 +178,92 @@ def setup_signal_handlers():
     default="tm1637",
     help="Display hardware type (tm1637 or ht16k33)",
 )
-def main(debug, console, log_file, display_type):
+@click.option(
+    "--record",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Record every frame to this ring file",
+)
+@click.option(
+    "--record-size",
+    type=int,
+    default=DEFAULT_SIZE,
+    show_default=True,
+    help="On-disk budget of the recording in bytes",
+)
+@click.option(
+    "--framebuffer",
+    is_flag=False,
+    flag_value=default_path(),
+    default=None,
+    help=f"Publish frames to a shared-memory segment (default: {default_path()})",
+)
+@click.option(
+    "--publish-frames",
+    is_flag=False,
+    flag_value=socket.gethostname(),
+    default=None,
+    help="Publish frames to kurokku:frames:<instance> (default: the host name)",
+)
+@click.option(
+    "--publish-fps",
+    type=float,
+    default=10.0,
+    show_default=True,
+    help="Maximum frames per second published over Redis",
+)
+@click.option(
+    "--alert-debounce",
+    type=click.FloatRange(min=0),
+    default=DEFAULT_ALERT_DEBOUNCE,
+    show_default=True,
+    help="Seconds without alert changes before the display reacts to them",
+)
+@click.option(
+    "--preempt-priority",
+    type=int,
+    default=DEFAULT_PREEMPT_PRIORITY,
+    show_default=True,
+    help="Alerts at this priority or lower interrupt the current widget; "
+    "the others wait for the alert widget",
+)
+@click.option(
+    "--fleet-redis",
+    envvar="FLEET_REDIS_URL",
+    default=None,
+    help="Redis URL holding the fleet's shared base and group configuration layers",
+)
+@click.option(
+    "--namespace",
+    envvar="KUROKKU_NAMESPACE",
+    default=None,
+    callback=_check_namespace,
+    help="Keep the clock's keys under kurokku:<namespace>: so clocks can share a Redis",
+)
+@click.option(
+    "--command-stream",
+    is_flag=False,
+    flag_value=socket.gethostname(),
+    default=None,
+    help="Also read acknowledged commands from the kurokku:commands stream, "
+    "as this consumer (default: the host name)",
+)
+def main(
+    debug,
+    console,
+    log_file,
+    display_type,
+    record,
+    record_size,
+    framebuffer,
+    publish_frames,
+    publish_fps,
+    alert_debounce,
+    preempt_priority,
+    fleet_redis,
+    namespace,
+    command_stream,
+):
     """
     Main function to run the clock application.
     """
@@ -102,7 +280,22 @@ def main(debug, console, log_file, display_type):
     atexit.register(cleanup_gpio)
 
     try:
-        asyncio.run(event_loop(force_console=console, display_type=display_type))
+        asyncio.run(
+            event_loop(
+                force_console=console,
+                display_type=display_type,
+                record=record,
+                record_size=record_size,
+                framebuffer=framebuffer,
+                publish_frames=publish_frames,
+                publish_fps=publish_fps,
+                alert_debounce=alert_debounce,
+                preempt_priority=preempt_priority,
+                fleet_redis=fleet_redis,
+                namespace=namespace,
+                command_stream=command_stream,
+            )
+        )
     except KeyboardInterrupt:
         logger.info("Application interrupted by user")
     except Exception as e:
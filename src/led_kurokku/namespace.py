@@ -0,0 +1,108 @@
+"""Redis key namespaces, so one Redis can serve many clocks.
+
+By default a clock uses the keys it always has (``kurokku:config``,
+``kurokku:alert:<id>``, ``kurokku:channel:*``), which need a Redis server or
+database per clock. A clock given an instance name keeps its keys under
+``kurokku:<instance>:`` instead, e.g. ``kurokku:kitchen:config``, and
+subscribes to the keyspace events of its own keys only, so clocks sharing a
+Redis do not receive each other's traffic.
+
+The shared configuration layers (``kurokku:config:base`` and
+``kurokku:config:group:<name>``) and weather data are not namespaced: they
+are written once and read by every clock.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+REDIS_KEY_BASE = "kurokku"
+REDIS_KEY_SEPARATOR = ":"
+
+# Names that would make a namespace overlap the un-namespaced keys
+RESERVED_NAMES = frozenset({"alert", "channel", "commands", "config", "frames", "weather"})
+_NAME_RE = re.compile(r"[A-Za-z0-9_.-]+")
+
+
+def validate_instance_name(instance: str) -> str:
+    """
+    Check an instance name can be used as a key namespace.
+
+    :param instance: The instance name.
+    :return: The name.
+    :raises ValueError: If it has characters other than letters, digits,
+        ``_``, ``.`` and ``-``, or is one of :data:`RESERVED_NAMES`.
+    """
+    if not _NAME_RE.fullmatch(instance):
+        raise ValueError(
+            f"Invalid namespace '{instance}': use letters, digits, '_', '.' and '-'"
+        )
+    if instance.lower() in RESERVED_NAMES:
+        raise ValueError(f"Invalid namespace '{instance}': the name is reserved")
+    return instance
+
+
+@dataclass(frozen=True)
+class KeyNamespace:
+    """The Redis keys and channels of one clock."""
+
+    instance: Optional[str] = None  # None for the un-namespaced keys
+
+    def __post_init__(self):
+        if self.instance is not None:
+            validate_instance_name(self.instance)
+
+    @property
+    def prefix(self) -> str:
+        """The prefix of every key, e.g. ``kurokku:kitchen``."""
+        if self.instance is None:
+            return REDIS_KEY_BASE
+        return f"{REDIS_KEY_BASE}{REDIS_KEY_SEPARATOR}{self.instance}"
+
+    def key(self, *parts: str) -> str:
+        """A key in the namespace."""
+        return REDIS_KEY_SEPARATOR.join((self.prefix, *parts))
+
+    @property
+    def config(self) -> str:
+        """The clock's own configuration key."""
+        return self.key("config")
+
+    @property
+    def alert(self) -> str:
+        """The prefix of alert keys, without the trailing separator."""
+        return self.key("alert")
+
+    @property
+    def alert_pattern(self) -> str:
+        """The glob pattern matching every alert key."""
+        return f"{self.alert}{REDIS_KEY_SEPARATOR}*"
+
+    def alert_key(self, alert_id: str) -> str:
+        """The key of an alert, given its ID or its key."""
+        if alert_id.startswith(self.alert + REDIS_KEY_SEPARATOR):
+            return alert_id
+        return f"{self.alert}{REDIS_KEY_SEPARATOR}{alert_id}"
+
+    @property
+    def channel_pattern(self) -> str:
+        """The pattern of the channels the clock listens on."""
+        return self.key("channel", "*")
+
+    @property
+    def channel_alert(self) -> str:
+        """The channel alert JSON is published on to show it at once."""
+        return self.key("channel", "alert")
+
+    @property
+    def commands(self) -> str:
+        """The stream of acknowledged commands."""
+        return self.key("commands")
+
+    @property
+    def command_acks(self) -> str:
+        """The stream the clock acknowledges commands on."""
+        return self.key("commands", "acks")
+
+
+DEFAULT_NAMESPACE = KeyNamespace()
@@ -0,0 +1,152 @@
+"""Read and write Redis connections of a clock.
+
+A clock reads its configuration, alerts and dynamic sources, and receives
+their events, far more often than it writes: its only writes are deleting
+``delete_after_display`` alerts, storing direct alerts and publishing frames.
+By default both go to one Redis (``REDIS_HOST`` and ``REDIS_PORT``). A clock
+at a remote site can read from a nearby replica instead (``REDIS_READ_HOST``
+and ``REDIS_READ_PORT``) and send its writes to the primary, so no WAN round
+trip is on the display's path.
+
+With ``REDIS_SENTINELS`` (``host:port`` pairs separated by commas) the
+primary of ``REDIS_SENTINEL_SERVICE`` is discovered through Sentinel, and
+follows failovers. Reads then go to ``REDIS_READ_HOST`` if it is set, or to
+a replica Sentinel picks.
+
+Replicas raise keyspace events as they apply the primary's writes, so the
+event listener subscribes to the Redis it reads from. The write client is
+passed explicitly to :func:`~led_kurokku.core.event_listener`,
+:func:`~led_kurokku.core.display_widgets` and the widgets.
+"""
+
+import logging
+import os
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Mapping, Optional
+
+import redis.asyncio as redis
+from redis.asyncio.sentinel import Sentinel
+
+DEFAULT_SENTINEL_SERVICE = "mymaster"
+
+logger = logging.getLogger(__name__)
+
+
+def parse_sentinels(value: str) -> tuple[tuple[str, int], ...]:
+    """
+    Parse a list of Sentinel addresses.
+
+    :param value: ``host:port`` pairs separated by commas; the port defaults
+        to 26379.
+    :return: The addresses.
+    :raises ValueError: If a port is not a number.
+    """
+    sentinels = []
+    for address in value.split(","):
+        address = address.strip()
+        if not address:
+            continue
+        host, separator, port = address.rpartition(":")
+        if not separator:
+            host, port = address, ""
+        try:
+            sentinels.append((host, int(port) if port else 26379))
+        except ValueError:
+            raise ValueError(f"Invalid Sentinel address '{address}'") from None
+    return tuple(sentinels)
+
+
+@dataclass(frozen=True)
+class RedisEndpoints:
+    """Where a clock reads from and writes to."""
+
+    host: str = "localhost"
+    port: int = 6379
+    db: int = 0
+    read_host: Optional[str] = None  # None to read from the primary
+    read_port: Optional[int] = None  # Defaults to ``port``
+    sentinels: tuple[tuple[str, int], ...] = ()
+    service: str = DEFAULT_SENTINEL_SERVICE
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> "RedisEndpoints":
+        """
+        Read the endpoints from environment variables.
+
+        :param environ: The environment.
+        :return: The endpoints.
+        :raises ValueError: If a port or Sentinel address is invalid.
+        """
+        read_port = environ.get("REDIS_READ_PORT")
+        return cls(
+            host=environ.get("REDIS_HOST", "localhost"),
+            port=int(environ.get("REDIS_PORT", 6379)),
+            read_host=environ.get("REDIS_READ_HOST") or None,
+            read_port=int(read_port) if read_port else None,
+            sentinels=parse_sentinels(environ.get("REDIS_SENTINELS", "")),
+            service=environ.get("REDIS_SENTINEL_SERVICE", DEFAULT_SENTINEL_SERVICE),
+        )
+
+    def clients(self, **connection_kwargs) -> tuple[redis.Redis, redis.Redis]:
+        """
+        Create the clients; neither connects until it is used.
+
+        :param connection_kwargs: Passed to every client, e.g. ``socket_timeout``.
+        :return: The read client and the write client, the same client
+            unless reads and writes are split.
+        """
+        if self.sentinels:
+            sentinel = Sentinel(list(self.sentinels), **connection_kwargs)
+            write_client = sentinel.master_for(self.service, db=self.db)
+            if self.read_host is None:
+                read_client = sentinel.slave_for(self.service, db=self.db)
+                return read_client, write_client
+        else:
+            write_client = redis.Redis(
+                host=self.host, port=self.port, db=self.db, **connection_kwargs
+            )
+            if self.read_host is None:
+                return write_client, write_client
+        read_client = redis.Redis(
+            host=self.read_host,
+            port=self.read_port or self.port,
+            db=self.db,
+            **connection_kwargs,
+        )
+        return read_client, write_client
+
+    def describe(self) -> str:
+        """Where reads and writes go, for logging."""
+        if self.sentinels:
+            primary = f"primary of '{self.service}' via Sentinel"
+        else:
+            primary = f"{self.host}:{self.port}"
+        if self.read_host:
+            return f"reading from {self.read_host}:{self.read_port or self.port}, writing to {primary}"
+        if self.sentinels:
+            return f"reading from a replica of '{self.service}', writing to {primary}"
+        return f"reading from and writing to {primary}"
+
+
+@asynccontextmanager
+async def open_clients(
+    endpoints: RedisEndpoints, **connection_kwargs
+) -> AsyncIterator[tuple[redis.Redis, redis.Redis]]:
+    """
+    Open a clock's read and write clients, closing them on exit.
+
+    :param endpoints: Where to read from and write to.
+    :param connection_kwargs: Passed to every client.
+    :return: The read client and the write client, to pass on to
+        everything that writes; the same client unless reads and writes
+        are split.
+    """
+    read_client, write_client = endpoints.clients(**connection_kwargs)
+    logger.info(f"Redis: {endpoints.describe()}")
+    try:
+        yield read_client, write_client
+    finally:
+        await read_client.aclose()
+        if write_client is not read_client:
+            await write_client.aclose()
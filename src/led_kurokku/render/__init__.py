@@ -0,0 +1,13 @@
+"""Server-side rendering of display frames to images.
+
+:mod:`.raster` rasterizes 7- and 14-segment frames to palette images with
+NumPy, :mod:`.formats` encodes them as PNG, APNG and GIF, and
+:mod:`.animation` turns frame recordings into animations. NumPy is an
+optional dependency (``pip install led-kurokku[render]``); import the
+submodules only when :data:`RENDER_AVAILABLE` is true.
+"""
+
+import importlib.util
+
+RENDER_AVAILABLE = importlib.util.find_spec("numpy") is not None
+RENDER_MISSING = "numpy is not installed (pip install led-kurokku[render])"
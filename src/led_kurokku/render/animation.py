@@ -0,0 +1,67 @@
+"""Export frame recordings as animated GIF or APNG."""
+
+from typing import Iterator
+
+from ..drivers.recording import FrameRecord
+from .formats import encode_apng, encode_gif
+from .raster import SegmentRenderer
+
+FORMATS = ("gif", "apng")
+# Shorter frames are folded into the frame before them; browsers show GIF
+# frames of less than 20 ms for 100 ms
+MIN_FRAME = 0.02
+# Seconds the last frame of a recording is shown
+LAST_FRAME = 1.0
+
+
+def timeline(
+    records: list[FrameRecord], speed: float = 1.0
+) -> list[tuple[tuple[int, ...], bool, int, float]]:
+    """
+    The distinct display states of a recording and how long each is shown.
+
+    :param records: Decoded recording, oldest first.
+    :param speed: Playback speed.
+    :return: ``(digits, colon, brightness, seconds)`` per state.
+    """
+    states: list[tuple[tuple[int, ...], bool, int, float]] = []
+    for record, following in zip(records, records[1:] + [None]):
+        seconds = (following.time - record.time) / speed if following else LAST_FRAME
+        state = (tuple(record.digits), record.colon, record.brightness)
+        if states and (states[-1][:3] == state or seconds < MIN_FRAME):
+            digits, colon, brightness, shown = states[-1]
+            states[-1] = (digits, colon, brightness, shown + seconds)
+        else:
+            states.append((*state, seconds))
+    return states
+
+
+def export_animation(
+    records: list[FrameRecord],
+    image_format: str = "gif",
+    display_type: str = "tm1637",
+    scale: float = 2,
+    speed: float = 1.0,
+) -> bytes:
+    """
+    Render a recording as an animation.
+
+    :param records: Decoded recording, oldest first.
+    :param image_format: "gif" or "apng".
+    :param display_type: Display type to decode digits for.
+    :param scale: Pixels per design unit of the display layout.
+    :param speed: Playback speed.
+    :return: The animation file.
+    """
+    if image_format not in FORMATS:
+        raise ValueError(f"Unknown animation format: {image_format}")
+    if not records:
+        raise ValueError("The recording is empty")
+    renderer = SegmentRenderer(display_type, scale=scale)
+
+    def frames() -> Iterator:
+        for digits, colon, brightness, seconds in timeline(records, speed):
+            yield renderer.render(digits, colon, brightness), seconds
+
+    encode = encode_gif if image_format == "gif" else encode_apng
+    return encode(frames(), renderer.palette)
@@ -0,0 +1,254 @@
+"""PNG, APNG and GIF encoding of palette images.
+
+Animation frames after the first are stored as the smallest rectangle that
+changed since the previous frame, drawn over it, and frames that did not
+change only extend the previous frame's delay. Identical rectangles (a
+blinking colon, a digit shown again) are compressed once.
+"""
+
+import struct
+import zlib
+from typing import Callable, Iterable
+
+import numpy as np
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PATCH_CACHE_SIZE = 1024
+# GIF delays are in hundredths of a second, up to this many
+MAX_GIF_DELAY = 0xFFFF
+
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def _ihdr(width: int, height: int) -> bytes:
+    # 8-bit palette image
+    return _chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0))
+
+
+def _plte(palette: np.ndarray) -> bytes:
+    return _chunk(b"PLTE", palette.astype(np.uint8).tobytes())
+
+
+def _deflate(image: np.ndarray) -> bytes:
+    # Every row starts with filter type 0 (none)
+    rows = np.zeros((image.shape[0], image.shape[1] + 1), dtype=np.uint8)
+    rows[:, 1:] = image
+    return zlib.compress(rows.tobytes(), 6)
+
+
+def encode_png(image: np.ndarray, palette: np.ndarray) -> bytes:
+    """
+    Encode a palette image as PNG.
+
+    :param image: uint8 palette indices, shaped (height, width).
+    :param palette: uint8 RGB palette, up to 256 entries.
+    :return: The PNG file.
+    """
+    height, width = image.shape
+    return (
+        PNG_SIGNATURE
+        + _ihdr(width, height)
+        + _plte(palette)
+        + _chunk(b"IDAT", _deflate(image))
+        + _chunk(b"IEND", b"")
+    )
+
+
+def changed_box(previous: np.ndarray, image: np.ndarray) -> tuple[int, int, int, int] | None:
+    """
+    Bounding box of the pixels that differ between two images.
+
+    :return: ``(top, bottom, left, right)``, exclusive of bottom and right,
+        or None if the images are equal.
+    """
+    diff = previous != image
+    rows = np.flatnonzero(diff.any(axis=1))
+    if not rows.size:
+        return None
+    columns = np.flatnonzero(diff.any(axis=0))
+    return int(rows[0]), int(rows[-1]) + 1, int(columns[0]), int(columns[-1]) + 1
+
+
+def frame_patches(
+    frames: Iterable[tuple[np.ndarray, float]], compress: Callable[[np.ndarray], bytes]
+) -> list[list]:
+    """
+    Reduce frames to compressed changed rectangles.
+
+    :param frames: Images and the seconds each is shown.
+    :param compress: Compresses a rectangle of the image.
+    :return: ``[left, top, width, height, data, seconds, image]`` per stored
+        frame; image is the rectangle itself.
+    """
+    patches: list[list] = []
+    cache: dict[tuple, bytes] = {}
+    previous = None
+    for image, seconds in frames:
+        if previous is None:
+            box = (0, image.shape[0], 0, image.shape[1])
+        else:
+            box = changed_box(previous, image)
+            if box is None:
+                patches[-1][5] += seconds
+                continue
+        top, bottom, left, right = box
+        crop = image[top:bottom, left:right]
+        key = (crop.shape, crop.tobytes())
+        data = cache.get(key)
+        if data is None:
+            if len(cache) >= PATCH_CACHE_SIZE:
+                cache.clear()
+            data = cache[key] = compress(crop)
+        patches.append([left, top, right - left, bottom - top, data, seconds, crop])
+        previous = image
+    return patches
+
+
+def _apng_delay(seconds: float) -> tuple[int, int]:
+    milliseconds = round(seconds * 1000)
+    if milliseconds <= 0xFFFF:
+        return milliseconds, 1000
+    return min(round(seconds), 0xFFFF), 1
+
+
+def encode_apng(
+    frames: Iterable[tuple[np.ndarray, float]], palette: np.ndarray, loops: int = 0
+) -> bytes:
+    """
+    Encode palette images as an animated PNG.
+
+    :param frames: Images of equal size and the seconds each is shown.
+    :param palette: uint8 RGB palette, up to 256 entries.
+    :param loops: Times to play the animation (0 loops forever).
+    :return: The APNG file.
+    """
+    patches = frame_patches(frames, _deflate)
+    if not patches:
+        raise ValueError("No frames to encode")
+    _, _, width, height, *_ = patches[0]
+    parts = [
+        PNG_SIGNATURE,
+        _ihdr(width, height),
+        _chunk(b"acTL", struct.pack(">II", len(patches), loops)),
+        _plte(palette),
+    ]
+    sequence = 0
+    for index, (left, top, w, h, data, seconds, _) in enumerate(patches):
+        # Keep the previous frame and draw the rectangle over it
+        control = struct.pack(">IIIII", sequence, w, h, left, top)
+        control += struct.pack(">HHBB", *_apng_delay(seconds), 0, 0)
+        parts.append(_chunk(b"fcTL", control))
+        sequence += 1
+        if index == 0:
+            parts.append(_chunk(b"IDAT", data))
+        else:
+            parts.append(_chunk(b"fdAT", struct.pack(">I", sequence) + data))
+            sequence += 1
+    parts.append(_chunk(b"IEND", b""))
+    return b"".join(parts)
+
+
+def lzw_compress(data: bytes, min_code_size: int = 8) -> bytes:
+    """
+    GIF variant of LZW compression.
+
+    :param data: Pixel indices.
+    :param min_code_size: Bits per pixel index.
+    :return: The packed codes, without sub-block framing.
+    """
+    clear = 1 << min_code_size
+    end = clear + 1
+    out = bytearray()
+    buffer = bits = 0
+    code_size = min_code_size + 1
+    next_code = end + 1
+    table: dict[int, int] = {}
+
+    def emit(code: int) -> None:
+        nonlocal buffer, bits
+        buffer |= code << bits
+        bits += code_size
+        while bits >= 8:
+            out.append(buffer & 0xFF)
+            buffer >>= 8
+            bits -= 8
+
+    emit(clear)
+    prefix = data[0]
+    for byte in data[1:]:
+        key = prefix << 8 | byte
+        code = table.get(key)
+        if code is not None:
+            prefix = code
+            continue
+        emit(prefix)
+        if next_code < 4096:
+            table[key] = next_code
+            next_code += 1
+            if next_code > 1 << code_size and code_size < 12:
+                code_size += 1
+        else:
+            emit(clear)
+            table.clear()
+            code_size = min_code_size + 1
+            next_code = end + 1
+        prefix = byte
+    emit(prefix)
+    emit(end)
+    if bits:
+        out.append(buffer & 0xFF)
+    return bytes(out)
+
+
+def _gif_image(crop: np.ndarray) -> bytes:
+    data = lzw_compress(crop.tobytes())
+    blocks = b"".join(
+        bytes([len(data[i : i + 255])]) + data[i : i + 255] for i in range(0, len(data), 255)
+    )
+    return b"\x08" + blocks + b"\x00"
+
+
+def _gif_frame(left: int, top: int, width: int, height: int, data: bytes, delay: int) -> bytes:
+    # Graphic control extension: keep the previous frame (disposal 1)
+    control = b"\x21\xf9\x04" + struct.pack("<BHBB", 1 << 2, delay, 0, 0)
+    descriptor = b"\x2c" + struct.pack("<HHHHB", left, top, width, height, 0)
+    return control + descriptor + data
+
+
+def encode_gif(
+    frames: Iterable[tuple[np.ndarray, float]], palette: np.ndarray, loops: int = 0
+) -> bytes:
+    """
+    Encode palette images as an animated GIF.
+
+    :param frames: Images of equal size and the seconds each is shown.
+    :param palette: uint8 RGB palette of 256 entries.
+    :param loops: Times to repeat the animation (0 loops forever).
+    :return: The GIF file.
+    """
+    patches = frame_patches(frames, _gif_image)
+    if not patches:
+        raise ValueError("No frames to encode")
+    _, _, width, height, *_ = patches[0]
+    colors = np.zeros((256, 3), dtype=np.uint8)
+    colors[: len(palette)] = palette
+    parts = [
+        b"GIF89a",
+        # Global colour table of 256 entries, 8 bits per channel
+        struct.pack("<HHBBB", width, height, 0xF7, 0, 0),
+        colors.tobytes(),
+        b"\x21\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", loops) + b"\x00",
+    ]
+    for left, top, w, h, data, seconds, crop in patches:
+        delay = round(seconds * 100)
+        parts.append(_gif_frame(left, top, w, h, data, min(delay, MAX_GIF_DELAY)))
+        # Longer delays continue on one unchanged pixel
+        delay -= MAX_GIF_DELAY
+        while delay > 0:
+            pixel = _gif_image(crop[:1, :1])
+            parts.append(_gif_frame(left, top, 1, 1, pixel, min(delay, MAX_GIF_DELAY)))
+            delay -= MAX_GIF_DELAY
+    parts.append(b"\x3b")
+    return b"".join(parts)
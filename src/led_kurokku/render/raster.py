@@ -0,0 +1,262 @@
+"""Rasterize display frames to palette images.
+
+Every segment of a digit cell is rasterized once, supersampled, into a
+coverage mask. A digit's cell is then a single matrix product of its lit
+segment bits with the stacked masks, and is cached per segment word, so
+rendering a frame only copies four cells and the colon into a blank image.
+
+Pixels are palette indices: ``brightness * LEVELS + level``, where level is
+the quantized segment coverage. The palette matches the web page's colours
+and brightness curve.
+"""
+
+import math
+from typing import Callable
+
+import numpy as np
+
+# Layout in design units, multiplied by the scale
+DIGIT_WIDTH = 40
+DIGIT_HEIGHT = 72
+THICKNESS = 8
+SEGMENT_GAP = 1
+DP_SPACE = 10  # Right of each digit for its decimal point
+DIGIT_SPACING = 12
+COLON_WIDTH = 20
+PADDING = 12
+
+SUPERSAMPLE = 4
+LEVELS = 32  # Coverage levels per brightness, 8 * 32 palette entries
+INACTIVE_LEVEL = 0x22 / 0xFF  # Unlit segments, like the page's inactive colour
+GLYPH_CACHE_SIZE = 4096
+
+DEFAULT_COLOR = (0xFF, 0x00, 0x00)
+DEFAULT_BACKGROUND = (0x00, 0x00, 0x00)
+
+Shape = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+def polygon(*points: tuple[float, float]) -> Shape:
+    """Convex polygon, as a test of which sample points it contains."""
+    area = sum(
+        x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(points, points[1:] + points[:1])
+    )
+    sign = 1 if area >= 0 else -1
+
+    def contains(xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        inside = np.ones(np.broadcast(xs, ys).shape, dtype=bool)
+        for (x0, y0), (x1, y1) in zip(points, points[1:] + points[:1]):
+            inside &= sign * ((x1 - x0) * (ys - y0) - (y1 - y0) * (xs - x0)) >= 0
+        return inside
+
+    return contains
+
+
+def dot(cx: float, cy: float, r: float) -> Shape:
+    """Filled circle."""
+    return lambda xs, ys: (xs - cx) ** 2 + (ys - cy) ** 2 <= r * r
+
+
+def horizontal(x0: float, x1: float, y: float, t: float = THICKNESS) -> Shape:
+    """Horizontal segment with pointed ends."""
+    h = t / 2
+    return polygon(
+        (x0, y), (x0 + h, y - h), (x1 - h, y - h), (x1, y), (x1 - h, y + h), (x0 + h, y + h)
+    )
+
+
+def vertical(x: float, y0: float, y1: float, t: float = THICKNESS) -> Shape:
+    """Vertical segment with pointed ends."""
+    h = t / 2
+    return polygon(
+        (x, y0), (x + h, y0 + h), (x + h, y1 - h), (x, y1), (x - h, y1 - h), (x - h, y0 + h)
+    )
+
+
+def diagonal(x0: float, y0: float, x1: float, y1: float, t: float = THICKNESS * 0.7) -> Shape:
+    """Straight segment between two points."""
+    length = math.hypot(x1 - x0, y1 - y0)
+    nx, ny = (y0 - y1) / length * t / 2, (x1 - x0) / length * t / 2
+    return polygon((x0 + nx, y0 + ny), (x1 + nx, y1 + ny), (x1 - nx, y1 - ny), (x0 - nx, y0 - ny))
+
+
+def _outline() -> list[Shape]:
+    # Segments A-F, shared by both layouts
+    w, h, g, mid = DIGIT_WIDTH, THICKNESS / 2, SEGMENT_GAP, DIGIT_HEIGHT / 2
+    bottom = DIGIT_HEIGHT - h
+    return [
+        horizontal(h + g, w - h - g, h),  # A
+        vertical(w - h, h + g, mid - g),  # B
+        vertical(w - h, mid + g, bottom - g),  # C
+        horizontal(h + g, w - h - g, bottom),  # D
+        vertical(h, mid + g, bottom - g),  # E
+        vertical(h, h + g, mid - g),  # F
+    ]
+
+
+def _decimal_point() -> Shape:
+    return dot(DIGIT_WIDTH + DP_SPACE / 2, DIGIT_HEIGHT - THICKNESS / 2, THICKNESS / 2)
+
+
+def seven_segments() -> list[Shape]:
+    """Shapes of TM1637 segment bits 0-7 (A-G, decimal point)."""
+    w, h, g, mid = DIGIT_WIDTH, THICKNESS / 2, SEGMENT_GAP, DIGIT_HEIGHT / 2
+    return _outline() + [horizontal(h + g, w - h - g, mid), _decimal_point()]
+
+
+def fourteen_segments() -> list[Shape]:
+    """Shapes of HT16K33 segment bits 0-14 (see :mod:`led_kurokku.ht16k33.segments`)."""
+    w, t, h, g = DIGIT_WIDTH, THICKNESS, THICKNESS / 2, SEGMENT_GAP
+    mid, center, bottom = DIGIT_HEIGHT / 2, DIGIT_WIDTH / 2, DIGIT_HEIGHT - t
+    inset = t + 2  # Diagonals keep clear of the outline
+    return _outline() + [
+        horizontal(h + g, center - g, mid),  # G1
+        horizontal(center + g, w - h - g, mid),  # G2
+        diagonal(inset, inset, center - h - g, mid - h - g),  # H
+        vertical(center, t + g, mid - g),  # I
+        diagonal(w - inset, inset, center + h + g, mid - h - g),  # J
+        diagonal(inset, bottom + t - inset, center - h - g, mid + h + g),  # K
+        vertical(center, mid + g, bottom - g),  # L
+        diagonal(w - inset, bottom + t - inset, center + h + g, mid + h + g),  # M
+        _decimal_point(),  # DP
+    ]
+
+
+def coverage(shape: Shape, width: int, height: int, scale: float) -> np.ndarray:
+    """
+    Rasterize a shape with supersampling.
+
+    :param shape: Shape in design units.
+    :param width: Raster width in pixels.
+    :param height: Raster height in pixels.
+    :param scale: Pixels per design unit.
+    :return: Float32 coverage (0-1) of every pixel.
+    """
+    step = 1 / (SUPERSAMPLE * scale)
+    xs = (np.arange(width * SUPERSAMPLE) + 0.5) * step
+    ys = (np.arange(height * SUPERSAMPLE) + 0.5)[:, None] * step
+    inside = shape(xs[None, :], ys)
+    return (
+        inside.reshape(height, SUPERSAMPLE, width, SUPERSAMPLE)
+        .mean(axis=(1, 3), dtype=np.float32)
+    )
+
+
+def make_palette(
+    color: tuple[int, int, int] = DEFAULT_COLOR,
+    background: tuple[int, int, int] = DEFAULT_BACKGROUND,
+) -> np.ndarray:
+    """
+    Palette of every brightness and coverage level.
+
+    :param color: Lit segment colour.
+    :param background: Background colour.
+    :return: uint8 array of 256 RGB entries.
+    """
+    # Same brightness curve as the web page: opacity 0.3 at 0 to 1.0 at 7
+    opacity = 0.3 + np.arange(8, dtype=np.float32)[:, None] / 7 * 0.7
+    level = np.arange(LEVELS, dtype=np.float32)[None, :] / (LEVELS - 1)
+    mix = (opacity * level).reshape(-1, 1)
+    color_array = np.array(color, dtype=np.float32)
+    background_array = np.array(background, dtype=np.float32)
+    return np.rint(background_array + (color_array - background_array) * mix).astype(np.uint8)
+
+
+class SegmentRenderer:
+    """
+    Renders frames of a four digit display with a colon.
+    """
+
+    def __init__(
+        self,
+        display_type: str = "tm1637",
+        scale: float = 2,
+        color: tuple[int, int, int] = DEFAULT_COLOR,
+        background: tuple[int, int, int] = DEFAULT_BACKGROUND,
+    ):
+        """
+        Precompute the segment masks.
+
+        :param display_type: "tm1637" (7 segments) or "ht16k33" (14 segments).
+        :param scale: Pixels per design unit.
+        :param color: Lit segment colour.
+        :param background: Background colour.
+        """
+        self.display_type = display_type
+        self.scale = scale
+        shapes = fourteen_segments() if display_type == "ht16k33" else seven_segments()
+
+        cell_width = round((DIGIT_WIDTH + DP_SPACE) * scale)
+        cell_height = round(DIGIT_HEIGHT * scale)
+        digit_step = DIGIT_WIDTH + DP_SPACE + DIGIT_SPACING
+        colon_x = PADDING + 2 * digit_step - DIGIT_SPACING
+        right_half = colon_x + COLON_WIDTH
+        lefts = [PADDING, PADDING + digit_step, right_half, right_half + digit_step]
+        self._cell_x = [round(x * scale) for x in lefts]
+        self._cell_y = round(PADDING * scale)
+        self.width = self._cell_x[-1] + cell_width + round(PADDING * scale)
+        self.height = self._cell_y + cell_height + round(PADDING * scale)
+        self._cell_shape = (cell_height, cell_width)
+
+        masks = np.stack([coverage(shape, cell_width, cell_height, scale) for shape in shapes])
+        self._masks = masks.reshape(len(shapes), -1)
+        self._bits = 1 << np.arange(len(shapes))
+        self._inactive = np.minimum(masks.sum(axis=0), 1).reshape(-1) * INACTIVE_LEVEL
+        self._glyphs: dict[int, np.ndarray] = {}
+
+        # The colon is rendered over its whole column
+        colon_left = round(colon_x * scale)
+        colon_width = round(COLON_WIDTH * scale)
+        cx, r = COLON_WIDTH / 2, THICKNESS / 2
+        colon = np.maximum(
+            coverage(dot(cx, PADDING + DIGIT_HEIGHT * 0.3, r), colon_width, self.height, scale),
+            coverage(dot(cx, PADDING + DIGIT_HEIGHT * 0.7, r), colon_width, self.height, scale),
+        )
+        self._colon_x = slice(colon_left, colon_left + colon_width)
+        self._colon = (_quantize(colon * INACTIVE_LEVEL), _quantize(colon))
+
+        self.palette = make_palette(color, background)
+
+    def glyphs(self, words: list[int]) -> list[np.ndarray]:
+        """
+        Quantized cells of segment words, rendering the uncached ones together.
+
+        :param words: Segment words.
+        :return: uint8 coverage levels of each word's cell.
+        """
+        missing = list({word for word in words if word not in self._glyphs})
+        if missing:
+            if len(self._glyphs) + len(missing) > GLYPH_CACHE_SIZE:
+                self._glyphs.clear()
+            lit = (np.array(missing)[:, None] & self._bits) != 0
+            lit_coverage = np.minimum(lit.astype(np.float32) @ self._masks, 1)
+            cells = _quantize(np.maximum(lit_coverage, self._inactive))
+            for word, cell in zip(missing, cells.reshape(len(missing), *self._cell_shape)):
+                self._glyphs[word] = cell
+        return [self._glyphs[word] for word in words]
+
+    def render(self, digits: list[int], colon: bool = False, brightness: int = 7) -> np.ndarray:
+        """
+        Render a frame.
+
+        :param digits: Segment words of the four digits.
+        :param colon: Colon state.
+        :param brightness: Brightness level (0-7).
+        :return: uint8 palette indices, shaped (height, width).
+        """
+        image = np.zeros((self.height, self.width), dtype=np.uint8)
+        height, width = self._cell_shape
+        top = self._cell_y
+        for left, cell in zip(self._cell_x, self.glyphs(list(digits)[:4])):
+            image[top : top + height, left : left + width] = cell
+        image[:, self._colon_x] = self._colon[bool(colon)]
+        image += min(max(int(brightness), 0), 7) * LEVELS
+        return image
+
+    def to_rgb(self, image: np.ndarray) -> np.ndarray:
+        """Expand palette indices to RGB, shaped (height, width, 3)."""
+        return self.palette[image]
+
+
+def _quantize(levels: np.ndarray) -> np.ndarray:
+    return np.rint(levels * (LEVELS - 1)).astype(np.uint8)
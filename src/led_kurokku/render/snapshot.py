@@ -0,0 +1,37 @@
+"""PNG snapshots of broadcast hubs for the web server."""
+
+import weakref
+import zlib
+
+from ..broadcast import BroadcastHub
+from .formats import encode_png
+from .raster import SegmentRenderer
+
+_renderers: dict[tuple[str, int], SegmentRenderer] = {}
+# Latest snapshot of each hub per scale: version, ETag and PNG
+_snapshots: "weakref.WeakKeyDictionary[BroadcastHub, dict[int, tuple[int, str, bytes]]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def snapshot_png(hub: BroadcastHub, scale: int = 2) -> tuple[str, bytes]:
+    """
+    The hub's current frame as a PNG image, rendered once per frame.
+
+    :param hub: Hub holding the frame.
+    :param scale: Pixels per design unit of the display layout.
+    :return: The image's ETag and the image.
+    """
+    cached = _snapshots.setdefault(hub, {})
+    snapshot = cached.get(scale)
+    if snapshot is not None and snapshot[0] == hub.version:
+        return snapshot[1], snapshot[2]
+
+    display_type = "ht16k33" if hub.display_type == "ht16k33" else "tm1637"
+    renderer = _renderers.get((display_type, scale))
+    if renderer is None:
+        renderer = _renderers[(display_type, scale)] = SegmentRenderer(display_type, scale)
+    body = encode_png(renderer.render(hub.digits, hub.colon, hub.brightness), renderer.palette)
+    etag = f'"{zlib.crc32(body):08x}"'
+    cached[scale] = (hub.version, etag, body)
+    return etag, body
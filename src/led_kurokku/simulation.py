@@ -0,0 +1,342 @@
+"""Virtual-time simulation of the display engine.
+
+Runs :func:`~led_kurokku.core.display_widgets` on an event loop whose clock
+jumps straight to the next scheduled timer instead of waiting for it, against
+an in-memory fakeredis store and a driver that records every frame. A full day
+of widget rotation completes in seconds and produces a timeline of what was
+shown when.
+"""
+
+import asyncio
+import json
+import logging
+import selectors
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import Any
+
+from .alert_scheduler import AlertScheduler
+from .core import REDIS_KEY_ALERT, REDIS_KEY_SEPARATOR, display_widgets
+from .display_factory import DisplayType
+from .ht16k33.segments import REVERSE_SEGMENTS_14
+from .models import ConfigSettings
+from .tm1637.base_driver import BaseDriver
+from .tm1637.console import REVERSE_SEGMENTS
+from .utils import clock
+from .widgets.alert import IndividualAlert
+from .widgets.base import WidgetConfig
+
+logger = logging.getLogger(__name__)
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    """Selector that advances the loop's virtual clock instead of blocking."""
+
+    def __init__(self, loop: "VirtualTimeEventLoop"):
+        super().__init__()
+        self._virtual_loop = loop
+
+    def select(self, timeout=None):
+        # Only the loop's self-pipe is registered when running against
+        # fakeredis, so skip the system call unless something else is
+        events = super().select(0) if len(self.get_map()) > 1 else []
+        if not events and timeout:
+            self._virtual_loop.advance(timeout)
+        elif not events and timeout is None:
+            raise RuntimeError("Simulation stalled: nothing is scheduled")
+        return events
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    """
+    Event loop running on virtual time.
+
+    Whenever the loop would block waiting for a timer, the virtual clock is
+    moved forward to that timer instead. ``time()`` starts at zero.
+    """
+
+    def __init__(self):
+        super().__init__(selector=_VirtualSelector(self))
+        self._virtual_time = 0.0
+
+    def time(self) -> float:
+        return self._virtual_time
+
+    def advance(self, seconds: float) -> None:
+        """Move the virtual clock forward."""
+        self._virtual_time += seconds
+
+
+@dataclass
+class Frame:
+    """A single frame written to the recording driver."""
+
+    time: datetime
+    digits: list[int]
+    colon: bool
+    brightness: int
+    widget: str | None = None
+
+
+@dataclass
+class TimelineEntry:
+    """A span of time during which the display showed the same text."""
+
+    start: datetime
+    end: datetime
+    widget: str | None
+    text: str
+    frames: int = 1
+    brightness: int = 0
+
+    @property
+    def duration(self) -> float:
+        return (self.end - self.start).total_seconds()
+
+
+@dataclass
+class SimulationResult:
+    """Outcome of a simulation run."""
+
+    start: datetime
+    end: datetime
+    display_type: str
+    frames: int
+    timeline: list[TimelineEntry]
+    elapsed: float = 0.0  # Real seconds taken to run the simulation
+    widget_time: dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return a JSON-serializable representation."""
+        return {
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+            "display_type": self.display_type,
+            "frames": self.frames,
+            "elapsed": self.elapsed,
+            "widget_time": self.widget_time,
+            "timeline": [
+                {
+                    **asdict(entry),
+                    "start": entry.start.isoformat(),
+                    "end": entry.end.isoformat(),
+                    "duration": entry.duration,
+                }
+                for entry in self.timeline
+            ],
+        }
+
+
+class TimelineDriver(BaseDriver):
+    """
+    Driver that records every frame with the (simulated) time it was shown.
+    """
+
+    def __init__(self, brightness=2) -> None:
+        super().__init__(brightness=brightness)
+        self._driver_name = "timeline"
+        self.frames: list[Frame] = []
+        self.current_widget: str | None = None
+
+    def _record(self, data: list[int], colon: bool) -> None:
+        self.frames.append(
+            Frame(clock.now(), list(data), colon, self._brightness, self.current_widget)
+        )
+
+    def display(self, data: list[int], colon: bool = False) -> None:
+        self._record(data, colon)
+
+    def clear(self) -> None:
+        self._record([0, 0, 0, 0], False)
+
+    @BaseDriver.brightness.setter
+    def brightness(self, value: int) -> None:
+        if not 0 <= value <= 7:
+            raise ValueError("Brightness must be between 0 and 7")
+        self._brightness = value
+
+
+def decode_text(digits: list[int], display_type: str = DisplayType.TM1637) -> str:
+    """Turn raw segment values back into display text ("?" when unknown)."""
+    if display_type == DisplayType.HT16K33:
+        return "".join(REVERSE_SEGMENTS_14.get(d & 0x3FFF, "?") for d in digits)
+    return "".join(REVERSE_SEGMENTS.get(d & 0x7F, "?") for d in digits)
+
+
+def build_timeline(
+    frames: list[Frame], end: datetime, display_type: str = DisplayType.TM1637
+) -> list[TimelineEntry]:
+    """
+    Collapse consecutive frames showing the same widget and text into spans.
+
+    Colon blinking does not start a new span.
+    """
+    timeline: list[TimelineEntry] = []
+    for frame in frames:
+        text = decode_text(frame.digits, display_type)
+        last = timeline[-1] if timeline else None
+        if last and last.text == text and last.widget == frame.widget:
+            last.frames += 1
+            continue
+        if last:
+            last.end = frame.time
+        timeline.append(
+            TimelineEntry(
+                start=frame.time,
+                end=frame.time,
+                widget=frame.widget,
+                text=text,
+                brightness=frame.brightness,
+            )
+        )
+    if timeline:
+        timeline[-1].end = end
+    return timeline
+
+
+def _parse_at(value: Any, start: datetime) -> datetime:
+    """Resolve an alert's ``at`` field (seconds offset, HH:MM or ISO datetime)."""
+    if isinstance(value, (int, float)):
+        return start + timedelta(seconds=value)
+    value = str(value)
+    if "T" in value or "-" in value:
+        return datetime.fromisoformat(value)
+    parts = [int(p) for p in value.split(":")]
+    at = start.replace(hour=parts[0], minute=parts[1], second=parts[2] if len(parts) > 2 else 0)
+    return at if at >= start else at + timedelta(days=1)
+
+
+async def _run(
+    config: ConfigSettings,
+    start: datetime,
+    duration: timedelta,
+    display_type: str,
+    alerts: list[dict[str, Any]],
+    data: dict[str, str],
+) -> tuple[TimelineDriver, datetime]:
+    from fakeredis import FakeAsyncRedis, FakeServer
+
+    loop = asyncio.get_running_loop()
+    origin = loop.time()
+    redis_client = FakeAsyncRedis(server=FakeServer())
+    queue = asyncio.Queue()
+    config_event = asyncio.Event()
+    stop_event = asyncio.Event()
+    driver = TimelineDriver()
+    config_dict = json.loads(config.model_dump_json())
+    # Stands in for the event listener's alert tracking
+    scheduler = AlertScheduler()
+    scheduler.loaded = True
+
+    for key, value in data.items():
+        await redis_client.set(key, value)
+
+    def at_virtual(moment: datetime) -> float:
+        return origin + (moment - start).total_seconds()
+
+    async def add_alert(alert: dict[str, Any]) -> None:
+        key = f"{REDIS_KEY_ALERT}{REDIS_KEY_SEPARATOR}{alert['id']}"
+        payload = IndividualAlert(**alert).model_dump_json(exclude={"id"})
+        await redis_client.set(key, payload)
+        # Mirror event_listener's reaction to an alert keyspace event
+        scheduler.update(key, payload)
+
+    async def expire_alert(alert_id: str) -> None:
+        key = f"{REDIS_KEY_ALERT}{REDIS_KEY_SEPARATOR}{alert_id}"
+        await redis_client.delete(key)
+        scheduler.remove(key)
+
+    for i, raw in enumerate(alerts):
+        alert = dict(raw)
+        alert.setdefault("id", f"sim-{i}")
+        at = _parse_at(alert.pop("at", 0), start)
+        ttl = alert.pop("ttl", None)
+        alert.setdefault("timestamp", at.isoformat())
+        loop.call_at(at_virtual(at), lambda a=alert: loop.create_task(add_alert(a)))
+        if ttl:
+            expiry = at + timedelta(seconds=ttl)
+            loop.call_at(
+                at_virtual(expiry),
+                lambda i=alert["id"]: loop.create_task(expire_alert(i)),
+            )
+
+    def stop() -> None:
+        stop_event.set()
+        config_event.set()
+
+    def on_widget(widget_config: WidgetConfig) -> None:
+        driver.current_widget = str(widget_config.widget_type)
+
+    end = start + duration
+    loop.call_at(at_virtual(end), stop)
+    await queue.put(config_dict)
+    with clock.use_clock(lambda: start + timedelta(seconds=loop.time() - origin)):
+        await display_widgets(
+            redis_client,
+            queue,
+            config_event,
+            stop_event,
+            driver_instance=driver,
+            display_type=display_type,
+            widget_callback=on_widget,
+            scheduler=scheduler,
+        )
+    await redis_client.aclose()
+    return driver, end
+
+
+def simulate(
+    config: ConfigSettings | dict[str, Any],
+    start: datetime | None = None,
+    duration: timedelta = timedelta(hours=24),
+    display_type: str = DisplayType.TM1637,
+    alerts: list[dict[str, Any]] | None = None,
+    data: dict[str, str] | None = None,
+) -> SimulationResult:
+    """
+    Run a configuration on virtual time and return a timeline of what was shown.
+
+    :param config: Configuration to simulate.
+    :param start: Simulated start time (defaults to today at midnight).
+    :param duration: How much simulated time to run.
+    :param display_type: Hardware display type ("tm1637" or "ht16k33").
+    :param alerts: Alerts to inject. Each is an ``IndividualAlert`` dictionary
+        with optional ``at`` (seconds offset, ``HH:MM[:SS]`` or ISO datetime)
+        and ``ttl`` (seconds) fields.
+    :param data: Extra Redis keys to preload, e.g. dynamic message sources.
+    :return: The simulation result.
+    """
+    if not isinstance(config, ConfigSettings):
+        config = ConfigSettings.model_validate(config)
+    if start is None:
+        start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    real_start = time.perf_counter()
+    loop = VirtualTimeEventLoop()
+    try:
+        driver, end = loop.run_until_complete(
+            _run(config, start, duration, display_type, alerts or [], data or {})
+        )
+    finally:
+        loop.close()
+
+    timeline = build_timeline(driver.frames, end, display_type)
+    widget_time: dict[str, float] = {}
+    for entry in timeline:
+        key = entry.widget or "none"
+        widget_time[key] = widget_time.get(key, 0.0) + entry.duration
+
+    result = SimulationResult(
+        start=start,
+        end=end,
+        display_type=str(display_type),
+        frames=len(driver.frames),
+        timeline=timeline,
+        elapsed=time.perf_counter() - real_start,
+        widget_time=widget_time,
+    )
+    logger.info(
+        f"Simulated {duration} in {result.elapsed:.2f}s ({result.frames} frames)"
+    )
+    return result
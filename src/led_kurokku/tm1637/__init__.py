@@ -62,6 +62,7 @@ class TM1637:
 
     def __init__(self, driver=BaseDriver):
         self.driver = driver
+        self.last_frame = None
 
     def clear(self):
         """Clear the display"""
@@ -77,6 +78,7 @@ class TM1637:
 
     def display(self, segments: list[int], colon=False):
         """Display the segments on the display"""
+        self.last_frame = (segments, colon)  # Restored after an urgent alert
         self.driver.display(segments, colon)
 
     def show_number(self, number: int | float):
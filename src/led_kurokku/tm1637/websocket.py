@@ -1,9 +1,9 @@
-import json
 import asyncio
 import logging
-from typing import Dict, List, Optional, Set
+from typing import List, Optional, Set
 
 from .base_driver import BaseDriver
+from ..broadcast import BroadcastHub
 
 logger = logging.getLogger(__name__)
 
@@ -11,96 +11,155 @@ logger = logging.getLogger(__name__)
 class WebSocketDriver(BaseDriver):
     """
     WebSocket driver for TM1637 display.
-    Sends display data as JSON over WebSocket connections.
+    Sends display data as JSON over WebSocket connections, or as binary delta
+    frames (see :mod:`led_kurokku.websocket_protocol`) to clients that ask for it.
+
+    Every frame is published to :attr:`hub`, which the web server's viewers
+    follow with latest-state-wins semantics. Queues added with
+    :meth:`add_client` receive every frame and suit in-process consumers.
     """
 
+    # Added to JSON updates when set, and flagged in binary frames
+    display_type: Optional[str] = None
+
     def __init__(self, brightness=2) -> None:
         """
         Initialize the WebSocket TM1637 driver.
-        
+
         :param brightness: Initial brightness level (0-7).
         """
         super().__init__(brightness=brightness)
         self._driver_name = "websocket"
         self._connected_clients: Set[asyncio.Queue] = set()
+        self._binary_clients: Set[asyncio.Queue] = set()
+        # Binary clients that missed a frame and need a keyframe next
+        self._stale_clients: Set[asyncio.Queue] = set()
         self._current_display = [0, 0, 0, 0]
         self._current_colon = False
+        self.hub = BroadcastHub(display_type=self.display_type, brightness=brightness)
 
-    def add_client(self, queue: asyncio.Queue) -> None:
+    def add_client(self, queue: asyncio.Queue, binary: bool = False) -> None:
         """
         Add a client to the WebSocket driver.
-        
+
         :param queue: An asyncio Queue to send updates to.
+        :param binary: Send binary delta frames instead of JSON.
         """
-        self._connected_clients.add(queue)
+        if binary:
+            self._binary_clients.add(queue)
+        else:
+            self._connected_clients.add(queue)
         # Send the current state to the new client
         self._send_update_to_client(queue)
-        logger.debug(f"Added client, total clients: {len(self._connected_clients)}")
+        logger.debug(f"Added client, total clients: {self.client_count}")
 
     def remove_client(self, queue: asyncio.Queue) -> None:
         """
         Remove a client from the WebSocket driver.
-        
+
         :param queue: The asyncio Queue to remove.
         """
         self._connected_clients.discard(queue)
-        logger.debug(f"Removed client, remaining clients: {len(self._connected_clients)}")
+        self._binary_clients.discard(queue)
+        self._stale_clients.discard(queue)
+        logger.debug(f"Removed client, remaining clients: {self.client_count}")
+
+    @property
+    def client_count(self) -> int:
+        """Number of connected clients."""
+        return len(self._connected_clients) + len(self._binary_clients)
+
+    @property
+    def sequence(self) -> int:
+        """Sequence number of the last broadcast frame."""
+        return self.hub.version
+
+    def _json_update(self) -> str:
+        return self.hub.json_message()
+
+    def keyframe(self) -> bytes:
+        """
+        Encode the current state as a binary keyframe.
+
+        :return: The encoded keyframe.
+        """
+        return self.hub.keyframe()
+
+    def request_keyframe(self, queue: asyncio.Queue) -> None:
+        """
+        Send a keyframe to a binary client, e.g. when it detects a gap.
+
+        :param queue: The client's asyncio Queue.
+        """
+        if queue in self._binary_clients:
+            self._send_update_to_client(queue)
 
     def _send_update_to_client(self, queue: asyncio.Queue) -> None:
         """
         Send the current display state to a specific client.
-        
+
         :param queue: The client's asyncio Queue.
         """
+        binary = queue in self._binary_clients
         try:
-            update = {
-                "brightness": self._brightness,
-                "digits": self._current_display,
-                "colon": self._current_colon
-            }
-            queue.put_nowait(json.dumps(update))
+            queue.put_nowait(self.keyframe() if binary else self._json_update())
+            self._stale_clients.discard(queue)
         except asyncio.QueueFull:
             logger.warning("Client queue full, update not sent")
+            if binary:
+                self._stale_clients.add(queue)
         except Exception as e:
             logger.error(f"Error sending update to client: {e}")
 
-    def _broadcast_update(self) -> None:
-        """
-        Broadcast the current display state to all connected clients.
-        """
-        if not self._connected_clients:
-            return
-            
-        update = {
-            "brightness": self._brightness,
-            "digits": self._current_display,
-            "colon": self._current_colon
-        }
-        update_json = json.dumps(update)
-        
-        for queue in list(self._connected_clients):
+    def _put(self, clients: Set[asyncio.Queue], message, stale: Optional[Set] = None) -> None:
+        for queue in list(clients):
             try:
-                queue.put_nowait(update_json)
+                queue.put_nowait(message)
+                if stale:
+                    stale.discard(queue)
             except asyncio.QueueFull:
                 logger.warning("Client queue full, update not sent")
+                if stale is not None:
+                    stale.add(queue)
             except Exception as e:
                 logger.error(f"Error broadcasting update: {e}")
                 # Optionally remove problematic clients
-                self._connected_clients.discard(queue)
+                self.remove_client(queue)
+
+    def _broadcast_update(self) -> None:
+        """
+        Broadcast the current display state to all connected clients.
+
+        Each message is encoded once and shared by every client of the
+        same protocol.
+        """
+        self.hub.publish(self._current_display, self._current_colon, self._brightness)
+
+        if self._connected_clients:
+            self._put(self._connected_clients, self.hub.json_message())
+
+        if self._binary_clients:
+            delta = self.hub.delta()
+            if self._stale_clients:
+                stale = self._binary_clients & self._stale_clients
+                self._put(stale, self.hub.keyframe(), self._stale_clients)
+                self._put(self._binary_clients - stale, delta, self._stale_clients)
+            else:
+                self._put(self._binary_clients, delta, self._stale_clients)
 
     def display(self, data: List[int], colon: bool = False) -> None:
         """
         Display the given data and broadcast it to all connected clients.
-        
+
         :param data: A list of integers to display (segment values).
         :param colon: Boolean flag whether to display the colon.
         """
         if not isinstance(data, list) or len(data) != 4:
             raise ValueError("Display data must be a list of 4 integers")
-            
+
         self._current_display = data.copy()
         self._current_colon = colon
-        
+
         logger.debug(f"Displaying: {data}, colon: {colon}")
         self._broadcast_update()
 
@@ -110,7 +169,7 @@ class WebSocketDriver(BaseDriver):
         """
         self._current_display = [0, 0, 0, 0]
         self._current_colon = False
-        
+
         logger.debug("Clearing display")
         self._broadcast_update()
 
@@ -118,12 +177,12 @@ class WebSocketDriver(BaseDriver):
     def brightness(self, value: int) -> None:
         """
         Set the brightness level and broadcast the change to all clients.
-        
+
         :param value: The brightness level (0-7).
         """
         if 0 <= value <= 7:
             self._brightness = value
         else:
             raise ValueError("Brightness must be between 0 and 7")
-            
-        self._broadcast_update()
\ No newline at end of file
+
+        self._broadcast_update()
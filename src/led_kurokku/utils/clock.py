@@ -0,0 +1,38 @@
+"""Wall clock used by the display engine and widgets.
+
+Everything that decides what to show based on the time of day reads it through
+:func:`now`, so the simulator can substitute a virtual clock.
+"""
+
+import contextlib
+from datetime import datetime
+from typing import Callable
+
+_now: Callable[[], datetime] = datetime.now
+
+
+def now() -> datetime:
+    """Return the current (possibly simulated) local time."""
+    return _now()
+
+
+def set_clock(func: Callable[[], datetime] | None) -> None:
+    """
+    Replace the time source.
+
+    :param func: Callable returning the current time, or None to restore
+        the system clock.
+    """
+    global _now
+    _now = func or datetime.now
+
+
+@contextlib.contextmanager
+def use_clock(func: Callable[[], datetime]):
+    """Use ``func`` as the time source for the duration of the block."""
+    previous = _now
+    set_clock(func)
+    try:
+        yield
+    finally:
+        set_clock(previous)
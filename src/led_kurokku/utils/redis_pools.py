@@ -0,0 +1,45 @@
+"""Shared Redis connection pools, one per endpoint and database."""
+
+import redis.asyncio as redis
+
+
+class RedisPools:
+    """
+    One connection pool per Redis endpoint and database, shared by every
+    client that uses it.
+    """
+
+    def __init__(self, **connection_kwargs):
+        """
+        Initialize the pools.
+
+        :param connection_kwargs: Passed to every pool, e.g. ``socket_timeout``.
+        """
+        self._connection_kwargs = connection_kwargs
+        self._pools: dict[tuple[str, int, int], redis.ConnectionPool] = {}
+
+    def client(self, host: str, port: int, db: int = 0) -> redis.Redis:
+        """
+        Get a client backed by the shared pool for an endpoint.
+
+        :param host: Redis host.
+        :param port: Redis port.
+        :param db: Redis database.
+        :return: A client; closing it leaves the pool open.
+        """
+        key = (host, port, db)
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = redis.ConnectionPool(
+                host=host, port=port, db=db, **self._connection_kwargs
+            )
+        return redis.Redis(connection_pool=pool)
+
+    def __len__(self) -> int:
+        return len(self._pools)
+
+    async def aclose(self) -> None:
+        """Disconnect every pool."""
+        for pool in self._pools.values():
+            await pool.disconnect()
+        self._pools.clear()
@@ -0,0 +1,206 @@
+"""In-memory cache of the web server's templates and static files.
+
+Files are read once at startup and pre-compressed with gzip, and with brotli
+when the ``brotli`` package is installed. Responses carry an ETag so browsers
+revalidate with ``If-None-Match`` and get an empty 304 when nothing changed.
+In reload mode each request checks the file's modification time and size,
+and reloads the file when either changed.
+"""
+
+import gzip
+import hashlib
+import importlib.util
+import logging
+import mimetypes
+import os
+import pathlib
+from dataclasses import dataclass
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+BROTLI_AVAILABLE = importlib.util.find_spec("brotli") is not None
+
+# Smaller files are not worth compressing
+MIN_COMPRESS_SIZE = 256
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+)
+# Browsers revalidate on every load; unchanged assets cost a 304
+CACHE_CONTROL = "no-cache"
+
+
+@dataclass
+class Asset:
+    """A file held in memory with its pre-compressed variants."""
+
+    path: pathlib.Path
+    content_type: str
+    body: bytes
+    etag: str
+    mtime_ns: int
+    size: int
+    gzip: bytes | None = None
+    brotli: bytes | None = None
+
+
+def load_asset(path: pathlib.Path) -> Asset:
+    """
+    Read a file and pre-compress it when worthwhile.
+
+    :param path: File to load.
+    :return: The loaded asset.
+    """
+    stat = path.stat()
+    body = path.read_bytes()
+    content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    asset = Asset(
+        path=path,
+        content_type=content_type,
+        body=body,
+        etag=hashlib.sha1(body).hexdigest()[:20],
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+    )
+    if len(body) >= MIN_COMPRESS_SIZE and content_type.startswith(COMPRESSIBLE_TYPES):
+        compressed = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(compressed) < len(body):
+            asset.gzip = compressed
+        if BROTLI_AVAILABLE:
+            import brotli
+
+            compressed = brotli.compress(body)
+            if len(compressed) < len(body):
+                asset.brotli = compressed
+    return asset
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an asset's ETag."""
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        candidate = candidate.removeprefix("W/").strip('"')
+        # Compressed variants carry a suffix on the same base tag
+        if candidate.split("-", 1)[0] == etag:
+            return True
+    return False
+
+
+class AssetCache:
+    """
+    Serves files from memory with compression and ETag revalidation.
+    """
+
+    def __init__(self, reload: bool = False):
+        """
+        Initialize the cache.
+
+        :param reload: Check files for changes on every request.
+        """
+        self.reload = reload
+        self._assets: dict[str, Asset] = {}
+        self._directories: dict[str, pathlib.Path] = {}
+
+    def add_file(self, url_path: str, path: pathlib.Path) -> None:
+        """
+        Cache a single file under a URL path.
+
+        :param url_path: URL path the file is served under.
+        :param path: File to serve.
+        """
+        self._assets[url_path] = load_asset(pathlib.Path(path))
+
+    def add_directory(self, prefix: str, directory: pathlib.Path) -> None:
+        """
+        Cache every file below a directory under a URL prefix.
+
+        :param prefix: URL prefix, e.g. "/static".
+        :param directory: Directory to serve.
+        """
+        directory = pathlib.Path(directory).resolve()
+        self._directories[prefix.rstrip("/")] = directory
+        for root, _, files in os.walk(directory):
+            for name in files:
+                path = pathlib.Path(root) / name
+                relative = path.relative_to(directory).as_posix()
+                self.add_file(f"{prefix.rstrip('/')}/{relative}", path)
+        logger.debug(f"Cached {len(self._assets)} assets")
+
+    def _find_new(self, url_path: str) -> Asset | None:
+        """In reload mode, pick up files added below a cached directory."""
+        for prefix, directory in self._directories.items():
+            if not url_path.startswith(prefix + "/"):
+                continue
+            path = (directory / url_path[len(prefix) + 1 :]).resolve()
+            if path.is_relative_to(directory) and path.is_file():
+                self.add_file(url_path, path)
+                return self._assets[url_path]
+        return None
+
+    def get(self, url_path: str) -> Asset | None:
+        """
+        Look up an asset, reloading it first in reload mode.
+
+        :param url_path: URL path of the asset.
+        :return: The asset, or None if there is none.
+        """
+        asset = self._assets.get(url_path)
+        if not self.reload:
+            return asset
+        if asset is None:
+            return self._find_new(url_path)
+        try:
+            stat = asset.path.stat()
+        except FileNotFoundError:
+            del self._assets[url_path]
+            return None
+        if stat.st_mtime_ns != asset.mtime_ns or stat.st_size != asset.size:
+            logger.info(f"Reloading {asset.path}")
+            asset = self._assets[url_path] = load_asset(asset.path)
+        return asset
+
+    def respond(self, request: web.Request, url_path: str) -> web.Response:
+        """
+        Build the response for an asset, honouring If-None-Match and Accept-Encoding.
+
+        :param request: The web request.
+        :param url_path: URL path of the asset.
+        :return: The response.
+        """
+        asset = self.get(url_path)
+        if asset is None:
+            raise web.HTTPNotFound()
+
+        accept = request.headers.get("Accept-Encoding", "")
+        body, encoding, etag = asset.body, None, asset.etag
+        if asset.brotli is not None and "br" in accept:
+            body, encoding, etag = asset.brotli, "br", f"{asset.etag}-br"
+        elif asset.gzip is not None and "gzip" in accept:
+            body, encoding, etag = asset.gzip, "gzip", f"{asset.etag}-gz"
+
+        headers = {
+            "ETag": f'"{etag}"',
+            "Cache-Control": CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+        }
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match and _etag_matches(if_none_match, asset.etag):
+            return web.Response(status=304, headers=headers)
+
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        response = web.Response(body=body, content_type=asset.content_type, headers=headers)
+        if asset.content_type.startswith("text/"):
+            response.charset = "utf-8"
+        return response
+
+    async def handle_static(self, request: web.Request) -> web.Response:
+        """Route handler for ``<prefix>/{path}`` routes."""
+        return self.respond(request, request.path)
@@ -0,0 +1,435 @@
+"""Host many named virtual clocks from one web server process.
+
+Each clock has its own Redis endpoint and database, its own widget rotation
+and its own broadcast hub, served under ``/clock/<name>`` and ``/ws/<name>``.
+All clocks share one event loop, one HTTP server, the cached page and static
+files, and one Redis connection pool per endpoint.
+
+Clocks are listed in a YAML file::
+
+    redis:
+      host: localhost
+      port: 6379
+    clocks:
+      - name: lobby
+        db: 1
+      - name: office
+        db: 2
+        display_type: ht16k33
+      - name: warehouse
+        host: redis.warehouse.local
+      - name: kitchen
+        namespace: kitchen
+
+A clock with a ``namespace`` keeps its keys under ``kurokku:<namespace>:``
+(see :mod:`led_kurokku.namespace`), so several clocks can share a database.
+
+In mirror mode the server runs no widget engines; it relays the frames that
+``led-kurokku --publish-frames`` clocks publish over Redis, adding a clock for
+each instance as its first frame arrives.
+"""
+
+import asyncio
+import html
+import logging
+import os
+import pathlib
+import time
+from typing import Literal
+
+import redis.asyncio as redis
+import yaml
+from aiohttp import web
+from pydantic import BaseModel, Field, field_validator
+
+from .alert_events import OwnWrites
+from .alert_scheduler import AlertScheduler
+from .broadcast import BroadcastHub
+from .core import display_widgets, event_listener
+from .display_factory import create_driver
+from .drivers.redis_frames import follow_frames
+from .namespace import DEFAULT_NAMESPACE, KeyNamespace, validate_instance_name
+from .tm1637.factory import DriverType
+from .utils.redis_pools import RedisPools
+from .web_assets import AssetCache
+from .web_server import (
+    STATIC_DIR,
+    WEB_TEMPLATE_DIR,
+    serve_events,
+    serve_poll,
+    serve_snapshot,
+    serve_viewer,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RedisEndpoint(BaseModel):
+    """Default Redis connection settings for the clocks in a file."""
+
+    host: str = Field(default_factory=lambda: os.environ.get("REDIS_HOST", "localhost"))
+    port: int = Field(default_factory=lambda: int(os.environ.get("REDIS_PORT", 6379)))
+
+
+class ClockSpec(BaseModel):
+    """A named virtual clock and the Redis database it reads its config from."""
+
+    name: str = Field(pattern=r"^[A-Za-z0-9_.-]+$")
+    host: str | None = None
+    port: int | None = None
+    db: int = Field(default=0, ge=0)
+    display_type: Literal["tm1637", "ht16k33"] = "tm1637"
+    namespace: str | None = None  # Key namespace on a shared Redis database
+
+    @field_validator("namespace")
+    @classmethod
+    def _check_namespace(cls, value: str | None) -> str | None:
+        return None if value is None else validate_instance_name(value)
+
+    def key_namespace(self) -> KeyNamespace:
+        """Return the Redis keys of this clock."""
+        return KeyNamespace(self.namespace)
+
+
+class ClocksConfig(BaseModel):
+    """The clocks hosted by one web server."""
+
+    redis: RedisEndpoint = Field(default_factory=RedisEndpoint)
+    clocks: list[ClockSpec]
+
+    @field_validator("clocks")
+    @classmethod
+    def unique_names(cls, clocks: list[ClockSpec]) -> list[ClockSpec]:
+        names = [clock.name for clock in clocks]
+        duplicates = {name for name in names if names.count(name) > 1}
+        if duplicates:
+            raise ValueError(f"Duplicate clock names: {', '.join(sorted(duplicates))}")
+        return clocks
+
+
+def load_clocks(path: str | pathlib.Path) -> ClocksConfig:
+    """
+    Load a clocks file.
+
+    :param path: YAML file listing the clocks.
+    :return: The validated clocks configuration.
+    """
+    with open(path) as f:
+        return ClocksConfig.model_validate(yaml.safe_load(f))
+
+
+class VirtualClock:
+    """
+    A named clock: a websocket driver fed by its own widget rotation.
+
+    Kept deliberately small, since a process may host hundreds of them.
+    """
+
+    __slots__ = ("name", "display_type", "redis_client", "keys", "driver", "hub", "_task")
+
+    def __init__(
+        self,
+        name: str,
+        redis_client: redis.Redis,
+        display_type: str = "tm1637",
+        keys: KeyNamespace = DEFAULT_NAMESPACE,
+    ):
+        """
+        Initialize the clock.
+
+        :param name: Name used in the clock's URLs.
+        :param redis_client: Client for the clock's Redis database.
+        :param display_type: Hardware display type ("tm1637" or "ht16k33").
+        :param keys: The clock's Redis keys.
+        """
+        self.name = name
+        self.display_type = display_type
+        self.redis_client = redis_client
+        self.keys = keys
+        self.driver = create_driver(display_type, driver_type=DriverType.WEBSOCKET)
+        self.hub: BroadcastHub = self.driver.hub
+        self._task: asyncio.Task | None = None
+
+    async def run(self) -> None:
+        """Run the clock's event listener and widget rotation until cancelled."""
+        queue = asyncio.Queue()
+        config_event = asyncio.Event()
+        stop_event = asyncio.Event()
+        own_writes = OwnWrites()
+        scheduler = AlertScheduler()
+        try:
+            await asyncio.gather(
+                event_listener(
+                    self.redis_client,
+                    queue,
+                    config_event,
+                    stop_event,
+                    keys=self.keys,
+                    own_writes=own_writes,
+                    scheduler=scheduler,
+                ),
+                display_widgets(
+                    self.redis_client,
+                    queue,
+                    config_event,
+                    stop_event,
+                    driver_type=DriverType.WEBSOCKET,
+                    driver_instance=self.driver,
+                    display_type=self.display_type,
+                    keys=self.keys,
+                    own_writes=own_writes,
+                    scheduler=scheduler,
+                ),
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # One broken clock must not take the others down
+            logger.exception(f"Clock '{self.name}' stopped: {e}")
+
+    def start(self) -> asyncio.Task:
+        """
+        Start the clock on the running event loop.
+
+        :return: The clock's task.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(), name=f"clock-{self.name}")
+        return self._task
+
+    async def stop(self) -> None:
+        """Cancel the clock's task and wait for it to finish."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the clock's task is running."""
+        return self._task is not None and not self._task.done()
+
+
+class MirroredClock:
+    """
+    A clock whose frames are published by a remote ``led-kurokku``.
+    """
+
+    __slots__ = ("name", "display_type", "hub", "last_frame")
+
+    # Seconds without a frame after which the clock is reported as stopped
+    STALE_AFTER = 60.0
+
+    def __init__(self, name: str, display_type: str = "tm1637"):
+        """
+        Initialize the clock.
+
+        :param name: Instance name used in the clock's URLs.
+        :param display_type: Hardware display type ("tm1637" or "ht16k33").
+        """
+        self.name = name
+        self.display_type = display_type
+        # Same hub settings as the matching websocket driver
+        self.hub = BroadcastHub(display_type="ht16k33" if display_type == "ht16k33" else None)
+        self.last_frame = float("-inf")
+
+    def apply(self, state: dict) -> None:
+        """
+        Relay a decoded frame to the clock's viewers.
+
+        :param state: A decoded frame.
+        """
+        self.hub.publish(state["digits"], state["colon"], state["brightness"])
+        self.last_frame = time.monotonic()
+
+    @property
+    def running(self) -> bool:
+        """Whether the remote clock published recently."""
+        return time.monotonic() - self.last_frame < self.STALE_AFTER
+
+
+class ClockHost:
+    """
+    Web server for many named virtual clocks.
+    """
+
+    def __init__(self, reload_assets: bool = False):
+        """
+        Initialize the server.
+
+        :param reload_assets: Reload the page and static files when they change.
+        """
+        self.app = web.Application()
+        self.clocks: dict[str, VirtualClock | MirroredClock] = {}
+
+        # Every clock page is the same cached file
+        self.assets = AssetCache(reload=reload_assets)
+        self.assets.add_file("/clock", WEB_TEMPLATE_DIR / "index.html")
+
+        self.app.router.add_get("/", self.handle_index)
+        self.app.router.add_get("/clocks", self.handle_clocks)
+        self.app.router.add_get("/clock/{name}", self.handle_clock)
+        self.app.router.add_get("/clock/{name}/snapshot.png", self.handle_snapshot)
+        self.app.router.add_get("/ws/{name}", self.handle_websocket)
+        self.app.router.add_get("/events/{name}", self.handle_events)
+        self.app.router.add_get("/poll/{name}", self.handle_poll)
+        if STATIC_DIR.is_dir():
+            self.assets.add_directory("/static", STATIC_DIR)
+            self.app.router.add_get("/static/{path:.*}", self.assets.handle_static)
+
+    def add_clock(self, clock: VirtualClock | MirroredClock) -> None:
+        """
+        Register a clock. Virtual clocks are started by :meth:`run_clocks`.
+
+        :param clock: The clock to serve.
+        """
+        if clock.name in self.clocks:
+            raise ValueError(f"Clock '{clock.name}' already exists")
+        self.clocks[clock.name] = clock
+
+    def _clock(self, request: web.Request) -> VirtualClock | MirroredClock:
+        clock = self.clocks.get(request.match_info["name"])
+        if clock is None:
+            raise web.HTTPNotFound()
+        return clock
+
+    async def handle_index(self, request: web.Request) -> web.Response:
+        """List the hosted clocks with links to their pages."""
+        links = "\n".join(
+            f'<li><a href="/clock/{html.escape(name)}">{html.escape(name)}</a></li>'
+            for name in sorted(self.clocks)
+        )
+        return web.Response(
+            text=f"<!DOCTYPE html>\n<title>LED-Kurokku clocks</title>\n<ul>\n{links}\n</ul>\n",
+            content_type="text/html",
+        )
+
+    async def handle_clocks(self, request: web.Request) -> web.Response:
+        """Report each clock's display type, state and viewer count as JSON."""
+        return web.json_response(
+            {
+                name: {
+                    "display_type": clock.display_type,
+                    "running": clock.running,
+                    "viewers": clock.hub.viewers,
+                    "sequence": clock.hub.version,
+                }
+                for name, clock in sorted(self.clocks.items())
+            }
+        )
+
+    async def handle_clock(self, request: web.Request) -> web.Response:
+        """Serve the virtual display page for one clock."""
+        self._clock(request)
+        return self.assets.respond(request, "/clock")
+
+    async def handle_snapshot(self, request: web.Request) -> web.Response:
+        """Serve one clock's current frame as a PNG image."""
+        return await serve_snapshot(request, self._clock(request).hub)
+
+    async def handle_websocket(self, request: web.Request) -> web.WebSocketResponse:
+        """Serve a WebSocket viewer from one clock's broadcast hub."""
+        return await serve_viewer(request, self._clock(request).hub)
+
+    async def handle_events(self, request: web.Request) -> web.StreamResponse:
+        """Serve a Server-Sent Events viewer from one clock's broadcast hub."""
+        return await serve_events(request, self._clock(request).hub)
+
+    async def handle_poll(self, request: web.Request) -> web.Response:
+        """Serve a long-poll request from one clock's broadcast hub."""
+        return await serve_poll(request, self._clock(request).hub)
+
+    async def run_clocks(self) -> None:
+        """Run every virtual clock until cancelled."""
+        clocks = [c for c in self.clocks.values() if isinstance(c, VirtualClock)]
+        try:
+            await asyncio.gather(*(clock.start() for clock in clocks))
+        finally:
+            await asyncio.gather(*(clock.stop() for clock in clocks))
+
+    async def mirror_frames(self, redis_client: redis.Redis, pattern: str = "*") -> None:
+        """
+        Relay the frames of every published clock matching a pattern.
+
+        :param redis_client: Client to subscribe with.
+        :param pattern: Glob pattern of instance names.
+        """
+        async for instance, state in follow_frames(redis_client, pattern):
+            clock = self.clocks.get(instance)
+            if clock is None:
+                logger.info(f"Mirroring {state['display_type']} clock '{instance}'")
+                clock = MirroredClock(instance, state["display_type"])
+                self.add_clock(clock)
+            if isinstance(clock, MirroredClock):
+                clock.apply(state)
+
+    async def start(self, host: str = "0.0.0.0", port: int = 8080) -> None:
+        """
+        Start the web server and run every clock until cancelled.
+
+        :param host: Host address to bind to.
+        :param port: Port to listen on.
+        """
+        runner = web.AppRunner(self.app)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        logger.info(f"Serving {len(self.clocks)} clocks at http://{host}:{port}")
+        try:
+            await self.run_clocks()
+            # Keep serving the last frames if every clock stopped
+            while True:
+                await asyncio.sleep(3600)
+        finally:
+            await runner.cleanup()
+
+
+async def multi_clock_event_loop(
+    host: str, port: int, path: str | pathlib.Path, reload_assets: bool = False
+):
+    """
+    Serve every clock listed in a clocks file.
+
+    :param host: Host address to bind to.
+    :param port: Port to listen on.
+    :param path: YAML file listing the clocks.
+    :param reload_assets: Reload the page and static files when they change.
+    """
+    config = load_clocks(path)
+    pools = RedisPools()
+    server = ClockHost(reload_assets=reload_assets)
+    for spec in config.clocks:
+        client = pools.client(
+            spec.host or config.redis.host,
+            spec.port or config.redis.port,
+            spec.db,
+        )
+        server.add_clock(
+            VirtualClock(spec.name, client, spec.display_type, spec.key_namespace())
+        )
+    logger.info(f"Loaded {len(server.clocks)} clocks using {len(pools)} Redis pools")
+    try:
+        await server.start(host=host, port=port)
+    finally:
+        await pools.aclose()
+
+
+async def redis_mirror_event_loop(
+    host: str, port: int, pattern: str = "*", reload_assets: bool = False
+):
+    """
+    Serve the frames published over Redis by ``led-kurokku --publish-frames``.
+
+    :param host: Host address to bind to.
+    :param port: Port to listen on.
+    :param pattern: Glob pattern of instance names to mirror.
+    :param reload_assets: Reload the page and static files when they change.
+    """
+    redis_host = os.environ.get("REDIS_HOST", "localhost")
+    redis_port = int(os.environ.get("REDIS_PORT", 6379))
+    server = ClockHost(reload_assets=reload_assets)
+    async with redis.Redis(host=redis_host, port=redis_port, db=0) as redis_client:
+        await asyncio.gather(
+            server.start(host=host, port=port),
+            server.mirror_frames(redis_client, pattern),
+        )
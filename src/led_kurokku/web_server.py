@@ -3,6 +3,7 @@ import json
 import logging
 import os
 import pathlib
+import socket
 import sys
 
 import aiohttp
@@ -10,19 +11,224 @@ from aiohttp import web
 import click
 import redis.asyncio as redis
 
+from .alert_events import OwnWrites
+from .alert_scheduler import AlertScheduler
+from .broadcast import BroadcastHub, Subscriber
 from .core import display_widgets, event_listener
-from .display_factory import create_display, DisplayType
+from .display_factory import create_display, create_driver, DisplayType
+from .drivers.fanout import FanoutChild, FanoutDriver
+from .drivers.framebuffer import FrameBufferReader, default_path, mirror
+from .drivers.recording import encode_frames
+from .render import RENDER_AVAILABLE, RENDER_MISSING
 from .tm1637.factory import DriverType
 from .tm1637.base_driver import BaseDriver
 from .utils.logging import setup_logging
+from .web_assets import AssetCache
 
 logger = logging.getLogger(__name__)
 
+# Frames and seconds of history kept for resuming viewers and /history
+DEFAULT_HISTORY = 1024
+DEFAULT_HISTORY_AGE = 300.0
+
+# Seconds between keep-alive comments on idle event streams, before a long
+# poll returns unchanged, and milliseconds EventSource waits to reconnect
+EVENTS_KEEPALIVE = 15.0
+POLL_TIMEOUT = 25.0
+EVENTS_RETRY_MS = 3000
+
+# Pixels per design unit of /snapshot.png images, and the largest accepted
+DEFAULT_SNAPSHOT_SCALE = 2
+MAX_SNAPSHOT_SCALE = 8
+
 # Directory to serve static files from
 STATIC_DIR = pathlib.Path(__file__).parent / "web" / "static"
 WEB_TEMPLATE_DIR = pathlib.Path(__file__).parent / "web" / "templates" / "web_kurokku"
 
 
+async def serve_viewer(
+    request: web.Request,
+    hub: BroadcastHub,
+    clients: dict[int, Subscriber] | None = None,
+) -> web.WebSocketResponse:
+    """
+    Serve a WebSocket viewer from a broadcast hub.
+
+    Each connection follows the hub: it always sends the newest frame and
+    skips frames it was too slow to send.
+
+    :param request: The web request.
+    :param hub: The hub to follow.
+    :param clients: Optional registry the viewer is added to while connected.
+    :return: WebSocket response.
+    """
+    ws = web.WebSocketResponse()
+    await ws.prepare(request)
+
+    # "?proto=bin" selects binary delta frames instead of JSON, and
+    # "&since=<sequence>" resumes a binary viewer from the hub's history
+    binary = request.query.get("proto") == "bin"
+    subscriber = hub.subscribe(binary=binary, since=_since(request))
+    client_id = id(ws)
+    if clients is not None:
+        clients[client_id] = subscriber
+
+    try:
+        # Start the sender task; the first message is the current state
+        sender_task = asyncio.create_task(_send_frames(ws, subscriber))
+
+        # Handle incoming messages from client (if needed)
+        async for msg in ws:
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                try:
+                    data = json.loads(msg.data)
+                    logger.debug(f"Received message from client: {data}")
+                    if isinstance(data, dict) and data.get("request") == "keyframe":
+                        subscriber.resync()
+                except json.JSONDecodeError:
+                    logger.warning(f"Invalid JSON received: {msg.data}")
+            elif msg.type == aiohttp.WSMsgType.ERROR:
+                logger.error(f"WebSocket error: {ws.exception()}")
+                break
+
+        # Cancel the sender task when the connection is closed
+        sender_task.cancel()
+        try:
+            await sender_task
+        except asyncio.CancelledError:
+            pass
+
+    finally:
+        # Clean up when the connection is closed
+        subscriber.close()
+        if clients is not None:
+            del clients[client_id]
+
+    return ws
+
+
+def _since(request: web.Request) -> int | None:
+    """The version a reconnecting client last received, if it sent a valid one."""
+    value = request.headers.get("Last-Event-ID", request.query.get("since"))
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+async def serve_events(request: web.Request, hub: BroadcastHub) -> web.StreamResponse:
+    """
+    Serve a Server-Sent Events viewer from a broadcast hub.
+
+    For clients behind proxies that break websockets. Each event is the JSON
+    message with the hub version as its ID, so a reconnecting ``EventSource``
+    (``Last-Event-ID``) is not sent the frame it already has.
+
+    :param request: The web request.
+    :param hub: The hub to follow.
+    :return: The event stream response.
+    """
+    response = web.StreamResponse(
+        headers={
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+            # Stop nginx-style proxies from buffering the stream
+            "X-Accel-Buffering": "no",
+        }
+    )
+    await response.prepare(request)
+    subscriber = hub.subscribe(since=_since(request), events=True)
+    try:
+        await response.write(f"retry: {EVENTS_RETRY_MS}\n\n".encode())
+        while True:
+            try:
+                message = await asyncio.wait_for(subscriber.next_message(), EVENTS_KEEPALIVE)
+            except asyncio.TimeoutError:
+                message = b": keep-alive\n\n"
+            await response.write(message)
+    except ConnectionResetError:
+        pass
+    finally:
+        subscriber.close()
+    return response
+
+
+async def serve_poll(request: web.Request, hub: BroadcastHub) -> web.Response:
+    """
+    Serve a long-poll request from a broadcast hub.
+
+    Returns the JSON message at once unless ``?since=`` is the current
+    version; then it waits for the next frame, up to ``POLL_TIMEOUT``
+    seconds, and answers 204 if none came. ``X-Kurokku-Sequence`` holds the
+    version to pass as ``since`` next time.
+
+    :param request: The web request.
+    :param hub: The hub to follow.
+    :return: JSON response.
+    """
+    subscriber = hub.subscribe(since=_since(request))
+    try:
+        await asyncio.wait_for(subscriber.next_message(), POLL_TIMEOUT)
+    except asyncio.TimeoutError:
+        return web.Response(status=204, headers={"X-Kurokku-Sequence": str(hub.version)})
+    finally:
+        subscriber.close()
+    return web.Response(
+        body=hub.json_body(),
+        content_type="application/json",
+        headers={"X-Kurokku-Sequence": str(hub.version), "Cache-Control": "no-store"},
+    )
+
+
+async def _send_frames(ws: web.WebSocketResponse, subscriber: Subscriber):
+    """
+    Send the newest frame to a client whenever it is ready for one.
+
+    :param ws: The WebSocket response object.
+    :param subscriber: The client's hub subscription.
+    """
+    try:
+        while not ws.closed:
+            message = await subscriber.next_message()
+            if isinstance(message, bytes):
+                await ws.send_bytes(message)
+            else:
+                await ws.send_str(message)
+    except asyncio.CancelledError:
+        # Task was cancelled, exit gracefully
+        pass
+    except Exception as e:
+        logger.error(f"Error in WebSocket sender: {e}")
+
+
+async def serve_snapshot(request: web.Request, hub: BroadcastHub) -> web.Response:
+    """
+    Serve a broadcast hub's current frame as a PNG image.
+
+    ``?scale=N`` sets the image size (1-8). The image is rendered once per
+    frame and revalidated with its ETag.
+
+    :param request: The web request.
+    :param hub: The hub holding the frame.
+    :return: PNG response.
+    """
+    if not RENDER_AVAILABLE:
+        raise web.HTTPNotImplemented(text=RENDER_MISSING)
+    from .render.snapshot import snapshot_png
+
+    try:
+        scale = int(request.query.get("scale", DEFAULT_SNAPSHOT_SCALE))
+    except ValueError:
+        raise web.HTTPBadRequest(text="scale must be a number")
+    if not 1 <= scale <= MAX_SNAPSHOT_SCALE:
+        raise web.HTTPBadRequest(text=f"scale must be between 1 and {MAX_SNAPSHOT_SCALE}")
+    etag, body = snapshot_png(hub, scale)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("If-None-Match") == etag:
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=body, content_type="image/png", headers=headers)
+
+
 class WebServer:
     """
     Web server for LED-Kurokku with WebSocket support.
@@ -36,6 +242,9 @@ class WebServer:
         driver_type: DriverType = DriverType.WEBSOCKET,
         driver_instance: BaseDriver | None = None,
         display_type: str = "tm1637",
+        reload_assets: bool = False,
+        history: int = 0,
+        history_age: float = DEFAULT_HISTORY_AGE,
     ):
         """
         Initialize the web server.
@@ -44,6 +253,10 @@ class WebServer:
         :param driver_type: Type of driver to use.
         :param driver_instance: Optional existing driver instance to use.
         :param display_type: Hardware display type ("tm1637" or "ht16k33").
+        :param reload_assets: Reload the page and static files when they change.
+        :param history: Number of recent frames kept for resuming viewers and
+            ``/history`` (0 disables the history).
+        :param history_age: Seconds a frame is kept in the history.
         """
         self.app = web.Application()
         self.redis_client = redis_client
@@ -58,15 +271,27 @@ class WebServer:
         # Keep backward compatibility with tm1637 naming
         self.tm1637 = self.display
         self.tm1637_driver = self.display.driver
-        self.clients: dict[str, asyncio.Queue] = {}
+        self.hub: BroadcastHub = self.tm1637_driver.hub
+        self.clients: dict[int, Subscriber] = {}
+        if history:
+            self.hub.keep_history(history, history_age)
+
+        # Page and static files are served from memory
+        self.assets = AssetCache(reload=reload_assets)
+        self.assets.add_file("/", WEB_TEMPLATE_DIR / "index.html")
 
         # Set up routes
         self.app.router.add_get("/", self.handle_index)
         self.app.router.add_get("/ws", self.handle_websocket)
+        self.app.router.add_get("/events", self.handle_events)
+        self.app.router.add_get("/poll", self.handle_poll)
+        self.app.router.add_get("/history", self.handle_history)
+        self.app.router.add_get("/snapshot.png", self.handle_snapshot)
 
         # Add static route if static directory exists
         if STATIC_DIR.exists() and STATIC_DIR.is_dir():
-            self.app.router.add_static("/static", STATIC_DIR)
+            self.assets.add_directory("/static", STATIC_DIR)
+            self.app.router.add_get("/static/{path:.*}", self.assets.handle_static)
         else:
             logger.warning(f"Static directory not found: {STATIC_DIR}")
             # Create the directory if it doesn't exist
@@ -79,10 +304,7 @@ class WebServer:
         :param request: The web request.
         :return: HTML response with the virtual display page.
         """
-        with open(WEB_TEMPLATE_DIR / "index.html", "r") as f:
-            # Read the HTML template from the file
-            html = f.read()
-        return web.Response(text=html, content_type="text/html")
+        return self.assets.respond(request, "/")
 
     async def handle_websocket(self, request: web.Request) -> web.WebSocketResponse:
         """
@@ -91,84 +313,79 @@ class WebServer:
         :param request: The web request.
         :return: WebSocket response.
         """
-        ws = web.WebSocketResponse()
-        await ws.prepare(request)
-
-        # Create a queue for this client
-        client_queue = asyncio.Queue(maxsize=10)
-        client_id = id(ws)
-        self.clients[client_id] = client_queue
+        return await serve_viewer(request, self.hub, self.clients)
 
-        # Add the client to the TM1637 driver for updates
-        self.tm1637_driver.add_client(client_queue)
+    async def handle_events(self, request: web.Request) -> web.StreamResponse:
+        """
+        Handle Server-Sent Events viewers, a fallback for websockets.
 
-        # Send initial state to the client
-        try:
-            # Start the message handling task
-            message_handler_task = asyncio.create_task(
-                self._handle_messages(ws, client_queue)
-            )
-
-            # Handle incoming messages from client (if needed)
-            async for msg in ws:
-                if msg.type == aiohttp.WSMsgType.TEXT:
-                    try:
-                        data = json.loads(msg.data)
-                        logger.debug(f"Received message from client: {data}")
-                        # Handle client messages here if needed
-                    except json.JSONDecodeError:
-                        logger.warning(f"Invalid JSON received: {msg.data}")
-                elif msg.type == aiohttp.WSMsgType.ERROR:
-                    logger.error(f"WebSocket error: {ws.exception()}")
-                    break
-
-            # Cancel the message handler task when the connection is closed
-            message_handler_task.cancel()
-            try:
-                await message_handler_task
-            except asyncio.CancelledError:
-                pass
+        :param request: The web request.
+        :return: Event stream response.
+        """
+        return await serve_events(request, self.hub)
 
-        finally:
-            # Clean up when the connection is closed
-            self.tm1637_driver.remove_client(client_queue)
-            del self.clients[client_id]
+    async def handle_poll(self, request: web.Request) -> web.Response:
+        """
+        Handle long-poll viewers, a fallback for websockets and event streams.
 
-        return ws
+        :param request: The web request.
+        :return: JSON response.
+        """
+        return await serve_poll(request, self.hub)
 
-    async def _handle_messages(self, ws: web.WebSocketResponse, queue: asyncio.Queue):
+    async def handle_history(self, request: web.Request) -> web.Response:
         """
-        Handle messages from the driver to send to the client.
+        Return recent frames as a recording blob.
+
+        ``?seconds=N`` limits the blob to the last N seconds. The blob can be
+        inspected and replayed with ``kurokku-cli recording``; the
+        ``X-Kurokku-Sequence`` header holds the first and last sequence number
+        in the history.
 
-        :param ws: The WebSocket response object.
-        :param queue: The client's message queue.
+        :param request: The web request.
+        :return: Binary response with the recording.
         """
+        history = self.hub.history
+        if history is None:
+            raise web.HTTPNotFound(text="History is disabled")
         try:
-            while True:
-                # Wait for messages from the driver
-                message = await queue.get()
-
-                # Send the message to the client
-                if not ws.closed:
-                    await ws.send_str(message)
-                else:
-                    break
-        except asyncio.CancelledError:
-            # Task was cancelled, exit gracefully
-            pass
-        except Exception as e:
-            logger.error(f"Error in WebSocket message handler: {e}")
+            seconds = float(request.query.get("seconds", history.max_age))
+        except ValueError:
+            raise web.HTTPBadRequest(text="seconds must be a number")
+        headers = {"Cache-Control": "no-store"}
+        if versions := history.versions():
+            headers["X-Kurokku-Sequence"] = f"{versions[0]}-{versions[1]}"
+        return web.Response(
+            body=encode_frames(history.records(seconds)),
+            content_type="application/octet-stream",
+            headers=headers,
+        )
 
-    async def start(self, host: str = "0.0.0.0", port: int = 8080) -> None:
+    async def handle_snapshot(self, request: web.Request) -> web.Response:
+        """
+        Return the current frame as a PNG image.
+
+        :param request: The web request.
+        :return: PNG response.
+        """
+        return await serve_snapshot(request, self.hub)
+
+    async def start(
+        self, host: str = "0.0.0.0", port: int = 8080, sock: socket.socket | None = None
+    ) -> None:
         """
         Start the web server.
 
         :param host: Host address to bind to.
         :param port: Port to listen on.
+        :param sock: Already listening socket to serve on instead of binding.
         """
         runner = web.AppRunner(self.app)
         await runner.setup()
-        site = web.TCPSite(runner, host, port)
+        if sock is not None:
+            site = web.SockSite(runner, sock)
+        else:
+            site = web.TCPSite(runner, host, port)
         await site.start()
         logger.info(f"Web server started at http://{host}:{port}")
 
@@ -196,7 +413,14 @@ async def run_web_server(host: str = "0.0.0.0", port: int = 8080) -> None:
         await server.start(host=host, port=port)
 
 
-async def web_event_loop(host: str, port: int, display_type: str = "tm1637"):
+async def web_event_loop(
+    host: str,
+    port: int,
+    display_type: str = "tm1637",
+    hardware: bool = False,
+    reload_assets: bool = False,
+    history: int = DEFAULT_HISTORY,
+):
     """
     Integrated event loop for the web server with the core application logic.
     This combines the web server with the main display_widgets functionality.
@@ -204,6 +428,9 @@ async def web_event_loop(host: str, port: int, display_type: str = "tm1637"):
     :param host: Host address to bind to.
     :param port: Port to listen on.
     :param display_type: Hardware display type ("tm1637" or "ht16k33").
+    :param hardware: Also drive the hardware display from the same frames.
+    :param reload_assets: Reload the page and static files when they change.
+    :param history: Number of recent frames kept (0 disables the history).
     """
     # Get Redis configuration from environment variables
     redis_host = os.environ.get("REDIS_HOST", "localhost")
@@ -213,15 +440,42 @@ async def web_event_loop(host: str, port: int, display_type: str = "tm1637"):
     queue = asyncio.Queue()  # Create an asyncio.Queue for inter-task communication
     stop_event = asyncio.Event()  # Create an asyncio.Event to signal stopping
     config_event = asyncio.Event()  # Event to signal configuration updates
+    own_writes = OwnWrites()
+    scheduler = AlertScheduler()
 
     # Create and start the web server with specified display type
-    web_server = WebServer(driver_type=DriverType.WEBSOCKET, display_type=display_type)
+    driver = None
+    if hardware:
+        # Hardware runs on its own thread so slow I/O never delays web clients
+        driver = FanoutDriver(
+            [
+                create_driver(display_type, driver_type=DriverType.WEBSOCKET),
+                FanoutChild(
+                    create_driver(display_type, driver_type=DriverType.LED),
+                    threaded=True,
+                ),
+            ]
+        )
+    web_server = WebServer(
+        driver_type=DriverType.WEBSOCKET,
+        driver_instance=driver,
+        display_type=display_type,
+        reload_assets=reload_assets,
+        history=history,
+    )
     web_server_task = asyncio.create_task(web_server.start(host=host, port=port))
 
     async with redis.Redis(host=redis_host, port=redis_port, db=0) as redis_client:
         tasks: list[asyncio.Task] = [
             asyncio.create_task(
-                event_listener(redis_client, queue, config_event, stop_event)
+                event_listener(
+                    redis_client,
+                    queue,
+                    config_event,
+                    stop_event,
+                    own_writes=own_writes,
+                    scheduler=scheduler,
+                )
             ),
             asyncio.create_task(
                 display_widgets(
@@ -233,6 +487,8 @@ async def web_event_loop(host: str, port: int, display_type: str = "tm1637"):
                     driver_type=DriverType.WEBSOCKET,
                     driver_instance=web_server.tm1637_driver,
                     display_type=display_type,
+                    own_writes=own_writes,
+                    scheduler=scheduler,
                 )
             ),
             web_server_task,
@@ -251,6 +507,48 @@ async def web_event_loop(host: str, port: int, display_type: str = "tm1637"):
 
             # Wait for tasks to finish cancellation
             await asyncio.gather(*tasks, return_exceptions=True)
+            if driver:
+                driver.close()
+
+
+async def mirror_event_loop(
+    host: str,
+    port: int,
+    path: str | None = None,
+    reload_assets: bool = False,
+    sock: socket.socket | None = None,
+    history: int = DEFAULT_HISTORY,
+):
+    """
+    Serve the frames published by a running ``led-kurokku --framebuffer``.
+
+    Instead of running a second display engine, the web display follows the
+    real display's shared-memory frame buffer.
+
+    :param host: Host address to bind to.
+    :param port: Port to listen on.
+    :param path: Frame buffer path (defaults to the standard location).
+    :param reload_assets: Reload the page and static files when they change.
+    :param sock: Already listening socket to serve on instead of binding.
+    :param history: Number of recent frames kept (0 disables the history).
+    """
+    reader = FrameBufferReader(path)
+    state = reader.read()
+    display_type = state.display_type if state else "tm1637"
+    web_server = WebServer(
+        driver_type=DriverType.WEBSOCKET,
+        display_type=display_type,
+        reload_assets=reload_assets,
+        history=history,
+    )
+    logger.info(f"Mirroring {display_type} frames from {reader.path}")
+    try:
+        await asyncio.gather(
+            web_server.start(host=host, port=port, sock=sock),
+            mirror(reader, web_server.tm1637_driver),
+        )
+    finally:
+        reader.close()
 
 
 @click.command()
@@ -266,15 +564,127 @@ async def web_event_loop(host: str, port: int, display_type: str = "tm1637"):
     default="tm1637",
     help="Display hardware type (tm1637 or ht16k33)",
 )
-def main(host, port, debug, log_file, display_type):
+@click.option(
+    "--mirror",
+    "mirror_path",
+    is_flag=False,
+    flag_value=default_path(),
+    default=None,
+    help="Mirror a local led-kurokku frame buffer instead of running widgets",
+)
+@click.option(
+    "--mirror-redis",
+    "mirror_pattern",
+    is_flag=False,
+    flag_value="*",
+    default=None,
+    help="Mirror the clocks publishing frames over Redis (optionally a name glob)",
+)
+@click.option(
+    "--clocks",
+    "clocks_file",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Host every clock listed in a YAML file under /clock/<name>",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Serve viewers from this many processes sharing the port (SO_REUSEPORT)",
+)
+@click.option(
+    "--hardware",
+    is_flag=True,
+    default=False,
+    help="Also drive the hardware display (falls back to the terminal display)",
+)
+@click.option(
+    "--history",
+    type=click.IntRange(min=0),
+    default=DEFAULT_HISTORY,
+    show_default=True,
+    help="Frames kept for resuming viewers and /history (0 disables)",
+)
+@click.option(
+    "--reload",
+    "reload_assets",
+    is_flag=True,
+    default=False,
+    help="Reload the page and static files when they change (development)",
+)
+def main(
+    host,
+    port,
+    debug,
+    log_file,
+    display_type,
+    mirror_path,
+    mirror_pattern,
+    clocks_file,
+    workers,
+    hardware,
+    history,
+    reload_assets,
+):
     """Start the LED-Kurokku web server with a virtual display."""
     log_level = logging.INFO if not debug else logging.DEBUG
     setup_logging(level=log_level, filename=log_file)
 
-    logger.info(f"Starting LED-Kurokku web server with {display_type} display on {host}:{port}")
+    if clocks_file:
+        from .web_clocks import multi_clock_event_loop
+
+        loop = multi_clock_event_loop(
+            host=host, port=port, path=clocks_file, reload_assets=reload_assets
+        )
+    elif mirror_pattern:
+        from .web_clocks import redis_mirror_event_loop
+
+        loop = redis_mirror_event_loop(
+            host=host, port=port, pattern=mirror_pattern, reload_assets=reload_assets
+        )
+    elif mirror_path:
+        loop = mirror_event_loop(
+            host=host,
+            port=port,
+            path=mirror_path,
+            reload_assets=reload_assets,
+            history=history,
+        )
+    elif workers > 1:
+        from .web_workers import REUSE_PORT_AVAILABLE, workers_event_loop
+
+        if not REUSE_PORT_AVAILABLE:
+            raise click.ClickException("--workers needs SO_REUSEPORT, not available here")
+        if hardware:
+            raise click.ClickException("--workers cannot be combined with --hardware")
+        logger.info(
+            f"Starting LED-Kurokku web server with {display_type} display on {host}:{port}"
+            f" with {workers} workers"
+        )
+        loop = workers_event_loop(
+            host=host,
+            port=port,
+            workers=workers,
+            display_type=display_type,
+            reload_assets=reload_assets,
+            history=history,
+        )
+    else:
+        logger.info(
+            f"Starting LED-Kurokku web server with {display_type} display on {host}:{port}"
+        )
+        loop = web_event_loop(
+            host=host,
+            port=port,
+            display_type=display_type,
+            hardware=hardware,
+            reload_assets=reload_assets,
+            history=history,
+        )
 
     try:
-        asyncio.run(web_event_loop(host=host, port=port, display_type=display_type))
+        asyncio.run(loop)
     except KeyboardInterrupt:
         logger.info("Web server stopped by user")
     except Exception as e:
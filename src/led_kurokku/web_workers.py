@@ -0,0 +1,247 @@
+"""Scale web-kurokku viewers across processes sharing one port.
+
+One engine process runs the widget rotation and publishes every frame to a
+private shared-memory frame buffer (see :mod:`led_kurokku.drivers.framebuffer`).
+N worker processes each listen on their own ``SO_REUSEPORT`` socket bound to
+the same port, so the kernel spreads incoming connections across them, and
+each worker serves the page and websocket viewers from the frame buffer's
+latest frame. The engine never touches a viewer socket, so viewer capacity
+grows with the number of cores.
+
+The sockets are bound by the parent before any worker starts, so the port is
+accepting as soon as the pool has started, and a restarted worker picks up
+the same socket.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import time
+
+import redis.asyncio as redis
+
+from .alert_events import OwnWrites
+from .alert_scheduler import AlertScheduler
+from .core import display_widgets, event_listener
+from .drivers.framebuffer import FrameBufferDriver, default_path
+from .utils.logging import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks for workers that exited
+SUPERVISE_INTERVAL = 1.0
+# Workers that exit sooner than this after starting have failed, and are
+# not restarted again
+MIN_WORKER_LIFETIME = 5.0
+
+REUSE_PORT_AVAILABLE = hasattr(socket, "SO_REUSEPORT")
+
+
+def worker_path() -> str:
+    """Frame buffer path private to this server."""
+    return os.path.join(os.path.dirname(default_path()), f"led-kurokku-web-{os.getpid()}.fb")
+
+
+def bind_reuse_port(host: str, port: int, backlog: int = 1024) -> socket.socket:
+    """
+    Create a listening socket that other sockets may bind the same port to.
+
+    :param host: Host address to bind to.
+    :param port: Port to listen on.
+    :param backlog: Pending connection queue length.
+    :return: The listening socket.
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.setblocking(False)
+    return sock
+
+
+def _run_worker(sock, host, port, path, reload_assets, history, log_level, log_file) -> None:
+    from .web_server import mirror_event_loop
+
+    setup_logging(level=log_level, filename=log_file)
+    try:
+        asyncio.run(
+            mirror_event_loop(
+                host=host,
+                port=port,
+                path=path,
+                reload_assets=reload_assets,
+                sock=sock,
+                history=history,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+class WorkerPool:
+    """
+    Worker processes serving viewers from a frame buffer on a shared port.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        path: str,
+        workers: int,
+        reload_assets: bool = False,
+        history: int = 0,
+        log_level: int = logging.INFO,
+        log_file: str = "",
+    ):
+        """
+        Initialize the pool.
+
+        :param host: Host address to bind to.
+        :param port: Port every worker listens on.
+        :param path: Frame buffer the workers follow.
+        :param workers: Number of worker processes.
+        :param reload_assets: Reload the page and static files when they change.
+        :param history: Number of recent frames each worker keeps.
+        :param log_level: Logging level of the workers.
+        :param log_file: Log file of the workers (empty for console logging).
+        """
+        if not REUSE_PORT_AVAILABLE:
+            raise RuntimeError("SO_REUSEPORT is not supported on this platform")
+        self._args = (host, port, path, reload_assets, history, log_level, log_file)
+        self._context = multiprocessing.get_context("spawn")
+        self.workers = workers
+        self.sockets: list[socket.socket] = []
+        self.processes: list[multiprocessing.Process] = []
+        self._started: list[float] = []
+        self.restarts = 0
+        self.failed: set[int] = set()  # Workers that exited on startup
+
+    def _spawn(self, index: int) -> multiprocessing.Process:
+        process = self._context.Process(
+            target=_run_worker,
+            args=(self.sockets[index], *self._args),
+            name=f"web-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def start(self) -> None:
+        """Bind a socket per worker and start the workers."""
+        host, port = self._args[:2]
+        self.sockets = [bind_reuse_port(host, port) for _ in range(self.workers)]
+        self.processes = [self._spawn(i) for i in range(self.workers)]
+        self._started = [time.monotonic()] * self.workers
+        logger.info(f"Started {self.workers} web workers on port {self._args[1]}")
+
+    def check(self) -> int:
+        """
+        Restart workers that exited, except those that exited on startup.
+
+        :return: Number of workers running afterwards.
+        """
+        now = time.monotonic()
+        for i, process in enumerate(self.processes):
+            if process.is_alive() or i in self.failed:
+                continue
+            if now - self._started[i] < MIN_WORKER_LIFETIME:
+                # Failing on startup, restarting would loop
+                logger.error(f"Web worker {i} exited with {process.exitcode} on startup")
+                self.failed.add(i)
+                continue
+            logger.warning(f"Web worker {i} exited with {process.exitcode}, restarting")
+            self.processes[i] = self._spawn(i)
+            self._started[i] = now
+            self.restarts += 1
+        return sum(p.is_alive() for p in self.processes)
+
+    async def supervise(self) -> None:
+        """
+        Restart exited workers until cancelled.
+
+        :raises RuntimeError: If no worker is running any more.
+        """
+        while True:
+            await asyncio.sleep(SUPERVISE_INTERVAL)
+            if self.check() == 0:
+                raise RuntimeError("All web workers exited")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Terminate every worker and close the sockets."""
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            process.join(timeout)
+        for sock in self.sockets:
+            sock.close()
+
+
+async def workers_event_loop(
+    host: str,
+    port: int,
+    workers: int,
+    display_type: str = "tm1637",
+    reload_assets: bool = False,
+    history: int = 0,
+):
+    """
+    Run the widget engine and serve its frames from worker processes.
+
+    :param host: Host address to bind to.
+    :param port: Port every worker listens on.
+    :param workers: Number of worker processes.
+    :param display_type: Hardware display type ("tm1637" or "ht16k33").
+    :param reload_assets: Reload the page and static files when they change.
+    :param history: Number of recent frames each worker keeps.
+    """
+    redis_host = os.environ.get("REDIS_HOST", "localhost")
+    redis_port = int(os.environ.get("REDIS_PORT", 6379))
+
+    queue = asyncio.Queue()
+    stop_event = asyncio.Event()
+    config_event = asyncio.Event()
+    own_writes = OwnWrites()
+    scheduler = AlertScheduler()
+
+    # The frame buffer must exist before the workers open it
+    driver = FrameBufferDriver(worker_path(), display_type=display_type)
+    root = logging.getLogger()
+    log_file = next(
+        (h.baseFilename for h in root.handlers if isinstance(h, logging.FileHandler)), ""
+    )
+    pool = WorkerPool(
+        host, port, driver.path, workers, reload_assets, history, root.level, log_file
+    )
+    pool.start()
+    try:
+        async with redis.Redis(host=redis_host, port=redis_port, db=0) as redis_client:
+            await asyncio.gather(
+                event_listener(
+                    redis_client,
+                    queue,
+                    config_event,
+                    stop_event,
+                    own_writes=own_writes,
+                    scheduler=scheduler,
+                ),
+                display_widgets(
+                    redis_client,
+                    queue,
+                    config_event,
+                    stop_event,
+                    driver_instance=driver,
+                    display_type=display_type,
+                    own_writes=own_writes,
+                    scheduler=scheduler,
+                ),
+                pool.supervise(),
+            )
+    finally:
+        pool.stop()
+        driver.close(unlink=True)
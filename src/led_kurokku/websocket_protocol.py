@@ -0,0 +1,100 @@
+"""Binary delta protocol for websocket display updates.
+
+Clients opt in by connecting to ``/ws?proto=bin``; other clients keep
+receiving the JSON messages. Each binary message is::
+
+    byte 0      flags: keyframe (0x01), colon (0x02), brightness present (0x04),
+                HT16K33 display (0x08); changed digit mask in bits 4-7
+    bytes 1-4   sequence number (uint32, little-endian)
+    [byte 5]    brightness, when the brightness flag is set
+    ...         one uint16 little-endian segment word per changed digit
+
+A keyframe carries every digit and the brightness and resets the client's
+state. Delta frames only apply on top of the frame with the previous
+sequence number; the server sends a keyframe to any client that missed one.
+"""
+
+import struct
+
+FLAG_KEYFRAME = 0x01
+FLAG_COLON = 0x02
+FLAG_BRIGHTNESS = 0x04
+FLAG_HT16K33 = 0x08
+
+HEADER = struct.Struct("<BI")
+DIGITS = 4
+SEQUENCE_MASK = 0xFFFFFFFF
+
+
+def encode_frame(
+    sequence: int,
+    digits: list[int],
+    colon: bool,
+    brightness: int,
+    previous: list[int] | None = None,
+    previous_brightness: int | None = None,
+    ht16k33: bool = False,
+) -> bytes:
+    """
+    Encode a frame, as a delta when the previous state is given.
+
+    :param sequence: Frame sequence number.
+    :param digits: Segment words for each digit.
+    :param colon: Colon state.
+    :param brightness: Brightness level (0-7).
+    :param previous: Digits of the previous frame; omit for a keyframe.
+    :param previous_brightness: Brightness of the previous frame.
+    :param ht16k33: Whether the words are 14-segment HT16K33 values.
+    :return: The encoded message.
+    """
+    flags = FLAG_HT16K33 if ht16k33 else 0
+    if colon:
+        flags |= FLAG_COLON
+    if previous is None:
+        flags |= FLAG_KEYFRAME | FLAG_BRIGHTNESS | 0xF0
+        changed = range(DIGITS)
+    else:
+        changed = [i for i in range(DIGITS) if digits[i] != previous[i]]
+        for i in changed:
+            flags |= 0x10 << i
+        if brightness != previous_brightness:
+            flags |= FLAG_BRIGHTNESS
+    out = bytearray(HEADER.pack(flags, sequence & SEQUENCE_MASK))
+    if flags & FLAG_BRIGHTNESS:
+        out.append(brightness & 0xFF)
+    for i in changed:
+        out += (digits[i] & 0xFFFF).to_bytes(2, "little")
+    return bytes(out)
+
+
+def decode_frame(data: bytes, state: dict | None = None) -> dict:
+    """
+    Apply a binary message to a client-side state.
+
+    :param data: The encoded message.
+    :param state: State from earlier messages; required for delta frames.
+    :return: The new state with "sequence", "digits", "colon", "brightness",
+        "display_type" and "changed" (indexes of the digits that changed).
+    """
+    flags, sequence = HEADER.unpack_from(data, 0)
+    if flags & FLAG_KEYFRAME:
+        state = {"digits": [0] * DIGITS, "brightness": 0}
+    elif state is None:
+        raise ValueError("Delta frame received before a keyframe")
+    else:
+        state = dict(state, digits=list(state["digits"]))
+    pos = HEADER.size
+    if flags & FLAG_BRIGHTNESS:
+        state["brightness"] = data[pos]
+        pos += 1
+    changed = []
+    for i in range(DIGITS):
+        if flags & (0x10 << i):
+            state["digits"][i] = data[pos] | (data[pos + 1] << 8)
+            pos += 2
+            changed.append(i)
+    state["sequence"] = sequence
+    state["colon"] = bool(flags & FLAG_COLON)
+    state["display_type"] = "ht16k33" if flags & FLAG_HT16K33 else "tm1637"
+    state["changed"] = changed
+    return state
@@ -3,8 +3,9 @@ import json
 from typing import Literal
 
 from pydantic import BaseModel
-import pycron
 
+from ..alert_scheduler import PRIORITY_WINDOWS
+from ..utils import clock
 from .base import DisplayWidget, WidgetConfig
 
 logger = logging.getLogger(__name__)
@@ -38,9 +39,8 @@ class AlertWidgetConfig(WidgetConfig):
 
 class AlertWidget(DisplayWidget):
     async def _get_alerts(self) -> list[IndividualAlert]:
-        # TODO: replace key pattern with shared configuration
         alert_keys = set()
-        async for k in self.redis_client.scan_iter("kurokku:alert:*"):
+        async for k in self.redis_client.scan_iter(self.keys.alert_pattern):
             alert_keys.add(k)
         if not alert_keys:
             logger.debug("No alert keys found in Redis.")
@@ -56,39 +56,57 @@ class AlertWidget(DisplayWidget):
                     logger.error(f"Error parsing alert {k}: {e}")
         return alerts
 
+    async def _delete(self, alert: IndividualAlert) -> None:
+        # The clock's own delete should not restart its rotation
+        if self.own_writes is not None:
+            self.own_writes.expect(alert.id, "del")
+        await self.write_client.delete(alert.id)
+        if self.scheduler is not None:
+            self.scheduler.remove(alert.id)
+
+    async def show_alert(self, alert: IndividualAlert) -> bool:
+        """
+        Show one alert for its display duration.
+
+        :param alert: The alert; its ID is its Redis key.
+        :return: Whether the display was interrupted.
+        """
+        message = alert.message.upper() if self.config.uppercase else alert.message
+        if len(message) <= self.tm.display_length:
+            self.tm.show_text(message)
+            interrupted = await self._sleep_and_check_stop(alert.display_duration)
+        else:
+            await self.interruptable_scrolled_display(
+                self.tm.show_text,
+                message,
+                scroll_speed=self.config.scroll_speed,
+                repeat=self.config.repeat,
+                sleep_before_repeat=self.config.sleep_before_repeat,
+                duration=alert.display_duration,
+            )
+            interrupted = not self.okay_to_display()
+        if interrupted and alert.delete_after_display:
+            await self._delete(alert)
+        return interrupted
+
     async def display(
         self,
     ):
         while self.okay_to_display():
-            alerts = await self._get_alerts()
+            if self.scheduler is not None and self.scheduler.loaded:
+                # Kept in order by the event listener
+                alerts = self.scheduler.alerts()
+            else:
+                alerts = await self._get_alerts()
+                alerts.sort(key=lambda x: (x.priority, x.timestamp))
+                now = clock.now()
+                alerts = [a for a in alerts if PRIORITY_WINDOWS.is_open(a.priority, now)]
 
             if not alerts:
                 logger.debug("No alerts to display.")
                 break
 
-            alerts.sort(key=lambda x: (x.priority, x.timestamp))
-
             for alert in alerts:
-                if alert.priority == 10 and not pycron.is_now("*/10 * * * *"):
-                    continue  # Skip low-priority alerts if not the right time
-                message = alert.message.upper() if self.config.uppercase else alert.message
-                if len(message) <= self.tm.display_length:
-                    self.tm.show_text(message)
-                    if await self._sleep_and_check_stop(alert.display_duration):
-                        if alert.delete_after_display:
-                            await self.redis_client.delete(alert.id)
-                        break
-                else:
-                    await self.interruptable_scrolled_display(
-                        self.tm.show_text,
-                        message,
-                        scroll_speed=self.config.scroll_speed,
-                        repeat=self.config.repeat,
-                        sleep_before_repeat=self.config.sleep_before_repeat,
-                        duration=alert.display_duration,
-                    )
-                    if not self.okay_to_display():
-                        if alert.delete_after_display:
-                            await self.redis_client.delete(alert.id)
-                        break
+                if await self.show_alert(alert):
+                    break
             break
@@ -1,14 +1,18 @@
 import asyncio
 from datetime import timedelta
 from enum import StrEnum
-from datetime import datetime
 import logging
+from typing import Optional
 
 import pycron
 from pydantic import BaseModel
 from redis.asyncio import Redis
 
+from ..alert_events import OwnWrites
+from ..alert_scheduler import AlertScheduler, wait_for_either
+from ..namespace import DEFAULT_NAMESPACE, KeyNamespace
 from ..tm1637 import TM1637
+from ..utils import clock
 
 logger = logging.getLogger(__name__)
 
@@ -40,25 +44,44 @@ class DisplayWidget:
         redis_client: Redis = None,
         config_event: asyncio.Event = None,
         config: WidgetConfig = None,
+        keys: KeyNamespace = DEFAULT_NAMESPACE,
+        own_writes: Optional[OwnWrites] = None,
+        scheduler: Optional[AlertScheduler] = None,
+        write_client: Optional[Redis] = None,
     ):
         """Initialize the DisplayWidget.
 
         :param config_event: An ``asyncio.Event`` that signals configuration
             changes.
+        :param keys: The Redis keys of the clock the widget displays on.
+        :param own_writes: Where the widget records the writes it makes, so
+            the clock's event listener ignores their keyspace events.
+        :param scheduler: The clock's alert scheduler; urgent alerts it
+            schedules interrupt the widget.
+        :param write_client: Client the widget writes to, if ``redis_client``
+            reads from a replica.
         """
         self.config_event = config_event
         self.config = config
         self.tm = tm
         self.redis_client = redis_client
+        self.write_client = redis_client if write_client is None else write_client
+        self.keys = keys
+        self.own_writes = own_writes
         self._duration = self.config.duration if self.config else self.DEFAULT_DURATION
         self._start_time = None
+        self.scheduler = scheduler
+        self.preemptible = True  # Whether urgent alerts may interrupt the widget
+        self._paused = 0.0  # Seconds urgent alerts interrupted the widget for
 
     def check_cron(self):
         """
         Check if the current minute matches the cron expression.
         """
         try:
-            if self.config.cron is not None and not pycron.is_now(self.config.cron):
+            if self.config.cron is not None and not pycron.is_now(
+                self.config.cron, clock.now()
+            ):
                 return False
         except ValueError as e:
             logger.error(f"Invalid cron expression '{self.config.cron}': {e}")
@@ -68,23 +91,67 @@ class DisplayWidget:
     async def _sleep_and_check_stop(self, duration):
         """
         Sleep for the specified duration and check if the stop event is set.
+
+        Urgent alerts scheduled meanwhile are shown first, and the sleep is
+        extended by the time they took, so the widget resumes where it was.
         """
-        try:
-            await asyncio.wait_for(self.config_event.wait(), timeout=duration)
-        except asyncio.TimeoutError:
-            pass
+        if self.config_event.is_set():
+            return True
+        scheduler = self.scheduler if self.preemptible else None
+        if scheduler is None:
+            try:
+                async with asyncio.timeout(duration):
+                    await self.config_event.wait()
+            except TimeoutError:
+                pass
+            return self.config_event.is_set()
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + duration
+        while not self.config_event.is_set():
+            if scheduler.preempt.is_set():
+                deadline += await self._yield_to_alerts(scheduler)
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            await wait_for_either(self.config_event, scheduler.preempt, remaining)
+            if not (self.config_event.is_set() or scheduler.preempt.is_set()):
+                # Timed out; the loop may run a timer a rounding error early,
+                # so the remainder is not compared with zero again
+                break
         return self.config_event.is_set()
 
+    async def _yield_to_alerts(self, scheduler) -> float:
+        """
+        Show the urgent alerts, then restore the widget's frame.
+
+        :return: The seconds the alerts took.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        frame = getattr(self.tm, "last_frame", None)
+        await scheduler.show_urgent(
+            self.tm, self.redis_client, self.config_event, self.own_writes, self.write_client
+        )
+        if frame is not None and not self.config_event.is_set():
+            self.tm.display(*frame)
+        paused = loop.time() - started
+        self._paused += paused
+        if self._start_time is not None:
+            self._start_time += timedelta(seconds=paused)
+        return paused
+
     def okay_to_display(self):
         """
         Check if the widget is okay to display.
         This can be overridden by subclasses to implement specific conditions.
         """
         if self._start_time is None:
-            self._start_time = datetime.now()
+            self._start_time = clock.now()
         return (not self.config_event.is_set()) and (
             self._duration <= 0
-            or (datetime.now() - self._start_time).seconds < self._duration
+            or (clock.now() - self._start_time).seconds < self._duration
         )
 
     async def interruptable_scrolled_display(
@@ -108,14 +175,15 @@ class DisplayWidget:
         logger.debug(
             f"Scroll speed: {scroll_speed}, Repeat: {repeat}, Sleep before repeat: {sleep_before_repeat}, Duration: {duration}"
         )
-        start_time = datetime.now()
+        start_time = clock.now()
+        paused_before = self._paused
         internal_message = (
             " " * self.tm.display_length + message + " " * self.tm.display_length
         )  # Add padding for scrolling
         msg_index = 0
 
-        while self.okay_to_display() and datetime.now() - start_time < timedelta(
-            seconds=duration
+        while self.okay_to_display() and clock.now() - start_time < timedelta(
+            seconds=duration + self._paused - paused_before
         ):
             display_func(
                 internal_message[msg_index : msg_index + self.tm.display_length]
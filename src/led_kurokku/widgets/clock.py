@@ -1,6 +1,5 @@
 from typing import Literal
-from datetime import datetime
-
+from ..utils import clock
 from .base import DisplayWidget, WidgetConfig
 
 
@@ -31,7 +30,7 @@ class ClockWidget(DisplayWidget):
 
         while self.okay_to_display():
             # Display the current time
-            now = datetime.now()
+            now = clock.now()
             if not self.config.use_24_hour_format and now.hour >= 12:
                 # double blink for PM
                 colon_list = [
@@ -46,8 +45,8 @@ class ClockWidget(DisplayWidget):
                     [False, 0.5],
                 ]
             for colon, timing in colon_list:
-                hours = datetime.now().hour
-                minutes = datetime.now().minute
+                hours = clock.now().hour
+                minutes = clock.now().minute
                 if not self.config.use_24_hour_format:
                     hours = _convert_to_12_hour_format(hours)
                 self.tm.show_time(hours, minutes, colon=colon, leading_blank=not self.config.use_24_hour_format)
@@ -1,4 +1,5 @@
 import asyncio
+from typing import Optional
 
 from redis.asyncio import Redis
 
@@ -7,6 +8,9 @@ from .alert import AlertWidget
 from .base import WidgetType, WidgetConfig
 from .clock import ClockWidget
 from .message import MessageWidget
+from ..alert_events import OwnWrites
+from ..alert_scheduler import AlertScheduler
+from ..namespace import DEFAULT_NAMESPACE, KeyNamespace
 from ..tm1637 import TM1637
 
 
@@ -23,7 +27,20 @@ def widget_factory(
     tm: TM1637,
     redis_client: Redis,
     config_event: asyncio.Event,
+    keys: KeyNamespace = DEFAULT_NAMESPACE,
+    own_writes: Optional[OwnWrites] = None,
+    scheduler: Optional[AlertScheduler] = None,
+    write_client: Optional[Redis] = None,
 ) -> DisplayWidget:
     """Factory function to create a widget based on the configuration."""
 
-    return WIDGET_MAP.get(config.widget_type)(tm, redis_client, config_event, config)
+    return WIDGET_MAP.get(config.widget_type)(
+        tm,
+        redis_client,
+        config_event,
+        config,
+        keys=keys,
+        own_writes=own_writes,
+        scheduler=scheduler,
+        write_client=write_client,
+    )
@@ -0,0 +1,219 @@
+"""Tests for debounced alert event handling."""
+
+import asyncio
+import json
+import time
+from datetime import datetime
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from led_kurokku.alert_events import AlertTracker, OwnWrites
+from led_kurokku.alert_scheduler import AlertScheduler
+from led_kurokku.core import (
+    REDIS_CHANNEL_ALERT,
+    REDIS_KEY_ALERT,
+    REDIS_KEY_CONFIG,
+    display_widgets,
+    event_listener,
+    parse_direct_alert,
+)
+from led_kurokku.tm1637 import TM1637
+from led_kurokku.tm1637.base_driver import BaseDriver
+from led_kurokku.utils import clock
+from led_kurokku.widgets.alert import AlertWidget, AlertWidgetConfig, IndividualAlert
+
+
+def _alert(message: str, timestamp: str = "2025-01-01T00:00:00") -> str:
+    return json.dumps({"timestamp": timestamp, "message": message, "priority": 0})
+
+
+@pytest.mark.asyncio
+async def test_tracker_reports_only_visible_changes():
+    client = FakeAsyncRedis()
+    await client.set("kurokku:alert:a", _alert("STORM"))
+    tracker = AlertTracker(client, REDIS_KEY_ALERT, debounce=0)
+    await tracker.load()
+    assert tracker.visible.keys() == {"kurokku:alert:a"}
+
+    # Rewritten with a new timestamp only, many times
+    await client.set("kurokku:alert:a", _alert("STORM", "2025-01-01T00:15:00"))
+    for _ in range(100):
+        tracker.note("kurokku:alert:a", "set")
+    tracker.note("kurokku:alert:a", "expire")
+    assert await tracker.flush() is False
+    assert tracker.reads == 2
+
+    await client.set("kurokku:alert:b", _alert("FLOOD"))
+    tracker.note("kurokku:alert:b", "set")
+    assert await tracker.flush() is True
+
+    # The display's own delete is tracked without being reported
+    tracker.own_writes.expect(b"kurokku:alert:b")
+    tracker.note("kurokku:alert:b", "del")
+    assert tracker.timeout() is None
+    assert tracker.visible.keys() == {"kurokku:alert:a"}
+
+    tracker.note("kurokku:alert:a", "expired")
+    assert await tracker.flush() is True
+    assert tracker.visible == {}
+
+
+@pytest.mark.asyncio
+async def test_widget_deletes_are_recorded_as_own_writes():
+    client = FakeAsyncRedis()
+    alert = json.dumps(
+        {"timestamp": "2025-01-01T00:00:00", "message": "BYE", "delete_after_display": True}
+    )
+    await client.set("kurokku:alert:bye", alert)
+    tracker = AlertTracker(client, REDIS_KEY_ALERT, debounce=0)
+    await tracker.load()
+
+    interrupted = asyncio.Event()
+    interrupted.set()
+    widget = AlertWidget(
+        TM1637(driver=FrameDriver()),
+        client,
+        interrupted,
+        AlertWidgetConfig(),
+        own_writes=tracker.own_writes,
+    )
+    assert await widget.show_alert(IndividualAlert(id="kurokku:alert:bye", **json.loads(alert)))
+    assert not await client.exists("kurokku:alert:bye")
+    tracker.note("kurokku:alert:bye", "del")
+    assert tracker.timeout() is None and tracker.visible == {}
+
+
+def test_debounce_timeout_is_capped():
+    tracker = AlertTracker(FakeAsyncRedis(), REDIS_KEY_ALERT, debounce=10)
+    assert tracker.timeout() is None
+    tracker.note("kurokku:alert:a", "set")
+    assert 9 < tracker.timeout() <= 10
+    tracker._first_event -= 75
+    assert tracker.timeout() <= 5
+
+
+@pytest.mark.asyncio
+async def test_event_listener_debounces_alert_storms():
+    client = FakeAsyncRedis()
+    await client.set(REDIS_KEY_CONFIG, json.dumps({"widgets": []}))
+    queue: asyncio.Queue = asyncio.Queue()
+    config_event, stop_event = asyncio.Event(), asyncio.Event()
+    own_writes, scheduler = OwnWrites(), AlertScheduler()
+    listener = asyncio.create_task(
+        event_listener(
+            client,
+            queue,
+            config_event,
+            stop_event,
+            alert_debounce=0.05,
+            own_writes=own_writes,
+            scheduler=scheduler,
+        )
+    )
+    try:
+        await asyncio.wait_for(queue.get(), 1)
+        await asyncio.sleep(0.05)
+        config_event.clear()
+
+        # An urgent alert is scheduled once, without restarting the rotation
+        for i in range(50):
+            await client.set("kurokku:alert:storm", _alert("STORM", f"2025-01-01T00:{i:02}:00"))
+        await asyncio.wait_for(scheduler.preempt.wait(), 1)
+        assert scheduler.pop_urgent().alert.message == "STORM"
+        assert scheduler.pop_urgent() is None
+
+        # Same content again, and the clock deleting an alert it displayed
+        await client.set("kurokku:alert:storm", _alert("STORM", "2025-01-02T00:00:00"))
+        own_writes.expect("kurokku:alert:storm")
+        await client.delete("kurokku:alert:storm")
+        await asyncio.sleep(0.3)
+        assert not scheduler.preempt.is_set() and len(scheduler) == 0
+        assert queue.empty() and not config_event.is_set()
+    finally:
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+
+
+class FrameDriver(BaseDriver):
+    def __init__(self):
+        super().__init__()
+        self.frames: list[list[int]] = []
+
+    def display(self, data: list[int], colon: bool = False) -> None:
+        self.frames.append(list(data))
+
+    def clear(self) -> None:
+        pass
+
+
+def _frame(text: str) -> list[int]:
+    driver = FrameDriver()
+    TM1637(driver=driver).show_text(text)
+    return driver.frames[-1]
+
+
+def test_parse_direct_alert():
+    alert, ttl, sent_at = parse_direct_alert('{"message": "TORNADO WARNING", "id": "nws-1"}')
+    assert alert.id == "kurokku:alert:nws-1"
+    assert alert.display_duration == pytest.approx(6.0)
+    assert (ttl, sent_at) == (300, None)
+
+    alert, ttl, sent_at = parse_direct_alert(
+        '{"message": "X", "id": "kurokku:alert:a", "ttl": 30, "sent_at": 1.5}'
+    )
+    assert (alert.id, ttl, sent_at) == ("kurokku:alert:a", 30, 1.5)
+
+    # Timestamped by the engine's clock, which the simulation replaces
+    with clock.use_clock(lambda: datetime(2030, 6, 1, 12, 0)):
+        alert, _, _ = parse_direct_alert('{"message": "X"}')
+    assert alert.timestamp == "2030-06-01T12:00:00"
+
+    for payload in ('{"message": "X", "ttl": 0}', '{"priority": 1}', "[1]", "{oops"):
+        with pytest.raises(ValueError):
+            parse_direct_alert(payload)
+
+
+@pytest.mark.asyncio
+async def test_direct_alert_preempts_the_rotation():
+    client = FakeAsyncRedis()
+    config = {"widgets": [{"widget_type": "message", "message": "IDLE", "duration": 60}]}
+    await client.set(REDIS_KEY_CONFIG, json.dumps(config))
+    queue: asyncio.Queue = asyncio.Queue()
+    config_event, stop_event = asyncio.Event(), asyncio.Event()
+    driver = FrameDriver()
+    scheduler = AlertScheduler()
+    tasks = [
+        asyncio.create_task(
+            event_listener(client, queue, config_event, stop_event, scheduler=scheduler)
+        ),
+        asyncio.create_task(
+            display_widgets(
+                client, queue, config_event, stop_event, driver_instance=driver, scheduler=scheduler
+            )
+        ),
+    ]
+    try:
+        await asyncio.sleep(0.1)
+        assert driver.frames[-1] == _frame("IDLE")
+
+        await client.publish(REDIS_CHANNEL_ALERT, "{oops")
+        payload = {"id": "nws-1", "message": "WARN", "ttl": 60, "sent_at": time.time()}
+        await client.publish(REDIS_CHANNEL_ALERT, json.dumps(payload))
+        async with asyncio.timeout(1):
+            while driver.frames[-1] != _frame("WARN"):
+                await asyncio.sleep(0.01)
+
+        # Stored in the background, without restarting the rotation again
+        await asyncio.sleep(0.1)
+        stored = json.loads(await client.get("kurokku:alert:nws-1"))
+        assert stored["message"] == "WARN"
+        assert 0 < await client.ttl("kurokku:alert:nws-1") <= 60
+        assert not scheduler.preempt.is_set()
+        assert not config_event.is_set() and queue.empty()
+    finally:
+        stop_event.set()
+        config_event.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,126 @@
+"""Tests for the alert gateway."""
+
+import asyncio
+import json
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from led_kurokku.cli.models.instance import KurokkuInstance
+from led_kurokku.cli.services import alert_gateway
+from led_kurokku.cli.services.alert_gateway import AlertGateway, create_app, handle_socket
+
+
+class FakePools:
+    servers: dict[str, FakeServer] = {}
+
+    def __init__(self, **connection_kwargs):
+        pass
+
+    def client(self, host: str, port: int = 6379, db: int = 0):
+        return FakeAsyncRedis(server=self.servers.setdefault(host, FakeServer()))
+
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    FakePools.servers = {}
+    monkeypatch.setattr(alert_gateway, "RedisPools", FakePools)
+    instances = [
+        KurokkuInstance(name="kitchen", host="kitchen.local", groups=["home"]),
+        KurokkuInstance(name="office", host="office.local", groups=["work"]),
+    ]
+    return AlertGateway(instances, window=0.05, rate=60, burst=5)
+
+
+async def _alerts(host: str) -> dict[str, dict]:
+    client = FakeAsyncRedis(server=FakePools.servers[host])
+    keys = await client.keys("kurokku:alert:*")
+    return {key.decode(): json.loads(await client.get(key)) for key in keys}
+
+
+@pytest.mark.asyncio
+async def test_burst_is_coalesced_into_one_batch(gateway):
+    async with TestClient(TestServer(create_app(gateway))) as client:
+        storm = [{"message": "DISK FULL", "priority": 1}] * 50
+        response = await client.post("/alerts", json=storm + [{"message": "CPU HOT"}, {}])
+        assert response.status == 202
+        body = await response.json()
+        assert body["accepted"] == 51
+        assert body["rejected"][0]["index"] == 51
+
+        await gateway.flush()
+        assert sorted(a["message"] for a in (await _alerts("kitchen.local")).values()) == [
+            "CPU HOT",
+            "DISK FULL",
+        ]
+        metrics = await (await client.get("/metrics")).json()
+        assert metrics["total"]["written"] == 4
+        assert metrics["total"]["batches"] == 2
+        assert metrics["total"]["rejected"] == 1
+        assert metrics["instances"]["office"]["coalesced"] == 49
+        assert metrics["total"]["suppressed"] == 98
+
+
+@pytest.mark.asyncio
+async def test_known_alerts_are_not_rewritten_until_half_expired(gateway, monkeypatch):
+    gateway.submit({"message": "STORM", "ttl": 100, "instances": ["kitchen"]})
+    await gateway.flush()
+    first = await _alerts("kitchen.local")
+    assert "office.local" not in FakePools.servers
+
+    gateway.submit({"message": "STORM", "ttl": 100, "groups": ["home"]})
+    await gateway.flush()
+    assert gateway.metrics.unchanged == 1
+    assert gateway.metrics.written == 1
+
+    # Past half its TTL, the alert is refreshed under the same key
+    now = alert_gateway.time.time()
+    monkeypatch.setattr(alert_gateway.time, "time", lambda: now + 60)
+    gateway.submit({"message": "STORM", "ttl": 100})
+    await gateway.flush()
+    assert (await _alerts("kitchen.local")).keys() == first.keys()
+    assert gateway.states["kitchen"].metrics.written == 2
+
+    with pytest.raises(ValueError, match="no instances matched"):
+        gateway.submit({"message": "X", "instances": ["garage"]})
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_keeps_the_most_important_alerts(gateway):
+    for priority in range(8):
+        gateway.submit({"message": f"ALERT {priority}", "priority": 7 - priority})
+    await gateway.flush()
+
+    messages = sorted(a["message"] for a in (await _alerts("office.local")).values())
+    assert messages == [f"ALERT {i}" for i in range(3, 8)]
+    assert gateway.states["office"].metrics.rate_limited == 3
+
+
+@pytest.mark.asyncio
+async def test_socket_and_window(gateway, tmp_path):
+    path = str(tmp_path / "gateway.sock")
+    server = await asyncio.start_unix_server(
+        lambda reader, writer: handle_socket(gateway, reader, writer), path
+    )
+    running = asyncio.create_task(gateway.run())
+    try:
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(b'{"message": "TORNADO WARNING", "priority": 0}\n{"oops\n')
+        assert await reader.readline() == b"OK\n"
+        assert (await reader.readline()).startswith(b"ERROR invalid JSON")
+        writer.close()
+
+        # Written once the window closes
+        await asyncio.sleep(0.2)
+        assert [a["message"] for a in (await _alerts("office.local")).values()] == [
+            "TORNADO WARNING"
+        ]
+        assert gateway.metrics.batches == 2
+    finally:
+        running.cancel()
+        server.close()
+        await asyncio.gather(running, return_exceptions=True)
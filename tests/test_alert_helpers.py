@@ -0,0 +1,69 @@
+"""Tests for the batched alert operations used by the CLI."""
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from led_kurokku.cli.utils.redis_helpers import (
+    alert_entry,
+    delete_alerts,
+    deliver_alert,
+    iter_alerts,
+    make_alert,
+    read_alerts,
+    write_alert,
+)
+from led_kurokku.core import REDIS_CHANNEL_ALERT, parse_direct_alert
+
+
+async def _seed(client, count: int) -> set[str]:
+    ids = set()
+    for i in range(count):
+        alert = make_alert(f"ALERT {i}", None, i % 3, False)
+        await write_alert(client, alert, ttl=60)
+        ids.add(alert.id)
+    await client.set("kurokku:config", "{}")
+    return ids
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("decode_responses", [False, True])
+async def test_read_alerts_in_batches(decode_responses):
+    client = FakeAsyncRedis(decode_responses=decode_responses)
+    ids = await _seed(client, 25)
+
+    batches = [batch async for batch in iter_alerts(client, batch_size=7)]
+    alerts = await read_alerts(client, batch_size=7)
+
+    assert max(len(batch) for batch in batches) <= 7
+    assert {alert["id"] for alert in alerts} == ids
+    assert {alert["message"] for alert in alerts} == {f"ALERT {i}" for i in range(25)}
+    assert await read_alerts(FakeAsyncRedis()) == []
+
+
+@pytest.mark.asyncio
+async def test_delete_alerts_in_batches():
+    client = FakeAsyncRedis()
+    await _seed(client, 25)
+
+    assert await delete_alerts(client, batch_size=4) == 25
+    assert await client.keys("*") == [b"kurokku:config"]
+    assert await delete_alerts(client) == 0
+
+
+@pytest.mark.asyncio
+async def test_direct_delivery_falls_back_to_storing():
+    client = FakeAsyncRedis()
+    alert = make_alert("TORNADO WARNING", None, 0, False)
+    assert await deliver_alert(client, alert, ttl=60, direct=True) == "stored"
+    assert await client.exists(alert_entry(alert)[0])
+
+    async with client.pubsub() as pubsub:
+        await pubsub.subscribe(REDIS_CHANNEL_ALERT)
+        await pubsub.get_message(timeout=1)
+        assert await deliver_alert(client, alert, ttl=60, direct=True) == "published"
+        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
+
+    received, ttl, sent_at = parse_direct_alert(message["data"])
+    assert received.id == alert_entry(alert)[0]
+    assert received.message == alert.message
+    assert ttl == 60 and sent_at is not None
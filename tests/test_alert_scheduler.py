@@ -0,0 +1,107 @@
+"""Tests for the alert scheduler and widget preemption."""
+
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from led_kurokku.alert_scheduler import AlertScheduler, PriorityWindows
+from led_kurokku.tm1637 import TM1637
+from led_kurokku.tm1637.base_driver import BaseDriver
+from led_kurokku.widgets.alert import AlertWidget, AlertWidgetConfig
+from led_kurokku.widgets.message import MessageWidget, MessageWidgetConfig
+
+
+class TextDriver(BaseDriver):
+    """Records the text of every frame."""
+
+    def __init__(self):
+        super().__init__()
+        self.frames: list[list[int]] = []
+
+    def display(self, data: list[int], colon: bool = False) -> None:
+        self.frames.append(list(data))
+
+    def clear(self) -> None:
+        pass
+
+
+def _frame(text: str) -> list[int]:
+    driver = TextDriver()
+    TM1637(driver=driver).show_text(text)
+    return driver.frames[0]
+
+
+def _alert(message: str, priority: int = 0, timestamp: str = "2025-01-01T00:00:00", **extra) -> str:
+    return json.dumps(
+        {"timestamp": timestamp, "message": message, "priority": priority, **extra}
+    )
+
+
+def test_priority_windows():
+    windows = PriorityWindows({10: "*/10 * * * *", 5: "0 9 * * *"})
+    assert windows.is_open(10, datetime(2025, 1, 1, 12, 20, 30))
+    assert not windows.is_open(10, datetime(2025, 1, 1, 12, 21))
+    assert windows.is_open(5, datetime(2025, 1, 2, 9, 0))
+    assert not windows.is_open(5, datetime(2025, 1, 2, 10, 0))
+    assert windows.is_open(1, datetime(2025, 1, 2, 10, 3))
+
+
+def test_scheduler_orders_and_preempts_above_threshold():
+    scheduler = AlertScheduler(preempt_priority=1, windows=PriorityWindows({}))
+    scheduler.update("kurokku:alert:heat", _alert("HEAT", 10))
+    scheduler.update("kurokku:alert:old", _alert("OLD", 0), announce=False)
+    assert not scheduler.preempt.is_set()
+
+    scheduler.update("kurokku:alert:storm", _alert("STORM", 1, "2025-01-01T00:05:00"))
+    scheduler.update("kurokku:alert:storm", _alert("STORM 2", 1, "2025-01-01T00:06:00"))
+    scheduler.update("kurokku:alert:fire", _alert("FIRE", 0, "2025-01-01T00:07:00"))
+    scheduler.update("kurokku:alert:bad", "{oops")
+    assert [a.message for a in scheduler.alerts()] == ["OLD", "FIRE", "STORM 2", "HEAT"]
+
+    # Most important first; the replaced storm is skipped
+    assert scheduler.pop_urgent().alert.message == "FIRE"
+    scheduler.remove("kurokku:alert:fire")
+    assert scheduler.pop_urgent().alert.message == "STORM 2"
+    assert not scheduler.preempt.is_set()
+    assert scheduler.pop_urgent() is None
+
+
+@pytest.mark.asyncio
+async def test_urgent_alert_preempts_and_widget_resumes():
+    client = FakeAsyncRedis()
+    scheduler = AlertScheduler()
+    scheduler.loaded = True
+    driver = TextDriver()
+    tm = TM1637(driver=driver)
+    config_event = asyncio.Event()
+    widget = MessageWidget(
+        tm,
+        client,
+        config_event,
+        MessageWidgetConfig(message="IDLE", duration=1),
+        scheduler=scheduler,
+    )
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    running = asyncio.create_task(widget.display())
+
+    await asyncio.sleep(0.1)
+    scheduler.update("kurokku:alert:warn", _alert("WARN", 0, display_duration=0.3))
+    await running
+    elapsed = loop.time() - started
+
+    frames = driver.frames
+    assert frames[0] == frames[-1] == _frame("IDLE")
+    assert _frame("WARN") in frames
+    # The message kept its full duration around the alert
+    assert elapsed >= 1.25
+    assert not config_event.is_set()
+
+    # The alert widget reads the scheduler, not Redis
+    alert_widget = AlertWidget(tm, client, config_event, AlertWidgetConfig(), scheduler=scheduler)
+    scheduler.update("kurokku:alert:warn", _alert("OK", 5, display_duration=0.01), announce=False)
+    await alert_widget.display()
+    assert driver.frames[-1] == _frame("OK")
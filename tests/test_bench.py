@@ -0,0 +1,68 @@
+"""Tests for the benchmark suite harness."""
+
+import json
+
+from click.testing import CliRunner
+
+from led_kurokku.bench import compare_results, run_benchmarks
+from led_kurokku.bench.fakes import fake_hardware
+from led_kurokku.bench.main import main
+
+
+def _results(**medians):
+    return {
+        "results": {
+            name: {"name": name, "median_ns": value} for name, value in medians.items()
+        }
+    }
+
+
+def test_compare_results_flags_regressions():
+    baseline = _results(a=100.0, b=100.0, c=100.0)
+    current = _results(a=110.0, b=150.0, d=1.0)
+
+    comparisons = {c.name: c for c in compare_results(baseline, current, threshold=0.2)}
+
+    assert set(comparisons) == {"a", "b"}
+    assert comparisons["a"].regression is False
+    assert comparisons["b"].regression is True
+    assert comparisons["b"].ratio == 1.5
+
+
+def test_run_benchmarks_selected_by_name():
+    results = run_benchmarks(names=["render.show_text"], rounds=2, min_time=0.001)
+
+    assert set(results["results"]) == {
+        "render.show_text.tm1637",
+        "render.show_text.ht16k33",
+    }
+    for result in results["results"].values():
+        assert result["median_ns"] > 0
+        assert result["rounds"] == 2
+    json.dumps(results)
+
+
+def test_fake_hardware_drives_led_drivers():
+    with fake_hardware() as (tm1637_led, ht16k33_led):
+        tm_driver = tm1637_led.LedDriver()
+        ht_driver = ht16k33_led.HT16K33LedDriver()
+
+    tm_driver.display([0x3F, 0x06, 0x5B, 0x4F], colon=True)
+    ht_driver.display([0x00F7, 0x128F, 0x0039, 0x120F])
+
+    assert ht_driver.bus.ram[:8] == [0xF7, 0x00, 0x8F, 0x12, 0x39, 0x00, 0x0F, 0x12]
+
+
+def test_cli_compare_mode_exits_on_regression(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    current = tmp_path / "current.json"
+    baseline.write_text(json.dumps(_results(a=100.0)))
+    current.write_text(json.dumps(_results(a=200.0)))
+
+    runner = CliRunner()
+    result = runner.invoke(
+        main, ["--compare", str(current), "--baseline", str(baseline)]
+    )
+
+    assert result.exit_code == 1
+    assert "REGRESSION" in result.output
@@ -0,0 +1,82 @@
+"""Tests for the latest-state-wins broadcast hub."""
+
+import asyncio
+import json
+
+import pytest
+
+from led_kurokku.broadcast import BroadcastHub
+from led_kurokku.websocket_protocol import FLAG_KEYFRAME, decode_frame
+
+
+@pytest.mark.asyncio
+async def test_slow_viewer_skips_to_latest_frame():
+    hub = BroadcastHub()
+    viewer = hub.subscribe(binary=True)
+    state = decode_frame(await viewer.next_message())
+
+    for i in range(10):
+        hub.publish([i, 0, 0, 0], False, 2)
+    message = await viewer.next_message()
+
+    assert message[0] & FLAG_KEYFRAME
+    assert decode_frame(message, state)["digits"] == [9, 0, 0, 0]
+    assert hub.skipped == 9
+
+
+@pytest.mark.asyncio
+async def test_viewer_one_behind_gets_shared_delta():
+    hub = BroadcastHub()
+    first = hub.subscribe(binary=True)
+    second = hub.subscribe(binary=True)
+    state = decode_frame(await first.next_message())
+    await second.next_message()
+
+    hub.publish([0, 0, 0, 0], True, 2)
+    message = await first.next_message()
+
+    assert message == b"\x02\x01\x00\x00\x00"  # colon only
+    assert await second.next_message() is message
+    assert decode_frame(message, state)["colon"] is True
+
+
+@pytest.mark.asyncio
+async def test_waiting_viewers_wake_and_cancel_independently():
+    hub = BroadcastHub(display_type="ht16k33")
+    viewers = [hub.subscribe() for _ in range(3)]
+    for viewer in viewers:
+        await viewer.next_message()
+    tasks = [asyncio.create_task(v.next_message()) for v in viewers]
+    await asyncio.sleep(0)
+
+    tasks[0].cancel()
+    await asyncio.sleep(0)
+    hub.publish([1, 2, 3, 4], False, 5)
+    results = await asyncio.gather(*tasks[1:])
+
+    assert tasks[0].cancelled()
+    assert json.loads(results[0]) == {
+        "display_type": "ht16k33",
+        "brightness": 5,
+        "digits": [1, 2, 3, 4],
+        "colon": False,
+    }
+    assert results[0] is results[1]
+
+
+@pytest.mark.asyncio
+async def test_resync_sends_keyframe_and_close_unregisters():
+    hub = BroadcastHub()
+    viewer = hub.subscribe(binary=True)
+    await viewer.next_message()
+    waiting = asyncio.create_task(viewer.next_message())
+    await asyncio.sleep(0)
+
+    viewer.resync()
+    message = await asyncio.wait_for(waiting, 1)
+
+    assert message[0] & FLAG_KEYFRAME
+    assert hub.viewers == 1
+    viewer.close()
+    viewer.close()
+    assert hub.viewers == 0
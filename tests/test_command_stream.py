@@ -0,0 +1,222 @@
+"""Tests for the acknowledged command stream."""
+
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from led_kurokku.alert_scheduler import AlertScheduler
+from led_kurokku.cli.models.instance import KurokkuInstance, KurokkuRegistry
+from led_kurokku.cli.utils import fleet
+from led_kurokku import command_stream
+from led_kurokku.cli_main import cli
+from led_kurokku.command_stream import (
+    ACK_ERROR,
+    ACK_EXPIRED,
+    ACK_OK,
+    send_command,
+    wait_for_ack,
+)
+from led_kurokku.core import display_widgets, event_listener
+from led_kurokku.namespace import DEFAULT_NAMESPACE
+from led_kurokku.tm1637.base_driver import BaseDriver
+
+CONFIG = json.dumps({"widgets": []})
+
+
+@pytest.fixture(autouse=True)
+def short_reads(monkeypatch):
+    # fakeredis can miss waking one of several blocked readers until it times out
+    monkeypatch.setattr(command_stream, "READ_BLOCK", 0.05)
+
+
+async def _start(client, keys=DEFAULT_NAMESPACE, consumer="clock"):
+    await client.set(keys.config, CONFIG)
+    events = asyncio.Event(), asyncio.Event()
+    queue: asyncio.Queue = asyncio.Queue()
+    scheduler = AlertScheduler()
+    listener = asyncio.create_task(
+        event_listener(
+            client,
+            queue,
+            *events,
+            alert_debounce=0,
+            keys=keys,
+            command_consumer=consumer,
+            scheduler=scheduler,
+        )
+    )
+    await asyncio.wait_for(queue.get(), 1)
+    await asyncio.sleep(0.05)
+    return listener, events, scheduler
+
+
+async def _stop(listener):
+    listener.cancel()
+    await asyncio.gather(listener, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_commands_are_acted_on_and_acknowledged():
+    client = FakeAsyncRedis()
+    # Sent before the clock started reading
+    missed = await send_command(client, "ALERT")
+    expired = await client.xadd(DEFAULT_NAMESPACE.commands, {"command": "ALERT", "ttl": 0.01})
+    await asyncio.sleep(0.02)
+
+    listener, (config_event, stop_event), scheduler = await _start(client)
+    try:
+        ack = await wait_for_ack(client, missed, 1)
+        assert (ack.result, ack.consumer) == (ACK_OK, "clock")
+        assert ack.delivery_ms >= 0 and ack.processing_ms >= 0
+        assert (await wait_for_ack(client, expired.decode(), 1)).result == ACK_EXPIRED
+
+        command_id = await send_command(client, json.dumps({"id": "hi", "message": "HI"}))
+        assert (await wait_for_ack(client, command_id, 1)).result == ACK_OK
+        assert [a.message for a in scheduler.alerts()] == ["HI"]
+        await asyncio.sleep(0.05)
+        assert await client.exists("kurokku:alert:hi")
+
+        ack = await wait_for_ack(client, await send_command(client, "JUMP"), 1)
+        assert (ack.result, ack.error) == (ACK_ERROR, "unknown command 'JUMP'")
+        pending = await client.xpending(DEFAULT_NAMESPACE.commands, "kurokku")
+        assert pending["pending"] == 0
+
+        command_id = await send_command(client, "STOP")
+        assert (await wait_for_ack(client, command_id, 1)).result == ACK_OK
+        assert stop_event.is_set()
+        await asyncio.wait_for(listener, 2)
+    finally:
+        await _stop(listener)
+
+
+class FrameCounter(BaseDriver):
+    def __init__(self):
+        super().__init__()
+        self.frames = 0
+
+    def display(self, data: list[int], colon: bool = False) -> None:
+        self.frames += 1
+
+    def clear(self) -> None:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_display_keeps_running_after_an_alert_command():
+    client = FakeAsyncRedis()
+    await client.set(DEFAULT_NAMESPACE.config, json.dumps({"widgets": [{"widget_type": "clock"}]}))
+    queue: asyncio.Queue = asyncio.Queue()
+    config_event, stop_event = asyncio.Event(), asyncio.Event()
+    scheduler = AlertScheduler()
+    driver = FrameCounter()
+    tasks = [
+        asyncio.create_task(
+            event_listener(
+                client,
+                queue,
+                config_event,
+                stop_event,
+                command_consumer="clock",
+                scheduler=scheduler,
+            )
+        ),
+        asyncio.create_task(
+            display_widgets(
+                client, queue, config_event, stop_event, driver_instance=driver, scheduler=scheduler
+            )
+        ),
+    ]
+    try:
+        async with asyncio.timeout(1):
+            while not driver.frames:
+                await asyncio.sleep(0.01)
+        command_id = await send_command(client, "ALERT")
+        assert (await wait_for_ack(client, command_id, 1)).result == ACK_OK
+
+        # The rotation restarts with the current config rather than waiting for one
+        frames = driver.frames
+        await asyncio.sleep(1.2)
+        assert driver.frames >= frames + 2
+        assert queue.empty() and not config_event.is_set()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_unacknowledged_commands_are_read_again():
+    client = FakeAsyncRedis()
+    command_id = await send_command(client, "ALERT")
+    # Read by the clock, which then went away before acting on it
+    await client.xreadgroup("kurokku", "clock", {DEFAULT_NAMESPACE.commands: ">"})
+
+    listener, *_ = await _start(client)
+    try:
+        assert (await wait_for_ack(client, command_id, 1)).result == ACK_OK
+        with pytest.raises(TimeoutError):
+            await wait_for_ack(client, "1-0", 0.1)
+    finally:
+        await _stop(listener)
+
+
+def test_command_send_waits_for_every_clock():
+    servers = {"hall.local": FakeServer(), "office.local": FakeServer()}
+    registry = KurokkuRegistry(
+        instances=[
+            KurokkuInstance(name="kitchen", host="hall.local", namespace="kitchen"),
+            KurokkuInstance(name="hall", host="hall.local", namespace="hall"),
+            KurokkuInstance(name="office", host="office.local"),
+            KurokkuInstance(name="away", host="office.local", namespace="away"),
+        ]
+    )
+
+    class FakePools:
+        def __init__(self, **connection_kwargs):
+            pass
+
+        def client(self, host, port=6379, db=0):
+            return FakeAsyncRedis(server=servers[host])
+
+        async def aclose(self):
+            pass
+
+    async def run(args):
+        listeners = []
+        for instance in registry.instances[:3]:
+            client = FakeAsyncRedis(server=servers[instance.host])
+            listeners.append((await _start(client, instance.key_namespace()))[0])
+        try:
+            result = await asyncio.to_thread(CliRunner().invoke, cli, args)
+
+            # The clock that was away gets the command when it starts
+            away = registry.instances[3].key_namespace()
+            client = FakeAsyncRedis(server=servers["office.local"])
+            ((command_id, _),) = await client.xrange(away.commands)
+            listeners.append((await _start(client, away))[0])
+            return result, await wait_for_ack(client, command_id.decode(), 1, away)
+        finally:
+            for listener in listeners:
+                await _stop(listener)
+
+    with (
+        patch.object(fleet, "RedisPools", FakePools),
+        patch("led_kurokku.cli.commands.command.load_registry", return_value=registry),
+    ):
+        result, ack = asyncio.run(
+            run(["command", "send", "alert", "--all", "--wait", "0.5", "--timeout", "0.2"])
+        )
+        assert result.exit_code == 1, result.output
+        assert result.output.count("ok by clock in") == 3
+        assert "sent " in result.output and "not acknowledged within 0.5s" in result.output
+        assert "4 instances: 3 ok, 1 failed" in result.output
+        assert "Acknowledged by 3 of 4 instances: delivery median" in result.output
+        assert ack.result == ACK_OK
+
+        result = CliRunner().invoke(cli, ["command", "send", "JUMP", "--all"])
+        assert result.exit_code == 2
+        assert "not STOP, ALERT or alert JSON" in result.output
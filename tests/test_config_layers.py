@@ -0,0 +1,201 @@
+"""Tests for layered configuration."""
+
+import asyncio
+import json
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from led_kurokku import core
+from led_kurokku.config_layers import ConfigLayers, deep_merge, layer_key
+from led_kurokku.core import REDIS_KEY_CONFIG, display_widgets, event_listener
+from led_kurokku.tm1637 import TM1637
+from led_kurokku.tm1637.base_driver import BaseDriver
+
+BASE = {
+    "widgets": [{"widget_type": "clock", "duration": 10}],
+    "brightness": {"high": 7, "low": 2},
+}
+
+
+def test_deep_merge_and_layer_keys():
+    merged = deep_merge(BASE, {"brightness": {"low": 0}, "widgets": []})
+    assert merged == {"widgets": [], "brightness": {"high": 7, "low": 0}}
+    assert deep_merge(BASE, {"brightness": None}) == {"widgets": BASE["widgets"]}
+    assert BASE["brightness"] == {"high": 7, "low": 2}
+
+    assert layer_key("kurokku:config", "base") == "kurokku:config:base"
+    assert layer_key("kurokku:config", "group:home") == "kurokku:config:group:home"
+    for layer in ("group:", "own", ""):
+        with pytest.raises(ValueError):
+            layer_key("kurokku:config", layer)
+
+
+@pytest.mark.asyncio
+async def test_only_the_changed_layer_is_read():
+    client = FakeAsyncRedis()
+    await client.set("kurokku:config:base", json.dumps(BASE))
+    await client.set("kurokku:config:group:home", json.dumps({"brightness": {"low": 1}}))
+    await client.set("kurokku:config:group:work", json.dumps({"brightness": {"low": 5}}))
+    await client.set("kurokku:config:groups", json.dumps(["home"]))
+    await client.set("kurokku:config", json.dumps({"brightness": {"high": 4}}))
+
+    layers = ConfigLayers(client, REDIS_KEY_CONFIG)
+    assert await layers.load() == {
+        "widgets": BASE["widgets"],
+        "brightness": {"high": 4, "low": 1},
+    }
+    assert layers.fetches == 3
+
+    # Layers of other groups are not ours
+    assert await layers.refresh("kurokku:config:group:work") is False
+    await client.set("kurokku:config", json.dumps({"brightness": {"high": 3}}))
+    assert await layers.refresh("kurokku:config") is True
+    assert layers.effective["brightness"] == {"high": 3, "low": 1}
+    assert layers.fetches == 4
+
+    # Rewriting a layer unchanged changes nothing
+    assert await layers.refresh("kurokku:config:base") is False
+
+    await client.set("kurokku:config:groups", json.dumps(["home", "work"]))
+    assert await layers.refresh("kurokku:config:groups") is True
+    assert layers.effective["brightness"] == {"high": 3, "low": 5}
+    assert layers.fetches == 6
+
+
+@pytest.mark.asyncio
+async def test_fleet_wide_change_is_one_write():
+    fleet = FakeAsyncRedis(server=FakeServer())
+    await fleet.set("kurokku:config:base", json.dumps(BASE))
+    clocks = []
+    for _ in range(3):
+        client = FakeAsyncRedis(server=FakeServer())
+        await client.set("kurokku:config", json.dumps({"brightness": {"low": 0}}))
+        queue: asyncio.Queue = asyncio.Queue()
+        listener = asyncio.create_task(
+            event_listener(
+                client, queue, asyncio.Event(), asyncio.Event(), fleet_client=fleet
+            )
+        )
+        clocks.append((queue, listener))
+    try:
+        for queue, _ in clocks:
+            config = await asyncio.wait_for(queue.get(), 1)
+            assert config["brightness"] == {"high": 7, "low": 0}
+        await asyncio.sleep(0.1)
+
+        widgets = [{"widget_type": "message", "message": "HI"}]
+        await fleet.set("kurokku:config:base", json.dumps({**BASE, "widgets": widgets}))
+        for queue, _ in clocks:
+            config = await asyncio.wait_for(queue.get(), 1)
+            assert config["widgets"] == widgets
+            assert config["brightness"]["low"] == 0
+    finally:
+        for _, listener in clocks:
+            listener.cancel()
+        await asyncio.gather(*(listener for _, listener in clocks), return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_fleet_layers_are_reread_after_reconnecting(monkeypatch):
+    monkeypatch.setattr(core, "FLEET_RETRY_DELAY", 0.01)
+    fleet = FakeAsyncRedis(server=FakeServer())
+    await fleet.set("kurokku:config:base", json.dumps(BASE))
+    dropped = asyncio.Event()
+    subscriptions = []
+    pubsub = fleet.pubsub
+
+    def flaky_pubsub():
+        # The first subscription misses every event until its connection drops
+        subscription = pubsub()
+        subscriptions.append(subscription)
+        if len(subscriptions) == 1:
+
+            async def listen():
+                await dropped.wait()
+                raise ConnectionError("Connection closed by server.")
+                yield
+
+            subscription.listen = listen
+        return subscription
+
+    monkeypatch.setattr(fleet, "pubsub", flaky_pubsub)
+    client = FakeAsyncRedis(server=FakeServer())
+    queue: asyncio.Queue = asyncio.Queue()
+    listener = asyncio.create_task(
+        event_listener(client, queue, asyncio.Event(), asyncio.Event(), fleet_client=fleet)
+    )
+    try:
+        assert (await asyncio.wait_for(queue.get(), 1))["widgets"] == BASE["widgets"]
+        await asyncio.sleep(0.1)
+
+        widgets = [{"widget_type": "message", "message": "HI"}]
+        await fleet.set("kurokku:config:base", json.dumps({**BASE, "widgets": widgets}))
+        await asyncio.sleep(0.1)
+        assert queue.empty()
+
+        dropped.set()
+        assert (await asyncio.wait_for(queue.get(), 1))["widgets"] == widgets
+        assert len(subscriptions) == 2
+
+        # Events are received again
+        await fleet.set("kurokku:config:base", json.dumps(BASE))
+        assert (await asyncio.wait_for(queue.get(), 1))["widgets"] == BASE["widgets"]
+    finally:
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+
+
+class FrameDriver(BaseDriver):
+    def __init__(self):
+        super().__init__()
+        self.frames: list[list[int] | None] = []
+
+    def display(self, data: list[int], colon: bool = False) -> None:
+        self.frames.append(list(data))
+
+    def clear(self) -> None:
+        self.frames.append(None)
+
+
+def _frame(text: str) -> list[int]:
+    driver = FrameDriver()
+    TM1637(driver=driver).show_text(text)
+    return driver.frames[-1]
+
+
+@pytest.mark.asyncio
+async def test_deleting_the_last_layer_clears_the_display():
+    client = FakeAsyncRedis()
+    home = {"widgets": [{"widget_type": "message", "message": "HOME", "duration": 60}]}
+    await client.set("kurokku:config:group:home", json.dumps(home))
+    await client.set("kurokku:config:groups", json.dumps(["home"]))
+    queue: asyncio.Queue = asyncio.Queue()
+    config_event, stop_event = asyncio.Event(), asyncio.Event()
+    driver = FrameDriver()
+    listener = asyncio.create_task(event_listener(client, queue, config_event, stop_event))
+    display = asyncio.create_task(
+        display_widgets(client, queue, config_event, stop_event, driver_instance=driver)
+    )
+    try:
+        async with asyncio.timeout(1):
+            while not driver.frames or driver.frames[-1] != _frame("HOME"):
+                await asyncio.sleep(0.01)
+
+        # The clock is left without any configuration
+        await client.delete("kurokku:config:group:home")
+        async with asyncio.timeout(1):
+            while driver.frames[-1] is not None:
+                await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+        assert not display.done()
+
+        back = {"widgets": [{"widget_type": "message", "message": "BACK", "duration": 60}]}
+        await client.set("kurokku:config:group:home", json.dumps(back))
+        async with asyncio.timeout(2):
+            while driver.frames[-1] != _frame("BACK"):
+                await asyncio.sleep(0.01)
+    finally:
+        for task in (listener, display):
+            task.cancel()
+        await asyncio.gather(listener, display, return_exceptions=True)
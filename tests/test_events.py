@@ -0,0 +1,93 @@
+"""Tests for the Server-Sent Events and long-poll viewers."""
+
+import asyncio
+import json
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from led_kurokku import web_server
+from led_kurokku.broadcast import BroadcastHub
+from led_kurokku.web_server import WebServer
+
+
+async def _read_event(response) -> dict[str, str]:
+    fields = {}
+    async with asyncio.timeout(5):
+        while line := (await response.content.readline()).decode().rstrip("\n"):
+            name, _, value = line.partition(": ")
+            fields[name] = value
+    return fields
+
+
+@pytest.mark.asyncio
+async def test_event_message_is_shared_and_resumable():
+    hub = BroadcastHub()
+    hub.publish([1, 2, 3, 4], True, 5)
+    first = hub.subscribe(events=True)
+    second = hub.subscribe(events=True)
+
+    message = await first.next_message()
+    assert await second.next_message() is message
+    assert message.startswith(f"id: {hub.version}\ndata: ".encode())
+
+    # A client that already has the current frame waits for the next one
+    resumed = hub.subscribe(since=hub.version, events=True)
+    waiting = asyncio.create_task(resumed.next_message())
+    await asyncio.sleep(0)
+    assert not waiting.done()
+    hub.publish([0, 0, 0, 0], False, 5)
+    assert (await asyncio.wait_for(waiting, 1)).startswith(f"id: {hub.version}\n".encode())
+
+
+@pytest.mark.asyncio
+async def test_event_stream_follows_hub():
+    server = WebServer()
+    async with TestClient(TestServer(server.app)) as client:
+        response = await client.get("/events")
+        assert response.headers["Content-Type"] == "text/event-stream"
+        assert (await _read_event(response)) == {"retry": "3000"}
+
+        first = await _read_event(response)
+        assert int(first["id"]) == server.hub.version
+        assert json.loads(first["data"])["digits"] == [0, 0, 0, 0]
+
+        server.hub.publish([1, 2, 3, 4], True, 5)
+        update = await _read_event(response)
+        assert int(update["id"]) == server.hub.version
+        assert json.loads(update["data"])["digits"] == [1, 2, 3, 4]
+        assert server.hub.viewers == 1
+        response.close()
+
+        # Resuming with the current ID skips straight to the next frame
+        response = await client.get(
+            "/events", headers={"Last-Event-ID": str(server.hub.version)}
+        )
+        await _read_event(response)
+        server.hub.publish([5, 6, 7, 8], False, 5)
+        assert json.loads((await _read_event(response))["data"])["digits"] == [5, 6, 7, 8]
+        response.close()
+
+
+@pytest.mark.asyncio
+async def test_long_poll(monkeypatch):
+    monkeypatch.setattr(web_server, "POLL_TIMEOUT", 0.1)
+    server = WebServer()
+    async with TestClient(TestServer(server.app)) as client:
+        response = await client.get("/poll")
+        assert response.status == 200
+        version = response.headers["X-Kurokku-Sequence"]
+        assert (await response.json())["digits"] == [0, 0, 0, 0]
+
+        # Nothing new before the timeout
+        response = await client.get(f"/poll?since={version}")
+        assert response.status == 204
+
+        waiting = asyncio.create_task(client.get(f"/poll?since={version}"))
+        await asyncio.sleep(0.02)
+        server.hub.publish([1, 2, 3, 4], False, 5)
+        response = await waiting
+        assert response.status == 200
+        assert (await response.json())["digits"] == [1, 2, 3, 4]
+        assert int(response.headers["X-Kurokku-Sequence"]) == server.hub.version
+    assert server.hub.viewers == 0
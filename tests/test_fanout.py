@@ -0,0 +1,90 @@
+"""Tests for the fan-out driver."""
+
+import asyncio
+import threading
+import time
+
+from led_kurokku.drivers import FanoutChild, FanoutDriver
+from led_kurokku.tm1637.base_driver import BaseDriver
+from led_kurokku.tm1637.websocket import WebSocketDriver
+
+
+class ListDriver(BaseDriver):
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        super().__init__()
+        self._driver_name = "list"
+        self.frames = []
+        self.delay = delay
+        self.fail = fail
+        self.threads = set()
+
+    def display(self, data, colon=False):
+        self.threads.add(threading.current_thread().name)
+        if self.fail:
+            raise OSError("bus error")
+        time.sleep(self.delay)
+        self.frames.append((data, colon))
+
+    def clear(self):
+        self.display([0, 0, 0, 0])
+
+
+def test_failing_child_does_not_affect_others():
+    good = ListDriver()
+    bad = ListDriver(fail=True)
+    driver = FanoutDriver([bad, good])
+
+    driver.display([1, 2, 3, 4], colon=True)
+    driver.brightness = 5
+
+    assert good.frames == [([1, 2, 3, 4], True)]
+    assert good.brightness == 5
+    assert bad.frames == []
+    assert driver._children[0].errors == 1
+
+
+def test_rate_limited_child_gets_latest_frame():
+    fast = ListDriver()
+    slow = ListDriver()
+    driver = FanoutDriver([fast, FanoutChild(slow, min_interval=0.05)])
+
+    async def run():
+        for i in range(5):
+            driver.display([i, 0, 0, 0])
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+
+    assert [f[0][0] for f in fast.frames] == [0, 1, 2, 3, 4]
+    assert [f[0][0] for f in slow.frames] == [0, 4]
+    assert driver._children[1].dropped == 3
+
+
+def test_threaded_child_does_not_block_caller():
+    hardware = ListDriver(delay=0.05)
+    driver = FanoutDriver([FanoutChild(hardware, threaded=True)])
+
+    start = time.monotonic()
+    for i in range(5):
+        driver.display([i, 0, 0, 0])
+    assert time.monotonic() - start < 0.05
+
+    deadline = time.monotonic() + 2
+    while time.monotonic() < deadline and (not hardware.frames or hardware.frames[-1][0][0] != 4):
+        time.sleep(0.01)
+    driver.close()
+
+    assert hardware.frames[-1][0] == [4, 0, 0, 0]
+    assert len(hardware.frames) < 5
+    assert hardware.threads == {"fanout-list"}
+
+
+def test_delegates_to_websocket_child():
+    websocket = WebSocketDriver()
+    driver = FanoutDriver([ListDriver(), websocket])
+    queue = asyncio.Queue()
+
+    driver.add_client(queue)
+    driver.display([1, 2, 3, 4])
+
+    assert queue.qsize() == 2
@@ -0,0 +1,280 @@
+"""Tests for running CLI commands across many instances."""
+
+import asyncio
+import json
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+import yaml
+from click.testing import CliRunner
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from led_kurokku.cli.models.instance import KurokkuInstance, KurokkuRegistry
+from led_kurokku.cli.utils import alert_import, fleet
+from led_kurokku.cli_main import cli
+from led_kurokku.core import REDIS_KEY_CONFIG
+
+SLOW_HOST = "slow.local"
+
+
+class FakePools:
+    """One fake Redis server per host; the slow host never answers."""
+
+    servers: dict[str, FakeServer] = {}
+
+    def __init__(self, **connection_kwargs):
+        pass
+
+    def client(self, host: str, port: int = 6379, db: int = 0):
+        if host == SLOW_HOST:
+            return SlowRedis()
+        server = self.servers.setdefault(host, FakeServer())
+        return FakeAsyncRedis(server=server)
+
+    async def aclose(self):
+        pass
+
+
+async def _hang(*args, **kwargs):
+    await asyncio.sleep(60)
+
+
+class SlowRedis(FakeAsyncRedis):
+    execute_command = _hang
+
+    def pipeline(self, *args, **kwargs):
+        pipe = super().pipeline(*args, **kwargs)
+        pipe.execute = _hang
+        return pipe
+
+
+@pytest.fixture
+def registry():
+    return KurokkuRegistry(
+        instances=[
+            KurokkuInstance(name="kitchen", host="kitchen.local", groups=["home"]),
+            KurokkuInstance(name="hall", host="hall.local", groups=["home"]),
+            KurokkuInstance(name="office-1", host="office-1.local", groups=["work"]),
+            KurokkuInstance(name="office-2", host="office-2.local", groups=["work"]),
+        ]
+    )
+
+
+@pytest.fixture
+def fake_pools(registry):
+    FakePools.servers = {}
+    with (
+        patch.object(fleet, "RedisPools", FakePools),
+        patch.object(alert_import, "RedisPools", FakePools),
+        patch("led_kurokku.cli.commands.config.load_registry", return_value=registry),
+        patch("led_kurokku.cli.commands.alert.load_registry", return_value=registry),
+    ):
+        yield FakePools.servers
+
+
+@pytest.fixture
+def temp_config_file(tmp_path):
+    path = tmp_path / "config.yaml"
+    path.write_text(yaml.dump({"widgets": [{"widget_type": "clock"}]}))
+    return str(path)
+
+
+def _client(servers, host):
+    return FakeAsyncRedis(server=servers[host], decode_responses=True)
+
+
+def test_registry_select(registry):
+    names = lambda instances: [i.name for i in instances]  # noqa: E731
+
+    assert names(registry.select(["office-*"])) == ["office-1", "office-2"]
+    assert names(registry.select(["hall"], ["work"])) == ["hall", "office-1", "office-2"]
+    assert names(registry.select(groups=["home"])) == ["kitchen", "hall"]
+    assert len(registry.select(all_instances=True)) == 4
+    assert registry.select(["nothing*"]) == []
+
+
+def test_config_set_and_diff_across_groups(fake_pools, temp_config_file):
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ["config", "set", "--group", "home", temp_config_file])
+    assert result.exit_code == 0, result.output
+    assert "2 instances: 2 ok, 0 failed" in result.output
+    stored = asyncio.run(_client(fake_pools, "hall.local").get(REDIS_KEY_CONFIG))
+    assert json.loads(stored)["widgets"][0]["widget_type"] == "clock"
+    assert "office-1.local" not in fake_pools
+
+    result = runner.invoke(cli, ["config", "diff", "kitchen", "hall", temp_config_file])
+    assert result.exit_code == 0, result.output
+    assert result.output.count("identical") == 2
+
+    # Instances without a configuration fail, and so does the command
+    result = runner.invoke(cli, ["config", "get", "--all"])
+    assert result.exit_code == 1
+    assert "4 instances: 2 ok, 2 failed" in result.output
+    assert "no configuration" in result.output
+
+
+def test_config_get_writes_a_file_per_instance(fake_pools, temp_config_file, tmp_path):
+    runner = CliRunner()
+    runner.invoke(cli, ["config", "set", "office-*", temp_config_file])
+
+    result = runner.invoke(
+        cli, ["config", "get", "office-*", "--output", str(tmp_path), "-f", "json"]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "1 widgets" in result.output
+    saved = json.loads((tmp_path / "office-2.json").read_text())
+    assert saved["widgets"][0]["widget_type"] == "clock"
+
+
+def test_config_layers_across_the_fleet(fake_pools, tmp_path):
+    layer_file = tmp_path / "night.yaml"
+    layer_file.write_text(yaml.dump({"brightness": {"low": 0}}))
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ["config", "layer", "set", "group:home", "--all", str(layer_file)])
+    assert result.exit_code == 0, result.output
+    assert result.output.count("group:home set") == 4
+    result = runner.invoke(cli, ["config", "layer", "groups", "--group", "home"])
+    assert result.exit_code == 0, result.output
+    assert result.output.count("groups: home") == 2
+
+    kitchen = _client(fake_pools, "kitchen.local")
+    assert json.loads(asyncio.run(kitchen.get("kurokku:config:group:home"))) == {
+        "brightness": {"low": 0}
+    }
+    assert json.loads(asyncio.run(kitchen.get("kurokku:config:groups"))) == ["home"]
+
+    result = runner.invoke(cli, ["config", "layer", "delete", "group:home", "office-*"])
+    assert result.exit_code == 0, result.output
+    assert result.output.count("group:home deleted") == 2
+
+    layer_file.write_text(yaml.dump({"brightness": {"low": "dim"}}))
+    result = runner.invoke(cli, ["config", "layer", "set", "base", "--all", str(layer_file)])
+    assert result.exit_code == 1
+    assert "Invalid layer" in result.output
+    result = runner.invoke(cli, ["config", "layer", "delete", "own", "--all"])
+    assert result.exit_code == 2
+
+
+def test_alerts_across_the_fleet(fake_pools):
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ["alert", "send", "--all", "Fire drill", "--ttl", "60"])
+    assert result.exit_code == 0, result.output
+    assert "4 instances: 4 ok" in result.output
+    result = runner.invoke(cli, ["alert", "send", "-c", "kitchen", "-c", "hall", "Dinner"])
+    assert result.exit_code == 0, result.output
+
+    result = runner.invoke(cli, ["alert", "list", "--group", "home"])
+    assert result.output.count("2 alerts") == 2
+    assert "Dinner" in result.output
+
+    result = runner.invoke(cli, ["alert", "clear", "--group", "home", "--group", "work"])
+    assert result.exit_code == 0, result.output
+    assert result.output.count("cleared 2 alerts") == 2
+    assert result.output.count("cleared 1 alerts") == 2
+    assert asyncio.run(_client(fake_pools, "kitchen.local").keys("*")) == []
+
+
+def test_namespaced_instances_share_a_redis(fake_pools, registry):
+    registry.instances[:] = [
+        KurokkuInstance(name=f"desk-{i}", host="shared.local", namespace=f"desk-{i}")
+        for i in range(3)
+    ]
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ["alert", "send", "-c", "desk-1", "-c", "desk-2", "Standup"])
+    assert result.exit_code == 0, result.output
+    result = runner.invoke(cli, ["alert", "list", "--all"])
+    assert result.output.count("1 alerts") == 2
+    assert result.output.count("0 alerts") == 1
+
+    keys = asyncio.run(_client(fake_pools, "shared.local").keys("*"))
+    assert sorted(key.split(":")[1] for key in keys) == ["desk-1", "desk-2"]
+
+
+def test_slow_hosts_time_out_concurrently(fake_pools, registry):
+    registry.instances.extend(
+        KurokkuInstance(name=f"slow-{i}", host=SLOW_HOST) for i in range(3)
+    )
+    runner = CliRunner()
+
+    started = time.perf_counter()
+    result = runner.invoke(cli, ["alert", "clear", "--all", "--timeout", "0.2"])
+    elapsed = time.perf_counter() - started
+
+    assert result.exit_code == 1
+    assert "7 instances: 4 ok, 3 failed" in result.output
+    assert result.output.count("timed out after 0.2s") == 3
+    # Bounded by the slowest host, not the sum of them
+    assert elapsed < 0.5
+
+
+def test_fleet_selection_errors(fake_pools):
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ["alert", "list", "nothing*"])
+    assert result.exit_code == 1
+    assert "No instances matched." in result.output
+
+    result = runner.invoke(cli, ["alert", "clear"])
+    assert result.exit_code == 2
+
+
+def test_parse_alert():
+    alert, ttl = alert_import.parse_alert(b'{"message": "HELLO", "ttl": 30}', 300)
+    assert (alert.message, alert.display_duration, ttl) == ("HELLO", 2.0, 30)
+    alert, ttl = alert_import.parse_alert('{"id": "a1", "message": "HI", "priority": 2}', 300)
+    assert (alert.id, alert.priority, ttl) == ("a1", 2, 300)
+
+    for line in ('{"priority": 1}', '{"message": "X", "ttl": 0}', "[1]", "{oops"):
+        with pytest.raises(ValueError):
+            alert_import.parse_alert(line, 300)
+
+
+def test_alert_import_from_stdin(fake_pools):
+    lines = [json.dumps({"message": f"ALERT {i}", "ttl": 100 + i}) for i in range(25)]
+    lines[3] = '{"message": 42}'
+    lines.insert(10, "")
+
+    result = CliRunner().invoke(
+        cli,
+        ["alert", "import", "--group", "home", "--batch-size", "4"],
+        input="\n".join(lines) + "\n",
+    )
+
+    assert result.exit_code == 1
+    assert "Line 4: message: Input should be a valid string" in result.output
+    assert "24 alerts imported from 26 lines, 1 rejected" in result.output
+    assert result.output.count("24 alerts") == 3
+    client = _client(fake_pools, "kitchen.local")
+    keys = asyncio.run(client.keys("kurokku:alert:*"))
+    assert len(keys) == 24
+    assert {asyncio.run(client.ttl(key)) for key in keys} <= set(range(99, 125))
+
+
+@pytest.mark.asyncio
+async def test_alert_import_flushes_a_paused_stream(fake_pools, registry):
+    read_fd, write_fd = os.pipe()
+    stream, feed = os.fdopen(read_fd, "rb"), os.fdopen(write_fd, "wb")
+    importing = asyncio.create_task(
+        alert_import.import_alerts(registry.instances[:1], stream, flush_interval=0.05)
+    )
+    feed.write(b'{"message": "FIRST"}\n{"message": "SECOND"}\n')
+    feed.flush()
+    await asyncio.sleep(0.3)
+
+    # Written before the input ends, although the batch is not full
+    client = _client(fake_pools, "kitchen.local")
+    assert len(await client.keys("kurokku:alert:*")) == 2
+    assert not importing.done()
+
+    feed.write(b'{"message": "THIRD"}\n')
+    feed.close()
+    stats = await asyncio.wait_for(importing, 2)
+    stream.close()
+    assert (stats.alerts, stats.results[0].value) == (3, 3)
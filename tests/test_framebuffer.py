@@ -0,0 +1,66 @@
+"""Tests for the shared-memory frame buffer."""
+
+import asyncio
+
+from led_kurokku.drivers import FrameBufferDriver, FrameBufferReader, mirror
+from led_kurokku.tm1637.websocket import WebSocketDriver
+
+
+def test_reader_sees_published_frames(tmp_path):
+    path = str(tmp_path / "kurokku.fb")
+    inner = WebSocketDriver()
+    driver = FrameBufferDriver(path, inner, display_type="ht16k33")
+    reader = FrameBufferReader(path)
+
+    driver.display([1, 2, 3, 4], colon=True)
+    driver.brightness = 6
+    state = reader.read()
+
+    assert inner._current_display == [1, 2, 3, 4]
+    assert state.sequence == driver.sequence == 4
+    assert state.digits == [1, 2, 3, 4]
+    assert state.colon is True
+    assert state.brightness == 6
+    assert state.display_type == "ht16k33"
+
+    driver.clear()
+    assert reader.read().digits == [0, 0, 0, 0]
+    reader.close()
+    driver.close(unlink=True)
+
+
+def test_reader_retries_while_writer_is_busy(tmp_path):
+    path = str(tmp_path / "kurokku.fb")
+    driver = FrameBufferDriver(path)
+    reader = FrameBufferReader(path)
+
+    # Leave the sequence odd, as if the writer were interrupted mid-frame
+    driver._mmap[8] = 1
+    assert reader.read(retries=3) is None
+    driver._mmap[8] = 0
+    assert reader.read() is not None
+    reader.close()
+    driver.close()
+
+
+def test_mirror_follows_frames(tmp_path):
+    path = str(tmp_path / "kurokku.fb")
+    driver = FrameBufferDriver(path)
+    reader = FrameBufferReader(path)
+    target = WebSocketDriver()
+
+    async def run():
+        task = asyncio.create_task(mirror(reader, target, interval=0.001))
+        driver.display([5, 6, 7, 8])
+        driver.brightness = 4
+        for _ in range(100):
+            await asyncio.sleep(0.001)
+            if target._current_display == [5, 6, 7, 8] and target.brightness == 4:
+                break
+        task.cancel()
+
+    asyncio.run(run())
+    assert target._current_display == [5, 6, 7, 8]
+    assert target.brightness == 4
+    reader.close()
+    driver.close()
@@ -0,0 +1,90 @@
+"""Tests for resuming viewers from the frame history and exporting it."""
+
+import pytest
+from aiohttp import WSMsgType
+from aiohttp.test_utils import TestClient, TestServer
+
+from led_kurokku.broadcast import BroadcastHub, FrameHistory
+from led_kurokku.drivers.recording import read_recording_bytes
+from led_kurokku.web_server import WebServer
+from led_kurokku.websocket_protocol import FLAG_KEYFRAME, decode_frame
+
+
+@pytest.mark.asyncio
+async def test_reconnecting_viewer_is_replayed_missed_deltas():
+    hub = BroadcastHub()
+    hub.keep_history(size=16)
+    viewer = hub.subscribe(binary=True)
+    state = decode_frame(await viewer.next_message())
+    viewer.close()
+
+    for i in range(1, 4):
+        hub.publish([i, 0, 0, 0], False, 2)
+
+    resumed = hub.subscribe(binary=True, since=state["sequence"])
+    for i in range(1, 4):
+        message = await resumed.next_message()
+        assert not message[0] & FLAG_KEYFRAME
+        state = decode_frame(message, state)
+        assert state["digits"] == [i, 0, 0, 0]
+    assert state["sequence"] == hub.version
+    assert resumed.version == hub.version
+
+
+@pytest.mark.asyncio
+async def test_unknown_version_falls_back_to_keyframe():
+    hub = BroadcastHub()
+    hub.keep_history(size=4)
+    first = hub.version
+    for i in range(10):
+        hub.publish([i, 0, 0, 0], False, 2)
+
+    assert len(hub.history) == 4
+    assert hub.history.versions() == (hub.version - 3, hub.version)
+    # Evicted from the history, or never part of it
+    for since in (first, hub.version + 1):
+        viewer = hub.subscribe(binary=True, since=since)
+        assert (await viewer.next_message())[0] & FLAG_KEYFRAME
+
+
+def test_history_drops_frames_older_than_max_age(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("led_kurokku.broadcast.time.time", lambda: now)
+    history = FrameHistory(size=10, max_age=5)
+    history.append(1, [1, 0, 0, 0], False, 2)
+    now += 3
+    history.append(2, [2, 0, 0, 0], False, 2)
+    now += 3
+    history.append(3, [3, 0, 0, 0], True, 2)
+
+    assert history.versions() == (2, 3)
+    assert [(r.kind, r.digits) for r in history.records(seconds=1)] == [
+        ("brightness", [3, 0, 0, 0]),
+        ("frame", [3, 0, 0, 0]),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_history_endpoint_and_websocket_resume():
+    server = WebServer(history=32)
+    async with TestClient(TestServer(server.app)) as client:
+        async with client.ws_connect("/ws?proto=bin") as ws:
+            state = decode_frame((await ws.receive()).data)
+        server.hub.publish([1, 2, 3, 4], True, 5)
+
+        async with client.ws_connect(f"/ws?proto=bin&since={state['sequence']}") as ws:
+            message = await ws.receive()
+            assert message.type == WSMsgType.BINARY
+            assert not message.data[0] & FLAG_KEYFRAME
+            assert decode_frame(message.data, state)["digits"] == [1, 2, 3, 4]
+
+        response = await client.get("/history")
+        assert response.status == 200
+        last = int(response.headers["X-Kurokku-Sequence"].rsplit("-", 1)[1])
+        assert last == server.hub.version
+        records = read_recording_bytes(await response.read())
+        assert (records[-1].digits, records[-1].brightness) == ([1, 2, 3, 4], 5)
+        assert (await client.get("/history?seconds=x")).status == 400
+
+    async with TestClient(TestServer(WebServer().app)) as client:
+        assert (await client.get("/history")).status == 404
@@ -0,0 +1,97 @@
+"""Tests for per-instance Redis key namespaces."""
+
+import asyncio
+import json
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from led_kurokku.alert_scheduler import AlertScheduler
+from led_kurokku.cli.models.instance import KurokkuInstance
+from led_kurokku.cli.utils.redis_helpers import deliver_alert, make_alert, read_alerts
+from led_kurokku.core import REDIS_KEY_CONFIG, event_listener, event_patterns
+from led_kurokku.namespace import DEFAULT_NAMESPACE, KeyNamespace
+
+
+def test_key_namespace():
+    assert DEFAULT_NAMESPACE.config == "kurokku:config"
+    assert DEFAULT_NAMESPACE.alert_key("a") == "kurokku:alert:a"
+    assert DEFAULT_NAMESPACE.channel_pattern == "kurokku:channel:*"
+
+    kitchen = KeyNamespace("kitchen")
+    assert kitchen.config == "kurokku:kitchen:config"
+    assert kitchen.alert_pattern == "kurokku:kitchen:alert:*"
+    assert kitchen.alert_key("a") == kitchen.alert_key("kurokku:kitchen:alert:a")
+    assert kitchen.channel_alert == "kurokku:kitchen:channel:alert"
+    assert kitchen.command_acks == "kurokku:kitchen:commands:acks"
+    assert event_patterns(kitchen, db=1, shared_layers=False) == (
+        "kurokku:kitchen:channel:*",
+        ["__keyspace@1__:kurokku:kitchen:*"],
+    )
+
+    for name in ("config", "Alert", "commands", "a:b", "a*", ""):
+        with pytest.raises(ValueError):
+            KeyNamespace(name)
+    with pytest.raises(ValueError):
+        KurokkuInstance(name="x", host="h", namespace="weather")
+
+
+async def _start(server: FakeServer, keys: KeyNamespace):
+    client = FakeAsyncRedis(server=server)
+    queue: asyncio.Queue = asyncio.Queue()
+    scheduler = AlertScheduler()
+    listener = asyncio.create_task(
+        event_listener(
+            client,
+            queue,
+            asyncio.Event(),
+            asyncio.Event(),
+            alert_debounce=0,
+            keys=keys,
+            scheduler=scheduler,
+        )
+    )
+    assert (await asyncio.wait_for(queue.get(), 1))["widgets"] == []
+    return scheduler, queue, listener
+
+
+@pytest.mark.asyncio
+async def test_clocks_sharing_a_redis_only_see_their_keys():
+    server = FakeServer()
+    client = FakeAsyncRedis(server=server, decode_responses=True)
+    names = ["kitchen", "hall", None]
+    clocks = {}
+    for name in names:
+        keys = KeyNamespace(name)
+        await client.set(keys.config, json.dumps({"widgets": []}))
+        clocks[name] = (keys, *await _start(server, keys))
+    try:
+        await asyncio.sleep(0.1)
+        kitchen = KurokkuInstance(name="kitchen", host="redis", namespace="kitchen")
+        alert = make_alert("STORM", priority=5)
+        assert await deliver_alert(client, alert, keys=kitchen.key_namespace()) == "stored"
+        assert [a["id"] for a in await read_alerts(client, keys=kitchen.key_namespace())] == [
+            alert.id
+        ]
+        assert await read_alerts(client) == []
+
+        hall_keys = clocks["hall"][0]
+        await client.set(hall_keys.config, json.dumps({"widgets": [], "brightness": {"low": 0}}))
+        await asyncio.sleep(0.2)
+
+        for name, (keys, scheduler, queue, _) in clocks.items():
+            assert len(scheduler) == (name == "kitchen")
+            assert queue.qsize() == (name == "hall")
+
+        # The shared base layer is read by every clock
+        await client.set(f"{REDIS_KEY_CONFIG}:base", json.dumps({"brightness": {"high": 1}}))
+        for keys, _, queue, _ in clocks.values():
+            while True:
+                config = await asyncio.wait_for(queue.get(), 1)
+                if config["brightness"].get("high") == 1:
+                    break
+    finally:
+        listeners = [listener for *_, listener in clocks.values()]
+        for listener in listeners:
+            listener.cancel()
+        await asyncio.gather(*listeners, return_exceptions=True)
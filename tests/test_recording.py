@@ -0,0 +1,101 @@
+"""Tests for the frame recording driver and replay."""
+
+import asyncio
+import os
+
+from click.testing import CliRunner
+
+from led_kurokku.cli_main import cli
+from led_kurokku.drivers import (
+    RecordingDriver,
+    RecordingPlayer,
+    encode_frames,
+    read_recording,
+    read_recording_bytes,
+)
+from led_kurokku.drivers.recording import FrameLog
+from led_kurokku.tm1637.websocket import WebSocketDriver
+
+
+def test_records_frames_and_tees(tmp_path):
+    path = tmp_path / "frames.rec"
+    inner = WebSocketDriver()
+    driver = RecordingDriver(str(path), inner, size=4096)
+    driver.display([0x3F, 0x06, 0x5B, 0x4F], colon=True)
+    driver.display([0x3F, 0x06, 0x5B, 0x4F], colon=True)  # unchanged, not stored
+    driver.display([0x3F, 0x06, 0x5B, 0x66], colon=False)
+    driver.brightness = 5
+    driver.clear()
+    driver.close()
+
+    assert os.path.getsize(path) == 4096
+    assert inner.brightness == 5
+    records = read_recording(str(path))
+    assert [r.kind for r in records] == ["brightness", "frame", "frame", "brightness", "clear"]
+    assert records[2].digits == [0x3F, 0x06, 0x5B, 0x66]
+    assert records[2].colon is False
+    assert records[3].brightness == 5
+    assert records[4].digits == [0, 0, 0, 0]
+
+
+def test_ring_evicts_oldest_records():
+    blob = bytearray(256)
+    log = FrameLog(blob, start_time=1000.0)
+    for i in range(500):
+        log.append_frame([i & 0xFF, (i * 7) & 0xFFFF, 3, 4], i % 2 == 0, 1000.0 + i)
+
+    records = read_recording_bytes(bytes(blob))
+    assert log.total == 500
+    assert 0 < len(records) < 500
+    last = records[-1]
+    assert last.digits == [499 & 0xFF, (499 * 7) & 0xFFFF, 3, 4]
+    assert last.time == 1499.0
+    # Every surviving record is fully reconstructed from the header snapshot
+    first_index = 500 - len(records)
+    assert records[0].digits[1] == (first_index * 7) & 0xFFFF
+
+
+def test_append_continues_existing_recording(tmp_path):
+    path = str(tmp_path / "frames.rec")
+    driver = RecordingDriver(path, size=4096)
+    driver.display([1, 2, 3, 4])
+    driver.close()
+
+    driver = RecordingDriver(path, size=4096, append=True)
+    driver.display([1, 2, 3, 5])
+    driver.close()
+
+    assert [r.digits for r in read_recording(path) if r.kind == "frame"] == [
+        [1, 2, 3, 4],
+        [1, 2, 3, 5],
+    ]
+
+
+def test_player_replays_into_driver():
+    # Round trip through the codec before playing back
+    records = read_recording_bytes(encode_frames(read_recording_bytes(_sample_blob())))
+    target = WebSocketDriver()
+    asyncio.run(RecordingPlayer(records).play(target, speed=0))
+
+    assert target.brightness == 3
+    assert target._current_display == [9, 9, 9, 9]
+    assert RecordingPlayer(records).duration == 2.0
+
+
+def _sample_blob() -> bytes:
+    log = FrameLog(bytearray(1024), start_time=100.0)
+    log.append_frame([1, 1, 1, 1], True, 100.0)
+    log.append_brightness(3, 101.0)
+    log.append_frame([9, 9, 9, 9], False, 102.0)
+    return bytes(log.buf)
+
+
+def test_cli_dump(tmp_path):
+    path = tmp_path / "frames.rec"
+    path.write_bytes(_sample_blob())
+
+    result = CliRunner().invoke(cli, ["recording", "dump", str(path)])
+
+    assert result.exit_code == 0
+    assert "brightness 3" in result.output
+    assert len(result.output.strip().splitlines()) == 3
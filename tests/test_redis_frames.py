@@ -0,0 +1,104 @@
+"""Tests for the Redis pub/sub frame channel and the web mirror."""
+
+import asyncio
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from led_kurokku.drivers.redis_frames import RedisFrameDriver, follow_frames, frame_channel
+from led_kurokku.web_clocks import ClockHost, MirroredClock
+from led_kurokku.websocket_protocol import decode_frame
+
+
+async def _drain(driver: RedisFrameDriver) -> None:
+    while driver._inflight is not None:
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_driver_publishes_changed_frames_only():
+    redis_client = FakeAsyncRedis(server=FakeServer())
+    driver = RedisFrameDriver(redis_client, "kitchen", display_type="ht16k33")
+    async with redis_client.pubsub() as pubsub:
+        await pubsub.subscribe(frame_channel("kitchen"))
+        await pubsub.get_message(timeout=1.0)
+
+        driver.display([1, 2, 3, 4], True)
+        driver.display([5, 6, 7, 8], False)  # coalesced while the first is in flight
+        driver.display([9, 9, 9, 9], False)
+        await _drain(driver)
+        driver.display([9, 9, 9, 9], False)  # unchanged
+        await _drain(driver)
+
+        frames = []
+        while message := await pubsub.get_message(timeout=0.2):
+            frames.append(decode_frame(message["data"]))
+
+    assert [f["digits"] for f in frames] == [[1, 2, 3, 4], [9, 9, 9, 9]]
+    assert frames[0]["colon"] is True
+    assert frames[0]["display_type"] == "ht16k33"
+    assert driver.published == 2
+    assert driver.deduplicated == 1
+    snapshot = decode_frame(await redis_client.get(frame_channel("kitchen")))
+    assert snapshot["digits"] == [9, 9, 9, 9]
+    assert await redis_client.ttl(frame_channel("kitchen")) > 0
+    await redis_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_follow_frames_yields_snapshots_then_published_frames():
+    server = FakeServer()
+    publisher = FakeAsyncRedis(server=server)
+    kitchen = RedisFrameDriver(publisher, "kitchen")
+    kitchen.display([1, 1, 1, 1])
+    await _drain(kitchen)
+
+    frames = follow_frames(FakeAsyncRedis(server=server), "k*")
+    async with asyncio.timeout(5):
+        instance, state = await anext(frames)
+        assert (instance, state["digits"]) == ("kitchen", [1, 1, 1, 1])
+
+        await publisher.publish(frame_channel("keep"), b"not a frame")
+        for name, digits in (("lab", [4] * 4), ("kitchen", [2] * 4)):
+            driver = RedisFrameDriver(publisher, name)
+            driver.display(digits)
+            await _drain(driver)
+        # Invalid frames and other instances are skipped
+        instance, state = await anext(frames)
+        assert (instance, state["digits"]) == ("kitchen", [2, 2, 2, 2])
+    await frames.aclose()
+    await publisher.aclose()
+
+
+@pytest.mark.asyncio
+async def test_mirror_adds_clocks_from_snapshots_and_channel():
+    server = FakeServer()
+    publisher = FakeAsyncRedis(server=server)
+    kitchen = RedisFrameDriver(publisher, "kitchen")
+    kitchen.display([1, 1, 1, 1])
+    await _drain(kitchen)
+
+    host = ClockHost()
+    subscriber = FakeAsyncRedis(server=server)
+    task = asyncio.create_task(host.mirror_frames(subscriber, "k*"))
+    try:
+        async with asyncio.timeout(5):
+            while "kitchen" not in host.clocks:
+                await asyncio.sleep(0.01)
+            assert host.clocks["kitchen"].hub.digits == [1, 1, 1, 1]
+
+            for name, digits in (("kitchen", [2] * 4), ("keep", [3] * 4), ("lab", [4] * 4)):
+                driver = RedisFrameDriver(publisher, name)
+                driver.display(digits)
+                await _drain(driver)
+            while "keep" not in host.clocks or host.clocks["kitchen"].hub.digits != [2] * 4:
+                await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    assert isinstance(host.clocks["keep"], MirroredClock)
+    assert host.clocks["keep"].running
+    assert "lab" not in host.clocks
+    await publisher.aclose()
+    await subscriber.aclose()
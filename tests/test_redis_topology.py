@@ -0,0 +1,186 @@
+"""Tests for reading from a replica and writing to the primary."""
+
+import asyncio
+import json
+import shutil
+import socket
+import subprocess
+import time
+
+import pytest
+import redis
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from led_kurokku.alert_scheduler import AlertScheduler
+from led_kurokku.core import REDIS_CHANNEL_ALERT, REDIS_KEY_CONFIG, event_listener
+from led_kurokku.redis_topology import (
+    RedisEndpoints,
+    open_clients,
+    parse_sentinels,
+)
+from led_kurokku.tm1637 import TM1637
+from led_kurokku.tm1637.console import ConsoleDriver
+from led_kurokku.widgets.alert import AlertWidget, AlertWidgetConfig
+
+CONFIG = json.dumps({"widgets": []})
+
+
+def test_endpoints_from_env():
+    assert RedisEndpoints.from_env({}) == RedisEndpoints()
+    endpoints = RedisEndpoints.from_env(
+        {"REDIS_HOST": "hq", "REDIS_READ_HOST": "site", "REDIS_READ_PORT": "6380"}
+    )
+    read_client, write_client = endpoints.clients()
+    assert read_client.connection_pool.connection_kwargs["host"] == "site"
+    assert read_client.connection_pool.connection_kwargs["port"] == 6380
+    assert write_client.connection_pool.connection_kwargs["host"] == "hq"
+    assert endpoints.describe() == "reading from site:6380, writing to hq:6379"
+
+    read_client, write_client = RedisEndpoints().clients()
+    assert read_client is write_client
+
+    assert parse_sentinels("s1:26380, s2,") == (("s1", 26380), ("s2", 26379))
+    with pytest.raises(ValueError):
+        parse_sentinels("s1:port")
+    endpoints = RedisEndpoints.from_env(
+        {"REDIS_SENTINELS": "s1,s2", "REDIS_SENTINEL_SERVICE": "clocks"}
+    )
+    read_client, write_client = endpoints.clients()
+    assert (read_client.connection_pool.is_master, write_client.connection_pool.is_master) == (
+        False,
+        True,
+    )
+    assert write_client.connection_pool.service_name == "clocks"
+
+
+@pytest.mark.asyncio
+async def test_writes_go_to_the_primary():
+    primary = FakeAsyncRedis(server=FakeServer(), decode_responses=True)
+    replica = FakeAsyncRedis(server=FakeServer())
+
+    alert = json.dumps(
+        {
+            "timestamp": "2025-01-01T00:00:00",
+            "message": "BYE",
+            "display_duration": 0.01,
+            "delete_after_display": True,
+        }
+    )
+    for client in (primary, replica):  # As if replicated
+        await client.set(REDIS_KEY_CONFIG, CONFIG)
+        await client.set("kurokku:alert:bye", alert)
+    queue: asyncio.Queue = asyncio.Queue()
+    scheduler = AlertScheduler()
+    listener = asyncio.create_task(
+        event_listener(
+            replica,
+            queue,
+            asyncio.Event(),
+            asyncio.Event(),
+            alert_debounce=0,
+            scheduler=scheduler,
+            write_client=primary,
+        )
+    )
+    try:
+        await asyncio.wait_for(queue.get(), 1)
+        await asyncio.sleep(0.1)
+
+        # Interrupted alerts are deleted after display
+        interrupted = asyncio.Event()
+        interrupted.set()
+        widget = AlertWidget(
+            TM1637(driver=ConsoleDriver()),
+            replica,
+            interrupted,
+            AlertWidgetConfig(),
+            scheduler=scheduler,
+            write_client=primary,
+        )
+        (alert,) = scheduler.alerts()
+        assert await widget.show_alert(alert)
+        assert await primary.exists("kurokku:alert:bye") == 0
+        assert await replica.exists("kurokku:alert:bye") == 1
+
+        # A direct alert arrives on the replica and is stored on the primary
+        await replica.publish(REDIS_CHANNEL_ALERT, json.dumps({"id": "hi", "message": "HI"}))
+        await asyncio.sleep(0.2)
+        assert json.loads(await primary.get("kurokku:alert:hi"))["message"] == "HI"
+        assert await replica.exists("kurokku:alert:hi") == 0
+        assert [a.message for a in scheduler.alerts()] == ["HI"]
+    finally:
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def primary_and_replica():
+    ports = _free_port(), _free_port()
+    servers = [
+        subprocess.Popen(
+            ["redis-server", "--port", str(port), "--save", "", "--appendonly", "no", *extra],
+            stdout=subprocess.DEVNULL,
+        )
+        for port, extra in zip(ports, ([], ["--replicaof", "127.0.0.1", str(ports[0])]))
+    ]
+    try:
+        yield ports
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+
+
+@pytest.mark.skipif(shutil.which("redis-server") is None, reason="needs redis-server")
+@pytest.mark.asyncio
+async def test_clock_reads_from_a_replica(primary_and_replica):
+    primary_port, replica_port = primary_and_replica
+    endpoints = RedisEndpoints(
+        host="127.0.0.1", port=primary_port, read_host="127.0.0.1", read_port=replica_port
+    )
+    async with open_clients(endpoints) as (replica, primary):
+        deadline = time.monotonic() + 5
+        while True:
+            try:
+                if (await replica.info("replication")).get("master_link_status") == "up":
+                    break
+            except redis.ConnectionError:  # Not started yet
+                pass
+            assert time.monotonic() < deadline, "replica did not connect"
+            await asyncio.sleep(0.05)
+        await primary.set(REDIS_KEY_CONFIG, CONFIG)
+        await primary.execute_command("WAIT", 1, 1000)
+
+        queue: asyncio.Queue = asyncio.Queue()
+        listener = asyncio.create_task(
+            event_listener(
+                replica,
+                queue,
+                asyncio.Event(),
+                asyncio.Event(),
+                alert_debounce=0,
+                write_client=primary,
+            )
+        )
+        try:
+            assert (await asyncio.wait_for(queue.get(), 2))["widgets"] == []
+            await asyncio.sleep(0.1)
+
+            # Keyspace events and published messages reach the replica's subscribers
+            await primary.set(REDIS_KEY_CONFIG, json.dumps({"widgets": [], "brightness": {"low": 0}}))
+            assert (await asyncio.wait_for(queue.get(), 2))["brightness"]["low"] == 0
+            await primary.publish(REDIS_CHANNEL_ALERT, json.dumps({"id": "hi", "message": "HI"}))
+            deadline = time.monotonic() + 2
+            while not await replica.exists("kurokku:alert:hi"):
+                assert time.monotonic() < deadline, "direct alert was not stored"
+                await asyncio.sleep(0.05)
+            assert await primary.exists("kurokku:alert:hi") == 1
+        finally:
+            listener.cancel()
+            await asyncio.gather(listener, return_exceptions=True)
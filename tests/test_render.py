@@ -0,0 +1,154 @@
+"""Tests for rendering frames to images and animations."""
+
+import struct
+import zlib
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from click.testing import CliRunner
+
+np = pytest.importorskip("numpy")
+
+from led_kurokku.cli_main import cli  # noqa: E402
+from led_kurokku.drivers.recording import FrameRecord, encode_frames  # noqa: E402
+from led_kurokku.render.animation import export_animation, timeline  # noqa: E402
+from led_kurokku.render.formats import encode_png, lzw_compress  # noqa: E402
+from led_kurokku.render.raster import LEVELS, SegmentRenderer  # noqa: E402
+from led_kurokku.web_server import WebServer  # noqa: E402
+
+
+def _chunks(png: bytes) -> list[tuple[bytes, bytes]]:
+    chunks, pos = [], 8
+    while pos < len(png):
+        (length,) = struct.unpack(">I", png[pos : pos + 4])
+        chunks.append((png[pos + 4 : pos + 8], png[pos + 8 : pos + 8 + length]))
+        pos += length + 12
+    return chunks
+
+
+def _decode_png(png: bytes) -> np.ndarray:
+    chunks = dict(_chunks(png))
+    width, height = struct.unpack(">II", chunks[b"IHDR"][:8])
+    rows = np.frombuffer(zlib.decompress(chunks[b"IDAT"]), dtype=np.uint8)
+    return rows.reshape(height, width + 1)[:, 1:]
+
+
+def test_renderer_lights_only_the_given_segments():
+    renderer = SegmentRenderer(scale=1)
+    blank = renderer.render([0, 0, 0, 0], False, 7)
+    eight = renderer.render([0x7F, 0, 0, 0], False, 7)
+    colon = renderer.render([0, 0, 0, 0], True, 7)
+    dim = renderer.render([0x7F, 0, 0, 0], False, 0)
+
+    assert blank.shape == (renderer.height, renderer.width)
+    # Unlit segments show faintly, lit ones at full level
+    assert (blank % LEVELS).max() < LEVELS // 2
+    assert (eight % LEVELS).max() == LEVELS - 1
+    # Only the first digit's columns change, and only the middle for the colon
+    assert np.flatnonzero((blank != eight).any(axis=0)).max() < renderer.width / 4
+    colon_columns = np.flatnonzero((blank != colon).any(axis=0))
+    assert renderer.width * 0.4 < colon_columns.min() < colon_columns.max() < renderer.width * 0.6
+    assert (dim // LEVELS).max() == 0 and (eight // LEVELS).min() == 7
+    assert tuple(renderer.to_rgb(eight)[eight == 255][0]) == (255, 0, 0)
+
+
+def test_glyphs_are_cached_per_word():
+    renderer = SegmentRenderer("ht16k33", scale=1)
+    first = renderer.glyphs([0x00F7, 0x2D00])
+    again = renderer.glyphs([0x2D00])
+
+    assert again[0] is first[1]
+    assert not np.array_equal(first[0], first[1])
+
+
+def test_png_round_trip():
+    renderer = SegmentRenderer(scale=1)
+    image = renderer.render([0x3F, 0x06, 0x5B, 0x4F], True, 3)
+    png = encode_png(image, renderer.palette)
+
+    assert png.startswith(b"\x89PNG")
+    assert [kind for kind, _ in _chunks(png)] == [b"IHDR", b"PLTE", b"IDAT", b"IEND"]
+    assert np.array_equal(_decode_png(png), image)
+
+
+def test_lzw_resets_its_table_when_full():
+    data = bytes(np.random.default_rng(0).integers(0, 256, 20000, dtype=np.uint8))
+    packed = lzw_compress(data)
+
+    # Random pixels do not compress, so the table fills and is cleared
+    assert len(packed) > len(data)
+
+
+def _records() -> list[FrameRecord]:
+    start = 1_700_000_000.0
+    records = []
+    for second in range(10):
+        digits = [0x3F, 0x06, 0x5B, [0x3F, 0x06][second >= 5]]
+        records.append(FrameRecord(start + second, "frame", digits, True, 7))
+        records.append(FrameRecord(start + second + 0.5, "frame", digits, False, 7))
+    # Blanked for a millisecond
+    records.append(FrameRecord(start + 10, "frame", [0, 0, 0, 0], False, 7))
+    records.append(FrameRecord(start + 10.001, "frame", digits, False, 7))
+    return records
+
+
+def test_timeline_merges_repeats_and_short_frames():
+    records = _records()
+    states = timeline(records + [records[-1]], speed=2)
+
+    # The 1 ms frame folds into the frame before it, and so do the repeats
+    assert len(states) == 20
+    assert states[0][3] == 0.25
+    assert states[-1][0] == (0x3F, 0x06, 0x5B, 0x06)
+    assert states[-1][3] == pytest.approx(0.25 + 0.0005 + 1.0)
+
+
+def test_export_animations():
+    records = _records()
+    gif = export_animation(records, "gif", scale=1)
+    apng = export_animation(records, "apng", scale=1)
+
+    assert gif.startswith(b"GIF89a") and gif.endswith(b"\x3b")
+    assert gif.count(b"\x21\xf9\x04") == 20
+    chunks = _chunks(apng)
+    assert struct.unpack(">II", dict(chunks)[b"acTL"]) == (20, 0)
+    controls = [data for kind, data in chunks if kind == b"fcTL"]
+    # Colon blinks only store the colon's rectangle
+    width = struct.unpack(">I", controls[1][4:8])[0]
+    assert width < SegmentRenderer(scale=1).width / 4
+    with pytest.raises(ValueError):
+        export_animation([], "gif")
+
+
+def test_cli_export(tmp_path):
+    source = tmp_path / "clock.rec"
+    source.write_bytes(encode_frames(_records()))
+    output = tmp_path / "clock.png"
+
+    result = CliRunner().invoke(cli, ["recording", "export", str(source), str(output)])
+
+    assert result.exit_code == 0, result.output
+    assert "APNG" in result.output
+    assert b"acTL" in output.read_bytes()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_endpoint():
+    server = WebServer()
+    server.hub.publish([0x3F, 0x06, 0x5B, 0x4F], True, 7)
+    async with TestClient(TestServer(server.app)) as client:
+        response = await client.get("/snapshot.png?scale=1")
+        assert response.status == 200
+        assert response.content_type == "image/png"
+        image = _decode_png(await response.read())
+        expected = SegmentRenderer(scale=1).render([0x3F, 0x06, 0x5B, 0x4F], True, 7)
+        assert np.array_equal(image, expected)
+
+        etag = response.headers["ETag"]
+        cached = await client.get("/snapshot.png?scale=1", headers={"If-None-Match": etag})
+        assert cached.status == 304
+
+        server.hub.publish([0, 0, 0, 0], False, 7)
+        changed = await client.get("/snapshot.png?scale=1", headers={"If-None-Match": etag})
+        assert changed.status == 200
+        assert (await client.get("/snapshot.png?scale=99")).status == 400
@@ -0,0 +1,127 @@
+"""Tests for the virtual-time simulation engine."""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import yaml
+from click.testing import CliRunner
+
+from led_kurokku.cli_main import cli
+from led_kurokku.simulation import VirtualTimeEventLoop, decode_text, simulate
+from led_kurokku.tm1637 import TM1637
+
+
+START = datetime(2025, 6, 1, 9, 55)
+
+
+def test_virtual_loop_skips_waiting():
+    loop = VirtualTimeEventLoop()
+    try:
+        loop.run_until_complete(asyncio.sleep(3600))
+        assert loop.time() == 3600
+    finally:
+        loop.close()
+
+
+def test_decode_text():
+    digits = [TM1637.SEGMENTS[c] for c in "12-4"]
+    assert decode_text(digits) == "12-4"
+
+
+def test_simulate_clock_only():
+    result = simulate(
+        {"widgets": [{"widget_type": "clock", "duration": 0}]},
+        start=START,
+        duration=timedelta(minutes=10),
+    )
+
+    texts = [e.text for e in result.timeline if e.widget == "clock" and e.text.strip()]
+    assert texts[0] == "0955"
+    assert texts[-1] == "1004"
+    assert result.widget_time["clock"] == 600
+    assert result.end == START + timedelta(minutes=10)
+
+
+def test_simulate_cron_gated_message():
+    config = {
+        "widgets": [
+            {"widget_type": "clock", "duration": 30},
+            {"widget_type": "message", "message": "HI", "cron": "0 * * * *"},
+        ]
+    }
+    result = simulate(config, start=START, duration=timedelta(minutes=10))
+
+    shown = [e for e in result.timeline if e.widget == "message" and e.text.strip()]
+    assert shown
+    assert all(e.start.minute == 0 for e in shown)
+
+
+def test_simulate_alert_priority_windows():
+    config = {
+        "widgets": [
+            {"widget_type": "clock", "duration": 20},
+            {"widget_type": "alert"},
+        ]
+    }
+    alerts = [
+        {"message": "HEAT", "priority": 10, "display_duration": 2, "at": 0},
+        {"message": "STRM", "priority": 1, "display_duration": 2, "at": "09:57"},
+    ]
+    result = simulate(
+        config, start=START, duration=timedelta(minutes=10), alerts=alerts
+    )
+
+    heat = [e for e in result.timeline if e.text == "HEAT"]
+    storm = [e for e in result.timeline if e.text == "5TRM"]
+    assert heat and all(e.start.minute % 10 == 0 for e in heat)
+    assert storm and storm[0].start >= START + timedelta(minutes=2)
+
+
+def test_simulate_preempting_alert_resumes_widget():
+    config = {
+        "widgets": [
+            {"widget_type": "clock", "duration": 30},
+            {"widget_type": "alert"},
+            {"widget_type": "message", "message": "HI", "cron": "*/15 * * * *"},
+        ]
+    }
+    alerts = [
+        {"message": "HEAT", "priority": 10, "at": "01:00", "ttl": 90, "display_duration": 3.3},
+        {"message": "STRM", "priority": 0, "at": "01:07:31", "ttl": 90, "display_duration": 3.3},
+    ]
+    start = datetime(2025, 6, 1)
+    result = simulate(config, start=start, duration=timedelta(hours=4), alerts=alerts)
+
+    assert result.end == start + timedelta(hours=4)
+    assert result.timeline[-1].start > start + timedelta(hours=3, minutes=59)
+    # The storm interrupts the clock, which then shows the time again
+    index = next(i for i, e in enumerate(result.timeline) if e.text == "5TRM")
+    storm, resumed = result.timeline[index : index + 2]
+    assert storm.start == start + timedelta(hours=1, minutes=7, seconds=31)
+    assert storm.widget == resumed.widget == "clock"
+    assert resumed.text == "0107"
+
+def test_simulate_cli_json(tmp_path):
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text(yaml.dump({"widgets": [{"widget_type": "clock"}]}))
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        [
+            "simulate",
+            str(config_file),
+            "--start",
+            START.isoformat(),
+            "--hours",
+            "0.1",
+            "--format",
+            "json",
+        ],
+    )
+
+    assert result.exit_code == 0
+    data = json.loads(result.output)
+    assert data["start"] == START.isoformat()
+    assert data["timeline"][0]["widget"] == "clock"
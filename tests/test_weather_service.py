@@ -3,7 +3,7 @@ import pytest
 import asyncio
 from datetime import datetime, time
 from unittest.mock import patch, MagicMock, AsyncMock
-from fakeredis import FakeAsyncRedis
+from fakeredis import FakeAsyncRedis, FakeServer
 
 from led_kurokku.cli.models.instance import KurokkuInstance, KurokkuRegistry
 from led_kurokku.cli.models.weather import WeatherLocation, WeatherConfig
@@ -122,7 +122,9 @@ class TestWeatherService:
 
         # Check that update_brightness_settings was called
         assert mock_update_brightness.call_count == len(self.registry.instances)
-        mock_update_brightness.assert_called_with(mock_client, sun_data)
+        mock_update_brightness.assert_called_with(
+            mock_client, sun_data, self.instance2.key_namespace()
+        )
 
     @pytest.mark.asyncio
     @patch(
@@ -244,6 +246,39 @@ class TestWeatherService:
             # Restore the original init method
             FakeAsyncRedis.__init__ = original_init
 
+    @pytest.mark.asyncio
+    @patch("led_kurokku.cli.services.weather_service.process_noaa_alerts")
+    @patch("led_kurokku.cli.services.weather_service.get_temperature_data")
+    async def test_clocks_sharing_a_redis(self, mock_get_temp, mock_process_alerts):
+        """Namespaced clocks on one Redis share temperatures but not alerts."""
+        mock_get_temp.return_value = ("72*F", {}, None)
+        mock_process_alerts.return_value = [{"message": "Flood Warning", "ttl": 3600}]
+        server = FakeServer()
+        clients = []
+
+        async def connect(instance):
+            clients.append(FakeAsyncRedis(server=server, decode_responses=True))
+            return clients[-1]
+
+        service = WeatherService(self.config)
+        service.registry = KurokkuRegistry(
+            instances=[
+                KurokkuInstance(name="a", host="shared", namespace="kitchen"),
+                KurokkuInstance(name="b", host="shared", namespace="hall"),
+            ]
+        )
+        with patch.object(service, "connect_to_instance", connect):
+            await service.update_temperature_for_location(self.location2)
+            await service.update_alerts_for_location(self.location2)
+
+        client = FakeAsyncRedis(server=server, decode_responses=True)
+        assert await client.get("kurokku:weather:temp:san_francisco") == "72*F"
+        assert sorted(await client.keys("kurokku:*:alert:*")) == [
+            "kurokku:hall:alert:weather:san_francisco:0",
+            "kurokku:kitchen:alert:weather:san_francisco:0",
+        ]
+        assert await client.keys("kurokku:alert:*") == []
+
     # @pytest.mark.asyncio
     # async def test_start_service(self):
     #     """Test just starting the service (simplified test to avoid mocking async tasks)."""
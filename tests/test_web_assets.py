@@ -0,0 +1,77 @@
+"""Tests for the in-memory web asset cache."""
+
+import gzip
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from led_kurokku.web_assets import AssetCache
+from led_kurokku.web_server import WebServer
+
+PAGE = "<html><body>" + "kurokku " * 100 + "</body></html>"
+
+
+def _app(cache: AssetCache) -> web.Application:
+    app = web.Application()
+    app.router.add_get("/static/{path:.*}", cache.handle_static)
+    return app
+
+
+@pytest.mark.asyncio
+async def test_index_is_compressed_and_revalidated():
+    server = WebServer()
+    async with TestClient(TestServer(server.app)) as client:
+        response = await client.get("/", headers={"Accept-Encoding": "gzip"})
+        body = await response.read()
+        etag = response.headers["ETag"]
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["Vary"] == "Accept-Encoding"
+        assert b"<html" in body  # the client transparently decompresses
+
+        response = await client.get("/", headers={"If-None-Match": etag})
+        assert response.status == 304
+        assert await response.read() == b""
+
+
+@pytest.mark.asyncio
+async def test_static_files_are_served_from_memory(tmp_path):
+    (tmp_path / "page.html").write_text(PAGE)
+    (tmp_path / "tiny.txt").write_text("hi")
+    cache = AssetCache()
+    cache.add_directory("/static", tmp_path)
+    (tmp_path / "page.html").write_text("changed on disk")
+
+    async with TestClient(TestServer(_app(cache)), auto_decompress=False) as client:
+        response = await client.get("/static/page.html", headers={"Accept-Encoding": "gzip"})
+        assert gzip.decompress(await response.read()).decode() == PAGE
+
+        response = await client.get("/static/tiny.txt", headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in response.headers
+        assert await response.text() == "hi"
+
+        response = await client.get("/static/../etc/passwd")
+        assert response.status == 404
+
+
+@pytest.mark.asyncio
+async def test_reload_mode_picks_up_changes(tmp_path):
+    page = tmp_path / "page.html"
+    page.write_text(PAGE)
+    cache = AssetCache(reload=True)
+    cache.add_directory("/static", tmp_path)
+
+    async with TestClient(TestServer(_app(cache))) as client:
+        first = await client.get("/static/page.html")
+        etag = first.headers["ETag"]
+
+        page.write_text("<p>changed</p>")  # size differs, so it is reloaded
+        response = await client.get("/static/page.html", headers={"If-None-Match": etag})
+        assert response.status == 200
+        assert await response.text() == "<p>changed</p>"
+
+        (tmp_path / "new.js").write_text("console.log(1);")
+        response = await client.get("/static/new.js")
+        assert response.status == 200
+        assert response.content_type == "text/javascript"
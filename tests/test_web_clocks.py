@@ -0,0 +1,137 @@
+"""Tests for hosting many virtual clocks in one web server."""
+
+import asyncio
+import json
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from fakeredis import FakeAsyncRedis, FakeServer
+from pydantic import ValidationError
+
+from led_kurokku.namespace import DEFAULT_NAMESPACE, KeyNamespace
+from led_kurokku.web_clocks import ClockHost, ClocksConfig, RedisPools, VirtualClock, load_clocks
+
+
+def _config(message: str) -> str:
+    return json.dumps(
+        {"widgets": [{"widget_type": "message", "duration": 30, "message": message}]}
+    )
+
+
+def test_load_clocks(tmp_path, monkeypatch):
+    monkeypatch.setenv("REDIS_HOST", "redis.local")
+    path = tmp_path / "clocks.yaml"
+    path.write_text(
+        "clocks:\n"
+        "  - name: lobby\n"
+        "    db: 1\n"
+        "  - name: office\n"
+        "    host: other\n"
+        "    display_type: ht16k33\n"
+        "  - name: kitchen\n"
+        "    namespace: kitchen\n"
+    )
+    config = load_clocks(path)
+
+    assert config.redis.host == "redis.local"
+    assert [c.name for c in config.clocks] == ["lobby", "office", "kitchen"]
+    assert config.clocks[1].display_type == "ht16k33"
+    assert config.clocks[0].key_namespace() == DEFAULT_NAMESPACE
+    assert config.clocks[2].key_namespace() == KeyNamespace("kitchen")
+
+    with pytest.raises(ValidationError):
+        ClocksConfig.model_validate({"clocks": [{"name": "a"}, {"name": "a"}]})
+    with pytest.raises(ValidationError):
+        ClocksConfig.model_validate({"clocks": [{"name": "../a"}]})
+    with pytest.raises(ValidationError):
+        ClocksConfig.model_validate({"clocks": [{"name": "a", "namespace": "config"}]})
+
+
+@pytest.mark.asyncio
+async def test_pools_are_shared_per_endpoint():
+    pools = RedisPools()
+    first = pools.client("localhost", 6379, 1)
+    second = pools.client("localhost", 6379, 1)
+    other = pools.client("localhost", 6379, 2)
+
+    assert first.connection_pool is second.connection_pool
+    assert other.connection_pool is not first.connection_pool
+    assert len(pools) == 2
+    await pools.aclose()
+
+
+async def _first_frame(ws) -> dict:
+    async with asyncio.timeout(5):
+        while True:
+            update = json.loads(await ws.receive_str())
+            if update["digits"] != [0, 0, 0, 0]:
+                return update
+
+
+@pytest.mark.asyncio
+async def test_clocks_run_independently_on_their_own_databases():
+    server = FakeServer()
+    clients = {name: FakeAsyncRedis(server=server, db=db) for name, db in (("a", 1), ("b", 2))}
+    await clients["a"].set("kurokku:config", _config("AAAA"))
+    await clients["b"].set("kurokku:config", _config("BBBB"))
+
+    host = ClockHost()
+    for name, client in clients.items():
+        host.add_clock(VirtualClock(name, client))
+    clocks_task = asyncio.create_task(host.run_clocks())
+
+    try:
+        async with TestClient(TestServer(host.app)) as client:
+            response = await client.get("/clock/a")
+            assert response.status == 200
+            assert "<html" in await response.text()
+            assert (await client.get("/clock/missing")).status == 404
+            assert (await client.get("/ws/missing")).status == 404
+
+            async with client.ws_connect("/ws/a") as ws_a, client.ws_connect("/ws/b") as ws_b:
+                first_a = await _first_frame(ws_a)
+                first_b = await _first_frame(ws_b)
+                assert first_a["digits"] != first_b["digits"]
+
+                status = await (await client.get("/clocks")).json()
+                assert status["a"]["viewers"] == 1
+                assert status["b"]["running"] is True
+
+                # A config change is picked up from b's own database
+                await clients["b"].set("kurokku:config", _config("AAAA"))
+                async with asyncio.timeout(5):
+                    while host.clocks["b"].hub.digits != first_a["digits"]:
+                        await asyncio.sleep(0.05)
+    finally:
+        clocks_task.cancel()
+        await asyncio.gather(clocks_task, return_exceptions=True)
+        for redis_client in clients.values():
+            await redis_client.aclose()
+
+    assert not any(clock.running for clock in host.clocks.values())
+
+
+@pytest.mark.asyncio
+async def test_namespaced_clocks_share_a_database():
+    redis_client = FakeAsyncRedis(server=FakeServer())
+    host = ClockHost()
+    for name, message in (("kitchen", "AAAA"), ("hall", "BBBB")):
+        keys = KeyNamespace(name)
+        await redis_client.set(keys.config, _config(message))
+        host.add_clock(VirtualClock(name, redis_client, keys=keys))
+    clocks_task = asyncio.create_task(host.run_clocks())
+    try:
+        async with asyncio.timeout(5):
+            while any(c.hub.digits == [0, 0, 0, 0] for c in host.clocks.values()):
+                await asyncio.sleep(0.05)
+            hall = host.clocks["hall"].hub.digits
+            assert host.clocks["kitchen"].hub.digits != hall
+
+            # Only the kitchen's own config key changes what it shows
+            await redis_client.set(KeyNamespace("kitchen").config, _config("BBBB"))
+            while host.clocks["kitchen"].hub.digits != hall:
+                await asyncio.sleep(0.05)
+    finally:
+        clocks_task.cancel()
+        await asyncio.gather(clocks_task, return_exceptions=True)
+        await redis_client.aclose()
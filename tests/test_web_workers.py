@@ -0,0 +1,57 @@
+"""Tests for serving viewers from worker processes sharing one port."""
+
+import json
+import logging
+import socket
+import time
+
+import aiohttp
+import pytest
+
+from led_kurokku.drivers.framebuffer import FrameBufferDriver
+from led_kurokku.web_workers import REUSE_PORT_AVAILABLE, WorkerPool
+
+pytestmark = pytest.mark.skipif(not REUSE_PORT_AVAILABLE, reason="needs SO_REUSEPORT")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.mark.asyncio
+async def test_workers_serve_engine_frames_and_restart(tmp_path):
+    driver = FrameBufferDriver(str(tmp_path / "web.fb"))
+    port = _free_port()
+    pool = WorkerPool("127.0.0.1", port, driver.path, 2, log_level=logging.WARNING)
+    pool.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{port}/") as response:
+                assert response.status == 200
+            async with session.ws_connect(f"http://127.0.0.1:{port}/ws") as ws:
+                assert json.loads(await ws.receive_str(timeout=10))["digits"] == [0, 0, 0, 0]
+                driver.display([1, 2, 3, 4], True)
+                update = json.loads(await ws.receive_str(timeout=10))
+                assert update == {"brightness": 2, "digits": [1, 2, 3, 4], "colon": True}
+
+        pool.processes[0].terminate()
+        pool.processes[0].join()
+        pool._started[0] = float("-inf")
+        assert pool.check() == 2
+        assert pool.restarts == 1
+
+        # A worker exiting on startup is given up on
+        pool.processes[1].terminate()
+        pool.processes[1].join()
+        pool._started[1] = time.monotonic()
+        assert pool.check() == 1
+        pool._started[1] = float("-inf")
+        assert pool.check() == 1
+        assert (pool.restarts, pool.failed) == (1, {1})
+    finally:
+        pool.stop()
+        driver.close()
+
+    assert not any(process.is_alive() for process in pool.processes)
@@ -0,0 +1,103 @@
+"""Tests for the binary websocket delta protocol."""
+
+import asyncio
+import json
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from led_kurokku.ht16k33.websocket import HT16K33WebSocketDriver
+from led_kurokku.tm1637.websocket import WebSocketDriver
+from led_kurokku.web_server import WebServer
+from led_kurokku.websocket_protocol import decode_frame, encode_frame
+
+
+def test_colon_toggle_is_five_bytes():
+    frame = encode_frame(7, [1, 2, 3, 4], False, 2, previous=[1, 2, 3, 4], previous_brightness=2)
+
+    assert len(frame) == 5
+    state = decode_frame(frame, {"digits": [1, 2, 3, 4], "brightness": 2})
+    assert state["sequence"] == 7
+    assert state["colon"] is False
+    assert state["changed"] == []
+
+
+def test_keyframe_and_delta_round_trip():
+    keyframe = encode_frame(1, [0x3F, 0x06, 0x5B, 0x4F], True, 3, ht16k33=True)
+    state = decode_frame(keyframe)
+    delta = encode_frame(
+        2,
+        [0x3F, 0x06, 0x5B, 0x1234],
+        True,
+        5,
+        previous=[0x3F, 0x06, 0x5B, 0x4F],
+        previous_brightness=3,
+        ht16k33=True,
+    )
+    state = decode_frame(delta, state)
+
+    assert state["digits"] == [0x3F, 0x06, 0x5B, 0x1234]
+    assert state["brightness"] == 5
+    assert state["changed"] == [3]
+    assert state["display_type"] == "ht16k33"
+    with pytest.raises(ValueError):
+        decode_frame(delta)
+
+
+def test_driver_shares_one_encoded_frame_and_resyncs_stale_clients():
+    driver = WebSocketDriver()
+    fast = asyncio.Queue()
+    slow = asyncio.Queue(maxsize=1)
+    legacy = asyncio.Queue()
+    driver.add_client(fast, binary=True)
+    driver.add_client(slow, binary=True)
+    driver.add_client(legacy)
+
+    driver.display([1, 2, 3, 4], colon=True)  # slow client's queue is full
+    slow.get_nowait()
+    driver.display([1, 2, 3, 5], colon=True)
+
+    fast_frames = [fast.get_nowait() for _ in range(fast.qsize())]
+    assert fast_frames[1] is not fast_frames[0]
+    resync = decode_frame(slow.get_nowait())
+    assert resync["sequence"] == 2
+    assert resync["digits"] == [1, 2, 3, 5]
+
+    state = None
+    for frame in fast_frames:
+        state = decode_frame(frame, state)
+    assert state == resync | {"changed": [3]}
+
+    legacy.get_nowait()
+    assert json.loads(legacy.get_nowait()) == {
+        "brightness": 2,
+        "digits": [1, 2, 3, 4],
+        "colon": True,
+    }
+
+
+def test_ht16k33_json_keeps_display_type():
+    driver = HT16K33WebSocketDriver()
+    queue = asyncio.Queue()
+    driver.add_client(queue)
+
+    assert json.loads(queue.get_nowait())["display_type"] == "ht16k33"
+    driver.add_client(binary_queue := asyncio.Queue(), binary=True)
+    assert decode_frame(binary_queue.get_nowait())["display_type"] == "ht16k33"
+
+
+@pytest.mark.asyncio
+async def test_websocket_negotiates_binary_protocol():
+    server = WebServer()
+    async with TestClient(TestServer(server.app)) as client:
+        binary_ws = await client.ws_connect("/ws?proto=bin")
+        json_ws = await client.ws_connect("/ws")
+
+        assert decode_frame(await binary_ws.receive_bytes())["digits"] == [0, 0, 0, 0]
+        assert json.loads(await json_ws.receive_str())["digits"] == [0, 0, 0, 0]
+
+        await binary_ws.send_json({"request": "keyframe"})
+        assert decode_frame(await binary_ws.receive_bytes())["sequence"] == 0
+
+        await binary_ws.close()
+        await json_ws.close()